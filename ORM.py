@@ -6,8 +6,8 @@
 
 from datetime import datetime, time
 from sqlalchemy import (
-    Column, Integer, String, Time, ARRAY, Text, Boolean, ForeignKey, 
-    TIMESTAMP, UniqueConstraint, Date, Table, Index
+    Column, Integer, String, Time, ARRAY, JSON, Text, Boolean, ForeignKey, 
+    TIMESTAMP, UniqueConstraint, Date, Table, Index, text
 )
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -35,7 +35,8 @@ class Doctor(Base):
     qualification = Column(String(100))
     working_start = Column(Time, default=time(10, 0))
     working_end = Column(Time, default=time(21, 0))
-    working_days = Column(ARRAY(Text), default=['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'])
+    # JSON stand-in lets tests run the models on SQLite
+    working_days = Column(ARRAY(Text).with_variant(JSON, 'sqlite'), default=['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'])
     is_active = Column(Boolean, default=True)
     consultation_fee = Column(Integer, default=500)  # Fee in INR
     experience_years = Column(Integer, default=0)
@@ -88,8 +89,11 @@ class Appointment(Base):
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
     updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Only scheduled/confirmed bookings hold a slot, so a cancelled slot can be booked again
     __table_args__ = (
-        UniqueConstraint("doctor_id", "appointment_date", "start_time", name="unique_slot"),
+        Index("unique_slot", "doctor_id", "appointment_date", "start_time", unique=True,
+              postgresql_where=text("status IN ('scheduled', 'confirmed')"),
+              sqlite_where=text("status IN ('scheduled', 'confirmed')")),
         Index('idx_appointment_date_status', 'appointment_date', 'status'),
         Index('idx_appointment_patient_date', 'patient_id', 'appointment_date'),
     )
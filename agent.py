@@ -13,8 +13,11 @@ from special_function_tools import (
     register_patient,
     find_patient_enhanced,
     recommend_doctor,
+    find_doctors_for_symptoms,
     get_available_slots_enhanced,
+    find_earliest_slots,
     book_appointment_enhanced,
+    get_my_appointments,
     reschedule_appointment_enhanced,
     cancel_appointment_enhanced,
     get_appointment_analytics,
@@ -53,8 +56,11 @@ class ApolloAssistAgent(agents.Agent):
                 agents.function_tool(register_patient),
                 agents.function_tool(find_patient_enhanced),
                 agents.function_tool(recommend_doctor),
+                agents.function_tool(find_doctors_for_symptoms),
                 agents.function_tool(get_available_slots_enhanced),
+                agents.function_tool(find_earliest_slots),
                 agents.function_tool(book_appointment_enhanced),
+                agents.function_tool(get_my_appointments),
                 agents.function_tool(reschedule_appointment_enhanced),
                 agents.function_tool(cancel_appointment_enhanced),
                 agents.function_tool(get_appointment_analytics),
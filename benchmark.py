@@ -0,0 +1,177 @@
+# benchmark.py
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.csv_manager import CSVManager, PATIENT_SCHEMA
+from utils.storage_backend import BACKENDS, StorageBackend, create_backend
+from utils.table_snapshot import FEATHER_AVAILABLE, read_table, write_snapshot
+
+SPECIALIZATIONS = ['General Dentist', 'Endodontist', 'Orthodontics', 'Pedodontist', 'Periodontist']
+SLOT_TIMES = [f"{9 + n // 2:02d}:{30 * (n % 2):02d}" for n in range(18)]
+
+
+def make_patients(count: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'patient_id': range(1, count + 1),
+        'name': [f"Patient {i}" for i in range(count)],
+        'phone': [f"9{i:09d}" for i in range(count)],
+        'age': [20 + i % 60 for i in range(count)],
+        'location': ['Chennai'] * count,
+        'first_visit': [i % 3 == 0 for i in range(count)],
+        'preferred_language': ['en', 'ta', 'hi'] * (count // 3) + ['en'] * (count % 3),
+    })
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark_startup(patients: int, repeat: int):
+    """Time loading a patients table from CSV and from the Feather snapshot"""
+    with tempfile.TemporaryDirectory() as folder:
+        csv_path = os.path.join(folder, 'patients.csv')
+        frame = make_patients(patients)
+        frame.to_csv(csv_path, index=False)
+        if FEATHER_AVAILABLE:
+            write_snapshot(frame, csv_path, PATIENT_SCHEMA)
+
+        print(f"Startup with {patients:,} patients (best of {repeat})")
+        results = {'csv': best_of(repeat, lambda: read_table(csv_path, PATIENT_SCHEMA, use_snapshot=False))}
+        if FEATHER_AVAILABLE:
+            results['feather'] = best_of(repeat, lambda: read_table(csv_path, PATIENT_SCHEMA))
+        else:
+            print("  pyarrow not installed, skipping the Feather snapshot")
+
+        for binary in ([False, True] if FEATHER_AVAILABLE else [False]):
+            def construct():
+                CSVManager(data_folder=folder, compact_interval=3600, binary_snapshots=binary).close()
+            results[f"CSVManager ({'feather' if binary else 'csv'})"] = best_of(repeat, construct)
+
+        for name, seconds in results.items():
+            print(f"  {name:<24} {seconds * 1000:9.1f} ms")
+
+
+# --- Storage backend workloads ---
+def backend_options(name: str, folder: str) -> Dict:
+    """Options for a throwaway instance of a backend stored under folder"""
+    if name == 'csv':
+        return {'data_folder': folder, 'compact_interval': 3600}
+    if name == 'sqlite':
+        return {'db_path': os.path.join(folder, 'apollo.db')}
+    if name == 'postgres':
+        # Point BENCHMARK_DATABASE_URL at an empty scratch database; SQLite stands in otherwise
+        return {'database_url': os.environ.get('BENCHMARK_DATABASE_URL', f"sqlite:///{os.path.join(folder, 'orm.db')}")}
+    raise ValueError(f"No benchmark setup for the '{name}' backend")
+
+
+def latency_summary(timings: List[float], elapsed: float) -> Dict[str, float]:
+    samples = np.array(timings)
+    return {
+        'ops': len(samples),
+        'ops_per_sec': len(samples) / elapsed if elapsed else float('inf'),
+        'p50_ms': float(np.percentile(samples, 50) * 1000),
+        'p99_ms': float(np.percentile(samples, 99) * 1000),
+    }
+
+
+def timed(calls: List[Callable[[], object]], threads: int = 1) -> Dict[str, float]:
+    """Latency of each call and overall throughput, with calls spread over `threads` workers"""
+    def measure(call):
+        start = time.perf_counter()
+        call()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            timings = list(pool.map(measure, calls))
+    else:
+        timings = [measure(call) for call in calls]
+    return latency_summary(timings, time.perf_counter() - start)
+
+
+def run_workloads(backend: StorageBackend, operations: int, doctors: int = 20, patients: int = 500,
+                  threads: int = 1) -> Dict[str, Dict]:
+    """Booking, search and analytics workloads, identical for every backend"""
+    doctor_rows = [backend.create_doctor({
+        'name': f"Dr. Bench {i}", 'qualification': 'BDS',
+        'specializations': ','.join(SPECIALIZATIONS[j % len(SPECIALIZATIONS)] for j in (i, i + 1)),
+    }) for i in range(doctors)]
+    patient_rows = [backend.create_patient({'name': f"Patient {i}", 'phone': f"9{i:09d}"}) for i in range(patients)]
+
+    # Distinct slots over the last few weeks, so the analytics window sees the bookings
+    first_day = date.today() - timedelta(days=20)
+    slots = [(doctor.doctor_id, (first_day + timedelta(days=day)).isoformat(), start_time)
+             for day in range(21) for start_time in SLOT_TIMES for doctor in doctor_rows]
+    if operations > len(slots):
+        raise ValueError(f"At most {len(slots)} booking operations fit in the benchmark calendar")
+
+    def book(i):
+        doctor_id, appointment_date, start_time = slots[i]
+        return lambda: backend.create_appointment({
+            'patient_id': patient_rows[i % patients].patient_id, 'doctor_id': doctor_id,
+            'appointment_date': appointment_date, 'start_time': start_time, 'end_time': '',
+        })
+
+    def search(i):
+        doctor_id, appointment_date, _ = slots[i]
+        return [
+            lambda: backend.find_patient_by_phone(f"9{i % patients:09d}"),
+            lambda: backend.search_patients(f"Patient {i % patients}"),
+            lambda: backend.get_doctors_by_specialization(SPECIALIZATIONS[i % len(SPECIALIZATIONS)]),
+            lambda: backend.get_appointments_by_doctor_date(doctor_id, appointment_date),
+        ][i % 4]
+
+    return {
+        'booking': timed([book(i) for i in range(operations)], threads),
+        'search': timed([search(i) for i in range(operations)], threads),
+        'analytics': timed([lambda: backend.get_booking_analytics(30)] * max(operations // 100, 5), threads),
+    }
+
+
+def benchmark_backends(names: List[str], operations: int, threads: int = 1) -> Dict[str, Dict[str, Dict]]:
+    """Run the workloads against a fresh instance of each backend and print ops/sec and latency"""
+    results = {}
+    print(f"Storage backends, {operations:,} operations per workload on {threads} thread(s)")
+    print(f"  {'backend':<8} {'workload':<10} {'ops/sec':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for name in names:
+        with tempfile.TemporaryDirectory() as folder:
+            backend = create_backend(name, **backend_options(name, folder))
+            try:
+                results[name] = run_workloads(backend, operations, threads=threads)
+            finally:
+                backend.close()
+        for workload, summary in results[name].items():
+            print(f"  {name:<8} {workload:<10} {summary['ops_per_sec']:>10,.0f} "
+                  f"{summary['p50_ms']:>9.3f} {summary['p99_ms']:>9.3f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Storage benchmarks")
+    parser.add_argument('suite', nargs='?', choices=['startup', 'backends'], default='startup')
+    parser.add_argument('--patients', type=int, default=200_000, help="startup: rows in the patients table")
+    parser.add_argument('--repeat', type=int, default=3, help="startup: runs per measurement")
+    parser.add_argument('--backends', nargs='+', default=['csv', 'sqlite'], choices=sorted(BACKENDS),
+                        help="backends: which storage backends to compare")
+    parser.add_argument('--operations', type=int, default=2000, help="backends: operations per workload")
+    parser.add_argument('--threads', type=int, default=1, help="backends: concurrent callers")
+    args = parser.parse_args()
+    if args.suite == 'backends':
+        benchmark_backends(args.backends, args.operations, args.threads)
+    else:
+        benchmark_startup(args.patients, args.repeat)
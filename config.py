@@ -11,6 +11,7 @@ class Settings(BaseSettings):
     HOSP_DB_HOST:str
     HOSP_DB_PORT:str
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: str | None = None  # asyncpg URL for the agent tools; derived from DATABASE_URL if unset
     LIVEKIT_URL: str
     LIVEKIT_API_KEY: str
     LIVEKIT_API_SECRET: str
@@ -38,6 +39,28 @@ class Settings(BaseSettings):
     MAX_BOOKING_ATTEMPTS: int = 5
     RATE_LIMIT_WINDOW: int = 300  # 5 minutes
 
+    # Storage backend: csv | sqlite | postgres (SQLAlchemy, DATABASE_URL) | sheets (see utils/storage_backend.py)
+    STORAGE_BACKEND: str = "csv"
+
+    # CSV persistence: sync | batched | interval (see utils/csv_manager.py)
+    CSV_DURABILITY_MODE: str = "batched"
+    CSV_FLUSH_INTERVAL: float = 0.5  # seconds; bounds data loss in batched/interval modes
+    CSV_FLUSH_THRESHOLD: int = 100  # pending writes that trigger an early flush
+    CSV_COMPACT_INTERVAL: float = 60.0
+    CSV_BINARY_SNAPSHOTS: bool = True  # Feather copies for fast startup; needs pyarrow
+    CSV_PHONETIC_SEARCH: bool = True  # patient name search also matches spellings that sound alike
+    SQLITE_DB_PATH: str = "data/apollo.db"  # utils/sqlite_manager.py; fill with migrate_csv_to_sqlite.py
+
+    # Bounded pool for blocking storage work awaited by the agent tools (utils/blocking_executor.py)
+    TOOL_EXECUTOR_WORKERS: int = 8
+    TOOL_EXECUTOR_QUEUE: int = 32  # calls allowed to wait for a worker before tools answer "please hold"
+    TOOL_CALL_TIMEOUT: float = 8.0  # seconds
+    # Seconds a cached day of the availability calendar is trusted (utils/availability_calendar.py);
+    # bounds how long bookings made by other worker processes can go unseen
+    AVAILABILITY_CALENDAR_TTL: float = 60.0
+    # Seconds a patient's cached visit history is trusted (utils/visit_history.py)
+    VISIT_HISTORY_TTL: float = 300.0
+
     class Config:
         env_file = ".env"
         extra = Extra.allow
@@ -717,6 +717,9 @@ Response: "நம்ம hospital காலை 8 மணியிலிருந
 2. `get_available_slots_enhanced` - Time preferences உடன்  
 3. `book_appointment_enhanced` - SMS confirmation உடன்
 4. `recommend_doctor` - Patient history-ஐ கருத்தில் கொண்டு
+5. `find_earliest_slots` - "அடுத்த free slot எப்போ?" கேட்டா, எல்லா doctors-லயும் earliest slot
+6. `get_my_appointments` - Reschedule/cancel-க்கு appointment_id தெரியலைன்னா, patient-ஓட upcoming appointments
+7. `find_doctors_for_symptoms` - Patient எந்த specialist வேணும்னு சொல்லாம symptoms சொன்னா ("பல் வலி", "ஈறு வீக்கம்"), சரியான specialization-உம் doctors-உம்
 
 **Error Handling:**
 ```tamil
@@ -2,11 +2,11 @@
 import os
 import sys
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import ProgrammingError
 from datetime import date, timedelta
 from ORM import Base, Doctor, Patient, Appointment, Specialization, SystemSettings
 from scheduler import AppointmentScheduler
+from utils.sqlalchemy_manager import SQLAlchemyManager
 from utils.logger import setup_logging
 from config import settings
 
@@ -136,7 +136,7 @@ def create_test_patient(scheduler):
         logger.error(f"Failed to create test patient: {e}")
         return None
 
-def run_basic_tests(scheduler, session):
+def run_basic_tests(scheduler):
     """Run basic functionality tests"""
     logger.info("Running basic system tests...")
     
@@ -193,28 +193,20 @@ def main():
         
         create_database_if_not_exists(**db_config)
         
-        # Create engine with connection pooling
-        engine = create_engine(
-            settings.DATABASE_URL, 
-            echo=False,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,
-            pool_recycle=3600
-        )
-        SessionLocal = sessionmaker(bind=engine)
-        Base.metadata.drop_all(engine)
+        # One engine and pool, shared by the scheduler and the setup below
+        storage = SQLAlchemyManager(settings.DATABASE_URL, create_tables=False)
+        Base.metadata.drop_all(storage.engine)
         # Create all tables
-        Base.metadata.create_all(engine)
+        Base.metadata.create_all(storage.engine)
         logger.info("Database tables created/verified")
         
-        # Initialize session and scheduler
-        session = SessionLocal()
-        scheduler = AppointmentScheduler(session)
+        # Initialize scheduler
+        scheduler = AppointmentScheduler(storage=storage)
         
         try:
             # Initialize system settings
-            initialize_system_settings(session)
+            with storage.session_scope() as session:
+                initialize_system_settings(session)
             
             # Seed doctors from Excel if file exists
             doctors_xlsx = "doctors.xlsx"
@@ -223,20 +215,22 @@ def main():
                 scheduler.seed_doctors_from_excel(doctors_xlsx)
             else:
                 logger.info(f"Excel file {doctors_xlsx} not found, using sample data")
-                seed_sample_data(session, scheduler)
+                with storage.session_scope() as session:
+                    seed_sample_data(session, scheduler)
             
             # Create test patient
             test_patient = create_test_patient(scheduler)
             
             # Run basic system tests
-            if run_basic_tests(scheduler, session):
+            if run_basic_tests(scheduler):
                 logger.info("🎉 Apollo Assist system initialized successfully!")
                 logger.info("System is ready to handle appointment bookings.")
                 
                 # Print system summary
-                doctor_count = session.query(Doctor).filter_by(is_active=True).count()
-                patient_count = session.query(Patient).filter_by(is_active=True).count()
-                appointment_count = session.query(Appointment).count()
+                with storage.session_scope() as session:
+                    doctor_count = session.query(Doctor).filter_by(is_active=True).count()
+                    patient_count = session.query(Patient).filter_by(is_active=True).count()
+                    appointment_count = session.query(Appointment).count()
                 
                 logger.info(f"""
 System Summary:
@@ -252,7 +246,7 @@ System Summary:
                 sys.exit(1)
                 
         finally:
-            session.close()
+            storage.close()
             
     except KeyboardInterrupt:
         logger.info("Setup interrupted by user")
@@ -0,0 +1,51 @@
+# migrate_csv_to_sqlite.py
+
+import argparse
+
+from utils.csv_manager import CSVManager
+from utils.sqlite_manager import SQLiteManager, WRITABLE_COLUMNS
+from utils.table_schema import TableSchema
+from utils.logger import logger
+
+# Parents first, so appointments can refer to migrated doctors and patients
+TABLES = (('doctors', 'doctors_df'), ('patients', 'patients_df'), ('appointments', 'appointments_df'))
+
+
+def migrate(data_folder: str = 'data', db_path: str = 'data/apollo.db') -> dict:
+    """Copy every CSV table into the SQLite database, keeping ids; safe to re-run"""
+    source = CSVManager(data_folder=data_folder)
+    target = SQLiteManager(db_path)
+    summary = {}
+    try:
+        for table, frame_name in TABLES:
+            df = getattr(source, frame_name)
+            columns = [column for column in df.columns if column in WRITABLE_COLUMNS[table]]
+            # Plain Python values: ISO date strings and None for missing cells
+            records = TableSchema.restore(df[columns]).to_dict('records')
+            inserted = target.import_rows(table, records)
+            skipped = len(records) - inserted
+            if skipped:
+                logger.warning(f"{table}: skipped {skipped} rows already present or conflicting with a booked slot")
+            # Ids the CSV allocator already leased must not be handed out again
+            target.advance_sequence(table, source.id_allocators[table].peek() - 1)
+            summary[table] = inserted
+            logger.info(f"Migrated {inserted} of {len(records)} {table} rows to {db_path}")
+    finally:
+        source.close()
+        target.close()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the CSV tables in data/ to the SQLite backend")
+    parser.add_argument('--data-folder', default='data')
+    parser.add_argument('--db-path', default=None, help="defaults to SQLITE_DB_PATH from the settings")
+    args = parser.parse_args()
+    db_path = args.db_path
+    if db_path is None:
+        try:
+            from config import settings
+            db_path = settings.SQLITE_DB_PATH
+        except Exception:
+            db_path = 'data/apollo.db'
+    migrate(args.data_folder, db_path)
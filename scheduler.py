@@ -880,7 +880,8 @@
 # scheduler.py
 
 from datetime import datetime, timedelta, date as date_class, time as time_class
-from typing import List, Optional, Dict, Tuple
+from typing import Iterable, List, Optional, Dict, Tuple, Union
+from contextlib import contextmanager
 import re
 
 import pandas as pd
@@ -897,8 +898,19 @@ from utils.exceptions import *
 # from utils.cache_manager import cache_manager  # Commented out Redis dependency
 from utils.security import security_manager
 from utils.notifications import notification_manager
+from utils.blocking_executor import blocking_executor
+from utils.slot_bitmap import SlotBitmap, slot_grid, available_slots
+from utils.interval_index import appointment_span
+from utils.availability_calendar import AvailabilityCalendar, DayAvailability, calendar_from_settings
+from utils.doctor_ranking import DoctorRanking, rank_from_days
+from utils.visit_history import PatientVisits, VisitHistory, visit_history_from_settings
+from utils.slot_search import (
+    SlotMatch, SlotSearch, earliest_slots, earliest_slots_async, parse_time_window, parse_weekdays,
+)
+from utils.date_parser import MAX_ADVANCE_DAYS
 # from utils.google_sheets_manager import sheets_manager, Patient, Doctor, Appointment
-from utils.csv_manager import csv_manager,Patient,Doctor,Appointment
+from utils.storage_backend import StorageBackend, AsyncStorageBackend, AsyncBackendAdapter, get_backend, get_async_backend
+from utils.storage_models import Patient, Doctor, Appointment
 # Helper: normalize specialization string -> list of specializations
 def split_specializations(raw: str) -> List[str]:
     """
@@ -915,15 +927,26 @@ def split_specializations(raw: str) -> List[str]:
     return parts
 
 class AppointmentScheduler:
-    def __init__(self, slot_minutes: int = 30):
+    def __init__(self, slot_minutes: int = 30, storage: Optional[StorageBackend] = None,
+                 async_storage: Optional[AsyncStorageBackend] = None,
+                 calendar: Optional[AvailabilityCalendar] = None, visits: Optional[VisitHistory] = None):
         """
-        Initialize scheduler with Google Sheets backend
+        Initialize scheduler with a storage backend
         slot_minutes: slot size in minutes
+        storage: defaults to the backend selected by settings.STORAGE_BACKEND
+        async_storage: backend for the *_async methods; defaults to `storage` run on the
+                       shared blocking executor, or to the configured backend's asyncio driver
+        calendar: per-day availability kept in step with this scheduler's bookings
+        visits: per-patient visit histories, kept in step the same way
         """
         # self.db = db_session  # Commented out for Google Sheets implementation
         self.slot_minutes = slot_minutes
-        # self.sheets = sheets_manager
-        self.sheets = csv_manager 
+        self.sheets = storage or get_backend()
+        if async_storage is None:
+            async_storage = AsyncBackendAdapter(storage) if storage else get_async_backend()
+        self.async_storage = async_storage
+        self.calendar = calendar or calendar_from_settings(slot_minutes)
+        self.visits = visits or visit_history_from_settings()
 
     def _log_action(self, action: str, table_name: str, record_id: int, 
                    old_values: dict = None, new_values: dict = None, user_session: str = None):
@@ -958,10 +981,13 @@ class AppointmentScheduler:
 
     def get_patient_by_phone(self, phone: str) -> Optional[Patient]:
         """Get patient by phone number with security"""
+        self._check_phone(phone)
+        return self.sheets.find_patient_by_phone(phone)
+
+    @staticmethod
+    def _check_phone(phone: str):
         if not security_manager.validate_phone_format(phone):
             raise InvalidDateError("Invalid phone number format")
-        
-        return self.sheets.find_patient_by_phone(phone)
 
     def enhanced_patient_search(self, query: str) -> List[Patient]:
         """Enhanced patient search with fuzzy matching"""
@@ -978,57 +1004,41 @@ class AppointmentScheduler:
                         visit_type: Optional[str] = None, language: str = 'en') -> Patient:
         """Register or update patient with enhanced security and validation"""
         
-        # Input validation and sanitization
-        name = security_manager.sanitize_input(name)
-        phone = security_manager.sanitize_input(phone)
-        
-        if not name or not phone:
-            raise PatientNotFoundError("Name and phone number are required")
-        
-        if not security_manager.validate_phone_format(phone):
-            raise InvalidDateError("Invalid phone number format")
+        name, phone = self._sanitize_registration(name, phone)
         
         # Check for existing patient
         existing = self.get_patient_by_phone(phone)
         if existing:
             # Update basic info if missing or changed
-            old_values = {
-                "name": existing.name,
-                "age": existing.age,
-                "location": existing.location,
-                "preferred_language": existing.preferred_language
-            }
-            
-            updated = False
-            update_data = {}
-            
-            if name and name != existing.name:
-                update_data['name'] = name
-                updated = True
-            if age and age != existing.age:
-                update_data['age'] = age
-                updated = True
-            if location and location != existing.location:
-                update_data['location'] = location
-                updated = True
-            if language != existing.preferred_language:
-                update_data['preferred_language'] = language
-                updated = True
-            
-            if updated:
+            update_data = self._patient_changes(existing, name, age, location, language)
+            if update_data:
                 self.sheets.update_patient(existing.patient_id, update_data)
-                
-                new_values = {**old_values, **update_data}
-                self._log_action("UPDATE", "patients", existing.patient_id, old_values, new_values)
-                
-                # Update existing patient object with new values
-                for key, value in update_data.items():
-                    setattr(existing, key, value)
-            
+                self._apply_patient_changes(existing, update_data)
             return existing
 
         # Create new patient
-        patient_data = {
+        patient = self.sheets.create_patient(
+            self._new_patient_data(name, phone, age, location, first_visit, visit_type, language))
+        self._log_registration(patient)
+        return patient
+
+    @staticmethod
+    def _sanitize_registration(name: str, phone: str) -> Tuple[str, str]:
+        """Input validation and sanitization for register_patient"""
+        name = security_manager.sanitize_input(name)
+        phone = security_manager.sanitize_input(phone)
+        
+        if not name or not phone:
+            raise PatientNotFoundError("Name and phone number are required")
+        
+        if not security_manager.validate_phone_format(phone):
+            raise InvalidDateError("Invalid phone number format")
+        return name, phone
+
+    @staticmethod
+    def _new_patient_data(name: str, phone: str, age: Optional[int], location: Optional[str],
+                          first_visit: bool, visit_type: Optional[str], language: str) -> Dict:
+        return {
             'name': name,
             'phone': phone,
             'age': age,
@@ -1037,9 +1047,38 @@ class AppointmentScheduler:
             'visit_type': visit_type,
             'preferred_language': language
         }
+
+    @staticmethod
+    def _patient_changes(existing: Patient, name: str, age: Optional[int],
+                         location: Optional[str], language: str) -> Dict:
+        """Fields of an existing patient that a repeat registration changes"""
+        update_data = {}
+        if name and name != existing.name:
+            update_data['name'] = name
+        if age and age != existing.age:
+            update_data['age'] = age
+        if location and location != existing.location:
+            update_data['location'] = location
+        if language != existing.preferred_language:
+            update_data['preferred_language'] = language
+        return update_data
+
+    def _apply_patient_changes(self, existing: Patient, update_data: Dict):
+        """Audit a stored patient update and mirror it onto the patient object"""
+        old_values = {
+            "name": existing.name,
+            "age": existing.age,
+            "location": existing.location,
+            "preferred_language": existing.preferred_language
+        }
+        new_values = {**old_values, **update_data}
+        self._log_action("UPDATE", "patients", existing.patient_id, old_values, new_values)
         
-        patient = self.sheets.create_patient(patient_data)
-        
+        # Update existing patient object with new values
+        for key, value in update_data.items():
+            setattr(existing, key, value)
+
+    def _log_registration(self, patient: Optional[Patient]):
         if patient:
             # Log creation
             new_values = {
@@ -1050,19 +1089,36 @@ class AppointmentScheduler:
             }
             self._log_action("CREATE", "patients", patient.patient_id, None, new_values)
             
-            logger.info(f"New patient registered", patient_id=patient.patient_id, name=name)
-        
-        return patient
+            logger.info(f"New patient registered", patient_id=patient.patient_id, name=patient.name)
 
-    def get_patient_last_doctor(self, patient_id: int) -> Optional[int]:
-        """Get patient's last visited doctor - simplified for Google Sheets"""
+    def patient_visits(self, patient_id: int) -> PatientVisits:
+        """The patient's booked appointments in date order, from the visit history"""
         try:
-            # This would require querying appointments sheet for this patient
-            # For now, return None (no last doctor preference)
-            return None
+            return self.visits.get(patient_id, lambda: self.sheets.get_appointments_by_patient(patient_id))
         except Exception as e:
-            logger.error(f"Failed to get patient's last doctor: {e}")
-            return None
+            logger.error(f"Failed to load visit history: {e}")
+            return PatientVisits()
+
+    def get_patient_last_doctor(self, patient_id: int) -> Optional[int]:
+        """Doctor of the patient's latest visit before today"""
+        return self._last_doctor(self.patient_visits(patient_id))
+
+    def get_patient_last_visit_date(self, patient_id: int) -> Optional[date_class]:
+        return self._last_visit_date(self.patient_visits(patient_id))
+
+    def get_upcoming_appointments(self, patient_id: int) -> List[Appointment]:
+        """The patient's scheduled and confirmed appointments from today on, soonest first"""
+        return self.patient_visits(patient_id).upcoming()
+
+    @staticmethod
+    def _last_doctor(visits: PatientVisits) -> Optional[int]:
+        last = visits.last_visit()
+        return int(last.doctor_id) if last and last.doctor_id is not None else None
+
+    @staticmethod
+    def _last_visit_date(visits: PatientVisits) -> Optional[date_class]:
+        last = visits.last_visit()
+        return date_class.fromisoformat(str(last.appointment_date)) if last else None
 
     # ---------------------------
     # Slot generation & queries
@@ -1080,40 +1136,64 @@ class AppointmentScheduler:
         
         try:
             appointments = self.sheets.get_appointments_by_doctor_date(doctor_id, on_date.isoformat())
-            booked_times = [apt.start_time for apt in appointments if apt.start_time]
-            
-            logger.debug(f"Found {len(booked_times)} booked slots for doctor {doctor_id} on {on_date}")
-            return booked_times
-            
         except Exception as e:
             logger.error(f"Failed to get booked slots: {e}")
             return []
+        return self._start_times(appointments, doctor_id, on_date)
+
+    @staticmethod
+    def _start_times(appointments: List[Appointment], doctor_id: int, on_date: date_class) -> List[str]:
+        booked_times = [apt.start_time for apt in appointments if apt.start_time]
+        logger.debug(f"Found {len(booked_times)} booked slots for doctor {doctor_id} on {on_date}")
+        return booked_times
+
+    def get_booked_intervals(self, doctor_id: int, on_date: date_class) -> List[Tuple[str, str]]:
+        """(start_time, end_time) of each active appointment of a doctor on a date"""
+        try:
+            appointments = self.sheets.get_appointments_by_doctor_date(doctor_id, on_date.isoformat())
+        except Exception as e:
+            logger.error(f"Failed to get booked intervals: {e}")
+            return []
+        return self._intervals(appointments)
+
+    @staticmethod
+    def _intervals(appointments: List[Appointment]) -> List[Tuple[str, str]]:
+        return [(apt.start_time, apt.end_time) for apt in appointments if apt.start_time]
+
+    def get_booked_slots_bulk(self, doctor_ids: Iterable[int],
+                              date_range: Iterable[date_class]) -> Dict[Tuple[int, date_class], List[Tuple[str, str]]]:
+        """get_booked_intervals() of every doctor on every date, read from storage in one pass"""
+        doctor_ids, dates = list(doctor_ids), list(date_range)
+        try:
+            grouped = self.sheets.get_booked_slots_bulk(doctor_ids, [on_date.isoformat() for on_date in dates])
+        except Exception as e:
+            logger.error(f"Failed to get booked intervals: {e}")
+            grouped = {}
+        return self._booked_grid(doctor_ids, dates, grouped)
+
+    @classmethod
+    def _booked_grid(cls, doctor_ids: List[int], dates: List[date_class],
+                     grouped: Dict) -> Dict[Tuple[int, date_class], List[Tuple[str, str]]]:
+        return {
+            (int(doctor_id), on_date): cls._intervals(grouped.get((int(doctor_id), on_date.isoformat()), ()))
+            for doctor_id in doctor_ids for on_date in dates
+        }
 
     def generate_available_slots(self, start_time: str, end_time: str,
-                                booked_slots: List[str], 
-                                preferred_time: str = None) -> List[str]:
-        """Generate available slots with intelligent ordering"""
+                                booked_slots: List[Union[str, Tuple[str, str]]], 
+                                preferred_time: str = None,
+                                duration_minutes: Optional[int] = None) -> List[str]:
+        """Generate available slots with intelligent ordering.
+
+        booked_slots holds start times, each taken to fill one slot, or
+        (start_time, end_time) pairs from get_booked_intervals(), which block
+        every slot they overlap. Only starts where a booking of
+        duration_minutes (default slot_minutes) fits before end_time and
+        overlaps nothing are returned.
+        """
         try:
-            slots = []
-            
-            # Parse time strings
-            start_hour, start_min = map(int, start_time.split(':'))
-            end_hour, end_min = map(int, end_time.split(':'))
-            
-            # Create datetime objects for calculation
-            today = datetime.today().replace(hour=start_hour, minute=start_min, second=0, microsecond=0)
-            end_dt = datetime.today().replace(hour=end_hour, minute=end_min, second=0, microsecond=0)
-            
-            delta = timedelta(minutes=self.slot_minutes)
-            booked_set = set(booked_slots)
-            
-            # Generate all available slots
-            current = today
-            while current + delta <= end_dt:
-                slot_str = current.strftime("%H:%M")
-                if slot_str not in booked_set:
-                    slots.append(slot_str)
-                current += delta
+            # Free bits of the day's slot bitmap, in time order
+            slots = available_slots(start_time, end_time, booked_slots, self.slot_minutes, duration_minutes)
             
             if not slots:
                 return []
@@ -1128,6 +1208,95 @@ class AppointmentScheduler:
             logger.error(f"Failed to generate available slots: {e}")
             return []
 
+    def slot_bitmap(self, doctor: Doctor, on_date: date_class) -> SlotBitmap:
+        """Booked/free bitmap of a doctor's working day, one bit per slot_minutes slot"""
+        grid = slot_grid(doctor.working_start, doctor.working_end, self.slot_minutes)
+        return SlotBitmap(grid, self.get_booked_intervals(doctor.doctor_id, on_date))
+
+    def first_free_slot(self, doctor: Doctor, on_date: date_class, at_or_after: str = None) -> Optional[str]:
+        """Earliest free slot of the doctor on on_date starting at or after at_or_after (HH:MM)"""
+        if not self.is_doctor_working_on(doctor, on_date):
+            return None
+        return self.day_availability(doctor, on_date).first_free(at_or_after)
+
+    def day_availability(self, doctor: Doctor, on_date: date_class) -> DayAvailability:
+        """Booked and free slots of a doctor's day, from the availability calendar"""
+        try:
+            return self.calendar.get(doctor, on_date, lambda: self.sheets.get_appointments_by_doctor_date(
+                doctor.doctor_id, on_date.isoformat()))
+        except Exception as e:
+            logger.error(f"Failed to load availability: {e}")
+            return DayAvailability.of(doctor, [], self.slot_minutes)
+
+    def day_availabilities(self, doctors: Iterable[Doctor],
+                           dates: Iterable[date_class]) -> Dict[Tuple[int, date_class], DayAvailability]:
+        """day_availability() of every doctor on every date; days not in the calendar are read in one bulk query"""
+        doctors, dates = list(doctors), list(dates)
+        try:
+            days = self.calendar.get_many(doctors, dates, self.sheets.get_booked_slots_bulk)
+        except Exception as e:
+            logger.error(f"Failed to load availability: {e}")
+            days = {}
+        return self._availability_grid(doctors, dates, days)
+
+    def free_slots(self, doctor: Doctor, on_date: date_class, preferred_time: str = None) -> List[str]:
+        """Free slots of a doctor's day from the availability calendar, best first for preferred_time if given"""
+        return self.ordered_free_slots(self.day_availability(doctor, on_date), preferred_time)
+
+    def ordered_free_slots(self, day: DayAvailability, preferred_time: Optional[str] = None) -> List[str]:
+        """A day's free slots, best first for preferred_time ('morning', 'afternoon', 'evening') if given"""
+        slots = day.free_slots()
+        return self._sort_slots_by_preference(slots, preferred_time) if preferred_time else slots
+
+    def _availability_grid(self, doctors: List[Doctor], dates: List[date_class],
+                           days: Dict) -> Dict[Tuple[int, date_class], DayAvailability]:
+        return {
+            (doctor.doctor_id, on_date): days.get((int(doctor.doctor_id), on_date.isoformat()))
+            or DayAvailability.of(doctor, [], self.slot_minutes)
+            for doctor in doctors for on_date in dates
+        }
+
+    def find_earliest_slots(self, specialization: str, count: int = 3, from_date: Optional[date_class] = None,
+                            time_of_day: Optional[str] = None, weekdays: Optional[str] = None,
+                            days_ahead: int = MAX_ADVANCE_DAYS) -> List[SlotMatch]:
+        """The `count` earliest free slots with any doctor of the specialization.
+
+        time_of_day: 'morning', 'afternoon', 'evening' or an 'HH:MM-HH:MM' range
+        weekdays: e.g. 'Mon,Wed' or 'weekend'; raises InvalidDateError if either is not understood
+        """
+        search = self._slot_search(from_date, time_of_day, weekdays, days_ahead)
+        doctors = self.get_doctors_by_specialization(specialization)
+        return earliest_slots(doctors, search, count, self.is_doctor_working_on, self.day_availability)
+
+    @staticmethod
+    def _slot_search(from_date: Optional[date_class], time_of_day: Optional[str], weekdays: Optional[str],
+                     days_ahead: int) -> SlotSearch:
+        return SlotSearch(from_date, days_ahead, parse_time_window(time_of_day), parse_weekdays(weekdays))
+
+    def next_openings(self, doctors: Iterable[Doctor], from_date: date_class,
+                      days_ahead: int = MAX_ADVANCE_DAYS) -> List[SlotMatch]:
+        """Each doctor's earliest free slot on or after from_date, soonest first; doctors with none are left out"""
+        search = self._slot_search(from_date, None, None, days_ahead)
+        matches = []
+        for doctor in doctors:
+            matches += earliest_slots([doctor], search, 1, self.is_doctor_working_on, self.day_availability)
+        return self._soonest_first(matches)
+
+    @staticmethod
+    def _soonest_first(matches: List[SlotMatch]) -> List[SlotMatch]:
+        # sorted() is stable, so doctors opening at the same time keep the caller's order
+        return sorted(matches, key=lambda match: (match.on_date, match.start_time))
+
+    @contextmanager
+    def _tracking_conflicts(self, doctor_id: int, on_date):
+        """Drop the calendar's copy of a day whose slot the backend reports as taken"""
+        try:
+            yield
+        except SlotUnavailableError:
+            # Booked through another process since the day was cached
+            self.calendar.invalidate(doctor_id, on_date)
+            raise
+
     def _sort_slots_by_preference(self, slots: List[str], preferred_time: str) -> List[str]:
         """Sort slots based on patient preference"""
         slot_scores = []
@@ -1165,39 +1334,37 @@ class AppointmentScheduler:
     def get_least_booked_doctor(self, specialization: str, on_date: date_class, 
                                patient_location: str = None) -> Optional[Doctor]:
         """Get least booked doctor with location preference"""
+        return self._best_working(self.rank_doctors(specialization, on_date, patient_location))
+
+    def rank_doctors(self, specialization: str, on_date: date_class,
+                     patient_location: str = None) -> List[DoctorRanking]:
+        """Every doctor of the specialization ranked for on_date, best first; doctors off that day come last.
+
+        Booking counts of all working doctors come from one bulk read (or the
+        availability calendar) and are scored together.
+        """
         doctors = self.get_doctors_by_specialization(specialization)
-        if not doctors:
-            return None
-        
-        best_doctor = None
-        best_score = -1
-        
-        for doctor in doctors:
-            if not self.is_doctor_working_on(doctor, on_date):
-                continue
-                
-            # Base score calculation
-            booked_slots = self.get_booked_slots(doctor.doctor_id, on_date)
-            booking_count = len(booked_slots)
-            
-            # Calculate score (lower bookings = higher score)
-            score = 100 - (booking_count * 10)
-            
-            # Experience bonus
-            if doctor.experience_years:
-                score += min(doctor.experience_years * 2, 20)  # Max 20 points for experience
-            
-            # Location preference (if patient location is known)
-            # This is a simplified implementation - in real world, you'd have doctor locations
-            if patient_location and doctor.name:  # Simplified location matching
-                # This would be more sophisticated in production
-                score += 5
-            
-            if best_doctor is None or score > best_score:
-                best_doctor = doctor
-                best_score = score
-        
-        return best_doctor
+        working = self._working_mask(doctors, on_date)
+        days = self.day_availabilities(self._working_doctors(doctors, working), [on_date])
+        return self._ranking(doctors, working, days, patient_location)
+
+    def _working_mask(self, doctors: List[Doctor], on_date: date_class) -> List[bool]:
+        return [self.is_doctor_working_on(doctor, on_date) for doctor in doctors]
+
+    @staticmethod
+    def _working_doctors(doctors: List[Doctor], working: List[bool]) -> List[Doctor]:
+        return [doctor for doctor, works in zip(doctors, working) if works]
+
+    @staticmethod
+    def _ranking(doctors: List[Doctor], working: List[bool], days: Dict,
+                 patient_location: Optional[str]) -> List[DoctorRanking]:
+        """rank_from_days() over the day_availabilities() of one date"""
+        return rank_from_days(doctors, working, {doctor_id: day for (doctor_id, _), day in days.items()},
+                              patient_location)
+
+    @staticmethod
+    def _best_working(ranking: List[DoctorRanking]) -> Optional[Doctor]:
+        return ranking[0].doctor if ranking and ranking[0].working else None
 
     def recommend_doctor(self, patient_id: Optional[int], specialization: str,
                         on_date: date_class, first_visit: bool = True, 
@@ -1207,28 +1374,33 @@ class AppointmentScheduler:
         # For follow-up visits, try to get the same doctor
         if not first_visit and patient_id:
             last_doc_id = self.get_patient_last_doctor(patient_id)
-            if last_doc_id:
-                last_doctor = self.get_doctor_by_id(last_doc_id)
-                if (last_doctor and 
-                    self.is_doctor_working_on(last_doctor, on_date)):
-                    
-                    # Check if the last doctor has the required specialization
-                    if specialization in last_doctor.specializations:
-                        logger.info(f"Recommended same doctor for follow-up", 
-                                   doctor_id=last_doctor.doctor_id, 
-                                   patient_id=patient_id)
-                        return last_doctor
+            last_doctor = self.get_doctor_by_id(last_doc_id) if last_doc_id else None
+            if self._follows_up_with(last_doctor, patient_id, specialization, on_date):
+                return last_doctor
         
         # For first visits or if last doctor is not available, get least booked
         recommended = self.get_least_booked_doctor(specialization, on_date, patient_location)
-        
+        self._log_recommendation(recommended, specialization, on_date)
+        return recommended
+
+    def _follows_up_with(self, last_doctor: Optional[Doctor], patient_id: int,
+                         specialization: str, on_date: date_class) -> bool:
+        """Whether a follow-up visit goes to the patient's last doctor: working that day, with the specialization"""
+        if not (last_doctor and self.is_doctor_working_on(last_doctor, on_date)
+                and specialization in last_doctor.specializations):
+            return False
+        logger.info(f"Recommended same doctor for follow-up", 
+                   doctor_id=last_doctor.doctor_id, 
+                   patient_id=patient_id)
+        return True
+
+    @staticmethod
+    def _log_recommendation(recommended: Optional[Doctor], specialization: str, on_date: date_class):
         if recommended:
             logger.info(f"Recommended doctor based on availability", 
                        doctor_id=recommended.doctor_id, 
                        specialization=specialization,
                        date=on_date.isoformat())
-        
-        return recommended
 
     # ---------------------------
     # Enhanced Booking with notifications
@@ -1238,41 +1410,69 @@ class AppointmentScheduler:
                         send_notification: bool = True, user_session: str = None) -> Appointment:
         """Book appointment with enhanced validation and notifications"""
         
-        duration_minutes = duration_minutes or self.slot_minutes
+        end_time_str = self._end_time(start_time_str, duration_minutes or self.slot_minutes)
         
-        try:
-            # Validate time format
-            datetime.strptime(start_time_str, "%H:%M")
-        except ValueError:
-            raise InvalidDateError(f"Invalid time format: {start_time_str}. Use HH:MM format.")
-        
-        # Validate entities exist
+        # Validate entities exist and the doctor works on this date
         patient = self.sheets.get_patient_by_id(patient_id)
+        self._require_patient(patient, patient_id)
+        doctor = self._require_working(self.sheets.get_doctor_by_id(doctor_id), doctor_id, on_date)
+        
+        # Slot conflicts are rejected atomically by the storage backend (SlotUnavailableError)
+        with self._tracking_conflicts(doctor_id, on_date):
+            appointment = self.sheets.create_appointment(
+                self._appointment_data(patient_id, doctor_id, on_date, start_time_str, end_time_str))
+        self._log_booking(appointment, on_date, user_session)
+        
+        # Send notification
+        if send_notification:
+            try:
+                notification_manager.send_appointment_confirmation(
+                    self._with_parties(appointment, patient, doctor))
+            except Exception as e:
+                logger.error(f"Failed to send appointment confirmation: {e}")
+                # Don't fail the booking if notification fails
+        
+        return appointment
+
+    @staticmethod
+    def _require_patient(patient: Optional[Patient], patient_id: int) -> Patient:
         if not patient:
             raise PatientNotFoundError(f"Patient with ID {patient_id} not found")
-        
-        doctor = self.sheets.get_doctor_by_id(doctor_id)
+        return patient
+
+    @staticmethod
+    def _require_doctor(doctor: Optional[Doctor], doctor_id: int) -> Doctor:
         if not doctor:
             raise DoctorNotFoundError(f"Doctor with ID {doctor_id} not found")
-        
-        # Validate doctor is working on this date
+        return doctor
+
+    def _require_working(self, doctor: Optional[Doctor], doctor_id: int, on_date: date_class) -> Doctor:
+        """The doctor, if found and working on on_date; DoctorNotFoundError otherwise"""
+        self._require_doctor(doctor, doctor_id)
         if not self.is_doctor_working_on(doctor, on_date):
             raise DoctorNotFoundError(f"Dr. {doctor.name} is not available on {on_date.strftime('%A')}")
-        
-        # Check for slot conflicts
-        existing_appointments = self.sheets.get_appointments_by_doctor_date(doctor_id, on_date.isoformat())
-        
-        for existing_apt in existing_appointments:
-            if existing_apt.start_time == start_time_str:
-                raise SlotUnavailableError(f"The slot {start_time_str} on {on_date} is already booked")
-        
-        # Calculate end time
-        start_dt = datetime.strptime(start_time_str, "%H:%M")
-        end_dt = start_dt + timedelta(minutes=duration_minutes)
-        end_time_str = end_dt.strftime("%H:%M")
-        
-        # Create appointment
-        appointment_data = {
+        return doctor
+
+    @staticmethod
+    def _with_parties(appointment: Appointment, patient: Patient, doctor: Doctor) -> Appointment:
+        """The appointment with its patient and doctor attached, as the confirmation message needs"""
+        appointment.patient = patient
+        appointment.doctor = doctor
+        return appointment
+
+    @staticmethod
+    def _end_time(start_time_str: str, duration_minutes: int) -> str:
+        """Validate an HH:MM start time and return the end time of a slot starting there"""
+        try:
+            start_dt = datetime.strptime(start_time_str, "%H:%M")
+        except ValueError:
+            raise InvalidDateError(f"Invalid time format: {start_time_str}. Use HH:MM format.")
+        return (start_dt + timedelta(minutes=duration_minutes)).strftime("%H:%M")
+
+    @staticmethod
+    def _appointment_data(patient_id: int, doctor_id: int, on_date: date_class,
+                          start_time_str: str, end_time_str: str) -> Dict:
+        return {
             'patient_id': patient_id,
             'doctor_id': doctor_id,
             'appointment_date': on_date.isoformat(),
@@ -1281,41 +1481,30 @@ class AppointmentScheduler:
             'status': 'scheduled',
             'booking_source': 'phone'
         }
-        
-        appointment = self.sheets.create_appointment(appointment_data)
-        
+
+    def _log_booking(self, appointment: Optional[Appointment], on_date: date_class, user_session: str = None):
         if not appointment:
             raise Exception("Failed to create appointment in database")
         
         # Log the booking
         new_values = {
-            "patient_id": patient_id,
-            "doctor_id": doctor_id,
+            "patient_id": appointment.patient_id,
+            "doctor_id": appointment.doctor_id,
             "appointment_date": on_date.isoformat(),
-            "start_time": start_time_str,
+            "start_time": appointment.start_time,
             "status": "scheduled"
         }
         self._log_action("CREATE", "appointments", appointment.appointment_id, 
                         None, new_values, user_session)
-        
-        # Send notification
-        if send_notification:
-            try:
-                appointment.patient = patient
-                appointment.doctor = doctor
-                notification_manager.send_appointment_confirmation(appointment)
-            except Exception as e:
-                logger.error(f"Failed to send appointment confirmation: {e}")
-                # Don't fail the booking if notification fails
+        self.calendar.book(appointment)
+        self.visits.record(appointment)
         
         logger.info(f"Appointment booked successfully", 
                    appointment_id=appointment.appointment_id,
-                   patient_id=patient_id,
-                   doctor_id=doctor_id,
+                   patient_id=appointment.patient_id,
+                   doctor_id=appointment.doctor_id,
                    date=on_date.isoformat(),
-                   time=start_time_str)
-        
-        return appointment
+                   time=appointment.start_time)
 
     def reschedule_appointment(self, appointment_id: int, new_date: date_class, 
                               new_time_str: str, send_notification: bool = True,
@@ -1323,100 +1512,120 @@ class AppointmentScheduler:
         """Reschedule appointment with validation and notifications"""
         
         appointment = self.sheets.get_appointment_by_id(appointment_id)
-        
-        if not appointment or appointment.status not in ['scheduled', 'confirmed']:
-            raise BookingConflictError(f"Appointment {appointment_id} not found or cannot be rescheduled")
+        self._require_active(appointment, appointment_id, "cannot be rescheduled")
         
         # Store old values for notification and audit
         old_date = appointment.appointment_date
         old_time = appointment.start_time
-        old_values = {
-            "appointment_date": old_date,
-            "start_time": old_time
-        }
-        
-        # Validate new time format
-        try:
-            datetime.strptime(new_time_str, "%H:%M")
-        except ValueError:
-            raise InvalidDateError(f"Invalid time format: {new_time_str}. Use HH:MM format.")
+        update_data = self._reschedule_data(appointment, new_date, new_time_str)
         
         # Validate doctor is working on new date
-        doctor = self.sheets.get_doctor_by_id(appointment.doctor_id)
-        if not self.is_doctor_working_on(doctor, new_date):
-            raise DoctorNotFoundError(f"Dr. {doctor.name} is not available on {new_date.strftime('%A')}")
+        self._require_working(self.sheets.get_doctor_by_id(appointment.doctor_id), appointment.doctor_id, new_date)
         
-        # Check for conflicts at the new slot
-        existing_appointments = self.sheets.get_appointments_by_doctor_date(appointment.doctor_id, new_date.isoformat())
+        # A conflict at the new slot is rejected atomically by the storage backend (SlotUnavailableError)
+        with self._tracking_conflicts(appointment.doctor_id, new_date):
+            success = self.sheets.update_appointment(appointment_id, update_data)
+        self._log_reschedule(appointment, update_data, success, user_session)
         
-        for existing_apt in existing_appointments:
-            if existing_apt.start_time == new_time_str and existing_apt.appointment_id != appointment_id:
-                raise SlotUnavailableError(f"The slot {new_time_str} on {new_date} is already booked")
-        
-        # Calculate new end time
-        start_dt = datetime.strptime(new_time_str, "%H:%M")
-        end_dt = start_dt + timedelta(minutes=self.slot_minutes)
-        new_end_time = end_dt.strftime("%H:%M")
+        # Send notification
+        if send_notification:
+            try:
+                notification_manager.send_reschedule_confirmation(
+                    appointment, 
+                    old_date,
+                    old_time
+                )
+            except Exception as e:
+                logger.error(f"Failed to send reschedule notification: {e}")
         
-        # Update the appointment
-        update_data = {
+        return appointment
+
+    @staticmethod
+    def _require_active(appointment: Optional[Appointment], appointment_id: int, otherwise: str) -> Appointment:
+        if not appointment or appointment.status not in ['scheduled', 'confirmed']:
+            raise BookingConflictError(f"Appointment {appointment_id} not found or {otherwise}")
+        return appointment
+
+    def _reschedule_data(self, appointment: Appointment, new_date: date_class, new_time_str: str) -> Dict:
+        """Validated update for moving an appointment to a new slot, keeping its length"""
+        try:
+            start, end = appointment_span(appointment.start_time, appointment.end_time, self.slot_minutes)
+            duration = end - start
+        except (TypeError, ValueError, AttributeError):
+            duration = self.slot_minutes
+        return {
             'appointment_date': new_date.isoformat(),
             'start_time': new_time_str,
-            'end_time': new_end_time
+            'end_time': self._end_time(new_time_str, duration)
         }
-        
-        success = self.sheets.update_appointment(appointment_id, update_data)
-        
+
+    def _log_reschedule(self, appointment: Appointment, update_data: Dict, success: bool,
+                        user_session: str = None):
+        """Audit a stored reschedule and mirror it onto the appointment object"""
         if not success:
             raise Exception("Failed to update appointment")
         
-        # Update appointment object
-        appointment.appointment_date = new_date.isoformat()
-        appointment.start_time = new_time_str
-        appointment.end_time = new_end_time
+        old_values = {
+            "appointment_date": appointment.appointment_date,
+            "start_time": appointment.start_time
+        }
+        
+        # Update appointment object, moving it in the availability calendar
+        self.calendar.release(appointment)
+        appointment.appointment_date = update_data['appointment_date']
+        appointment.start_time = update_data['start_time']
+        appointment.end_time = update_data['end_time']
+        self.calendar.book(appointment)
+        self.visits.record(appointment)
         
         # Log the change
         new_values = {
-            "appointment_date": new_date.isoformat(),
-            "start_time": new_time_str
+            "appointment_date": appointment.appointment_date,
+            "start_time": appointment.start_time
         }
-        self._log_action("UPDATE", "appointments", appointment_id, 
+        self._log_action("UPDATE", "appointments", appointment.appointment_id, 
                         old_values, new_values, user_session)
         
-        # Send notification
-        if send_notification:
-            try:
-                notification_manager.send_reschedule_confirmation(
-                    appointment, 
-                    old_date,
-                    old_time
-                )
-            except Exception as e:
-                logger.error(f"Failed to send reschedule notification: {e}")
-        
         logger.info(f"Appointment rescheduled successfully", 
-                   appointment_id=appointment_id,
-                   old_date=old_date,
-                   new_date=new_date.isoformat(),
-                   old_time=old_time,
-                   new_time=new_time_str)
-        
-        return appointment
+                   appointment_id=appointment.appointment_id,
+                   old_date=old_values["appointment_date"],
+                   new_date=appointment.appointment_date,
+                   old_time=old_values["start_time"],
+                   new_time=appointment.start_time)
 
     def cancel_appointment(self, appointment_id: int, send_notification: bool = True,
                           user_session: str = None) -> Optional[Appointment]:
         """Cancel appointment with validation and notifications"""
         
         appointment = self.sheets.get_appointment_by_id(appointment_id)
+        self._require_active(appointment, appointment_id, "already cancelled")
         
-        if not appointment or appointment.status not in ['scheduled', 'confirmed']:
-            raise BookingConflictError(f"Appointment {appointment_id} not found or already cancelled")
+        # Update status instead of deleting (better for audit trail)
+        success = self.sheets.update_appointment(appointment_id, {'status': 'cancelled'})
+        self._log_cancellation(appointment, success, user_session)
         
-        # Store values for notification before updating
-        patient_name = appointment.patient_name
-        doctor_name = appointment.doctor_name
-        appointment_date = appointment.appointment_date
-        appointment_time = appointment.start_time
+        # Send notification
+        if send_notification:
+            try:
+                # For Google Sheets, we need to get patient phone from patient record
+                patient = self.sheets.get_patient_by_id(appointment.patient_id)
+                notification_manager.send_cancellation_confirmation(*self._cancellation_notice(appointment, patient))
+            except Exception as e:
+                logger.error(f"Failed to send cancellation notification: {e}")
+        
+        return appointment
+
+    @staticmethod
+    def _cancellation_notice(appointment: Appointment, patient: Optional[Patient]) -> Tuple:
+        """Arguments of notification_manager.send_cancellation_confirmation()"""
+        patient_phone = patient.phone if patient else ""
+        return (appointment.patient_name, patient_phone, appointment.doctor_name,
+                appointment.appointment_date, appointment.start_time)
+
+    def _log_cancellation(self, appointment: Appointment, success: bool, user_session: str = None):
+        """Audit a stored cancellation and mirror it onto the appointment object"""
+        if not success:
+            raise Exception("Failed to cancel appointment")
         
         # Log the cancellation
         old_values = {
@@ -1424,39 +1633,18 @@ class AppointmentScheduler:
             "appointment_date": appointment.appointment_date,
             "start_time": appointment.start_time
         }
-        
-        # Update status instead of deleting (better for audit trail)
-        update_data = {'status': 'cancelled'}
-        success = self.sheets.update_appointment(appointment_id, update_data)
-        
-        if not success:
-            raise Exception("Failed to cancel appointment")
-        
+        self.calendar.release(appointment)
         appointment.status = 'cancelled'
+        self.visits.forget(appointment)
         
         new_values = {"status": "cancelled"}
-        self._log_action("UPDATE", "appointments", appointment_id, 
+        self._log_action("UPDATE", "appointments", appointment.appointment_id, 
                         old_values, new_values, user_session)
         
-        # Send notification
-        if send_notification:
-            try:
-                # For Google Sheets, we need to get patient phone from patient record
-                patient = self.sheets.get_patient_by_id(appointment.patient_id)
-                patient_phone = patient.phone if patient else ""
-                
-                notification_manager.send_cancellation_confirmation(
-                    patient_name, patient_phone, doctor_name, 
-                    appointment_date, appointment_time
-                )
-            except Exception as e:
-                logger.error(f"Failed to send cancellation notification: {e}")
-        
         logger.info(f"Appointment cancelled successfully", 
-                   appointment_id=appointment_id,
-                   patient_name=patient_name,
-                   doctor_name=doctor_name)
-        return appointment
+                   appointment_id=appointment.appointment_id,
+                   patient_name=appointment.patient_name,
+                   doctor_name=appointment.doctor_name)
     
     def find_patient(self, query: str) -> List[Patient]:
         """Enhanced patient search with fuzzy matching"""
@@ -1471,53 +1659,63 @@ class AppointmentScheduler:
             return self.sheets.get_booking_analytics(days)
         except Exception as e:
             logger.error(f"Failed to get booking analytics: {e}")
-            return {
-                "total_bookings": 0,
-                "specialization_stats": {},
-                "top_doctors": {},
-                "cancellation_rate": 0,
-                "total_cancelled": 0,
-                "period_days": days
-            }
+            return self._empty_analytics(days)
+
+    @staticmethod
+    def _empty_analytics(days: int) -> Dict:
+        return {
+            "total_bookings": 0,
+            "specialization_stats": {},
+            "top_doctors": {},
+            "cancellation_rate": 0,
+            "total_cancelled": 0,
+            "period_days": days
+        }
 
     def get_doctor_availability_summary(self, doctor_id: int, days_ahead: int = 7) -> Dict:
         """Get doctor availability summary for next N days"""
-        doctor = self.get_doctor_by_id(doctor_id)
-        if not doctor:
-            raise DoctorNotFoundError(f"Doctor with ID {doctor_id} not found")
-        
+        doctor = self._require_doctor(self.get_doctor_by_id(doctor_id), doctor_id)
+        days = self.day_availabilities([doctor], self._working_dates(doctor, days_ahead))
+        return self._availability_summary(doctor, days, days_ahead)
+
+    @staticmethod
+    def _upcoming_dates(days_ahead: int) -> List[date_class]:
         today = date_class.today()
+        return [today + timedelta(days=i) for i in range(days_ahead)]
+
+    def _working_dates(self, doctor: Doctor, days_ahead: int) -> List[date_class]:
+        return [check_date for check_date in self._upcoming_dates(days_ahead)
+                if self.is_doctor_working_on(doctor, check_date)]
+
+    def _availability_summary(self, doctor: Doctor, days: Dict, days_ahead: int) -> Dict:
+        """get_doctor_availability_summary() from the day_availabilities() of the doctor's working dates"""
         availability = {}
-        
-        for i in range(days_ahead):
-            check_date = today + timedelta(days=i)
-            
-            if not self.is_doctor_working_on(doctor, check_date):
-                availability[check_date.isoformat()] = {
-                    "working": False,
-                    "available_slots": 0,
-                    "booked_slots": 0
-                }
-                continue
-            
-            booked_slots = self.get_booked_slots(doctor_id, check_date)
-            available_slots = self.generate_available_slots(
-                doctor.working_start, doctor.working_end, booked_slots
-            )
-            
-            availability[check_date.isoformat()] = {
-                "working": True,
-                "available_slots": len(available_slots),
-                "booked_slots": len(booked_slots),
-                "slots": available_slots[:10]  # First 10 slots
-            }
+        for check_date in self._upcoming_dates(days_ahead):
+            availability[check_date.isoformat()] = self._availability_entry(days.get((doctor.doctor_id, check_date)))
         
         return {
             "doctor_name": doctor.name,
-            "doctor_id": doctor_id,
+            "doctor_id": doctor.doctor_id,
             "availability": availability
         }
 
+    @staticmethod
+    def _availability_entry(day: Optional[DayAvailability]) -> Dict:
+        """One day of get_doctor_availability_summary(); day is None on days off"""
+        if day is None:
+            return {
+                "working": False,
+                "available_slots": 0,
+                "booked_slots": 0
+            }
+        
+        return {
+            "working": True,
+            "available_slots": day.free_count,
+            "booked_slots": day.booked_count,
+            "slots": day.free_slots()[:10]  # First 10 slots
+        }
+
     # ---------------------------
     # Utility Methods for Agent
     # ---------------------------
@@ -1528,22 +1726,259 @@ class AppointmentScheduler:
     def get_doctors_info_by_specialization(self, specialization: str) -> List[Dict]:
         """Get detailed doctor information for agent communication"""
         doctors = self.get_doctors_by_specialization(specialization)
-        
-        doctor_info = []
+        return [self._doctor_info(doctor) for doctor in doctors]
+
+    @staticmethod
+    def _doctor_info(doctor: Doctor) -> Dict:
+        return {
+            "doctor_id": doctor.doctor_id,
+            "name": doctor.name,
+            "qualification": doctor.qualification,
+            "experience_years": doctor.experience_years,
+            "consultation_fee": doctor.consultation_fee,
+            "specializations": doctor.specializations,
+            "working_hours": f"{doctor.working_start} to {doctor.working_end}",
+            "working_days": doctor.working_days
+        }
+
+    # ---------------------------
+    # Async variants for the agent tools
+    # ---------------------------
+    # Same rules as the methods above, on self.async_storage, so a tool call awaits
+    # storage instead of blocking the event loop. Notifications go out on the shared
+    # blocking executor. Each pair shares its checks and results through the helpers
+    # above, which work on data already read, and differs only in its I/O calls.
+    async def get_doctors_by_specialization_async(self, specialization: str) -> List[Doctor]:
+        doctors = await self.async_storage.get_doctors_by_specialization(specialization)
+        logger.debug(f"Found {len(doctors)} doctors for specialization: {specialization}")
+        return doctors
+
+    async def get_doctor_by_id_async(self, doctor_id: int) -> Optional[Doctor]:
+        return await self.async_storage.get_doctor_by_id(doctor_id)
+
+    async def get_appointment_by_id_async(self, appointment_id: int) -> Optional[Appointment]:
+        return await self.async_storage.get_appointment_by_id(appointment_id)
+
+    async def get_patient_by_phone_async(self, phone: str) -> Optional[Patient]:
+        self._check_phone(phone)
+        return await self.async_storage.find_patient_by_phone(phone)
+
+    async def enhanced_patient_search_async(self, query: str) -> List[Patient]:
+        query = security_manager.sanitize_input(query)
+        if not query:
+            return []
+        return await self.async_storage.search_patients(query)
+
+    async def register_patient_async(self, name: str, phone: str, age: int = None,
+                                     location: str = None, first_visit: bool = True,
+                                     visit_type: Optional[str] = None, language: str = 'en') -> Patient:
+        name, phone = self._sanitize_registration(name, phone)
+
+        existing = await self.get_patient_by_phone_async(phone)
+        if existing:
+            update_data = self._patient_changes(existing, name, age, location, language)
+            if update_data:
+                await self.async_storage.update_patient(existing.patient_id, update_data)
+                self._apply_patient_changes(existing, update_data)
+            return existing
+
+        patient = await self.async_storage.create_patient(
+            self._new_patient_data(name, phone, age, location, first_visit, visit_type, language))
+        self._log_registration(patient)
+        return patient
+
+    async def patient_visits_async(self, patient_id: int) -> PatientVisits:
+        try:
+            return await self.visits.get_async(
+                patient_id, lambda: self.async_storage.get_appointments_by_patient(patient_id))
+        except Exception as e:
+            logger.error(f"Failed to load visit history: {e}")
+            return PatientVisits()
+
+    async def get_patient_last_doctor_async(self, patient_id: int) -> Optional[int]:
+        return self._last_doctor(await self.patient_visits_async(patient_id))
+
+    async def get_patient_last_visit_date_async(self, patient_id: int) -> Optional[date_class]:
+        return self._last_visit_date(await self.patient_visits_async(patient_id))
+
+    async def get_upcoming_appointments_async(self, patient_id: int) -> List[Appointment]:
+        return (await self.patient_visits_async(patient_id)).upcoming()
+
+    async def get_booked_slots_async(self, doctor_id: int, on_date: date_class) -> List[str]:
+        try:
+            appointments = await self.async_storage.get_appointments_by_doctor_date(doctor_id, on_date.isoformat())
+        except Exception as e:
+            logger.error(f"Failed to get booked slots: {e}")
+            return []
+        return self._start_times(appointments, doctor_id, on_date)
+
+    async def get_booked_intervals_async(self, doctor_id: int, on_date: date_class) -> List[Tuple[str, str]]:
+        try:
+            appointments = await self.async_storage.get_appointments_by_doctor_date(doctor_id, on_date.isoformat())
+        except Exception as e:
+            logger.error(f"Failed to get booked intervals: {e}")
+            return []
+        return self._intervals(appointments)
+
+    async def get_booked_slots_bulk_async(self, doctor_ids: Iterable[int], date_range: Iterable[date_class]
+                                          ) -> Dict[Tuple[int, date_class], List[Tuple[str, str]]]:
+        doctor_ids, dates = list(doctor_ids), list(date_range)
+        try:
+            grouped = await self.async_storage.get_booked_slots_bulk(
+                doctor_ids, [on_date.isoformat() for on_date in dates])
+        except Exception as e:
+            logger.error(f"Failed to get booked intervals: {e}")
+            grouped = {}
+        return self._booked_grid(doctor_ids, dates, grouped)
+
+    async def day_availability_async(self, doctor: Doctor, on_date: date_class) -> DayAvailability:
+        try:
+            return await self.calendar.get_async(doctor, on_date, lambda: self.async_storage.get_appointments_by_doctor_date(
+                doctor.doctor_id, on_date.isoformat()))
+        except Exception as e:
+            logger.error(f"Failed to load availability: {e}")
+            return DayAvailability.of(doctor, [], self.slot_minutes)
+
+    async def day_availabilities_async(self, doctors: Iterable[Doctor], dates: Iterable[date_class]
+                                       ) -> Dict[Tuple[int, date_class], DayAvailability]:
+        doctors, dates = list(doctors), list(dates)
+        try:
+            days = await self.calendar.get_many_async(doctors, dates, self.async_storage.get_booked_slots_bulk)
+        except Exception as e:
+            logger.error(f"Failed to load availability: {e}")
+            days = {}
+        return self._availability_grid(doctors, dates, days)
+
+    async def free_slots_async(self, doctor: Doctor, on_date: date_class, preferred_time: str = None) -> List[str]:
+        return self.ordered_free_slots(await self.day_availability_async(doctor, on_date), preferred_time)
+
+    async def find_earliest_slots_async(self, specialization: str, count: int = 3,
+                                        from_date: Optional[date_class] = None, time_of_day: Optional[str] = None,
+                                        weekdays: Optional[str] = None,
+                                        days_ahead: int = MAX_ADVANCE_DAYS) -> List[SlotMatch]:
+        search = self._slot_search(from_date, time_of_day, weekdays, days_ahead)
+        doctors = await self.get_doctors_by_specialization_async(specialization)
+        return await earliest_slots_async(doctors, search, count, self.is_doctor_working_on,
+                                          self.day_availability_async)
+
+    async def next_openings_async(self, doctors: Iterable[Doctor], from_date: date_class,
+                                  days_ahead: int = MAX_ADVANCE_DAYS) -> List[SlotMatch]:
+        search = self._slot_search(from_date, None, None, days_ahead)
+        matches = []
         for doctor in doctors:
-            info = {
-                "doctor_id": doctor.doctor_id,
-                "name": doctor.name,
-                "qualification": doctor.qualification,
-                "experience_years": doctor.experience_years,
-                "consultation_fee": doctor.consultation_fee,
-                "specializations": doctor.specializations,
-                "working_hours": f"{doctor.working_start} to {doctor.working_end}",
-                "working_days": doctor.working_days
-            }
-            doctor_info.append(info)
-        
-        return doctor_info
+            matches += await earliest_slots_async([doctor], search, 1, self.is_doctor_working_on,
+                                                  self.day_availability_async)
+        return self._soonest_first(matches)
+
+    async def get_least_booked_doctor_async(self, specialization: str, on_date: date_class,
+                                            patient_location: str = None) -> Optional[Doctor]:
+        return self._best_working(await self.rank_doctors_async(specialization, on_date, patient_location))
+
+    async def rank_doctors_async(self, specialization: str, on_date: date_class,
+                                 patient_location: str = None) -> List[DoctorRanking]:
+        doctors = await self.get_doctors_by_specialization_async(specialization)
+        working = self._working_mask(doctors, on_date)
+        days = await self.day_availabilities_async(self._working_doctors(doctors, working), [on_date])
+        return self._ranking(doctors, working, days, patient_location)
+
+    async def recommend_doctor_async(self, patient_id: Optional[int], specialization: str,
+                                     on_date: date_class, first_visit: bool = True,
+                                     patient_location: str = None) -> Optional[Doctor]:
+        if not first_visit and patient_id:
+            last_doc_id = await self.get_patient_last_doctor_async(patient_id)
+            last_doctor = await self.get_doctor_by_id_async(last_doc_id) if last_doc_id else None
+            if self._follows_up_with(last_doctor, patient_id, specialization, on_date):
+                return last_doctor
+
+        recommended = await self.get_least_booked_doctor_async(specialization, on_date, patient_location)
+        self._log_recommendation(recommended, specialization, on_date)
+        return recommended
+
+    async def book_appointment_async(self, patient_id: int, doctor_id: int, on_date: date_class,
+                                     start_time_str: str, duration_minutes: Optional[int] = None,
+                                     send_notification: bool = True, user_session: str = None) -> Appointment:
+        end_time_str = self._end_time(start_time_str, duration_minutes or self.slot_minutes)
+
+        patient = await self.async_storage.get_patient_by_id(patient_id)
+        self._require_patient(patient, patient_id)
+        doctor = self._require_working(await self.async_storage.get_doctor_by_id(doctor_id), doctor_id, on_date)
+
+        with self._tracking_conflicts(doctor_id, on_date):
+            appointment = await self.async_storage.create_appointment(
+                self._appointment_data(patient_id, doctor_id, on_date, start_time_str, end_time_str))
+        self._log_booking(appointment, on_date, user_session)
+
+        if send_notification:
+            try:
+                await blocking_executor.run(notification_manager.send_appointment_confirmation,
+                                            self._with_parties(appointment, patient, doctor))
+            except Exception as e:
+                logger.error(f"Failed to send appointment confirmation: {e}")
+
+        return appointment
+
+    async def reschedule_appointment_async(self, appointment_id: int, new_date: date_class,
+                                           new_time_str: str, send_notification: bool = True,
+                                           user_session: str = None) -> Appointment:
+        appointment = await self.async_storage.get_appointment_by_id(appointment_id)
+        self._require_active(appointment, appointment_id, "cannot be rescheduled")
+
+        old_date = appointment.appointment_date
+        old_time = appointment.start_time
+        update_data = self._reschedule_data(appointment, new_date, new_time_str)
+
+        self._require_working(await self.async_storage.get_doctor_by_id(appointment.doctor_id),
+                              appointment.doctor_id, new_date)
+
+        with self._tracking_conflicts(appointment.doctor_id, new_date):
+            success = await self.async_storage.update_appointment(appointment_id, update_data)
+        self._log_reschedule(appointment, update_data, success, user_session)
+
+        if send_notification:
+            try:
+                await blocking_executor.run(notification_manager.send_reschedule_confirmation,
+                                            appointment, old_date, old_time)
+            except Exception as e:
+                logger.error(f"Failed to send reschedule notification: {e}")
+
+        return appointment
+
+    async def cancel_appointment_async(self, appointment_id: int, send_notification: bool = True,
+                                       user_session: str = None) -> Optional[Appointment]:
+        appointment = await self.async_storage.get_appointment_by_id(appointment_id)
+        self._require_active(appointment, appointment_id, "already cancelled")
+
+        success = await self.async_storage.update_appointment(appointment_id, {'status': 'cancelled'})
+        self._log_cancellation(appointment, success, user_session)
+
+        if send_notification:
+            try:
+                patient = await self.async_storage.get_patient_by_id(appointment.patient_id)
+                await blocking_executor.run(notification_manager.send_cancellation_confirmation,
+                                            *self._cancellation_notice(appointment, patient))
+            except Exception as e:
+                logger.error(f"Failed to send cancellation notification: {e}")
+
+        return appointment
+
+    async def get_booking_analytics_async(self, days: int = 30) -> Dict:
+        try:
+            return await self.async_storage.get_booking_analytics(days)
+        except Exception as e:
+            logger.error(f"Failed to get booking analytics: {e}")
+            return self._empty_analytics(days)
+
+    async def get_doctor_availability_summary_async(self, doctor_id: int, days_ahead: int = 7) -> Dict:
+        doctor = self._require_doctor(await self.get_doctor_by_id_async(doctor_id), doctor_id)
+        days = await self.day_availabilities_async([doctor], self._working_dates(doctor, days_ahead))
+        return self._availability_summary(doctor, days, days_ahead)
+
+    async def get_all_specializations_async(self) -> List[str]:
+        return await self.async_storage.get_all_specializations()
+
+    async def get_doctors_info_by_specialization_async(self, specialization: str) -> List[Dict]:
+        doctors = await self.get_doctors_by_specialization_async(specialization)
+        return [self._doctor_info(doctor) for doctor in doctors]
 
     # ---------------------------
     # Excel/CSV Seeding (for Google Sheets)
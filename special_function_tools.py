@@ -548,21 +548,43 @@
 
 from typing import Optional, Dict, Any, List
 from livekit.agents import function_tool
-from datetime import date, datetime
-from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from contextlib import asynccontextmanager
 
 # Updated imports for Google Sheets
 from scheduler import AppointmentScheduler
 from utils.logger import logger
 from utils.exceptions import *
 from utils.rate_limiter import rate_limiter
-from utils.date_parser import date_parser
+from utils.blocking_executor import blocking_executor
+from utils.date_parser import date_parser, MAX_ADVANCE_DAYS
 from utils.language_support import language_manager
+from utils.specialization_resolver import SpecializationMatch, specialization_resolver
 from config import settings
 
-# Initialize scheduler with Google Sheets backend
+# Initialize scheduler with the backend selected by settings.STORAGE_BACKEND
 scheduler = AppointmentScheduler()
 
+@asynccontextmanager
+async def storage_session():
+    """One storage session per tool call, for backends that have one (SQLAlchemy); a no-op otherwise"""
+    session_scope = getattr(scheduler.async_storage, "session_scope", None)
+    if session_scope is None:
+        yield
+        return
+    async with session_scope():
+        yield
+
+def please_hold(error: Exception, language: str = 'en') -> Dict[str, Any]:
+    """Reply for a call turned away by the blocking executor (saturated or timed out)"""
+    logger.warning(f"Tool call deferred: {error}", executor=blocking_executor.stats())
+    return {
+        "ok": False,
+        "error": language_manager.get_message("please_hold", language),
+        "error_code": "SYSTEM_BUSY",
+        "retry_after_seconds": 2
+    }
+
 def handle_rate_limiting(identifier: str, max_requests: int = 5, window: int = 300) -> Optional[Dict[str, Any]]:
     """Handle rate limiting for function calls"""
     if not rate_limiter.is_allowed(identifier, max_requests, window):
@@ -587,10 +609,11 @@ async def register_patient(name: str, phone: str, age: Optional[int] = None,
         return rate_limit_result
     
     try:
-        patient = scheduler.register_patient(
-            name=name, phone=phone, age=age, 
-            location=location, language=language
-        )
+        async with storage_session():
+            patient = await scheduler.register_patient_async(
+                name=name, phone=phone, age=age, 
+                location=location, language=language
+            )
         
         logger.info("Patient registration successful", 
                    patient_id=patient.patient_id, 
@@ -611,6 +634,8 @@ async def register_patient(name: str, phone: str, age: Optional[int] = None,
     except (PatientNotFoundError, InvalidDateError) as e:
         logger.warning(f"Patient registration validation error: {e}")
         return {"ok": False, "error": str(e), "error_code": "VALIDATION_ERROR"}
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e, language)
     except Exception as e:
         logger.error(f"Patient registration error: {e}")
         return {"ok": False, "error": "Failed to register patient. Please try again.", "error_code": "SYSTEM_ERROR"}
@@ -627,7 +652,7 @@ async def find_patient_enhanced(query: str) -> Dict[str, Any]:
         return rate_limit_result
     
     try:
-        patients = scheduler.enhanced_patient_search(query)
+        patients = await scheduler.enhanced_patient_search_async(query)
         
         result = []
         for p in patients:
@@ -649,6 +674,8 @@ async def find_patient_enhanced(query: str) -> Dict[str, Any]:
             "query": query
         }
         
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Enhanced patient search error: {e}")
         return {"ok": False, "error": "Search failed. Please try again.", "error_code": "SEARCH_ERROR"}
@@ -659,72 +686,9 @@ async def find_patient_enhanced(query: str) -> Dict[str, Any]:
 )
 async def get_available_specializations() -> Dict[str, Any]:
     try:
-        specializations = scheduler.get_all_specializations()
-        
-        # Enhanced specialization information for the agent
-        detailed_specs = {
-            "Cardiology": {
-                "name": "Cardiology",
-                "description": "Heart and cardiovascular system specialists",
-                "common_conditions": ["chest pain", "heart problems", "blood pressure", "palpitations"]
-            },
-            "Orthopedics": {
-                "name": "Orthopedics", 
-                "description": "Bone, joint, and muscle specialists",
-                "common_conditions": ["back pain", "joint pain", "fractures", "arthritis", "sports injuries"]
-            },
-            "General Medicine": {
-                "name": "General Medicine",
-                "description": "General health and medical care",
-                "common_conditions": ["fever", "general checkup", "diabetes", "hypertension"]
-            },
-            "Pediatrics": {
-                "name": "Pediatrics",
-                "description": "Children's health specialists",
-                "common_conditions": ["child health", "vaccination", "growth problems", "pediatric care"]
-            },
-            "Gynecology": {
-                "name": "Gynecology", 
-                "description": "Women's health and reproductive system",
-                "common_conditions": ["women's health", "pregnancy", "menstrual problems", "reproductive health"]
-            },
-            "Dermatology": {
-                "name": "Dermatology",
-                "description": "Skin, hair, and nail specialists", 
-                "common_conditions": ["skin problems", "acne", "hair loss", "rashes"]
-            },
-            "Neurology": {
-                "name": "Neurology",
-                "description": "Nervous system and brain specialists",
-                "common_conditions": ["headache", "stroke", "epilepsy", "neurological problems"]
-            },
-            "ENT": {
-                "name": "ENT",
-                "description": "Ear, nose, and throat specialists",
-                "common_conditions": ["throat pain", "ear problems", "hearing loss", "sinus issues"]
-            },
-            "Ophthalmology": {
-                "name": "Ophthalmology",
-                "description": "Eye and vision care specialists",
-                "common_conditions": ["eye problems", "vision issues", "cataracts", "eye pain"]
-            },
-            "Psychiatry": {
-                "name": "Psychiatry",
-                "description": "Mental health and behavioral specialists",
-                "common_conditions": ["depression", "anxiety", "mental health", "stress"]
-            }
-        }
+        specializations = await scheduler.get_all_specializations_async()
         
-        available_detailed = []
-        for spec in specializations:
-            if spec in detailed_specs:
-                available_detailed.append(detailed_specs[spec])
-            else:
-                available_detailed.append({
-                    "name": spec,
-                    "description": f"{spec} specialist",
-                    "common_conditions": []
-                })
+        available_detailed = [specialization_resolver.describe(spec) for spec in specializations]
         
         return {
             "ok": True,
@@ -732,6 +696,8 @@ async def get_available_specializations() -> Dict[str, Any]:
             "count": len(available_detailed)
         }
         
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Error getting specializations: {e}")
         return {"ok": False, "error": "Failed to get specializations", "error_code": "SYSTEM_ERROR"}
@@ -742,14 +708,14 @@ async def get_available_specializations() -> Dict[str, Any]:
 )
 async def get_doctors_by_specialization(specialization: str) -> Dict[str, Any]:
     try:
-        doctors_info = scheduler.get_doctors_info_by_specialization(specialization)
+        doctors_info = await scheduler.get_doctors_info_by_specialization_async(specialization)
         
         if not doctors_info:
             return {
                 "ok": False,
                 "error": f"No doctors found for {specialization}",
                 "error_code": "NO_DOCTORS_FOUND",
-                "available_specializations": scheduler.get_all_specializations()
+                "available_specializations": await scheduler.get_all_specializations_async()
             }
         
         # Format for agent communication
@@ -774,10 +740,76 @@ async def get_doctors_by_specialization(specialization: str) -> Dict[str, Any]:
             "message": f"Found {len(formatted_doctors)} excellent doctors for {specialization}"
         }
         
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Error getting doctors for {specialization}: {e}")
         return {"ok": False, "error": f"Failed to get doctors for {specialization}", "error_code": "SYSTEM_ERROR"}
 
+@function_tool(
+    name="find_doctors_for_symptoms",
+    description="Find the right specialization and its doctors from what the patient describes: symptoms, a condition, a treatment or a specialty name, in English, Tamil or Hindi. Args: description (str, e.g. 'bleeding gums', 'பல் வலி', 'दांत दर्द')"
+)
+async def find_doctors_for_symptoms(description: str) -> Dict[str, Any]:
+    try:
+        available = await scheduler.get_all_specializations_async()
+        matches = specialization_resolver.resolve(description, available)
+        
+        if not matches:
+            # A specialty the table does not know can still be a name the doctors list
+            doctors_info = await scheduler.get_doctors_info_by_specialization_async(description)
+            if not doctors_info:
+                outside = [match.specialization for match in specialization_resolver.resolve(description)]
+                return {
+                    "ok": False,
+                    "error": (f"We do not have {', '.join(outside)} here" if outside
+                              else f"Could not tell which specialization '{description}' needs"),
+                    "error_code": "NO_SPECIALIZATION_MATCH",
+                    "available_specializations": available
+                }
+            matches = [SpecializationMatch(description, 0, [])]
+            doctors_by_spec = [doctors_info]
+        else:
+            doctors_by_spec = [await scheduler.get_doctors_info_by_specialization_async(match.specialization)
+                               for match in matches]
+        
+        suggestions, doctors, seen = [], [], set()
+        for match, doctors_info in zip(matches, doctors_by_spec):
+            info = specialization_resolver.describe(match.specialization)
+            suggestions.append({
+                "specialization": match.specialization,
+                "description": info["description"],
+                "matched_terms": match.matched_terms,
+                "doctor_count": len(doctors_info)
+            })
+            for doctor in doctors_info:
+                if doctor["doctor_id"] in seen:
+                    continue
+                seen.add(doctor["doctor_id"])
+                doctors.append({
+                    "doctor_id": doctor["doctor_id"],
+                    "name": doctor["name"],
+                    "specialization": match.specialization,
+                    "qualification": doctor["qualification"],
+                    "experience": f"{doctor['experience_years']} years of experience",
+                    "consultation_fee": f"₹{doctor['consultation_fee']}",
+                    "working_days": ", ".join(doctor["working_days"])
+                })
+        
+        return {
+            "ok": True,
+            "specializations": suggestions,
+            "doctors": doctors,
+            "count": len(doctors),
+            "message": f"{matches[0].specialization} is the best match; found {len(doctors)} doctors"
+        }
+        
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
+    except Exception as e:
+        logger.error(f"Error finding doctors for '{description}': {e}")
+        return {"ok": False, "error": "Failed to find doctors. Please try again.", "error_code": "SYSTEM_ERROR"}
+
 @function_tool(
     name="recommend_doctor", 
     description="Recommend a doctor based on specialization and desired date with intelligent suggestions. Args: specialization (str), desired_date (str, natural language like 'tomorrow', 'next Monday', '15th December'), patient_id (int, optional), first_visit (bool, optional), patient_location (str, optional)"
@@ -797,7 +829,7 @@ async def recommend_doctor(specialization: str, desired_date: str, patient_id: O
         # Get current datetime info for better recommendations
         datetime_info = date_parser.get_current_datetime_info()
         
-        doctor = scheduler.recommend_doctor(
+        doctor = await scheduler.recommend_doctor_async(
             patient_id=patient_id,
             specialization=specialization,
             on_date=on_date,
@@ -809,10 +841,7 @@ async def recommend_doctor(specialization: str, desired_date: str, patient_id: O
             # Get availability for this doctor on the requested date
             available_slots = []
             try:
-                booked_slots = scheduler.get_booked_slots(doctor.doctor_id, on_date)
-                available_slots = scheduler.generate_available_slots(
-                    doctor.working_start, doctor.working_end, booked_slots
-                )
+                available_slots = await scheduler.free_slots_async(doctor, on_date)
             except Exception as e:
                 logger.warning(f"Could not get slots for recommended doctor: {e}")
             
@@ -856,24 +885,22 @@ async def recommend_doctor(specialization: str, desired_date: str, patient_id: O
             }
         else:
             # Get alternative suggestions
-            all_doctors = scheduler.get_doctors_by_specialization(specialization)
-            alternatives = []
-            
-            for alt_doctor in all_doctors[:3]:  # Top 3 alternatives
-                try:
-                    alt_slots = scheduler.get_booked_slots(alt_doctor.doctor_id, on_date)
-                    alt_available = scheduler.generate_available_slots(
-                        alt_doctor.working_start, alt_doctor.working_end, alt_slots
-                    )
-                    if alt_available:
-                        alternatives.append({
-                            "doctor_id": alt_doctor.doctor_id,
-                            "name": alt_doctor.name,
-                            "available_slots": len(alt_available),
-                            "experience_years": alt_doctor.experience_years
-                        })
-                except Exception:
-                    continue
+            # Nobody in recommend_doctor's ranking works on on_date, so offer each doctor's
+            # next free slot instead, soonest first (ties keep the ranking order)
+            ranking = await scheduler.rank_doctors_async(specialization, on_date, patient_location)
+            openings = await scheduler.next_openings_async([ranked.doctor for ranked in ranking], on_date)
+            alternatives = [
+                {
+                    "doctor_id": opening.doctor.doctor_id,
+                    "name": opening.doctor.name,
+                    "next_available_date": opening.on_date.isoformat(),
+                    "next_available_display": date_parser.format_date_for_display(opening.on_date),
+                    "next_available_time": opening.start_time,
+                    "working_days": opening.doctor.working_days,
+                    "experience_years": opening.doctor.experience_years
+                }
+                for opening in openings[:3]  # Top 3 alternatives
+            ]
             
             formatted_date = date_parser.format_date_for_display(on_date)
             
@@ -881,18 +908,22 @@ async def recommend_doctor(specialization: str, desired_date: str, patient_id: O
                           specialization=specialization, 
                           date=on_date.isoformat())
             
+            suggestions = [
+                "Consider morning or evening slots if available",
+                "I can check availability for the entire week"
+            ]
+            if openings:
+                suggestions.insert(0, f"Try a different date - would {openings[0].on_date.strftime('%A')} work?")
+            
             return {
                 "ok": False,
                 "error": f"No doctors available for {specialization} on {formatted_date}.",
                 "error_code": "NO_DOCTOR_AVAILABLE",
                 "alternatives": {
-                    "message": f"However, I found these doctors for {specialization}:",
+                    "message": (f"However, these doctors for {specialization} have openings soon:" if alternatives
+                                else f"No doctor for {specialization} has a free slot in the booking window."),
                     "doctors": alternatives,
-                    "suggestions": [
-                        f"Try a different date - would {(on_date + datetime.timedelta(days=1)).strftime('%A')} work?",
-                        "Consider morning or evening slots if available",
-                        "I can check availability for the entire week"
-                    ]
+                    "suggestions": suggestions
                 }
             }
             
@@ -914,6 +945,8 @@ async def recommend_doctor(specialization: str, desired_date: str, patient_id: O
                 "suggestions": suggestion_text
             }
         }
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Doctor recommendation error: {e}")
         return {"ok": False, "error": "Failed to recommend doctor. Please try again.", "error_code": "SYSTEM_ERROR"}
@@ -932,7 +965,7 @@ async def get_available_slots_enhanced(doctor_id: int, date: str, preferred_time
     try:
         target_date = date_parser.parse_natural_language_date(date, "availability")
         
-        doctor = scheduler.get_doctor_by_id(doctor_id)
+        doctor = await scheduler.get_doctor_by_id_async(doctor_id)
         if not doctor:
             return {"ok": False, "error": f"Doctor with ID {doctor_id} not found.", "error_code": "DOCTOR_NOT_FOUND"}
         
@@ -951,10 +984,8 @@ async def get_available_slots_enhanced(doctor_id: int, date: str, preferred_time
                 ][:3]
             }
         
-        booked_slots = scheduler.get_booked_slots(doctor_id, target_date)
-        available_slots = scheduler.generate_available_slots(
-            doctor.working_start, doctor.working_end, booked_slots, preferred_time
-        )
+        day = await scheduler.day_availability_async(doctor, target_date)
+        available_slots = scheduler.ordered_free_slots(day, preferred_time)
         
         # Categorize slots by time of day
         morning_slots = [slot for slot in available_slots if int(slot.split(':')[0]) < 12]
@@ -990,7 +1021,7 @@ async def get_available_slots_enhanced(doctor_id: int, date: str, preferred_time
                     "evening": {"slots": evening_slots, "count": len(evening_slots)}
                 },
                 "recommended_slots": available_slots[:6],  # Top 6 recommended slots
-                "booked_slots_count": len(booked_slots)
+                "booked_slots_count": day.booked_count
             },
             "working_hours": {
                 "start": doctor.working_start,
@@ -1012,10 +1043,82 @@ async def get_available_slots_enhanced(doctor_id: int, date: str, preferred_time
                 for desc, date_obj in date_suggestions[:5]
             ]
         }
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Slot availability error: {e}")
         return {"ok": False, "error": "Failed to get available slots. Please try again.", "error_code": "SYSTEM_ERROR"}
 
+@function_tool(
+    name="find_earliest_slots",
+    description="Find the earliest free appointment slots for a specialization across all its doctors, e.g. to tell the caller 'Dr. X's next available slot is...'. Args: specialization (str), count (int, optional, default 3), time_of_day (str, optional - 'morning', 'afternoon', 'evening' or a range like '10:00-13:00'), weekdays (str, optional - e.g. 'Mon,Wed' or 'weekend'), from_date (str, optional, natural language)"
+)
+async def find_earliest_slots(specialization: str, count: int = 3, time_of_day: Optional[str] = None,
+                              weekdays: Optional[str] = None, from_date: Optional[str] = None) -> Dict[str, Any]:
+    
+    # Rate limiting
+    rate_limit_result = handle_rate_limiting(f"find_earliest_slots:{specialization}")
+    if rate_limit_result:
+        return rate_limit_result
+    
+    try:
+        start_date = date_parser.parse_natural_language_date(from_date, "booking") if from_date else None
+        matches = await scheduler.find_earliest_slots_async(
+            specialization, count=max(1, min(count, 10)), from_date=start_date,
+            time_of_day=time_of_day, weekdays=weekdays
+        )
+        
+        if not matches:
+            doctors = await scheduler.get_doctors_by_specialization_async(specialization)
+            if not doctors:
+                return {
+                    "ok": False,
+                    "error": f"No doctors found for {specialization}",
+                    "error_code": "NO_DOCTORS_FOUND",
+                    "available_specializations": await scheduler.get_all_specializations_async()
+                }
+            return {
+                "ok": False,
+                "error": f"No free {specialization} slots match those preferences in the next {MAX_ADVANCE_DAYS} days.",
+                "error_code": "NO_SLOTS_FOUND",
+                "suggestions": ["Try a different time of day", "Try other days of the week"]
+            }
+        
+        slots = [
+            {
+                "doctor_id": match.doctor.doctor_id,
+                "doctor_name": match.doctor.name,
+                "date": match.on_date.isoformat(),
+                "formatted_date": date_parser.format_date_for_display(match.on_date),
+                "day_of_week": match.on_date.strftime("%A"),
+                "start_time": match.start_time
+            }
+            for match in matches
+        ]
+        first = slots[0]
+        
+        logger.info("Earliest slot search completed", 
+                   specialization=specialization,
+                   found=len(slots),
+                   first_date=first["date"])
+        
+        return {
+            "ok": True,
+            "specialization": specialization,
+            "slots": slots,
+            "count": len(slots),
+            "message": f"Dr. {first['doctor_name']}'s next available slot is {first['formatted_date']} at {first['start_time']}"
+        }
+        
+    except InvalidDateError as e:
+        logger.warning(f"Invalid constraints in earliest slot search: {e}")
+        return {"ok": False, "error": str(e), "error_code": "INVALID_DATE"}
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
+    except Exception as e:
+        logger.error(f"Earliest slot search error: {e}")
+        return {"ok": False, "error": "Failed to find available slots. Please try again.", "error_code": "SYSTEM_ERROR"}
+
 @function_tool(
     name="book_appointment_enhanced", 
     description="Book an appointment with comprehensive validation, confirmation details, and notifications. Args: patient_id (int), doctor_id (int), date (str, natural language), start_time (str, HH:MM), send_sms (bool, optional)"
@@ -1030,14 +1133,15 @@ async def book_appointment_enhanced(patient_id: int, doctor_id: int, date: str,
     try:
         target_date = date_parser.parse_natural_language_date(date, "booking")
         
-        appointment = scheduler.book_appointment(
-            patient_id=patient_id,
-            doctor_id=doctor_id,
-            on_date=target_date,
-            start_time_str=start_time,
-            send_notification=send_sms,
-            user_session="phone_agent"
-        )
+        async with storage_session():
+            appointment = await scheduler.book_appointment_async(
+                patient_id=patient_id,
+                doctor_id=doctor_id,
+                on_date=target_date,
+                start_time_str=start_time,
+                send_notification=send_sms,
+                user_session="phone_agent"
+            )
         
         # Get comprehensive appointment details
         formatted_date = date_parser.format_date_for_display(target_date)
@@ -1101,12 +1205,10 @@ async def book_appointment_enhanced(patient_id: int, doctor_id: int, date: str,
         # Try to suggest alternative slots
         try:
             target_date = date_parser.parse_natural_language_date(date, "booking")
-            doctor = scheduler.get_doctor_by_id(doctor_id)
+            doctor = await scheduler.get_doctor_by_id_async(doctor_id)
             if doctor:
-                booked_slots = scheduler.get_booked_slots(doctor_id, target_date)
-                available_alternatives = scheduler.generate_available_slots(
-                    doctor.working_start, doctor.working_end, booked_slots
-                )
+                # A slot conflict drops the day from the availability calendar, so this reads it afresh
+                available_alternatives = await scheduler.free_slots_async(doctor, target_date)
                 
                 return {
                     "ok": False, 
@@ -1129,10 +1231,69 @@ async def book_appointment_enhanced(patient_id: int, doctor_id: int, date: str,
     except InvalidDateError as e:
         logger.warning(f"Date validation error in booking: {e}")
         return {"ok": False, "error": str(e), "error_code": "INVALID_DATE"}
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Appointment booking error: {e}")
         return {"ok": False, "error": "Failed to book appointment. Please try again.", "error_code": "SYSTEM_ERROR"}
 
+@function_tool(
+    name="get_my_appointments",
+    description="List a patient's upcoming appointments (with their appointment_id) and their last visit, so a caller can reschedule or cancel without knowing the appointment_id. Args: patient_id (int)"
+)
+async def get_my_appointments(patient_id: int) -> Dict[str, Any]:
+    
+    # Rate limiting
+    rate_limit_result = handle_rate_limiting(f"my_appointments:{patient_id}")
+    if rate_limit_result:
+        return rate_limit_result
+    
+    try:
+        visits = await scheduler.patient_visits_async(patient_id)
+        upcoming = []
+        for appointment in visits.upcoming():
+            on_date = datetime.strptime(str(appointment.appointment_date), "%Y-%m-%d").date()
+            upcoming.append({
+                "appointment_id": appointment.appointment_id,
+                "doctor_id": appointment.doctor_id,
+                "doctor_name": appointment.doctor_name,
+                "date": on_date.isoformat(),
+                "formatted_date": date_parser.format_date_for_display(on_date),
+                "day_of_week": on_date.strftime("%A"),
+                "start_time": appointment.start_time,
+                "end_time": appointment.end_time,
+                "status": appointment.status
+            })
+        
+        last = visits.last_visit()
+        last_visit = {
+            "date": str(last.appointment_date),
+            "doctor_id": last.doctor_id,
+            "doctor_name": last.doctor_name
+        } if last else None
+        
+        if upcoming:
+            first = upcoming[0]
+            message = (f"You have {len(upcoming)} upcoming appointment(s). The next one is with "
+                       f"{first['doctor_name']} on {first['formatted_date']} at {first['start_time']}")
+        else:
+            message = "You have no upcoming appointments"
+        
+        return {
+            "ok": True,
+            "patient_id": patient_id,
+            "upcoming": upcoming,
+            "count": len(upcoming),
+            "last_visit": last_visit,
+            "message": message
+        }
+        
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
+    except Exception as e:
+        logger.error(f"Error listing appointments for patient {patient_id}: {e}")
+        return {"ok": False, "error": "Failed to get your appointments. Please try again.", "error_code": "SYSTEM_ERROR"}
+
 @function_tool(
     name="reschedule_appointment_enhanced", 
     description="Reschedule an existing appointment with validation and comprehensive confirmation. Args: appointment_id (int), new_date (str, natural language), new_time (str, HH:MM), send_sms (bool, optional)"
@@ -1148,7 +1309,7 @@ async def reschedule_appointment_enhanced(appointment_id: int, new_date: str, ne
         target_date = date_parser.parse_natural_language_date(new_date, "rescheduling")
         
         # Get current appointment details before rescheduling
-        current_appointment = scheduler.sheets.get_appointment_by_id(appointment_id)
+        current_appointment = await scheduler.get_appointment_by_id_async(appointment_id)
         if not current_appointment:
             return {"ok": False, "error": f"Appointment {appointment_id} not found.", "error_code": "APPOINTMENT_NOT_FOUND"}
         
@@ -1157,13 +1318,14 @@ async def reschedule_appointment_enhanced(appointment_id: int, new_date: str, ne
         )
         old_time_display = datetime.strptime(current_appointment.start_time, "%H:%M").strftime("%I:%M %p")
         
-        appointment = scheduler.reschedule_appointment(
-            appointment_id=appointment_id,
-            new_date=target_date,
-            new_time_str=new_time,
-            send_notification=send_sms,
-            user_session="phone_agent"
-        )
+        async with storage_session():
+            appointment = await scheduler.reschedule_appointment_async(
+                appointment_id=appointment_id,
+                new_date=target_date,
+                new_time_str=new_time,
+                send_notification=send_sms,
+                user_session="phone_agent"
+            )
         
         formatted_date = date_parser.format_date_for_display(target_date)
         display_time = datetime.strptime(new_time, "%H:%M").strftime("%I:%M %p")
@@ -1211,14 +1373,11 @@ async def reschedule_appointment_enhanced(appointment_id: int, new_date: str, ne
         # Suggest alternative slots for rescheduling
         try:
             target_date = date_parser.parse_natural_language_date(new_date, "rescheduling")
-            current_appointment = scheduler.sheets.get_appointment_by_id(appointment_id)
+            current_appointment = await scheduler.get_appointment_by_id_async(appointment_id)
             if current_appointment:
-                doctor = scheduler.get_doctor_by_id(current_appointment.doctor_id)
+                doctor = await scheduler.get_doctor_by_id_async(current_appointment.doctor_id)
                 if doctor:
-                    booked_slots = scheduler.get_booked_slots(current_appointment.doctor_id, target_date)
-                    available_alternatives = scheduler.generate_available_slots(
-                        doctor.working_start, doctor.working_end, booked_slots
-                    )
+                    available_alternatives = await scheduler.free_slots_async(doctor, target_date)
                     
                     return {
                         "ok": False, 
@@ -1237,6 +1396,8 @@ async def reschedule_appointment_enhanced(appointment_id: int, new_date: str, ne
     except InvalidDateError as e:
         logger.warning(f"Date validation error in rescheduling: {e}")
         return {"ok": False, "error": str(e), "error_code": "INVALID_DATE"}
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Appointment rescheduling error: {e}")
         return {"ok": False, "error": "Failed to reschedule appointment. Please try again.", "error_code": "SYSTEM_ERROR"}
@@ -1254,7 +1415,7 @@ async def cancel_appointment_enhanced(appointment_id: int, send_sms: bool = True
     
     try:
         # Get appointment details before cancellation
-        current_appointment = scheduler.sheets.get_appointment_by_id(appointment_id)
+        current_appointment = await scheduler.get_appointment_by_id_async(appointment_id)
         if not current_appointment:
             return {"ok": False, "error": f"Appointment {appointment_id} not found or already cancelled.", "error_code": "APPOINTMENT_NOT_FOUND"}
         
@@ -1263,11 +1424,12 @@ async def cancel_appointment_enhanced(appointment_id: int, send_sms: bool = True
         formatted_date = date_parser.format_date_for_display(appointment_date_obj)
         display_time = datetime.strptime(current_appointment.start_time, "%H:%M").strftime("%I:%M %p")
         
-        appointment = scheduler.cancel_appointment(
-            appointment_id=appointment_id,
-            send_notification=send_sms,
-            user_session="phone_agent"
-        )
+        async with storage_session():
+            appointment = await scheduler.cancel_appointment_async(
+                appointment_id=appointment_id,
+                send_notification=send_sms,
+                user_session="phone_agent"
+            )
         
         if not appointment:
             return {"ok": False, "error": f"Appointment {appointment_id} not found or already cancelled.", "error_code": "APPOINTMENT_NOT_FOUND"}
@@ -1312,6 +1474,8 @@ async def cancel_appointment_enhanced(appointment_id: int, send_sms: bool = True
     except BookingConflictError as e:
         logger.warning(f"Appointment cancellation conflict: {e}")
         return {"ok": False, "error": str(e), "error_code": "CANCELLATION_ERROR"}
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Appointment cancellation error: {e}")
         return {"ok": False, "error": "Failed to cancel appointment. Please try again.", "error_code": "SYSTEM_ERROR"}
@@ -1323,7 +1487,7 @@ async def cancel_appointment_enhanced(appointment_id: int, send_sms: bool = True
 async def get_appointment_analytics(days: int = 30) -> Dict[str, Any]:
     
     try:
-        analytics = scheduler.get_booking_analytics(days)
+        analytics = await scheduler.get_booking_analytics_async(days)
         
         logger.info("Analytics request completed", days=days)
         
@@ -1334,6 +1498,8 @@ async def get_appointment_analytics(days: int = 30) -> Dict[str, Any]:
             "period": f"Last {days} days"
         }
         
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Analytics generation error: {e}")
         return {"ok": False, "error": "Failed to generate analytics.", "error_code": "ANALYTICS_ERROR"}
@@ -1345,7 +1511,7 @@ async def get_appointment_analytics(days: int = 30) -> Dict[str, Any]:
 async def get_doctor_availability(doctor_id: int, days_ahead: int = 7) -> Dict[str, Any]:
     
     try:
-        availability = scheduler.get_doctor_availability_summary(doctor_id, days_ahead)
+        availability = await scheduler.get_doctor_availability_summary_async(doctor_id, days_ahead)
         
         logger.info("Doctor availability check completed", 
                    doctor_id=doctor_id, 
@@ -1358,6 +1524,8 @@ async def get_doctor_availability(doctor_id: int, days_ahead: int = 7) -> Dict[s
         
     except DoctorNotFoundError as e:
         return {"ok": False, "error": str(e), "error_code": "DOCTOR_NOT_FOUND"}
+    except (ServiceBusyError, OperationTimeoutError) as e:
+        return please_hold(e)
     except Exception as e:
         logger.error(f"Doctor availability error: {e}")
         return {"ok": False, "error": "Failed to get doctor availability.", "error_code": "SYSTEM_ERROR"}
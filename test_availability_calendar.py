@@ -0,0 +1,143 @@
+#test_availability_calendar.py
+
+import asyncio
+from datetime import date, timedelta
+
+from utils.availability_calendar import AvailabilityCalendar
+from utils.storage_models import Appointment, Doctor
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def doctor():
+    return Doctor(doctor_id=7, name='Dr. Test', working_start='09:00', working_end='12:00')
+
+
+def appointment(appointment_id, start_time, end_time='', on_date=TOMORROW, status='scheduled'):
+    return Appointment(appointment_id=appointment_id, doctor_id=7, appointment_date=on_date.isoformat(),
+                       start_time=start_time, end_time=end_time, status=status)
+
+
+class Storage:
+    def __init__(self, *appointments):
+        self.appointments = list(appointments)
+        self.reads = 0
+
+    def load(self):
+        self.reads += 1
+        return list(self.appointments)
+
+
+def test_days_are_loaded_once_and_updated_in_place():
+    calendar = AvailabilityCalendar(30, clock=Clock())
+    storage = Storage(appointment(1, '10:00', '11:00'))
+    day = calendar.get(doctor(), TOMORROW, storage.load)
+    assert (day.booked_count, day.free_count) == (1, 4)
+    assert day.free_slots() == ['09:00', '09:30', '11:00', '11:30']
+
+    calendar.book(appointment(2, '11:00'))
+    booked = appointment(3, '09:00', '09:45')
+    calendar.book(booked)
+    day = calendar.get(doctor(), TOMORROW, storage.load)
+    assert day.free_slots() == ['11:30']
+    assert day.first_free('09:00') == '11:30'
+
+    calendar.release(booked)
+    assert calendar.get(doctor(), TOMORROW, storage.load).free_slots() == ['09:00', '09:30', '11:30']
+    assert storage.reads == 1
+    assert calendar.stats()['hits'] == 2
+
+
+def test_days_expire_and_follow_working_hours():
+    clock = Clock()
+    calendar = AvailabilityCalendar(30, ttl=60, clock=clock)
+    storage = Storage()
+    calendar.get(doctor(), TOMORROW, storage.load)
+    clock.now = 61
+    calendar.get(doctor(), TOMORROW, storage.load)
+    assert storage.reads == 2
+    # Changed working hours give the day a different slot grid
+    day = calendar.get(Doctor(doctor_id=7, working_start='09:00', working_end='10:00'), TOMORROW, storage.load)
+    assert storage.reads == 3
+    assert day.free_slots() == ['09:00', '09:30']
+
+
+def test_a_load_overlapping_a_booking_is_not_cached():
+    calendar = AvailabilityCalendar(30, clock=Clock())
+    storage = Storage()
+
+    def slow_load():
+        # Another call books while this read is in flight and sees no cached day to update
+        calendar.book(appointment(1, '10:00'))
+        return storage.load()
+
+    assert calendar.get(doctor(), TOMORROW, slow_load).free_count == 6
+    storage.appointments.append(appointment(1, '10:00'))
+    assert calendar.get(doctor(), TOMORROW, storage.load).free_count == 5
+    assert storage.reads == 2
+
+
+def test_invalidate_and_horizon():
+    calendar = AvailabilityCalendar(30, horizon_days=10, clock=Clock())
+    storage = Storage()
+    far = date.today() + timedelta(days=30)
+    calendar.get(doctor(), far, storage.load)
+    calendar.get(doctor(), far, storage.load)
+    assert storage.reads == 2
+
+    calendar.get(doctor(), TOMORROW, storage.load)
+    calendar.invalidate(7, TOMORROW.isoformat())
+    calendar.get(doctor(), TOMORROW, storage.load)
+    assert storage.reads == 4
+    calendar.invalidate(doctor_id=7)
+    assert calendar.stats()['days'] == 0
+
+
+def test_get_many_reads_missing_days_in_one_call():
+    calendar = AvailabilityCalendar(30, clock=Clock())
+    doctors = [doctor(), Doctor(doctor_id=8, working_start='09:00', working_end='10:00')]
+    day_after = TOMORROW + timedelta(days=1)
+    calls = []
+
+    def load_many(doctor_ids, dates):
+        calls.append((doctor_ids, dates))
+        return {(7, TOMORROW.isoformat()): [appointment(1, '09:00')]}
+
+    calendar.get(doctors[0], TOMORROW, Storage(appointment(1, '09:00')).load)
+    days = calendar.get_many(doctors, [TOMORROW, day_after], load_many)
+    # Doctor 7 on TOMORROW was cached; the other three days come from one read
+    assert calls == [([7, 8], [TOMORROW.isoformat(), day_after.isoformat()])]
+    assert {key: day.booked_count for key, day in days.items()} == {
+        (7, TOMORROW.isoformat()): 1, (7, day_after.isoformat()): 0,
+        (8, TOMORROW.isoformat()): 0, (8, day_after.isoformat()): 0}
+    assert calendar.get_many(doctors, [TOMORROW, day_after], load_many) == days
+    assert len(calls) == 1
+
+
+def test_async_loads_share_the_calendar():
+    calendar = AvailabilityCalendar(30, clock=Clock())
+    storage = Storage(appointment(1, '09:00'), appointment(2, '09:30'))
+
+    async def load():
+        return storage.load()
+
+    async def run():
+        first = await calendar.get_async(doctor(), TOMORROW, load)
+        second = await calendar.get_async(doctor(), TOMORROW, load)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert first.first_free() == '10:00'
+    calendar.release(appointment(1, '09:00', status='cancelled'))
+    assert first.first_free() == '10:00'
+    calendar.release(appointment(1, '09:00'))
+    assert first.first_free() == '09:00'
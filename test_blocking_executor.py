@@ -0,0 +1,145 @@
+#test_blocking_executor.py
+
+import asyncio
+import threading
+from contextvars import ContextVar
+
+import pytest
+
+from utils.blocking_executor import BlockingExecutor
+from utils.exceptions import ServiceBusyError, OperationTimeoutError
+from utils.storage_backend import AsyncBackendAdapter
+
+request_id: ContextVar[str] = ContextVar('request_id', default='')
+
+
+@pytest.fixture
+def executor():
+    instance = BlockingExecutor(max_workers=2, max_queue=1, timeout=2.0)
+    yield instance
+    instance.shutdown()
+
+
+def test_runs_off_the_event_loop_with_caller_context(executor):
+    async def run():
+        request_id.set('call-1')
+        loop_thread = threading.get_ident()
+        thread, seen = await executor.run(lambda: (threading.get_ident(), request_id.get()))
+        assert thread != loop_thread
+        assert seen == 'call-1'
+
+    asyncio.run(run())
+    stats = executor.stats()
+    assert (stats['submitted'], stats['completed'], stats['pending']) == (1, 1, 0)
+
+
+def test_rejects_calls_past_capacity(executor):
+    release = threading.Event()
+
+    async def run():
+        held = [asyncio.create_task(executor.run(release.wait)) for _ in range(executor.capacity)]
+        await asyncio.sleep(0.05)
+        assert executor.stats()['running'] == 2
+        assert executor.stats()['queued'] == 1
+        with pytest.raises(ServiceBusyError):
+            await executor.run(lambda: None)
+        release.set()
+        await asyncio.gather(*held)
+
+    asyncio.run(run())
+    stats = executor.stats()
+    assert stats['rejected'] == 1
+    assert stats['peak_pending'] == executor.capacity
+    assert stats['pending'] == 0
+
+
+def test_timeout_releases_the_caller_and_frees_queued_slots(executor):
+    release = threading.Event()
+
+    async def run():
+        running = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        # Queued behind two busy workers, so it times out before it starts
+        with pytest.raises(OperationTimeoutError):
+            await executor.run(lambda: None, timeout=0.05)
+        assert executor.stats()['pending'] == 2
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(run())
+    stats = executor.stats()
+    assert stats['timed_out'] == 1
+    assert stats['pending'] == 0
+
+
+def test_failures_propagate(executor):
+    async def run():
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(lambda: 1 / 0)
+
+    asyncio.run(run())
+    stats = executor.stats()
+    assert (stats['failed'], stats['completed']) == (1, 0)
+
+
+def test_writes_time_out_only_before_they_start(executor):
+    release = threading.Event()
+    ran = []
+
+    def write(name):
+        release.wait()
+        ran.append(name)
+        return name
+
+    async def run():
+        # A write that has started outlives its timeout and still returns
+        slow_write = asyncio.create_task(executor.run_to_completion(write, 'slow', timeout=0.05))
+        blocker = asyncio.create_task(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        # Both workers are busy, so this write is still queued at its timeout and is dropped
+        with pytest.raises(OperationTimeoutError):
+            await executor.run_to_completion(write, 'queued', timeout=0.05)
+        release.set()
+        assert await slow_write == 'slow'
+        await blocker
+
+    asyncio.run(run())
+    assert ran == ['slow']
+    stats = executor.stats()
+    assert (stats['timed_out'], stats['completed'], stats['pending']) == (1, 2, 0)
+
+
+def test_adapter_runs_backend_calls_on_the_executor(executor):
+    class Backend:
+        def get_all_specializations(self):
+            return [threading.current_thread().name]
+
+    adapter = AsyncBackendAdapter(Backend(), executor)
+    assert asyncio.run(adapter.get_all_specializations())[0].startswith('blocking')
+    assert executor.stats()['completed'] == 1
+
+
+def test_adapter_waits_for_writes_past_the_timeout():
+    class Backend:
+        def __init__(self):
+            self.appointments = []
+
+        def create_appointment(self, data):
+            threading.Event().wait(0.2)
+            self.appointments.append(data)
+            return data
+
+        def get_all_specializations(self):
+            threading.Event().wait(0.2)
+            return []
+
+    executor = BlockingExecutor(max_workers=2, max_queue=1, timeout=0.05)
+    backend = Backend()
+    adapter = AsyncBackendAdapter(backend, executor)
+    try:
+        with pytest.raises(OperationTimeoutError):
+            asyncio.run(adapter.get_all_specializations())
+        assert asyncio.run(adapter.create_appointment({'appointment_id': 1})) == {'appointment_id': 1}
+        assert backend.appointments == [{'appointment_id': 1}]
+    finally:
+        executor.shutdown()
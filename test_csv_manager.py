@@ -0,0 +1,725 @@
+#test_csv_manager.py
+
+import os
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.column_store import ColumnStore
+from utils.csv_manager import CSVManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    yield mgr
+    mgr.close()
+
+
+def seed(mgr):
+    doctor = mgr.create_doctor({'name': 'Dr. Test', 'qualification': 'BDS', 'specializations': 'General Dentist'})
+    patient = mgr.create_patient({'name': 'Asha', 'phone': '9876543210'})
+    return doctor, patient
+
+
+def crash(mgr):
+    """Stop a manager without compacting, leaving its journals behind"""
+    mgr._stop_event.set()
+    for journal in mgr._all_journals():
+        journal.close()
+
+
+def test_writes_are_journaled_not_rewritten(manager, tmp_path):
+    doctor, patient = seed(manager)
+    manager.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': '2026-10-20', 'start_time': '10:00', 'end_time': '10:30',
+    })
+    manager.flush()
+
+    assert not os.path.exists(tmp_path / 'appointments' / '2026-10.csv')
+    with open(tmp_path / 'appointments' / '2026-10.journal') as f:
+        assert len(f.readlines()) == 1
+
+
+def test_journal_is_replayed_on_startup(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    doctor, patient = seed(mgr)
+    apt = mgr.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': '2026-10-20', 'start_time': '10:00', 'end_time': '10:30',
+    })
+    mgr.update_appointment(apt.appointment_id, {'status': 'cancelled'})
+    mgr.update_patient(patient.patient_id, {'name': 'Asha R'})
+    crash(mgr)
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert reloaded.get_appointment_by_id(apt.appointment_id).status == 'cancelled'
+        assert reloaded.get_patient_by_id(patient.patient_id).name == 'Asha R'
+        assert reloaded.get_doctor_by_id(doctor.doctor_id).name == 'Dr. Test'
+    finally:
+        reloaded.close()
+
+
+def test_compaction_folds_journal_into_csv(manager, tmp_path):
+    doctor, patient = seed(manager)
+    manager.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': '2026-10-20', 'start_time': '10:00', 'end_time': '10:30',
+    })
+
+    manager.compact()
+
+    assert not os.path.exists(tmp_path / 'appointments' / '2026-10.journal')
+    saved = pd.read_csv(tmp_path / 'appointments' / '2026-10.csv')
+    assert saved['appointment_id'].tolist() == [1]
+
+
+def test_replay_after_interrupted_compaction_is_idempotent(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    doctor, patient = seed(mgr)
+    mgr.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': '2026-10-20', 'start_time': '10:00', 'end_time': '10:30',
+    })
+    # Base file written but the rotated journal was never discarded
+    partition = mgr.partitions['2026-10']
+    partition.journal.rotate()
+    mgr._save_csv(partition.store.frame(), partition.file_path)
+    crash(mgr)
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert len(reloaded.appointments_df) == 1
+    finally:
+        reloaded.close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def journal_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return len(f.readlines())
+
+
+def test_sync_mode_writes_before_returning(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600, durability='sync', flush_interval=3600)
+    try:
+        seed(mgr)
+        assert journal_lines(tmp_path / 'patients.journal') == 1
+    finally:
+        mgr.close()
+
+
+def test_batched_mode_flushes_in_background(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600, durability='batched',
+                     flush_interval=0.05, flush_threshold=1000)
+    try:
+        seed(mgr)
+        assert wait_for(lambda: journal_lines(tmp_path / 'patients.journal') == 1)
+    finally:
+        mgr.close()
+
+
+def test_batched_mode_flushes_early_at_threshold(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600, durability='batched',
+                     flush_interval=3600, flush_threshold=10)
+    try:
+        for n in range(10):
+            mgr.create_patient({'name': f"P{n}", 'phone': f"90000{n:05d}"})
+        assert wait_for(lambda: journal_lines(tmp_path / 'patients.journal') == 10)
+    finally:
+        mgr.close()
+
+
+def test_interval_mode_rewrites_dirty_tables(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600, durability='interval', flush_interval=0.05)
+    try:
+        seed(mgr)
+        assert wait_for(lambda: os.path.exists(tmp_path / 'patients.csv'))
+        assert not os.path.exists(tmp_path / 'patients.journal')
+        assert pd.read_csv(tmp_path / 'patients.csv')['name'].tolist() == ['Asha']
+    finally:
+        mgr.close()
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600, durability='interval')
+    try:
+        assert reloaded.find_patient_by_phone('9876543210').name == 'Asha'
+    finally:
+        reloaded.close()
+
+
+def test_unknown_durability_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        CSVManager(data_folder=str(tmp_path), durability='eventually')
+
+
+def test_indexed_lookups(manager):
+    doctor, patient = seed(manager)
+    apt = manager.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': '2026-10-20', 'start_time': '10:00', 'end_time': '10:30',
+    })
+
+    assert manager.get_doctor_by_id(doctor.doctor_id).name == 'Dr. Test'
+    assert manager.get_patient_by_id(patient.patient_id).name == 'Asha'
+    assert manager.find_patient_by_phone('9876543210').patient_id == patient.patient_id
+    assert manager.get_appointment_by_id(apt.appointment_id).start_time == '10:00'
+    assert manager.get_patient_by_id(999) is None
+    assert manager.find_patient_by_phone('0000000000') is None
+
+
+def test_bulk_results_match_single_row_lookups(manager):
+    doctor, _ = seed(manager)
+    patients = [manager.create_patient({'name': f"Ravi {n}", 'phone': f"90000{n:05d}", 'age': 30 + n}) for n in range(5)]
+    for n, patient in enumerate(patients):
+        book_on(manager, doctor, patient, '2026-10-20', start_time=f"{10 + n:02d}:00")
+
+    found = manager.search_patients('Ravi')
+    assert found == [manager.get_patient_by_id(p.patient_id) for p in patients]
+    assert manager.get_doctors_by_specialization('general') == [manager.get_doctor_by_id(doctor.doctor_id)]
+    day = manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20')
+    assert day == [manager.get_appointment_by_id(a.appointment_id) for a in day]
+    assert not hasattr(day[0], '__dict__')
+
+
+def test_patient_search_is_fuzzy_and_follows_updates(manager, tmp_path):
+    lakshmi = manager.create_patient({'name': 'Lakshmi Narayanan', 'phone': '9000000001'})
+    karthik = manager.create_patient({'name': 'Karthik Kumar', 'phone': '9000000002'})
+    manager.create_patient({'name': 'Ravi Kumar', 'phone': '9000000003'})
+
+    assert [p.patient_id for p in manager.search_patients('Laxmi')] == [lakshmi.patient_id]
+    assert manager.search_patients('Karthick Kumar')[0] == karthik
+    assert manager.search_patients('9000000002') == [karthik]
+    assert len(manager.search_patients('900000000')) == 3
+    assert len(manager.search_patients('Kumar', limit=1)) == 1
+
+    manager.update_patient(lakshmi.patient_id, {'name': 'Priya Narayanan'})
+    assert manager.search_patients('Laxmi') == []
+    assert manager.search_patients('Preeya')[0].patient_id == lakshmi.patient_id
+
+    manager.close()
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert reloaded.search_patients('Preeya')[0].patient_id == lakshmi.patient_id
+    finally:
+        reloaded.close()
+
+
+def test_specialization_lookups_match_whole_names(manager, tmp_path):
+    general, _ = seed(manager)
+    cosmetic = manager.create_doctor({'name': 'Dr. Cosmetic', 'specializations': 'Cosmetic dentistry, Dental implants'})
+    endo = manager.create_doctor({'name': 'Dr. Endo', 'specializations': 'Endodontist,general dentist'})
+    names = lambda doctors: [d.name for d in doctors]
+
+    assert names(manager.get_doctors_by_specialization('Dentist')) == ['Dr. Test', 'Dr. Endo']
+    assert names(manager.get_doctors_by_specialization('  cosmetic DENTISTRY ')) == ['Dr. Cosmetic']
+    assert names(manager.get_doctors_by_specialization('dontist')) == []
+    assert names(manager.get_doctors_by_specialization('Endodontist')) == ['Dr. Endo']
+    assert manager.get_all_specializations() == ['Cosmetic dentistry', 'Dental implants', 'Endodontist', 'General Dentist']
+    manager.close()
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert [d.doctor_id for d in reloaded.get_doctors_by_specialization('general dentist')] == [
+            general.doctor_id, endo.doctor_id]
+        assert [d.doctor_id for d in reloaded.get_doctors_by_specialization('implants')] == [cosmetic.doctor_id]
+    finally:
+        reloaded.close()
+
+
+def test_lazy_results_build_objects_on_access(manager):
+    from utils.result_view import ResultView
+
+    doctor, patient = seed(manager)
+    for n in range(3):
+        book_on(manager, doctor, patient, '2026-10-20', start_time=f"{10 + n:02d}:00")
+
+    view = manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20', lazy=True)
+    assert isinstance(view, ResultView)
+    assert len(view) == 3
+    assert view.column('start_time') == ['10:00', '11:00', '12:00']
+    assert view[1].start_time == '11:00'
+    assert view == manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20')
+
+    empty = manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-12-01', lazy=True)
+    assert len(empty) == 0 and list(empty) == [] and empty.column('status') == []
+
+
+def test_doctor_date_index_follows_updates(manager):
+    doctor, patient = seed(manager)
+    apt = manager.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': '2026-10-20', 'start_time': '10:00', 'end_time': '10:30',
+    })
+
+    manager.update_appointment(apt.appointment_id, {'appointment_date': '2026-10-21'})
+    assert manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20') == []
+    assert [a.appointment_id for a in manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-21')] == [apt.appointment_id]
+
+    manager.update_appointment(apt.appointment_id, {'status': 'cancelled'})
+    assert manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-21') == []
+
+
+def test_phone_lookup_after_reload_with_numeric_phones(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    seed(mgr)
+    mgr.close()
+
+    # pandas reads the compacted phone column back as int64
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert reloaded.find_patient_by_phone('9876543210') is not None
+    finally:
+        reloaded.close()
+
+
+def book_on(mgr, doctor, patient, appointment_date, start_time='10:00'):
+    return mgr.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': appointment_date, 'start_time': start_time, 'end_time': '',
+    })
+
+
+def test_appointments_are_partitioned_by_month(manager, tmp_path):
+    doctor, patient = seed(manager)
+    book_on(manager, doctor, patient, '2026-09-30')
+    book_on(manager, doctor, patient, '2026-10-01')
+    manager.compact()
+
+    assert sorted(name for name in os.listdir(tmp_path / 'appointments') if name.endswith('.csv')) == ['2026-09.csv', '2026-10.csv']
+    assert manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-11-01') == []
+    assert '2026-11' not in manager.partitions
+
+
+def test_partitions_load_lazily_and_evict(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    doctor, patient = seed(mgr)
+    old = book_on(mgr, doctor, patient, '2020-01-15')
+    book_on(mgr, doctor, patient, '2999-01-15')
+    mgr.close()
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert reloaded.partitions == {}
+        assert len(reloaded.get_appointments_by_doctor_date(doctor.doctor_id, '2999-01-15')) == 1
+        assert list(reloaded.partitions) == ['2999-01']
+
+        reloaded.update_appointment(old.appointment_id, {'status': 'completed'})
+        assert '2020-01' in reloaded.partitions
+        assert reloaded.evict_partitions() == ['2020-01']
+        assert list(reloaded.partitions) == ['2999-01']
+        # The evicted month was written out before being dropped
+        assert reloaded.get_appointment_by_id(old.appointment_id).status == 'completed'
+    finally:
+        reloaded.close()
+
+
+def test_eviction_saves_without_blocking_writers(manager):
+    from concurrent.futures import ThreadPoolExecutor
+
+    doctor, patient = seed(manager)
+    old = book_on(manager, doctor, patient, '2020-01-15')
+    save_csv = manager._save_csv
+
+    def save_while_booking(df, file_path, schema=None):
+        # A writer must get the lock while the month is being written out
+        if file_path.endswith('2020-01.csv'):
+            pool = ThreadPoolExecutor(max_workers=1)
+            try:
+                pool.submit(manager.update_appointment, old.appointment_id, {'status': 'completed'}).result(timeout=5)
+            finally:
+                pool.shutdown(wait=False)
+        save_csv(df, file_path, schema)
+
+    manager._save_csv = save_while_booking
+    # The write landed after the snapshot, so the month stays loaded rather than losing it
+    assert manager.evict_partitions() == []
+    assert '2020-01' in manager.partitions
+    manager._save_csv = save_csv
+    assert manager.evict_partitions() == ['2020-01']
+    assert manager.get_appointment_by_id(old.appointment_id).status == 'completed'
+
+
+def test_reschedule_across_months_survives_restart(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    doctor, patient = seed(mgr)
+    apt = book_on(mgr, doctor, patient, '2026-10-31')
+    mgr.update_appointment(apt.appointment_id, {'appointment_date': '2026-11-02', 'start_time': '11:00'})
+    assert mgr.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-31') == []
+    mgr.flush()
+    crash(mgr)
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        moved = reloaded.get_appointments_by_doctor_date(doctor.doctor_id, '2026-11-02')
+        assert [(a.appointment_id, a.start_time) for a in moved] == [(apt.appointment_id, '11:00')]
+        assert reloaded.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-31') == []
+        assert len(reloaded.appointments_df) == 1
+    finally:
+        reloaded.close()
+
+
+def test_lookups_by_id_load_only_their_partition(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    doctor, patient = seed(mgr)
+    appointments = [book_on(mgr, doctor, patient, f"2020-{month:02d}-15") for month in range(1, 7)]
+    mgr.update_appointment(appointments[2].appointment_id, {'appointment_date': '2020-08-01'})
+    mgr.flush()
+    crash(mgr)
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert reloaded.partitions == {}
+        assert reloaded.get_appointment_by_id(999) is None
+        assert not reloaded.update_appointment(999, {'status': 'completed'})
+        assert reloaded.partitions == {}
+
+        assert reloaded.get_appointment_by_id(appointments[1].appointment_id).appointment_date == '2020-02-15'
+        assert reloaded.get_appointment_by_id(appointments[2].appointment_id).appointment_date == '2020-08-01'
+        assert list(reloaded.partitions) == ['2020-02', '2020-08']
+    finally:
+        reloaded.close()
+
+    # Data written before the directory existed is indexed once on startup
+    for name in ('appointment_directory.csv', 'appointment_directory.feather', 'appointment_directory.journal'):
+        if os.path.exists(tmp_path / name):
+            os.remove(tmp_path / name)
+    rebuilt = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert rebuilt.get_appointment_by_id(appointments[5].appointment_id).appointment_date == '2020-06-15'
+        assert os.path.exists(tmp_path / 'appointment_directory.csv')
+    finally:
+        rebuilt.close()
+
+
+def test_patient_history_loads_only_that_patients_months(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    doctor, patient = seed(mgr)
+    other = mgr.create_patient({'name': 'Ravi', 'phone': '9876543211'})
+    first = book_on(mgr, doctor, patient, '2020-01-15')
+    moved = book_on(mgr, doctor, patient, '2020-02-15')
+    for month in range(3, 7):
+        book_on(mgr, doctor, other, f"2020-{month:02d}-15")
+    mgr.update_appointment(moved.appointment_id, {'appointment_date': '2020-08-01'})
+    mgr.close()
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        visits = reloaded.get_appointments_by_patient(patient.patient_id)
+        assert [a.appointment_id for a in visits] == [first.appointment_id, moved.appointment_id]
+        assert list(reloaded.partitions) == ['2020-01', '2020-08']
+        assert reloaded.get_appointments_by_patient(12345) == []
+        assert list(reloaded.partitions) == ['2020-01', '2020-08']
+    finally:
+        reloaded.close()
+
+
+def test_lookups_and_eviction_run_concurrently(manager):
+    from concurrent.futures import ThreadPoolExecutor
+
+    doctor, patient = seed(manager)
+    appointments = [book_on(manager, doctor, patient, f"2020-{month:02d}-15") for month in range(1, 13)]
+
+    def work(i):
+        if i % 10 == 0:
+            manager.evict_partitions()
+        appointment = appointments[i % 12]
+        assert manager.get_appointment_by_id(appointment.appointment_id).appointment_date == appointment.appointment_date
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(work, range(1200)))
+
+
+def test_legacy_appointments_file_is_migrated(tmp_path):
+    pd.DataFrame([
+        {**appointment_record(1), 'appointment_date': '2026-09-10'},
+        {**appointment_record(2), 'appointment_date': '2026-10-10'},
+    ]).to_csv(tmp_path / 'appointments.csv', index=False)
+
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert not os.path.exists(tmp_path / 'appointments.csv')
+        assert sorted(name for name in os.listdir(tmp_path / 'appointments') if name.endswith('.csv')) == ['2026-09.csv', '2026-10.csv']
+        assert mgr.get_appointment_by_id(2).appointment_date == '2026-10-10'
+        assert mgr.id_allocators['appointments'].next_id() > 2
+    finally:
+        mgr.close()
+
+
+def test_compaction_writes_binary_snapshot(tmp_path):
+    pytest.importorskip('pyarrow')
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    doctor, patient = seed(mgr)
+    book_on(mgr, doctor, patient, '2026-10-20')
+    mgr.close()
+
+    assert os.path.exists(tmp_path / 'patients.feather')
+    assert os.path.exists(tmp_path / 'appointments' / '2026-10.feather')
+    snapshot = pd.read_feather(tmp_path / 'patients.feather')
+    assert snapshot['phone'].tolist() == ['9876543210']
+    assert str(snapshot['patient_id'].dtype) == 'Int64'
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert reloaded.find_patient_by_phone('9876543210').name == 'Asha'
+        assert reloaded.get_doctor_by_id(doctor.doctor_id).specializations == ['General Dentist']
+        assert len(reloaded.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20')) == 1
+    finally:
+        reloaded.close()
+
+
+def test_hand_edited_csv_wins_over_stale_snapshot(tmp_path):
+    pytest.importorskip('pyarrow')
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    seed(mgr)
+    mgr.close()
+
+    edited = pd.read_csv(tmp_path / 'patients.csv', dtype={'phone': str})
+    edited.loc[0, 'name'] = 'Asha Edited'
+    time.sleep(0.01)
+    edited.to_csv(tmp_path / 'patients.csv', index=False)
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert reloaded.find_patient_by_phone('9876543210').name == 'Asha Edited'
+    finally:
+        reloaded.close()
+
+
+def appointment_record(i):
+    return {
+        'appointment_id': i, 'patient_id': i % 500, 'doctor_id': i % 16 + 1,
+        'patient_name': 'P', 'doctor_name': 'D', 'appointment_date': f"2026-{i % 12 + 1:02d}-10",
+        'start_time': '10:00', 'end_time': '10:30', 'status': 'scheduled',
+    }
+
+
+def test_column_store_inserts_are_linear():
+    store = ColumnStore(appointment_record(0).keys())
+
+    start = time.perf_counter()
+    for i in range(50_000):
+        store.append(appointment_record(i))
+    first_half = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(50_000, 100_000):
+        store.append(appointment_record(i))
+    second_half = time.perf_counter() - start
+
+    # Quadratic growth (pd.concat per row) would make the second half ~3x slower
+    assert second_half < first_half * 2
+    assert len(store) == 100_000
+    assert store.frame()['appointment_id'].iloc[-1] == 99_999
+
+
+def test_column_store_frame_is_a_snapshot():
+    store = ColumnStore(['appointment_id', 'status'])
+    store.append({'appointment_id': 1, 'status': 'scheduled'})
+    frame = store.frame()
+
+    store.update(0, {'status': 'cancelled'})
+
+    assert frame.loc[0, 'status'] == 'scheduled'
+    assert store.frame().loc[0, 'status'] == 'cancelled'
+
+
+def test_schema_encodes_compact_columns():
+    from utils.csv_manager import APPOINTMENT_SCHEMA
+
+    store = ColumnStore(APPOINTMENT_SCHEMA.columns, encodings=APPOINTMENT_SCHEMA.encodings())
+    plain = ColumnStore(APPOINTMENT_SCHEMA.columns)
+    for i in range(1000):
+        record = {**appointment_record(i), 'doctor_name': f"Dr. {i % 16}", 'end_time': None}
+        store.append(record)
+        plain.append(record)
+
+    assert store._data['status'].dtype == np.int32
+    assert store._data['appointment_date'].dtype == np.int32
+    assert store._data['start_time'].dtype == np.int16
+    assert store.nbytes() < plain.nbytes()
+    assert store.row(5) == plain.row(5)
+
+    frame = store.frame()
+    assert isinstance(frame['status'].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(frame['appointment_date'])
+    assert frame['start_time'].iloc[0] == '10:00'
+
+    positions = np.arange(10)
+    store.update(3, {'status': 'cancelled'})
+    assert store.isin('status', positions, ['scheduled', 'confirmed']).sum() == 9
+    assert store.isin('start_time', positions, ['10:00']).all()
+    assert not store.isin('start_time', positions, ['not a time']).any()
+
+
+def test_unencodable_value_falls_back_to_objects():
+    from utils.csv_manager import APPOINTMENT_SCHEMA
+
+    store = ColumnStore(APPOINTMENT_SCHEMA.columns, encodings=APPOINTMENT_SCHEMA.encodings())
+    store.append(appointment_record(1))
+    store.append({**appointment_record(2), 'start_time': 'after lunch'})
+
+    assert store._data['start_time'].dtype == object
+    assert [store.get(0, 'start_time'), store.get(1, 'start_time')] == ['10:00', 'after lunch']
+    assert store.isin('start_time', np.arange(2), ['after lunch']).tolist() == [False, True]
+
+
+def test_phones_load_as_fixed_strings(tmp_path):
+    pd.DataFrame([{'patient_id': 1, 'name': 'Asha', 'phone': 9876543210, 'age': 30, 'location': None,
+                   'first_visit': True, 'preferred_language': 'ta'}]).to_csv(tmp_path / 'patients.csv', index=False)
+
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert mgr.patient_store._data['phone'].dtype.kind == 'U'
+        assert mgr.find_patient_by_phone('9876543210').preferred_language == 'ta'
+        assert isinstance(mgr.patients_df['preferred_language'].dtype, pd.CategoricalDtype)
+    finally:
+        mgr.close()
+
+
+def test_create_appointment_is_linear_at_100k(manager):
+    doctor, patient = seed(manager)
+
+    def book(i):
+        manager.create_appointment({
+            # Every booking takes a distinct slot now that double-booking is rejected
+            'patient_id': patient.patient_id, 'doctor_id': i // 5_000 + 1,
+            'appointment_date': str(date(2026, 1, 1) + timedelta(days=i % 5_000 // 18)),
+            'start_time': f"{9 + i % 9:02d}:{30 * (i // 9 % 2):02d}", 'end_time': '',
+        })
+
+    start = time.perf_counter()
+    for i in range(50_000):
+        book(i)
+    first_half = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(50_000, 100_000):
+        book(i)
+    second_half = time.perf_counter() - start
+
+    assert second_half < first_half * 2
+    assert manager.get_appointment_by_id(100_000) is not None
+
+
+def test_ids_are_unique_under_concurrency(manager):
+    from concurrent.futures import ThreadPoolExecutor
+
+    allocator = manager.id_allocators['appointments']
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        ids = list(pool.map(lambda _: allocator.next_id(), range(5000)))
+
+    assert len(set(ids)) == 5000
+
+
+def test_reserved_id_blocks_and_restart_never_reuse_ids(tmp_path):
+    mgr = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    doctor, patient = seed(mgr)
+    block = mgr.reserve_ids('appointments', 10)
+    for appointment_id in block:
+        mgr.create_appointment({
+            'appointment_id': appointment_id, 'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+            'appointment_date': '2026-10-20', 'start_time': f"{8 + appointment_id:02d}:00", 'end_time': '',
+        })
+    last_issued = mgr.id_allocators['appointments'].next_id()
+    with pytest.raises(ValueError):
+        mgr.create_appointment({'appointment_id': block.start, 'patient_id': 1, 'doctor_id': 1})
+    crash(mgr)
+
+    reloaded = CSVManager(data_folder=str(tmp_path), compact_interval=3600)
+    try:
+        assert list(block) == list(range(1, 11))
+        assert reloaded.id_allocators['appointments'].next_id() > last_issued
+    finally:
+        reloaded.close()
+
+
+def test_concurrent_bookings_never_double_book(manager):
+    from concurrent.futures import ThreadPoolExecutor
+    from utils.exceptions import SlotUnavailableError
+
+    doctor, patient = seed(manager)
+    slots = [f"{9 + n // 2:02d}:{30 * (n % 2):02d}" for n in range(10)]
+
+    def book(i):
+        try:
+            return manager.create_appointment({
+                'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+                'appointment_date': '2026-10-20', 'start_time': slots[i % 10], 'end_time': '',
+            }).appointment_id
+        except SlotUnavailableError:
+            return None
+
+    # 50 threads racing for the same 10 slots, 20 attempts each
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        results = list(pool.map(book, range(1000)))
+
+    booked = [appointment_id for appointment_id in results if appointment_id is not None]
+    assert len(booked) == 10
+    assert len(set(booked)) == 10
+    day = manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20')
+    assert sorted(a.start_time for a in day) == sorted(slots)
+
+
+def test_rescheduling_onto_a_booked_slot_is_rejected(manager):
+    from utils.exceptions import SlotUnavailableError
+
+    doctor, patient = seed(manager)
+    first = manager.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': '2026-10-20', 'start_time': '10:00', 'end_time': '10:30',
+    })
+    second = manager.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': '2026-10-20', 'start_time': '11:00', 'end_time': '11:30',
+    })
+
+    with pytest.raises(SlotUnavailableError):
+        manager.update_appointment(second.appointment_id, {'start_time': '10:00'})
+
+    # A cancelled slot can be taken again
+    manager.update_appointment(first.appointment_id, {'status': 'cancelled'})
+    assert manager.update_appointment(second.appointment_id, {'start_time': '10:00'})
+
+
+def test_concurrent_reads_and_writes_stay_consistent(manager):
+    from concurrent.futures import ThreadPoolExecutor
+
+    doctor, _ = seed(manager)
+    patients = [manager.create_patient({'name': f"P{n}", 'phone': f"90000{n:05d}"}) for n in range(50)]
+
+    def work(i):
+        patient = patients[i % 50]
+        if i % 2:
+            manager.update_patient(patient.patient_id, {'age': i})
+            manager.create_appointment({
+                'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+                'appointment_date': '2026-10-20', 'start_time': f"slot-{i}", 'end_time': '',
+            })
+        else:
+            assert manager.find_patient_by_phone(patient.phone).patient_id == patient.patient_id
+            manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20')
+            manager.search_patients('P')
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        list(pool.map(work, range(2000)))
+
+    assert len(manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20')) == 1000
+    assert len(manager.appointments_df) == 1000
+    manager.flush()
+    with open(manager.partitions['2026-10'].journal.file_path) as f:
+        assert len(f.readlines()) == 1000
@@ -0,0 +1,61 @@
+#test_doctor_ranking.py
+
+import random
+
+import numpy as np
+
+from utils.doctor_ranking import rank_doctors, rank_from_days
+from utils.storage_models import Doctor
+
+
+def loop_score(doctor, booking_count, patient_location=None):
+    """The per-doctor score get_least_booked_doctor used before"""
+    score = 100 - (booking_count * 10)
+    if doctor.experience_years:
+        score += min(doctor.experience_years * 2, 20)
+    if patient_location and doctor.name:
+        score += 5
+    return score
+
+
+def loop_best(doctors, working, booked, patient_location=None):
+    best_doctor, best_score = None, -1
+    for doctor, works, count in zip(doctors, working, booked):
+        if not works:
+            continue
+        score = loop_score(doctor, count, patient_location)
+        if best_doctor is None or score > best_score:
+            best_doctor, best_score = doctor, score
+    return best_doctor
+
+
+def test_matches_the_scoring_loop():
+    rng = random.Random(5)
+    for _ in range(500):
+        doctors = [Doctor(doctor_id=i, name=rng.choice(['', f'Dr {i}']), experience_years=rng.choice([None, 0, 3, 8, 15]))
+                   for i in range(rng.randint(1, 8))]
+        working = [rng.random() < 0.7 for _ in doctors]
+        booked = np.array([rng.randint(0, 12) if works else 0 for works in working])
+        location = rng.choice([None, 'Chennai'])
+        ranking = rank_doctors(doctors, np.array(working), booked, np.zeros(len(doctors)), location)
+
+        best = loop_best(doctors, working, booked, location)
+        assert (ranking[0].doctor if ranking[0].working else None) is best
+        assert sorted(r.doctor.doctor_id for r in ranking) == [d.doctor_id for d in doctors]
+        on = [r for r in ranking if r.working]
+        assert ranking[:len(on)] == on
+        assert [r.score for r in on] == sorted((loop_score(r.doctor, r.booked_count, location) for r in on), reverse=True)
+
+
+class Day:
+    def __init__(self, booked_count, free_count):
+        self.booked_count, self.free_count = booked_count, free_count
+
+
+def test_rank_from_days_reads_only_working_doctors():
+    doctors = [Doctor(doctor_id=1, name='A', experience_years=5), Doctor(doctor_id=2, name='B', experience_years=5),
+               Doctor(doctor_id=3, name='C', experience_years=float('nan'))]
+    ranking = rank_from_days(doctors, [True, False, True], {1: Day(3, 5), 3: Day(1, 7)})
+    assert [(r.doctor.doctor_id, r.score, r.working, r.free_count) for r in ranking] == [
+        (3, 90, True, 7), (1, 80, True, 5), (2, 110, False, 0)]
+    assert rank_from_days([], [], {}) == []
@@ -0,0 +1,56 @@
+#test_id_allocator.py
+
+from utils.id_allocator import SequenceAllocator, SequenceFile, SheetSequences
+
+
+class FakeWorksheet:
+    """The slice of a gspread worksheet SheetSequences uses"""
+
+    def __init__(self, headers):
+        self.rows = [list(headers)]
+
+    def get_all_values(self):
+        return [list(row) for row in self.rows]
+
+    def append_row(self, values):
+        self.rows.append([str(value) for value in values])
+
+    def update_cell(self, row, col, value):
+        self.rows[row - 1][col - 1] = str(value)
+
+
+def test_leases_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'sequences.json')
+    allocator = SequenceAllocator('patients', 5, sequence_file=SequenceFile(path), block_size=10)
+    assert allocator.next_id() == 6
+    # Ids up to the leased mark may have been handed out, so a restart starts past it
+    assert SequenceAllocator('patients', 6, sequence_file=SequenceFile(path)).next_id() == 17
+
+
+def test_sheet_sequences_never_lower_a_value():
+    sequences = SheetSequences(FakeWorksheet(['name', 'value']))
+    assert sequences.get('patient_id') == 0
+    sequences.set('patient_id', 120)
+    sequences.set('patient_id', 80)
+    sequences.set('doctor_id', 7)
+    assert (sequences.get('patient_id'), sequences.get('doctor_id')) == (120, 7)
+
+
+def test_workers_sharing_a_spreadsheet_never_hand_out_the_same_id():
+    sequences = SheetSequences(FakeWorksheet(['name', 'value']))
+    written = []  # the id column both workers append to
+    refreshes = []
+
+    def worker():
+        def refresh():
+            refreshes.append(1)
+            return max(max(written, default=0) + 1, sequences.get('patient_id'))
+        return SequenceAllocator('patient_id', sequence_file=sequences, block_size=3, refresh=refresh)
+
+    first, second = worker(), worker()
+    for allocator in [first, second, first, second, first, first, second, second, first]:
+        written.append(allocator.next_id())
+    assert len(set(written)) == len(written)
+    # The sheet is only re-read when a lease runs out, not for every id
+    assert len(refreshes) < len(written)
+    assert sequences.get('patient_id') > max(written)
@@ -0,0 +1,78 @@
+#test_interval_index.py
+
+import random
+
+import pytest
+
+from utils.interval_index import IntervalIndex, appointment_span
+from utils.slot_bitmap import available_slots, slot_grid
+
+
+def brute_overlapping(intervals, start, end, exclude=None):
+    return {key for s, e, key in intervals if s < end and e > start and key != exclude}
+
+
+def test_overlap_queries_match_brute_force():
+    rng = random.Random(11)
+    for _ in range(300):
+        intervals = []
+        for key in range(rng.randint(0, 25)):
+            start = rng.randrange(480, 1080, 5)
+            intervals.append((start, start + rng.choice([10, 15, 30, 45, 60, 90]), key))
+        index = IntervalIndex(intervals)
+        for _ in range(20):
+            start = rng.randrange(450, 1110, 5)
+            end = start + rng.choice([5, 15, 30, 60])
+            exclude = rng.choice([None, *range(len(intervals))]) if intervals else None
+            expected = brute_overlapping(intervals, start, end, exclude)
+            assert set(index.overlapping(start, end)) - {exclude} == expected
+            assert index.overlaps(start, end, exclude=exclude) == bool(expected)
+
+
+def test_add_and_discard_keep_the_index_sorted():
+    index = IntervalIndex([(600, 660, 'a')])
+    index.add(540, 570, 'b')
+    index.add(630, 700, 'c')
+    assert index.spans() == [(540, 570), (600, 660), (630, 700)]
+    assert sorted(index.overlapping(650, 680)) == ['a', 'c']
+    assert index.discard('a')
+    assert not index.discard('a')
+    assert not index.overlaps(570, 630)
+    assert index.overlaps(690, 720)
+    with pytest.raises(ValueError):
+        index.add(600, 600)
+
+
+def test_appointment_span_defaults_missing_ends():
+    assert appointment_span('10:00', '11:15') == (600, 675)
+    assert appointment_span('10:00', '') == (600, 630)
+    assert appointment_span('10:00', None, default_minutes=20) == (600, 620)
+    assert appointment_span('10:00', '09:00') == (600, 630)
+    assert appointment_span('10:00', '11:15:00') == (600, 675)
+    with pytest.raises(ValueError):
+        appointment_span('slot-1', '')
+
+
+def test_free_slots_respect_booking_lengths():
+    booked = [('10:00', '11:00'), ('11:45', '12:05')]
+    assert available_slots('09:00', '13:00', booked, 30) == ['09:00', '09:30', '11:00', '12:30']
+    # A 60-minute visit needs a clear hour that ends by 13:00
+    assert available_slots('09:00', '13:00', booked, 30, duration_minutes=60) == ['09:00']
+    # Start labels still stand for one slot each, and mix with intervals
+    assert available_slots('09:00', '11:00', ['09:30', ('10:15', '10:45')], 30) == ['09:00']
+
+
+def test_interval_masks_match_brute_force():
+    rng = random.Random(5)
+    for _ in range(500):
+        slot_minutes = rng.choice([10, 15, 30])
+        duration = rng.choice([None, 15, 30, 45, 60])
+        grid = slot_grid('09:00', '13:00', slot_minutes)
+        spans = []
+        for _ in range(rng.randint(0, 6)):
+            start = rng.randrange(500, 800, 5)
+            spans.append((start, start + rng.choice([10, 20, 30, 60])))
+        length = duration or slot_minutes
+        expected = [label for label, t in zip(grid.labels, grid.starts)
+                    if t + length <= 13 * 60 and not any(s < t + length and e > t for s, e in spans)]
+        assert grid.free_slots(grid.mask_of_spans(spans, duration)) == expected
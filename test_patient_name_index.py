@@ -0,0 +1,71 @@
+#test_patient_name_index.py
+
+import random
+
+from utils.patient_name_index import PatientNameIndex, name_words, phonetic_key, trigrams
+
+
+def keys(results):
+    return [key for key, _ in results]
+
+
+def test_phonetic_key_folds_indian_spellings():
+    for spellings in [('Lakshmi', 'Laxmi'), ('Karthik', 'Karthick', 'Kartik'), ('Mohammed', 'Muhammad'),
+                      ('Sathish', 'Sateesh'), ('Ezhil', 'Ezil'), ('Aishwarya', 'Ishwarya'), ('Vasanth', 'Wasant')]:
+        assert len({phonetic_key(name.casefold()) for name in spellings}) == 1, spellings
+    assert phonetic_key('priya') != phonetic_key('puri')
+
+
+def test_exact_words_rank_before_misspellings():
+    index = PatientNameIndex()
+    for key, name in enumerate(['Lakshmi Narayanan', 'Laxmi Devi', 'Ravi Kumar', 'Ravi Shankar', 'Karthik Kumar']):
+        index.add(key, name)
+    assert keys(index.search('Laxmi')) == [1, 0]
+    assert index.search('Laxmi')[1][1] == 0.8
+    assert keys(index.search('ravi kumar')) == [2, 3, 4]
+    assert keys(index.search('Karthick Kumaar')) == [4, 2]
+    assert keys(index.search('Ravi', limit=1)) == [2]
+    assert index.search('Zzyzx') == [] and index.search('') == []
+
+
+def test_phonetic_matching_can_be_turned_off():
+    index = PatientNameIndex(phonetic=False)
+    index.add(1, 'Mohammed')
+    assert index.search('Muhammad') == []
+    assert keys(index.search('Mohamed')) == [1]
+
+
+def test_renames_and_removals_keep_the_index_current():
+    index = PatientNameIndex()
+    index.add(1, 'Priya')
+    index.add(2, 'Priya Raman')
+    assert keys(index.search('Priya')) == [1, 2]
+    index.add(1, 'Divya')
+    assert keys(index.search('Priya')) == [2]
+    assert keys(index.search('Divya')) == [1]
+    index.remove(2)
+    assert index.search('Priya') == [] and len(index) == 1
+
+
+def brute_force(names, query, index):
+    """Score every name directly, as the index should without visiting them all"""
+    query_words = name_words(query)
+    similar = [index._similar_words(word, 0.5) for word in query_words]
+    scored = []
+    for key, name in names.items():
+        total = sum(max((found.get(word, 0.0) for word in name_words(name)), default=0.0) for found in similar)
+        if total:
+            scored.append((-total, key))
+    return [key for _, key in sorted(scored)[:10]]
+
+
+def test_matches_scoring_every_name():
+    rng = random.Random(3)
+    vocabulary = ['Lakshmi', 'Laxmi', 'Priya', 'Preethi', 'Kumar', 'Kumaran', 'Ravi', 'Raghav', 'Devi', 'Sathish']
+    index, names = PatientNameIndex(), {}
+    for key in range(400):
+        names[key] = ' '.join(rng.sample(vocabulary, rng.randint(1, 3)))
+        index.add(key, names[key])
+    for query in ['Laksmi Kumar', 'Preeti', 'ravi devi', 'Satish Kumaran Priya']:
+        assert keys(index.search(query, limit=10)) == brute_force(names, query, index)
+    assert trigrams('ab') == frozenset({'  a', ' ab', 'ab '})
@@ -0,0 +1,194 @@
+#test_scheduler.py
+
+import asyncio
+import dataclasses
+import os
+from datetime import date, timedelta
+
+import pytest
+
+# config.Settings requires these; the scheduler under test only uses the storage passed to it
+for _name in ('HOSP_DB_NAME', 'HOSP_DB_USER', 'HOSP_DB_PASSWORD', 'HOSP_DB_HOST', 'HOSP_DB_PORT',
+              'LIVEKIT_URL', 'LIVEKIT_API_KEY', 'LIVEKIT_API_SECRET', 'JWT_SECRET_KEY'):
+    os.environ.setdefault(_name, 'test')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from benchmark import backend_options
+from scheduler import AppointmentScheduler
+from utils.availability_calendar import DayAvailability
+from utils.date_parser import MAX_ADVANCE_DAYS
+from utils.exceptions import BookingConflictError, DoctorNotFoundError, PatientNotFoundError
+from utils.storage_backend import create_backend
+
+
+def next_working_day(days: int = 1) -> date:
+    on_date = date.today() + timedelta(days=days)
+    while on_date.strftime('%a') == 'Sun':
+        on_date += timedelta(days=1)
+    return on_date
+
+
+def make_scheduler(name, folder):
+    os.makedirs(folder)
+    scheduler = AppointmentScheduler(storage=create_backend(name, **backend_options(name, folder)))
+    doctor = scheduler.sheets.create_doctor({'name': 'Dr. Rao', 'specializations': 'General Dentist'})
+    patient = scheduler.register_patient('Asha', '9876543210')
+    return scheduler, doctor, patient
+
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def twins(request, tmp_path):
+    """Two schedulers over identically seeded backends of one kind: one driven sync, one async"""
+    made = [make_scheduler(request.param, str(tmp_path / side)) for side in ('sync', 'async')]
+    yield made
+    for scheduler, _, _ in made:
+        scheduler.sheets.close()
+
+
+def stored(appointment):
+    return {key: value for key, value in dataclasses.asdict(appointment).items() if key not in ('patient', 'doctor')}
+
+
+def cached_state(scheduler, doctor, patient, on_date):
+    """The calendar day and visit history as cached; fails if either would be read from storage again"""
+    day = scheduler.calendar.get(doctor, on_date, lambda: pytest.fail("calendar day was not kept current"))
+    visits = scheduler.visits.get(patient.patient_id, lambda: pytest.fail("visit history was not kept current"))
+    # The cached copies must also agree with what storage now holds
+    fresh = DayAvailability.of(doctor, scheduler.sheets.get_appointments_by_doctor_date(
+        doctor.doctor_id, on_date.isoformat()), scheduler.slot_minutes)
+    assert day.free_slots() == fresh.free_slots()
+    upcoming = [stored(appointment) for appointment in visits.upcoming()]
+    assert upcoming == [stored(appointment) for appointment in scheduler.sheets.get_appointments_by_patient(
+        patient.patient_id) if appointment.status in ('scheduled', 'confirmed')]
+    return day.free_slots(), day.booked_count, upcoming
+
+
+def prime(scheduler, doctor, patient, *dates):
+    for on_date in dates:
+        scheduler.day_availability(doctor, on_date)
+    scheduler.patient_visits(patient.patient_id)
+
+
+def test_book_reschedule_and_cancel_agree_with_their_async_twins(twins):
+    (sync, doctor, patient), (twin, twin_doctor, twin_patient) = twins
+    on_date, later = next_working_day(), next_working_day(2)
+    prime(sync, doctor, patient, on_date, later)
+    prime(twin, twin_doctor, twin_patient, on_date, later)
+
+    def state(on):
+        return (cached_state(sync, doctor, patient, on), cached_state(twin, twin_doctor, twin_patient, on))
+
+    booked = sync.book_appointment(patient.patient_id, doctor.doctor_id, on_date, '10:00', send_notification=False)
+    twin_booked = asyncio.run(twin.book_appointment_async(
+        twin_patient.patient_id, twin_doctor.doctor_id, on_date, '10:00', send_notification=False))
+    assert stored(booked) == stored(twin_booked)
+    first, second = state(on_date)
+    assert first == second and '10:00' not in first[0] and first[1] == 1
+
+    moved = sync.reschedule_appointment(booked.appointment_id, later, '11:30', send_notification=False)
+    twin_moved = asyncio.run(twin.reschedule_appointment_async(
+        twin_booked.appointment_id, later, '11:30', send_notification=False))
+    assert stored(moved) == stored(twin_moved)
+    for on in (on_date, later):
+        first, second = state(on)
+        assert first == second
+    assert state(on_date)[0][1] == 0 and '11:30' not in state(later)[0][0]
+
+    cancelled = sync.cancel_appointment(moved.appointment_id, send_notification=False)
+    twin_cancelled = asyncio.run(twin.cancel_appointment_async(twin_moved.appointment_id, send_notification=False))
+    assert stored(cancelled) == stored(twin_cancelled) and cancelled.status == 'cancelled'
+    first, second = state(later)
+    assert first == second and first[1] == 0 and first[2] == []
+
+
+def test_lookups_and_recommendations_agree_with_their_async_twins(twins):
+    (sync, doctor, patient), (twin, twin_doctor, twin_patient) = twins
+    on_date = next_working_day()
+    sync.book_appointment(patient.patient_id, doctor.doctor_id, on_date, '09:00', send_notification=False)
+    asyncio.run(twin.book_appointment_async(
+        twin_patient.patient_id, twin_doctor.doctor_id, on_date, '09:00', send_notification=False))
+
+    assert sync.get_doctor_availability_summary(doctor.doctor_id, 5) == \
+        asyncio.run(twin.get_doctor_availability_summary_async(twin_doctor.doctor_id, 5))
+    assert sync.recommend_doctor(patient.patient_id, 'General Dentist', on_date) == \
+        asyncio.run(twin.recommend_doctor_async(twin_patient.patient_id, 'General Dentist', on_date))
+    assert sync.get_booked_slots(doctor.doctor_id, on_date) == \
+        asyncio.run(twin.get_booked_slots_async(twin_doctor.doctor_id, on_date)) == ['09:00']
+    assert sync.register_patient('Asha R', '9876543210', age=31) == \
+        asyncio.run(twin.register_patient_async('Asha R', '9876543210', age=31))
+
+
+def test_sync_and_async_raise_the_same_errors(twins):
+    (sync, doctor, patient), (twin, twin_doctor, twin_patient) = twins
+    sunday = next_working_day()
+    while sunday.strftime('%a') != 'Sun':
+        sunday += timedelta(days=1)
+    cases = [
+        (sync.book_appointment, twin.book_appointment_async, (999, doctor.doctor_id, sunday, '10:00')),
+        (sync.book_appointment, twin.book_appointment_async, (patient.patient_id, 999, sunday, '10:00')),
+        (sync.book_appointment, twin.book_appointment_async, (patient.patient_id, doctor.doctor_id, sunday, '10:00')),
+        (sync.reschedule_appointment, twin.reschedule_appointment_async, (999, sunday, '10:00')),
+        (sync.cancel_appointment, twin.cancel_appointment_async, (999,)),
+        (sync.get_doctor_availability_summary, twin.get_doctor_availability_summary_async, (999,)),
+    ]
+    for method, twin_method, args in cases:
+        with pytest.raises((PatientNotFoundError, DoctorNotFoundError, BookingConflictError)) as raised:
+            method(*args)
+        with pytest.raises(type(raised.value), match=str(raised.value)):
+            asyncio.run(twin_method(*args))
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    instance, _, _ = make_scheduler('sqlite', str(tmp_path / 'db'))
+    yield instance
+    instance.sheets.close()
+
+
+def clinic_doctors(scheduler, *working_days):
+    """Stored doctors with the given working days (the backends always store Mon-Sat)"""
+    doctors = []
+    for index, days in enumerate(working_days):
+        doctor = scheduler.sheets.create_doctor({'name': f"Dr. {index}", 'specializations': 'Orthodontics'})
+        doctors.append(dataclasses.replace(doctor, working_days=days))
+    return doctors
+
+
+def book_whole_day(scheduler, doctor, on_date):
+    scheduler.sheets.create_appointment({'patient_id': 1, 'doctor_id': doctor.doctor_id,
+                                         'appointment_date': on_date.isoformat(),
+                                         'start_time': doctor.working_start, 'end_time': doctor.working_end})
+
+
+def test_next_openings_skip_full_days_and_order_by_time(scheduler):
+    from_date = next_working_day()
+    while from_date.strftime('%a') != 'Wed':
+        from_date += timedelta(days=1)
+    thursday, friday = from_date + timedelta(days=1), from_date + timedelta(days=2)
+    thursdays_only, thursday_and_friday, fridays_only = clinic_doctors(scheduler, ['Thu'], ['Thu', 'Fri'], ['Fri'])
+    book_whole_day(scheduler, thursday_and_friday, thursday)
+    scheduler.book_appointment(1, fridays_only.doctor_id, friday, '09:00', send_notification=False)
+
+    openings = scheduler.next_openings([fridays_only, thursday_and_friday, thursdays_only], from_date)
+    assert [(opening.doctor.doctor_id, opening.on_date, opening.start_time) for opening in openings] == [
+        (thursdays_only.doctor_id, thursday, '09:00'),
+        (thursday_and_friday.doctor_id, friday, '09:00'),
+        (fridays_only.doctor_id, friday, '09:30'),
+    ]
+    assert asyncio.run(scheduler.next_openings_async(
+        [fridays_only, thursday_and_friday, thursdays_only], from_date)) == openings
+
+
+def test_next_openings_leave_out_doctors_with_nothing_free_in_the_booking_window(scheduler):
+    from_date = next_working_day()
+    mondays_only, never, open_doctor = clinic_doctors(scheduler, ['Mon'], [], ['Mon', 'Tue', 'Wed', 'Thu', 'Fri'])
+    on_date = from_date
+    while on_date <= date.today() + timedelta(days=MAX_ADVANCE_DAYS):
+        if on_date.strftime('%a') == 'Mon':
+            book_whole_day(scheduler, mondays_only, on_date)
+        on_date += timedelta(days=1)
+
+    assert scheduler.next_openings([mondays_only, never], from_date) == []
+    assert asyncio.run(scheduler.next_openings_async([mondays_only, never], from_date)) == []
+    openings = scheduler.next_openings([mondays_only, never, open_doctor], from_date)
+    assert [opening.doctor.doctor_id for opening in openings] == [open_doctor.doctor_id]
@@ -0,0 +1,66 @@
+#test_slot_bitmap.py
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.slot_bitmap import SlotBitmap, available_slots, slot_grid
+
+
+def string_slots(start_time, end_time, booked_slots, slot_minutes):
+    """The datetime/strftime slot generation the bitmap replaced"""
+    try:
+        start_hour, start_min = map(int, start_time.split(':'))
+        end_hour, end_min = map(int, end_time.split(':'))
+        current = datetime.today().replace(hour=start_hour, minute=start_min, second=0, microsecond=0)
+        end_dt = datetime.today().replace(hour=end_hour, minute=end_min, second=0, microsecond=0)
+    except Exception:
+        return None
+    delta = timedelta(minutes=slot_minutes)
+    booked_set = set(booked_slots)
+    slots = []
+    while current + delta <= end_dt:
+        if current.strftime("%H:%M") not in booked_set:
+            slots.append(current.strftime("%H:%M"))
+        current += delta
+    return slots
+
+
+def bitmap_slots(start_time, end_time, booked_slots, slot_minutes):
+    try:
+        return available_slots(start_time, end_time, booked_slots, slot_minutes)
+    except Exception:
+        return None
+
+
+def test_matches_string_generation_on_random_days():
+    rng = random.Random(7)
+    for _ in range(2000):
+        slot_minutes = rng.choice([10, 15, 20, 30, 45, 60])
+        start = f"{rng.randint(0, 23):02d}:{rng.choice([0, 5, 15, 30, 45]):02d}"
+        end = f"{rng.randint(0, 23):02d}:{rng.choice([0, 10, 30, 59]):02d}"
+        grid_labels = string_slots(start, end, [], slot_minutes)
+        booked = rng.sample(grid_labels, rng.randint(0, len(grid_labels))) + ['07:07', '9:00', '']
+        assert bitmap_slots(start, end, booked, slot_minutes) == string_slots(start, end, booked, slot_minutes)
+
+
+@pytest.mark.parametrize('start, end', [('10:00', '09:00'), ('25:00', '26:00'), ('10:00:00', '11:00'), ('x', '11:00')])
+def test_matches_string_generation_on_bad_hours(start, end):
+    assert bitmap_slots(start, end, [], 30) == string_slots(start, end, [], 30)
+
+
+def test_book_release_and_first_free():
+    day = SlotBitmap(slot_grid('10:00', '12:00', 30), ['10:30'])
+    assert day.free_slots() == ['10:00', '11:00', '11:30']
+    assert day.free_count == 3
+    assert not day.book('10:30')
+    assert not day.book('10:15')
+    assert day.book('10:00')
+    assert day.first_free() == '11:00'
+    assert day.first_free('10:01') == '11:00'
+    assert day.first_free('11:30') == '11:30'
+    assert day.first_free('11:31') is None
+    assert day.release('10:30')
+    assert not day.release('10:30')
+    assert day.first_free('09:00') == '10:30'
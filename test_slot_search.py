@@ -0,0 +1,149 @@
+#test_slot_search.py
+
+import asyncio
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from utils.availability_calendar import AvailabilityCalendar, DayAvailability
+from utils.exceptions import InvalidDateError
+from utils.slot_search import (
+    SlotSearch, earliest_slots, earliest_slots_async, parse_time_window, parse_weekdays
+)
+from utils.storage_models import Appointment, Doctor
+
+MONDAY = date(2030, 1, 7)
+NOW = datetime(2030, 1, 7, 10, 10)
+
+
+def doctor(doctor_id, working_days='Mon,Tue,Wed,Thu,Fri', start='09:00', end='12:00'):
+    return Doctor(doctor_id=doctor_id, name=f'Doctor {doctor_id}', working_days=working_days,
+                  working_start=start, working_end=end)
+
+
+def works_on(doctor, on_date):
+    return on_date.strftime('%a') in doctor.working_days.split(',')
+
+
+class Bookings:
+    """Appointments per (doctor, date), served through a calendar like the scheduler does"""
+
+    def __init__(self, appointments=()):
+        self.appointments = list(appointments)
+        self.calendar = AvailabilityCalendar(30)
+        self.days_read = set()
+
+    def load(self, doctor, on_date):
+        self.days_read.add((doctor.doctor_id, on_date))
+        return [appointment for appointment in self.appointments
+                if appointment.doctor_id == doctor.doctor_id and appointment.appointment_date == on_date.isoformat()]
+
+    def day_of(self, doctor, on_date):
+        return DayAvailability.of(doctor, self.load(doctor, on_date), 30)
+
+
+def brute_force(doctors, search, count, bookings):
+    """Every matching slot of every doctor over the whole range, sorted"""
+    found = []
+    for index, doc in enumerate(doctors):
+        for on_date in search.dates(search.first_date):
+            if not works_on(doc, on_date):
+                continue
+            day = bookings.day_of(doc, on_date)
+            for label in day.free_slots():
+                minute = int(label[:2]) * 60 + int(label[3:])
+                if minute >= search.window[0] and minute < search.window[1] and not (
+                        on_date == search.now.date() and minute <= search.now.hour * 60 + search.now.minute):
+                    found.append((on_date, label, index))
+    return [(on_date, label, doctors[index].doctor_id) for on_date, label, index in sorted(found)[:count]]
+
+
+def as_tuples(matches):
+    return [(match.on_date, match.start_time, match.doctor.doctor_id) for match in matches]
+
+
+def test_matches_brute_force_on_random_schedules():
+    rng = random.Random(11)
+    for _ in range(60):
+        doctors = [doctor(doctor_id, ','.join(rng.sample(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'], 3)))
+                   for doctor_id in range(1, rng.randint(2, 5))]
+        appointments = []
+        for appointment_id in range(rng.randint(0, 60)):
+            on_date = MONDAY + timedelta(days=rng.randint(0, 9))
+            start = rng.choice(['09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '10:15'])
+            appointments.append(Appointment(appointment_id=appointment_id, doctor_id=rng.choice(doctors).doctor_id,
+                                            appointment_date=on_date.isoformat(), start_time=start,
+                                            end_time=rng.choice(['', '11:45']), status='scheduled'))
+        bookings = Bookings(appointments)
+        window = rng.choice([(0, 1440), parse_time_window('morning'), parse_time_window('10:00-11:30')])
+        now = NOW - timedelta(days=rng.randint(0, 3))
+        search = SlotSearch(MONDAY + timedelta(days=rng.randint(0, 2)), 10, window,
+                            rng.choice([None, {'Mon', 'Wed'}, {'Sat', 'Sun'}]), now=now)
+        count = rng.randint(1, 8)
+        assert as_tuples(earliest_slots(doctors, search, count, works_on, bookings.day_of)) == \
+            brute_force(doctors, search, count, bookings)
+
+
+def test_window_weekdays_and_the_current_time():
+    doctors = [doctor(1), doctor(2, 'Sat', '08:00', '20:00')]
+    bookings = Bookings([Appointment(appointment_id=1, doctor_id=1, appointment_date=MONDAY.isoformat(),
+                                     start_time='10:30', end_time='11:30', status='scheduled')])
+    # 10:10 on Monday: 09:00-10:00 have started and 10:30-11:30 is booked
+    search = SlotSearch(None, 10, now=NOW)
+    assert as_tuples(earliest_slots(doctors, search, 2, works_on, bookings.day_of)) == [
+        (MONDAY, '11:30', 1), (MONDAY + timedelta(days=1), '09:00', 1)]
+
+    search = SlotSearch(None, 10, parse_time_window('evening'), now=NOW)
+    assert as_tuples(earliest_slots(doctors, search, 3, works_on, bookings.day_of)) == [
+        (MONDAY + timedelta(days=5), '17:00', 2), (MONDAY + timedelta(days=5), '17:30', 2),
+        (MONDAY + timedelta(days=5), '18:00', 2)]
+
+    search = SlotSearch(None, 10, weekdays=parse_weekdays('Wed'), now=NOW)
+    assert as_tuples(earliest_slots(doctors, search, 1, works_on, bookings.day_of)) == [
+        (MONDAY + timedelta(days=2), '09:00', 1)]
+    assert earliest_slots(doctors, SlotSearch(None, 10, weekdays={'Sun'}, now=NOW), 3,
+                          works_on, bookings.day_of) == []
+
+
+def test_only_the_days_needed_are_read():
+    doctors = [doctor(doctor_id) for doctor_id in range(1, 6)]
+    bookings = Bookings()
+    earliest_slots(doctors, SlotSearch(MONDAY, 90, now=NOW), 3, works_on, bookings.day_of)
+    # Monday for each doctor, not their whole 90 days
+    assert bookings.days_read == {(doctor_id, MONDAY) for doctor_id in range(1, 6)}
+
+
+def test_async_search_reads_through_the_calendar():
+    doctors = [doctor(1), doctor(2)]
+    tuesday = MONDAY + timedelta(days=1)
+    bookings = Bookings([Appointment(appointment_id=1, doctor_id=1, appointment_date=tuesday.isoformat(),
+                                     start_time='09:00', status='scheduled')])
+    search = SlotSearch(tuesday, 10, parse_time_window('09:00-09:30'), now=NOW)
+
+    async def day_of(doc, on_date):
+        async def load():
+            return bookings.load(doc, on_date)
+        return await bookings.calendar.get_async(doc, on_date, load)
+
+    matches = asyncio.run(earliest_slots_async(doctors, search, 3, works_on, day_of))
+    assert as_tuples(matches) == [(tuesday, '09:00', 2),
+                                  (MONDAY + timedelta(days=2), '09:00', 1),
+                                  (MONDAY + timedelta(days=2), '09:00', 2)]
+
+
+@pytest.mark.parametrize('text', ['noon-ish', '11:00-10:00', '25:00-26:00'])
+def test_bad_time_windows(text):
+    with pytest.raises(InvalidDateError):
+        parse_time_window(text)
+
+
+def test_parse_constraints():
+    assert parse_time_window(' Afternoon ') == (720, 1020)
+    assert parse_time_window('9:30 to 11:00') == (570, 660)
+    assert parse_time_window(None) == (0, 1440)
+    assert parse_weekdays('Monday and wed') == {'Mon', 'Wed'}
+    assert parse_weekdays('weekend') == {'Sat', 'Sun'}
+    assert parse_weekdays('') is None
+    with pytest.raises(InvalidDateError):
+        parse_weekdays('Funday')
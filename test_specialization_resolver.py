@@ -0,0 +1,50 @@
+#test_specialization_resolver.py
+
+from utils.specialization_resolver import PhraseMatcher, SpecializationResolver, normalize_text, specialization_resolver
+
+
+def names(matches):
+    return [match.specialization for match in matches]
+
+
+def test_phrase_matcher_finds_overlapping_phrases():
+    matcher = PhraseMatcher(['he', 'she', 'his', 'hers'])
+    found = sorted((start, end, matcher.phrases[index]) for start, end, index in matcher.find('ushers'))
+    assert found == [(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')]
+
+
+def test_normalize_keeps_tamil_and_devanagari_words_whole():
+    assert normalize_text('  Tooth-Ache!! ') == 'tooth ache'
+    assert normalize_text('பல் வலி?') == 'பல் வலி'
+    assert normalize_text('मसूड़ों से खून') == 'मसूड़ों से खून'
+
+
+def test_symptoms_and_aliases_in_any_language():
+    assert names(specialization_resolver.resolve('My gums are bleeding')) == ['Periodontist']
+    assert names(specialization_resolver.resolve('பல் வலி இருக்கு')) == ['General Dentist']
+    assert names(specialization_resolver.resolve('मसूड़ों से खून आ रहा है')) == ['Periodontist']
+    assert names(specialization_resolver.resolve('daant dard')) == ['General Dentist']
+    assert names(specialization_resolver.resolve('need an X-ray')) == ['Radiology']
+
+
+def test_longest_whole_word_match_wins():
+    assert names(specialization_resolver.resolve('severe tooth pain at night')) == ['Endodontist']
+    assert specialization_resolver.resolve('my parent is here') == []
+    matches = specialization_resolver.resolve('braces, and his baby teeth')
+    assert names(matches) == ['Pedodontist', 'Orthodontics']
+    assert matches[0].matched_terms == ['baby teeth']
+
+
+def test_available_restricts_and_keeps_its_names():
+    matches = specialization_resolver.resolve('teeth whitening and chest pain', ['cosmetic DENTISTRY', 'General Dentist'])
+    assert names(matches) == ['cosmetic DENTISTRY']
+    assert specialization_resolver.resolve('chest pain', ['General Dentist']) == []
+
+
+def test_describe():
+    resolver = SpecializationResolver({'ENT': {'description': 'Ear, nose and throat',
+                                               'common_conditions': ['sinus issues'], 'aliases': []}})
+    assert resolver.describe('ent') == {'name': 'ent', 'description': 'Ear, nose and throat',
+                                        'common_conditions': ['sinus issues']}
+    assert resolver.describe('Radiology')['description'] == 'Radiology specialist'
+    assert names(resolver.resolve('my sinus issues')) == ['ENT']
@@ -0,0 +1,134 @@
+#test_sqlite_manager.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.csv_manager import CSVManager
+from utils.exceptions import SlotUnavailableError
+from utils.sqlite_manager import SQLiteManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    mgr = SQLiteManager(str(tmp_path / 'apollo.db'))
+    yield mgr
+    mgr.close()
+
+
+def seed(mgr):
+    doctor = mgr.create_doctor({'name': 'Dr. Test', 'qualification': 'BDS',
+                                'specializations': 'General Dentist,Endodontist'})
+    patient = mgr.create_patient({'name': 'Asha', 'phone': '9876543210'})
+    return doctor, patient
+
+
+def book(mgr, doctor, patient, start_time='10:00', appointment_date='2026-10-20'):
+    return mgr.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': appointment_date, 'start_time': start_time, 'end_time': '',
+    })
+
+
+def test_database_uses_wal(manager):
+    assert manager._connection().execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_crud_matches_csv_manager(manager):
+    doctor, patient = seed(manager)
+    assert manager.create_doctor({'name': 'Dr. Test'}) is None
+    assert doctor.specializations == ['General Dentist', 'Endodontist']
+    assert manager.get_doctor_by_id(doctor.doctor_id) == doctor
+    assert manager.get_doctors_by_specialization('endodontist') == [doctor]
+    assert manager.get_all_specializations() == ['Endodontist', 'General Dentist']
+
+    assert manager.find_patient_by_phone(' 9876543210 ') == patient
+    assert manager.search_patients('Ash', lazy=True) == [patient]
+    assert manager.update_patient(patient.patient_id, {'age': 31, 'bogus': 1})
+    assert manager.get_patient_by_id(patient.patient_id).age == 31
+    assert not manager.update_patient(999, {'age': 1})
+
+    appointment = book(manager, doctor, patient)
+    assert (appointment.patient_name, appointment.doctor_name) == ('Asha', 'Dr. Test')
+    assert manager.get_appointment_by_id(appointment.appointment_id) == appointment
+    assert manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20') == [appointment]
+
+
+def test_unique_slot_rejects_double_booking(manager):
+    doctor, patient = seed(manager)
+    first = book(manager, doctor, patient, '10:00')
+    other = book(manager, doctor, patient, '11:00')
+    with pytest.raises(SlotUnavailableError):
+        book(manager, doctor, patient, '10:00')
+    with pytest.raises(SlotUnavailableError):
+        manager.update_appointment(other.appointment_id, {'start_time': '10:00'})
+
+    # A cancelled booking frees its slot
+    assert manager.update_appointment(first.appointment_id, {'status': 'cancelled'})
+    assert book(manager, doctor, patient, '10:00').start_time == '10:00'
+    assert len(manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20')) == 2
+
+
+def test_times_that_are_not_hh_mm_clash_only_on_the_same_start(manager):
+    doctor, patient = seed(manager)
+    first = book(manager, doctor, patient, 'morning')
+    other = book(manager, doctor, patient, '10:00')
+    with pytest.raises(SlotUnavailableError):
+        book(manager, doctor, patient, 'morning')
+    with pytest.raises(SlotUnavailableError):
+        manager.update_appointment(other.appointment_id, {'start_time': 'morning'})
+    assert book(manager, doctor, patient, 'evening').start_time == 'evening'
+    # Keeping its own start is not a clash with itself
+    assert manager.update_appointment(first.appointment_id, {'start_time': 'morning', 'end_time': ''})
+
+
+def test_concurrent_bookings_never_double_book(manager):
+    doctor, patient = seed(manager)
+    slots = [f"{9 + n // 2:02d}:{30 * (n % 2):02d}" for n in range(10)]
+
+    def attempt(i):
+        try:
+            return book(manager, doctor, patient, slots[i % 10]).appointment_id
+        except SlotUnavailableError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        results = list(pool.map(attempt, range(500)))
+
+    booked = [appointment_id for appointment_id in results if appointment_id is not None]
+    assert len(booked) == len(set(booked)) == 10
+    day = manager.get_appointments_by_doctor_date(doctor.doctor_id, '2026-10-20')
+    assert sorted(a.start_time for a in day) == sorted(slots)
+
+
+def test_reserved_ids_are_used_by_creates(manager):
+    ids = manager.reserve_ids('patients', 3)
+    assert list(ids) == [1, 2, 3]
+    patient = manager.create_patient({'patient_id': ids[1], 'name': 'Ravi'})
+    assert patient.patient_id == 2
+    assert manager.create_patient({'name': 'Meena'}).patient_id == 4
+
+
+def test_migration_copies_csv_tables(tmp_path):
+    from migrate_csv_to_sqlite import migrate
+
+    source = CSVManager(data_folder=str(tmp_path / 'csv'), compact_interval=3600)
+    doctor, patient = seed(source)
+    booked = [book(source, doctor, patient, '10:00'), book(source, doctor, patient, '10:00', '2026-11-02')]
+    source.close()
+
+    db_path = str(tmp_path / 'apollo.db')
+    assert migrate(str(tmp_path / 'csv'), db_path) == {'doctors': 1, 'patients': 1, 'appointments': 2}
+    # Re-running skips rows that are already there
+    assert migrate(str(tmp_path / 'csv'), db_path) == {'doctors': 0, 'patients': 0, 'appointments': 0}
+
+    target = SQLiteManager(db_path)
+    try:
+        assert target.get_doctor_by_id(doctor.doctor_id) == doctor
+        assert target.get_all_specializations() == ['Endodontist', 'General Dentist']
+        assert target.find_patient_by_phone('9876543210') == patient
+        assert [target.get_appointment_by_id(a.appointment_id) for a in booked] == booked
+        # New ids continue after the ones the CSV store handed out
+        assert target.create_patient({'name': 'Ravi'}).patient_id > patient.patient_id
+    finally:
+        target.close()
@@ -0,0 +1,319 @@
+#test_storage_backends.py
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+from benchmark import backend_options, run_workloads
+from utils.exceptions import SlotUnavailableError
+from utils.storage_backend import (
+    StorageBackend, AsyncStorageBackend, AsyncBackendAdapter, create_backend, create_async_backend,
+)
+from utils.sqlalchemy_manager import AsyncSQLAlchemyManager, async_database_url
+from utils.storage_models import PATIENT_SEARCH_LIMIT
+
+TODAY = date.today().isoformat()
+
+
+@pytest.fixture(params=['csv', 'sqlite', 'postgres'])
+def backend(request, tmp_path):
+    instance = create_backend(request.param, **backend_options(request.param, str(tmp_path)))
+    yield instance
+    instance.close()
+
+
+def seed(backend):
+    doctor = backend.create_doctor({'name': 'Dr. Test', 'qualification': 'BDS',
+                                    'specializations': 'General Dentist,Endodontist'})
+    patient = backend.create_patient({'name': 'Asha', 'phone': '9876543210'})
+    return doctor, patient
+
+
+def book(backend, doctor, patient, start_time='10:00', appointment_date=TODAY, end_time=''):
+    return backend.create_appointment({
+        'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+        'appointment_date': appointment_date, 'start_time': start_time, 'end_time': end_time,
+    })
+
+
+def test_backend_implements_protocol(backend):
+    assert isinstance(backend, StorageBackend)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend('parquet')
+
+
+def test_doctor_and_patient_lookups(backend):
+    doctor, patient = seed(backend)
+    assert backend.create_doctor({'name': 'Dr. Test'}) is None
+    assert backend.get_doctor_by_id(doctor.doctor_id) == doctor
+    assert backend.get_doctors_by_specialization('Endodontist') == [doctor]
+    assert backend.get_doctors_by_specialization('Pedodontist') == []
+    assert backend.get_all_specializations() == ['Endodontist', 'General Dentist']
+
+    assert backend.find_patient_by_phone('9876543210') == patient
+    assert backend.search_patients('Ash') == [patient]
+    assert backend.update_patient(patient.patient_id, {'age': 31})
+    assert backend.get_patient_by_id(patient.patient_id).age == 31
+
+
+def test_specialization_lookup_matches_whole_names_and_words(backend):
+    # Every backend selects doctors as utils.specialization_index.SpecializationIndex does
+    doctors = {spec: backend.create_doctor({'name': f"Dr. {spec}", 'specializations': spec})
+               for spec in ['General Dentist', 'Cosmetic dentistry', 'Endodontist', 'Pedodontist']}
+    both = backend.create_doctor({'name': 'Dr. Both', 'specializations': 'Endodontist, general dentist'})
+
+    def names(query):
+        return sorted(d.name for d in backend.get_doctors_by_specialization(query))
+
+    assert names('Dentist') == ['Dr. Both', 'Dr. General Dentist']
+    assert names('  GENERAL   dentist ') == ['Dr. Both', 'Dr. General Dentist']
+    assert names('dentistry') == ['Dr. Cosmetic dentistry']
+    assert names('endodontist') == ['Dr. Both', 'Dr. Endodontist']
+    assert names('dont') == [] and names('') == [] and names('Orthodontist') == []
+    assert both.doctor_id not in {d.doctor_id for d in backend.get_doctors_by_specialization('Pedodontist')}
+    assert [d.doctor_id for d in backend.get_doctors_by_specialization('Cosmetic')] == \
+        [doctors['Cosmetic dentistry'].doctor_id]
+
+
+def test_patient_search_is_capped_on_every_backend(backend):
+    for number in range(PATIENT_SEARCH_LIMIT + 5):
+        backend.create_patient({'name': f"Ravi {number}", 'phone': f"90000{number:05d}"})
+    assert len(backend.search_patients('Ravi')) == PATIENT_SEARCH_LIMIT
+    assert len(backend.search_patients('Ravi', limit=3)) == 3
+    assert len(backend.search_patients('90000', limit=4)) == 4
+
+
+def test_booking_rules(backend):
+    doctor, patient = seed(backend)
+    first = book(backend, doctor, patient, '10:00')
+    second = book(backend, doctor, patient, '10:30')
+    with pytest.raises(SlotUnavailableError):
+        book(backend, doctor, patient, '10:00')
+    with pytest.raises(SlotUnavailableError):
+        backend.update_appointment(second.appointment_id, {'start_time': '10:00'})
+
+    assert backend.update_appointment(first.appointment_id, {'status': 'cancelled'})
+    rebooked = book(backend, doctor, patient, '10:00')
+    day = backend.get_appointments_by_doctor_date(doctor.doctor_id, TODAY)
+    assert sorted(a.appointment_id for a in day) == sorted([second.appointment_id, rebooked.appointment_id])
+    assert backend.get_appointment_by_id(first.appointment_id).status == 'cancelled'
+
+
+def test_bulk_booked_slots_match_per_day_reads(backend):
+    doctor, patient = seed(backend)
+    other = backend.create_doctor({'name': 'Dr. Other', 'specializations': 'General Dentist'})
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    # Month after next, so the CSV backend reads a second partition
+    later = (date.today() + timedelta(days=62)).isoformat()
+    book(backend, doctor, patient, '10:00')
+    cancelled = book(backend, doctor, patient, '11:00')
+    backend.update_appointment(cancelled.appointment_id, {'status': 'cancelled'})
+    book(backend, other, patient, '10:00', tomorrow)
+    book(backend, other, patient, '09:00', later)
+    book(backend, doctor, patient, '12:00', (date.today() + timedelta(days=2)).isoformat())
+
+    grid = backend.get_booked_slots_bulk([doctor.doctor_id, other.doctor_id], [TODAY, tomorrow, later])
+    assert sorted(grid) == sorted((d.doctor_id, day) for d in (doctor, other) for day in (TODAY, tomorrow, later))
+    for (doctor_id, day), appointments in grid.items():
+        assert appointments == backend.get_appointments_by_doctor_date(doctor_id, day)
+    assert [a.start_time for a in grid[(doctor.doctor_id, TODAY)]] == ['10:00']
+    assert backend.get_booked_slots_bulk([], [TODAY]) == {}
+
+
+def test_appointments_by_patient(backend):
+    doctor, patient = seed(backend)
+    other = backend.create_patient({'name': 'Ravi', 'phone': '9876543211'})
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    next_month = (date.today() + timedelta(days=40)).isoformat()
+    later = book(backend, doctor, patient, '09:00', next_month)
+    past = book(backend, doctor, patient, '11:00', yesterday)
+    backend.update_appointment(past.appointment_id, {'status': 'completed'})
+    cancelled = book(backend, doctor, patient, '12:00')
+    backend.update_appointment(cancelled.appointment_id, {'status': 'cancelled'})
+    today = book(backend, doctor, patient, '10:00')
+    book(backend, doctor, other, '10:30')
+
+    visits = backend.get_appointments_by_patient(patient.patient_id)
+    assert [a.appointment_id for a in visits] == [past.appointment_id, today.appointment_id, later.appointment_id]
+    assert [a.status for a in visits] == ['completed', 'scheduled', 'scheduled']
+    assert backend.get_appointments_by_patient(12345) == []
+
+
+def test_concurrent_bookings_never_double_book(backend):
+    doctor, patient = seed(backend)
+    slots = [f"{9 + n // 2:02d}:{30 * (n % 2):02d}" for n in range(10)]
+
+    def attempt(i):
+        try:
+            return book(backend, doctor, patient, slots[i % 10]).appointment_id
+        except SlotUnavailableError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        results = list(pool.map(attempt, range(200)))
+
+    booked = [appointment_id for appointment_id in results if appointment_id is not None]
+    assert len(booked) == len(set(booked)) == 10
+    assert len(backend.get_appointments_by_doctor_date(doctor.doctor_id, TODAY)) == 10
+
+
+def test_bookings_may_not_overlap(backend):
+    doctor, patient = seed(backend)
+    long_visit = book(backend, doctor, patient, '10:00', end_time='11:00')
+    # Bookings without an end time last 30 minutes
+    for start_time in ('10:30', '09:45'):
+        with pytest.raises(SlotUnavailableError):
+            book(backend, doctor, patient, start_time)
+    after = book(backend, doctor, patient, '11:00')
+    before = book(backend, doctor, patient, '09:30')
+
+    with pytest.raises(SlotUnavailableError):
+        backend.update_appointment(after.appointment_id, {'start_time': '10:45', 'end_time': '11:15'})
+    with pytest.raises(SlotUnavailableError):
+        backend.update_appointment(before.appointment_id, {'end_time': '10:15'})
+    assert backend.update_appointment(long_visit.appointment_id, {'end_time': '10:30'})
+    assert book(backend, doctor, patient, '10:30').start_time == '10:30'
+    assert len(backend.get_appointments_by_doctor_date(doctor.doctor_id, TODAY)) == 4
+
+
+def test_concurrent_overlapping_bookings_admit_one(backend):
+    doctor, patient = seed(backend)
+    # Every pair of these hour-long visits overlaps, though no two start together
+    starts = [f"10:{minute:02d}" for minute in range(0, 60, 5)]
+
+    def attempt(i):
+        start_time = starts[i % len(starts)]
+        try:
+            return book(backend, doctor, patient, start_time, end_time=f"11:{start_time[3:]}").appointment_id
+        except SlotUnavailableError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=24) as pool:
+        results = list(pool.map(attempt, range(48)))
+
+    assert len([appointment_id for appointment_id in results if appointment_id is not None]) == 1
+    assert len(backend.get_appointments_by_doctor_date(doctor.doctor_id, TODAY)) == 1
+
+
+def test_booking_analytics(backend):
+    doctor, patient = seed(backend)
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    book(backend, doctor, patient, '10:00')
+    book(backend, doctor, patient, '11:00', yesterday)
+    cancelled = book(backend, doctor, patient, '12:00')
+    backend.update_appointment(cancelled.appointment_id, {'status': 'cancelled'})
+    book(backend, doctor, patient, '10:00', (date.today() - timedelta(days=90)).isoformat())
+
+    analytics = backend.get_booking_analytics(30)
+    assert analytics['total_bookings'] == 2
+    assert analytics['total_cancelled'] == 1
+    assert analytics['cancellation_rate'] == 33.33
+    assert analytics['top_doctors'] == {'Dr. Test': 2}
+    assert analytics['specialization_stats'] == {'General Dentist': 2, 'Endodontist': 2}
+    assert analytics['daily_trends'] == {yesterday: 1, TODAY: 1}
+    assert analytics['period_days'] == 30
+
+
+def test_reserved_ids_are_honoured(backend):
+    ids = backend.reserve_ids('patients', 2)
+    patient = backend.create_patient({'patient_id': ids[1], 'name': 'Ravi', 'phone': '9000000001'})
+    assert patient.patient_id == ids[1]
+    assert backend.create_patient({'name': 'Meena', 'phone': '9000000002'}).patient_id > ids[1]
+
+
+def test_benchmark_workloads_report_latency(backend):
+    results = run_workloads(backend, operations=50, doctors=3, patients=10)
+    assert set(results) == {'booking', 'search', 'analytics'}
+    for summary in results.values():
+        assert summary['ops'] > 0
+        assert summary['ops_per_sec'] > 0
+        assert summary['p50_ms'] <= summary['p99_ms']
+    assert backend.get_booking_analytics(30)['total_bookings'] == 50
+
+
+def test_session_scope_spans_a_tool_call(tmp_path):
+    backend = create_backend('postgres', **backend_options('postgres', str(tmp_path)))
+    try:
+        doctor, patient = seed(backend)
+        book(backend, doctor, patient, '10:00')
+        with backend.session_scope() as session:
+            assert backend.Session() is session
+            # A lost race rolls back to a savepoint; the rest of the call still commits
+            with pytest.raises(SlotUnavailableError):
+                book(backend, doctor, patient, '10:00')
+            book(backend, doctor, patient, '10:30')
+        with pytest.raises(ZeroDivisionError):
+            with backend.session_scope():
+                book(backend, doctor, patient, '11:00')
+                1 / 0
+        day = backend.get_appointments_by_doctor_date(doctor.doctor_id, TODAY)
+        assert sorted(a.start_time for a in day) == ['10:00', '10:30']
+    finally:
+        backend.close()
+
+
+def test_async_database_url_picks_asyncio_drivers():
+    assert async_database_url('postgresql+psycopg2://u:p@db:5432/hospital') == 'postgresql+asyncpg://u:p@db:5432/hospital'
+    assert async_database_url('sqlite:///data/orm.db') == 'sqlite+aiosqlite:///data/orm.db'
+
+
+@pytest.mark.parametrize('name', ['csv', 'sqlite', 'postgres'])
+def test_async_backend_books_each_slot_once(name, tmp_path):
+    async def run():
+        backend = create_async_backend(name, **backend_options(name, str(tmp_path)))
+        assert isinstance(backend, AsyncStorageBackend)
+        assert isinstance(backend, AsyncSQLAlchemyManager if name == 'postgres' else AsyncBackendAdapter)
+        try:
+            async with backend.session_scope():
+                doctor = await backend.create_doctor({'name': 'Dr. Test', 'specializations': 'General Dentist'})
+                patient = await backend.create_patient({'name': 'Asha', 'phone': '9876543210'})
+            payload = {'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+                       'appointment_date': TODAY, 'start_time': '10:00', 'end_time': ''}
+
+            async def attempt(data=payload):
+                # Each tool call gets its own session scope
+                async with backend.session_scope():
+                    return await backend.create_appointment(data)
+
+            results = await asyncio.gather(*(attempt() for _ in range(10)), return_exceptions=True)
+            assert sum(not isinstance(result, Exception) for result in results) == 1
+            assert all(isinstance(result, SlotUnavailableError) for result in results if isinstance(result, Exception))
+            # The 10:00 booking runs to 10:30, so later starts inside it clash too
+            overlapping = [{**payload, 'start_time': f"10:{minute:02d}", 'end_time': '10:45'} for minute in range(5, 30, 5)]
+            results = await asyncio.gather(*(attempt(data) for data in overlapping), return_exceptions=True)
+            assert all(isinstance(result, SlotUnavailableError) for result in results)
+            day = await backend.get_appointments_by_doctor_date(doctor.doctor_id, TODAY)
+            assert [(a.start_time, a.patient_name) for a in day] == [('10:00', 'Asha')]
+            assert await backend.get_booked_slots_bulk([doctor.doctor_id], [TODAY]) == {(doctor.doctor_id, TODAY): day}
+            assert [d.name for d in await backend.get_doctors_by_specialization('dentist')] == ['Dr. Test']
+            assert await backend.search_patients('Asha', limit=1) == [patient]
+            assert (await backend.get_booking_analytics(30))['total_bookings'] == 1
+        finally:
+            await backend.close()
+
+    asyncio.run(run())
+
+
+def test_async_session_scope_rolls_back_the_whole_call(tmp_path):
+    async def run():
+        backend = create_async_backend('postgres', **backend_options('postgres', str(tmp_path)))
+        try:
+            async with backend.session_scope():
+                doctor = await backend.create_doctor({'name': 'Dr. Test', 'specializations': 'General Dentist'})
+                patient = await backend.create_patient({'name': 'Asha', 'phone': '9876543210'})
+            with pytest.raises(ZeroDivisionError):
+                async with backend.session_scope() as session:
+                    assert backend.Session() is session
+                    await backend.create_appointment({'patient_id': patient.patient_id, 'doctor_id': doctor.doctor_id,
+                                                      'appointment_date': TODAY, 'start_time': '10:00'})
+                    1 / 0
+            assert await backend.get_appointments_by_doctor_date(doctor.doctor_id, TODAY) == []
+        finally:
+            await backend.close()
+
+    asyncio.run(run())
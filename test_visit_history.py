@@ -0,0 +1,95 @@
+#test_visit_history.py
+
+import asyncio
+from datetime import date, timedelta
+
+from utils.storage_models import Appointment
+from utils.visit_history import PatientVisits, VisitHistory
+
+TODAY = date.today()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def appointment(appointment_id, days, start_time='10:00', doctor_id=1, status='scheduled'):
+    return Appointment(appointment_id=appointment_id, patient_id=5, doctor_id=doctor_id,
+                       appointment_date=(TODAY + timedelta(days=days)).isoformat(),
+                       start_time=start_time, status=status)
+
+
+def ids(appointments):
+    return [a.appointment_id for a in appointments]
+
+
+def test_last_visit_and_upcoming():
+    visits = PatientVisits([appointment(1, -30, doctor_id=2), appointment(2, -3, doctor_id=3, status='completed'),
+                            appointment(3, -1, status='cancelled'), appointment(4, 5, '11:00'),
+                            appointment(5, 5, '09:00'), appointment(6, 0)])
+    assert len(visits) == 5
+    assert visits.last_visit().appointment_id == 2
+    assert ids(visits.upcoming()) == [6, 5, 4]
+    assert PatientVisits().last_visit() is None
+
+
+def test_add_moves_and_remove_drops():
+    visits = PatientVisits([appointment(1, -3), appointment(2, 4)])
+    moved = appointment(2, -1, doctor_id=9)
+    visits.add(moved)
+    # The history keeps its own copy
+    moved.appointment_date = (TODAY + timedelta(days=10)).isoformat()
+    assert visits.last_visit().doctor_id == 9
+    assert visits.upcoming() == []
+    assert visits.remove(1) and not visits.remove(1)
+    visits.add(appointment(2, 2, status='cancelled'))
+    assert len(visits) == 0
+
+
+def test_history_is_loaded_once_and_kept_current():
+    clock = Clock()
+    history = VisitHistory(ttl=60, clock=clock)
+    stored = [appointment(1, -3, doctor_id=2)]
+    reads = []
+
+    def load():
+        reads.append(1)
+        return list(stored)
+
+    assert history.get(5, load).last_visit().doctor_id == 2
+    booked = appointment(2, 3)
+    history.record(booked)
+    assert ids(history.get(5, load).upcoming()) == [2]
+    history.forget(booked)
+    assert history.get(5, load).upcoming() == []
+    assert len(reads) == 1
+
+    clock.now = 61
+    history.get(5, load)
+    assert len(reads) == 2
+    history.invalidate(5)
+    history.get(5, load)
+    assert len(reads) == 3
+    assert history.get(None, load).last_visit() is None
+
+
+def test_a_load_overlapping_a_change_is_not_cached():
+    history = VisitHistory(clock=Clock())
+
+    async def slow_load():
+        history.record(appointment(1, 2))
+        return []
+
+    async def load():
+        return [appointment(1, 2)]
+
+    async def run():
+        assert (await history.get_async(5, slow_load)).upcoming() == []
+        return await history.get_async(5, load)
+
+    assert ids(asyncio.run(run()).upcoming()) == [1]
+    assert history.stats()['misses'] == 2
@@ -0,0 +1,239 @@
+#utils/availability_calendar.py
+
+import threading
+import time
+from datetime import date as date_class, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.date_parser import MAX_ADVANCE_DAYS
+from utils.interval_index import IntervalIndex, appointment_span
+from utils.logger import logger
+from utils.slot_bitmap import SlotGrid, slot_grid
+from utils.storage_models import ACTIVE_STATUSES, Appointment, Doctor
+
+
+class DayAvailability:
+    """Booked intervals and free slots of one doctor on one date.
+
+    The free-slot set is the complement of `mask` over the doctor's SlotGrid,
+    kept in step with `booked` as appointments come and go.
+    """
+
+    __slots__ = ('grid', 'booked', 'mask', 'loaded_at')
+
+    def __init__(self, grid: SlotGrid, booked: IntervalIndex, loaded_at: float = 0.0):
+        self.grid = grid
+        self.booked = booked
+        self.mask = grid.mask_of_spans(booked.spans())
+        self.loaded_at = loaded_at
+
+    @classmethod
+    def of(cls, doctor: Doctor, appointments: Iterable[Appointment], slot_minutes: int,
+           loaded_at: float = 0.0) -> 'DayAvailability':
+        return cls(slot_grid(doctor.working_start, doctor.working_end, slot_minutes),
+                   IntervalIndex.from_appointments(appointments), loaded_at)
+
+    @property
+    def booked_count(self) -> int:
+        return len(self.booked)
+
+    @property
+    def free_count(self) -> int:
+        return len(self.grid) - (self.mask & self.grid.full_mask).bit_count()
+
+    def free_slots(self) -> List[str]:
+        return self.grid.free_slots(self.mask)
+
+    def first_free(self, at_or_after: Optional[str] = None) -> Optional[str]:
+        return self.grid.first_free(self.mask, at_or_after)
+
+    def book(self, key, start: int, end: int):
+        self.booked.add(start, end, key)
+        self.mask |= self.grid.mask_of_spans([(start, end)])
+
+    def release(self, key) -> bool:
+        if not self.booked.discard(key):
+            return False
+        self.mask = self.grid.mask_of_spans(self.booked.spans())
+        return True
+
+
+class AvailabilityCalendar:
+    """Per-(doctor, date) availability over the booking horizon, updated as bookings change.
+
+    Days are read from storage on first use and then kept current by book(),
+    release() and invalidate(), which the scheduler calls after each stored
+    booking, reschedule and cancellation. Summaries and recommendations then
+    read free-slot counts without touching storage.
+
+    Each worker process has its own calendar, so a day is also re-read once
+    it is older than `ttl` seconds; the storage backend's overlap check stays
+    the authority on whether a slot can be booked. A load that started before
+    a change to its day is not cached, so a slow read cannot undo a newer
+    update.
+    """
+
+    def __init__(self, slot_minutes: int = 30, horizon_days: int = MAX_ADVANCE_DAYS, ttl: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.slot_minutes = slot_minutes
+        self.horizon_days = horizon_days
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._days: Dict[Tuple[int, str], DayAvailability] = {}
+        # Bumped on every change to a day, so loads overlapping a change are not cached
+        self._versions: Dict[Tuple[int, str], int] = {}
+        self._today: Optional[date_class] = None
+        self._counts = {'hits': 0, 'misses': 0, 'updates': 0, 'invalidations': 0}
+
+    @staticmethod
+    def _key(doctor_id, on_date) -> Tuple[int, str]:
+        return (int(doctor_id), str(on_date))
+
+    def _roll(self):
+        """Drop days that have passed; caller holds the lock"""
+        today = date_class.today()
+        if today != self._today:
+            self._today = today
+            cutoff = today.isoformat()
+            for key in [key for key in self._days if key[1] < cutoff]:
+                del self._days[key]
+            self._versions = {key: version for key, version in self._versions.items() if key[1] >= cutoff}
+
+    def in_horizon(self, on_date: date_class) -> bool:
+        today = date_class.today()
+        return today <= on_date <= today + timedelta(days=self.horizon_days)
+
+    def _cached(self, doctor: Doctor, on_date: date_class) -> Tuple[Optional[DayAvailability], int]:
+        """The usable cached day (or None) and the day's version, counting the hit or miss"""
+        key = self._key(doctor.doctor_id, on_date)
+        with self._lock:
+            self._roll()
+            day = self._days.get(key)
+            grid = slot_grid(doctor.working_start, doctor.working_end, self.slot_minutes)
+            if day is not None and (day.grid is not grid or self._clock() - day.loaded_at > self.ttl):
+                day = None
+            self._counts['hits' if day is not None else 'misses'] += 1
+            return day, self._versions.get(key, 0)
+
+    def _store(self, doctor: Doctor, on_date: date_class, appointments: Iterable[Appointment],
+               version: int) -> DayAvailability:
+        day = DayAvailability.of(doctor, appointments, self.slot_minutes, self._clock())
+        key = self._key(doctor.doctor_id, on_date)
+        with self._lock:
+            if self.in_horizon(on_date) and self._versions.get(key, 0) == version:
+                self._days[key] = day
+        return day
+
+    def get(self, doctor: Doctor, on_date: date_class,
+            load: Callable[[], Iterable[Appointment]]) -> DayAvailability:
+        """The doctor's day, calling load() for its active appointments when it is not cached"""
+        day, version = self._cached(doctor, on_date)
+        if day is None:
+            day = self._store(doctor, on_date, load(), version)
+        return day
+
+    async def get_async(self, doctor: Doctor, on_date: date_class,
+                        load: Callable[[], Awaitable[Iterable[Appointment]]]) -> DayAvailability:
+        day, version = self._cached(doctor, on_date)
+        if day is None:
+            day = self._store(doctor, on_date, await load(), version)
+        return day
+
+    def _cached_many(self, doctors: Iterable[Doctor], dates: Iterable[date_class]):
+        """Cached days of the doctors x dates grid, and (doctor, date, version) of the ones to load"""
+        found, missing = {}, []
+        dates = list(dates)
+        for doctor in doctors:
+            for on_date in dates:
+                day, version = self._cached(doctor, on_date)
+                if day is None:
+                    missing.append((doctor, on_date, version))
+                else:
+                    found[self._key(doctor.doctor_id, on_date)] = day
+        return found, missing
+
+    @staticmethod
+    def _grid_of(missing) -> Tuple[List[int], List[str]]:
+        """Doctor ids and ISO dates spanning the missing days, for one bulk read"""
+        doctor_ids = list(dict.fromkeys(doctor.doctor_id for doctor, _, _ in missing))
+        dates = sorted({on_date.isoformat() for _, on_date, _ in missing})
+        return doctor_ids, dates
+
+    def _store_many(self, found: Dict, missing, loaded: Dict) -> Dict[Tuple[int, str], DayAvailability]:
+        for doctor, on_date, version in missing:
+            key = self._key(doctor.doctor_id, on_date)
+            found[key] = self._store(doctor, on_date, loaded.get(key, ()), version)
+        return found
+
+    def get_many(self, doctors: Iterable[Doctor], dates: Iterable[date_class],
+                 load_many: Callable[[List[int], List[str]], Dict]) -> Dict[Tuple[int, str], DayAvailability]:
+        """Days of every doctor on every date, keyed (doctor_id, 'YYYY-MM-DD').
+
+        The days not cached are read with a single load_many(doctor_ids, dates)
+        call returning active appointments per (doctor_id, date) key, as
+        StorageBackend.get_booked_slots_bulk() does.
+        """
+        found, missing = self._cached_many(doctors, dates)
+        if not missing:
+            return found
+        return self._store_many(found, missing, load_many(*self._grid_of(missing)))
+
+    async def get_many_async(self, doctors: Iterable[Doctor], dates: Iterable[date_class],
+                             load_many: Callable[[List[int], List[str]], Awaitable[Dict]]
+                             ) -> Dict[Tuple[int, str], DayAvailability]:
+        found, missing = self._cached_many(doctors, dates)
+        if not missing:
+            return found
+        return self._store_many(found, missing, await load_many(*self._grid_of(missing)))
+
+    def _change(self, key: Tuple[int, str], apply: Callable[[DayAvailability], None]):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            day = self._days.get(key)
+            if day is not None:
+                apply(day)
+                self._counts['updates'] += 1
+
+    def book(self, appointment: Appointment):
+        """Record a stored booking (or the new slot of a rescheduled one)"""
+        key = self._key(appointment.doctor_id, appointment.appointment_date)
+        try:
+            start, end = appointment_span(appointment.start_time, appointment.end_time, self.slot_minutes)
+        except (TypeError, ValueError, AttributeError):
+            self.invalidate(appointment.doctor_id, appointment.appointment_date)
+            return
+        self._change(key, lambda day: day.book(appointment.appointment_id, start, end))
+
+    def release(self, appointment: Appointment):
+        """Record a cancellation (or the old slot of a rescheduled appointment)"""
+        if appointment.status not in ACTIVE_STATUSES:
+            return
+        key = self._key(appointment.doctor_id, appointment.appointment_date)
+        self._change(key, lambda day: day.release(appointment.appointment_id))
+
+    def invalidate(self, doctor_id=None, on_date=None):
+        """Forget one day, every day of one doctor, or (with no arguments) everything"""
+        with self._lock:
+            if doctor_id is not None and on_date is not None:
+                keys = [self._key(doctor_id, on_date)]
+            else:
+                keys = [key for key in self._days if doctor_id is None or key[0] == int(doctor_id)]
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._days.pop(key, None)
+            self._counts['invalidations'] += 1
+        logger.debug(f"Availability calendar invalidated {len(keys)} day(s)")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'days': len(self._days), **self._counts}
+
+
+def calendar_from_settings(slot_minutes: int = 30) -> AvailabilityCalendar:
+    try:
+        from config import settings
+    except Exception as e:
+        logger.warning(f"Settings unavailable, using the default availability calendar TTL: {e}")
+        return AvailabilityCalendar(slot_minutes)
+    return AvailabilityCalendar(slot_minutes, ttl=settings.AVAILABILITY_CALENDAR_TTL)
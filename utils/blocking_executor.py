@@ -0,0 +1,173 @@
+#utils/blocking_executor.py
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from utils.exceptions import ServiceBusyError, OperationTimeoutError
+from utils.logger import logger
+
+# Queue waits kept for the latency percentiles in stats()
+WAIT_SAMPLES = 1000
+
+
+class BlockingExecutor:
+    """Bounded thread pool for blocking work awaited from the event loop.
+
+    The voice-agent tools run on one asyncio loop per worker process, so a
+    pandas scan or a disk flush made directly in a tool stalls audio for every
+    call on that process. Blocking storage and notification calls go through
+    run() instead, which hands them to at most `max_workers` threads with up
+    to `max_queue` more waiting. Past that, run() raises ServiceBusyError at
+    once rather than letting the backlog grow, and a call that takes longer
+    than its timeout raises OperationTimeoutError; tools turn both into a
+    "please hold" reply. Writes go through run_to_completion(), whose timeout
+    only covers the wait for a worker, so "please hold" never hides a write
+    that is still going ahead.
+    """
+
+    def __init__(self, max_workers: int = 8, max_queue: int = 32, timeout: float = 8.0,
+                 name: str = 'blocking'):
+        if max_workers < 1 or max_queue < 0:
+            raise ValueError("max_workers must be at least 1 and max_queue at least 0")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + running
+        self._running = 0
+        self._peak_pending = 0
+        self._counts = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'timed_out': 0}
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _submit(self, fn: Callable, args, kwargs, on_start: Optional[Callable] = None) -> Future:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._counts['rejected'] += 1
+                logger.warning(f"Blocking executor saturated ({self._pending} calls pending), rejecting "
+                               f"{getattr(fn, '__qualname__', fn)}")
+                raise ServiceBusyError("All workers are busy; please try again in a moment")
+            self._pending += 1
+            self._counts['submitted'] += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+
+        context = contextvars.copy_context()
+        enqueued = time.perf_counter()
+
+        def call():
+            with self._lock:
+                self._running += 1
+                self._waits.append(time.perf_counter() - enqueued)
+            try:
+                if on_start:
+                    on_start()
+                result = context.run(fn, *args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._counts['failed'] += 1
+                raise
+            else:
+                with self._lock:
+                    self._counts['completed'] += 1
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+
+        def release_if_never_started(future):
+            # A call cancelled while still queued never runs call(), so free its slot here
+            if future.cancelled():
+                with self._lock:
+                    self._pending -= 1
+
+        future = self._pool.submit(call)
+        future.add_done_callback(release_if_never_started)
+        return future
+
+    def _timed_out(self, fn: Callable, timeout: float) -> OperationTimeoutError:
+        with self._lock:
+            self._counts['timed_out'] += 1
+        logger.warning(f"{getattr(fn, '__qualname__', fn)} did not finish within {timeout}s")
+        return OperationTimeoutError(f"The request took longer than {timeout} seconds")
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Run fn(*args, **kwargs) on the pool and await its result.
+
+        Context variables (e.g. the storage session scope) are carried over to
+        the worker thread. On timeout the caller is released but the thread
+        finishes the call, and keeps its slot until then; use
+        run_to_completion() for calls with side effects.
+        """
+        future = self._submit(fn, args, kwargs)
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(fn, timeout) from None
+
+    async def run_to_completion(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Like run(), but the timeout only applies while the call waits for a worker.
+
+        A call still queued at the timeout is cancelled, so OperationTimeoutError
+        means it never ran and can be retried. Once a worker picks it up the
+        caller awaits the result however long it takes, so what follows a
+        write (logging, cache updates) is never skipped while the write itself
+        goes through.
+        """
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+        future = self._submit(fn, args, kwargs, on_start=lambda: loop.call_soon_threadsafe(started.set))
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            await asyncio.wait_for(started.wait(), timeout)
+        except asyncio.TimeoutError:
+            # cancel() fails once a worker has the call, which is then awaited below
+            if future.cancel():
+                raise self._timed_out(fn, timeout) from None
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict:
+        """Queue depth and throughput counters, plus queue-wait percentiles in milliseconds"""
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                'workers': self.max_workers,
+                'capacity': self.capacity,
+                'pending': self._pending,
+                'running': self._running,
+                'queued': self._pending - self._running,
+                'peak_pending': self._peak_pending,
+                **self._counts,
+            }
+        stats['wait_p50_ms'] = round(waits[len(waits) // 2] * 1000, 2) if waits else 0.0
+        stats['wait_p99_ms'] = round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 2) if waits else 0.0
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _executor_from_settings() -> BlockingExecutor:
+    try:
+        from config import settings
+    except Exception as e:
+        logger.warning(f"Settings unavailable, using default blocking executor limits: {e}")
+        return BlockingExecutor()
+    return BlockingExecutor(
+        max_workers=settings.TOOL_EXECUTOR_WORKERS,
+        max_queue=settings.TOOL_EXECUTOR_QUEUE,
+        timeout=settings.TOOL_CALL_TIMEOUT,
+    )
+
+
+blocking_executor = _executor_from_settings()
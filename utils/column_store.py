@@ -0,0 +1,175 @@
+# utils/column_store.py
+
+from typing import Dict, List, Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import logger
+from utils.table_schema import Encoding
+
+
+class ColumnStore:
+    """Growable column-oriented table backing one CSV file.
+
+    Each column is a preallocated numpy array whose capacity doubles when
+    full, so appending a row is amortized O(1) instead of copying the whole
+    frame as pd.concat does. A DataFrame is only materialized when a
+    vectorized query asks for one, and is cached until the next mutation.
+
+    Columns given an Encoding (see utils/table_schema.py) are kept in a
+    compact dtype, e.g. statuses as int32 category codes and times as
+    minute-of-day integers; get()/row() decode them. A value an encoding
+    cannot represent moves that column back to object storage.
+    """
+
+    def __init__(self, columns: Iterable[str], initial_capacity: int = 64,
+                 encodings: Optional[Dict[str, Encoding]] = None):
+        self.columns: List[str] = list(columns)
+        self._capacity = max(int(initial_capacity), 1)
+        self._size = 0
+        self._encodings: Dict[str, Encoding] = {
+            column: encoding for column, encoding in (encodings or {}).items() if column in self.columns
+        }
+        self._data: Dict[str, np.ndarray] = {column: self._empty(column, self._capacity) for column in self.columns}
+        self._frame = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, initial_capacity: int = 64,
+                   encodings: Optional[Dict[str, Encoding]] = None) -> 'ColumnStore':
+        store = cls(df.columns, initial_capacity=max(initial_capacity, len(df) * 2), encodings=encodings)
+        for column in store.columns:
+            values = df[column].to_numpy(dtype=object)
+            encoding = store._encodings.get(column)
+            if encoding is not None:
+                try:
+                    store._data[column][:len(df)] = [encoding.encode(value) for value in values]
+                    continue
+                except ValueError as e:
+                    store._decode_column(column, reason=e)
+            store._data[column][:len(df)] = values
+        store._size = len(df)
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _empty(self, column: str, capacity: int) -> np.ndarray:
+        encoding = self._encodings.get(column)
+        return encoding.empty(capacity) if encoding else np.full(capacity, None, dtype=object)
+
+    def _grow(self, min_capacity: int):
+        capacity = self._capacity
+        while capacity < min_capacity:
+            capacity *= 2
+        for column, values in self._data.items():
+            grown = self._empty(column, capacity)
+            grown[:self._size] = values[:self._size]
+            self._data[column] = grown
+        self._capacity = capacity
+
+    def _add_column(self, column: str):
+        self.columns.append(column)
+        self._data[column] = np.full(self._capacity, None, dtype=object)
+
+    def _decode_column(self, column: str, reason=None):
+        """Fall back to object storage for a column holding a value its encoding cannot represent"""
+        encoding = self._encodings.pop(column)
+        values = self._data[column]
+        decoded = np.full(self._capacity, None, dtype=object)
+        decoded[:self._size] = [encoding.decode(raw) for raw in values[:self._size]]
+        self._data[column] = decoded
+        logger.debug(f"Column '{column}' stored as objects: {reason}")
+
+    def _set(self, position: int, column: str, value: Any):
+        if column not in self._data:
+            self._add_column(column)
+        encoding = self._encodings.get(column)
+        if encoding is not None:
+            try:
+                value = encoding.encode(value)
+            except ValueError as e:
+                self._decode_column(column, reason=e)
+        self._data[column][position] = value
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Append a row and return its position"""
+        if self._size == self._capacity:
+            self._grow(self._size + 1)
+        position = self._size
+        for column, value in record.items():
+            self._set(position, column, value)
+        self._size += 1
+        self._frame = None
+        return position
+
+    def update(self, position: int, values: Dict[str, Any]):
+        for column, value in values.items():
+            self._set(position, column, value)
+        self._frame = None
+
+    def remove(self, positions: Iterable[int]):
+        """Drop rows, shifting later rows down; O(n), meant for rare deletes"""
+        keep = np.ones(self._size, dtype=bool)
+        keep[list(positions)] = False
+        kept = int(keep.sum())
+        for column, values in self._data.items():
+            compacted = self._empty(column, self._capacity)
+            compacted[:kept] = values[:self._size][keep]
+            self._data[column] = compacted
+        self._size = kept
+        self._frame = None
+
+    def get(self, position: int, column: str) -> Any:
+        raw = self._data[column][position]
+        encoding = self._encodings.get(column)
+        return encoding.decode(raw) if encoding else raw
+
+    def row(self, position: int) -> Dict[str, Any]:
+        return {column: self.get(position, column) for column in self.columns}
+
+    def take(self, column: str, positions: np.ndarray) -> List[Any]:
+        """Decoded values of one column at the given positions, as a plain list"""
+        if column not in self._data:
+            return [None] * len(positions)
+        raw = self._data[column][positions]
+        encoding = self._encodings.get(column)
+        return encoding.decode_many(raw) if encoding else raw.tolist()
+
+    def column(self, column: str) -> np.ndarray:
+        """Read-only view of a column's live values, decoded when the column is encoded"""
+        view = self._data[column][:self._size]
+        encoding = self._encodings.get(column)
+        if encoding is not None:
+            return np.array(encoding.decode_many(view), dtype=object)
+        view.flags.writeable = False
+        return view
+
+    def isin(self, column: str, positions: np.ndarray, values: Iterable[Any]) -> np.ndarray:
+        """Vectorized membership test for the rows at positions, compared in the column's compact form"""
+        raw = self._data[column][positions]
+        encoding = self._encodings.get(column)
+        if encoding is None:
+            wanted = set(values)
+            return np.fromiter((value in wanted for value in raw), dtype=bool, count=len(raw))
+        # A few equality passes beat np.isin's sort-based setup on the short lists queried here
+        mask = np.zeros(len(raw), dtype=bool)
+        for code in {encoding.lookup(value) for value in values} - {None}:
+            mask |= raw == code
+        return mask
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the live rows (object columns count pointers only)"""
+        return sum(values[:self._size].nbytes for values in self._data.values())
+
+    def frame(self) -> pd.DataFrame:
+        """Materialize (or return the cached) DataFrame snapshot of all rows"""
+        if self._frame is None:
+            series = {}
+            for column in self.columns:
+                # Copy so the snapshot is unaffected by later in-place updates
+                values = self._data[column][:self._size].copy()
+                encoding = self._encodings.get(column)
+                series[column] = encoding.to_series(values) if encoding else pd.Series(values, dtype=object)
+            self._frame = pd.DataFrame(series, columns=self.columns).infer_objects()
+        return self._frame
@@ -1,252 +1,964 @@
 # utils/csv_manager.py
 
+import numpy as np
 import pandas as pd
 import os
 import threading
+import time
 import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass, asdict
+from collections import Counter, defaultdict
+from typing import List, Dict, Optional, Any, Callable, Iterable, Tuple
+from dataclasses import asdict
 
 from utils.logger import logger
+from utils.exceptions import SlotUnavailableError
+from utils.rwlock import ReadWriteLock, StripedLock
+from utils.table_journal import TableJournal
+from utils.column_store import ColumnStore
+from utils.id_allocator import SequenceAllocator, SequenceFile
+from utils.table_schema import TableSchema
+from utils.table_snapshot import FEATHER_AVAILABLE, read_table, write_snapshot
+from utils.result_view import ResultView
+from utils.interval_index import IntervalIndex, appointment_span
+from utils.specialization_index import SpecializationIndex
+from utils.patient_name_index import PatientNameIndex
+from utils.storage_models import (
+    ACTIVE_STATUSES, BOOKED_STATUSES, Patient, Doctor, Appointment, booking_analytics,
+    DOCTOR_FIELDS, PATIENT_FIELDS, APPOINTMENT_FIELDS, make_doctor, make_patient, make_appointment,
+    DoctorDay, group_by_doctor_date, PATIENT_SEARCH_LIMIT,
+)
+
+# How writes reach disk:
+#   sync     - each journal record is fsynced before the write returns
+#   batched  - journal records are buffered and fsynced together by the flusher thread
+#              once flush_threshold records are waiting or flush_interval has passed
+#   interval - no journal; dirty tables are rewritten atomically every flush_interval
+DURABILITY_MODES = ('sync', 'batched', 'interval')
+
+# Column kinds: explicit dtypes on load, compact in-memory encodings and typed binary snapshots
+DOCTOR_SCHEMA = TableSchema({
+    'doctor_id': 'int', 'name': 'text', 'qualification': 'text', 'specializations': 'text',
+    'working_start': 'text', 'working_end': 'text', 'working_days': 'text', 'is_active': 'bool',
+    'consultation_fee': 'int', 'experience_years': 'int',
+})
+PATIENT_SCHEMA = TableSchema({
+    'patient_id': 'int', 'name': 'text', 'phone': 'phone', 'age': 'int', 'location': 'text',
+    'first_visit': 'bool', 'preferred_language': 'category',
+})
+APPOINTMENT_SCHEMA = TableSchema({
+    'appointment_id': 'int', 'patient_id': 'int', 'doctor_id': 'int', 'patient_name': 'text',
+    'doctor_name': 'category', 'appointment_date': 'date', 'start_time': 'time', 'end_time': 'time',
+    'status': 'category',
+})
+# Month partition and patient of every appointment, so a lookup by id or patient opens only
+# the partitions holding them
+APPOINTMENT_DIRECTORY_SCHEMA = TableSchema({'appointment_id': 'int', 'patient_id': 'int', 'month': 'category'})
+
+# Partition for appointments whose date has no YYYY-MM prefix
+UNDATED_PARTITION = 'undated'
+_MONTH_PATTERN = re.compile(r'^(\d{4}-\d{2})')
+
+
+def _id_key(value) -> Optional[int]:
+    """Normalize an id read from CSV/JSON (int, numpy int, float, str) for dict lookups"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _phone_key(value) -> Optional[str]:
+    """Normalize a phone number, which pandas may have parsed as int or float"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def partition_month(appointment_date) -> str:
+    """Month partition ('YYYY-MM') an appointment date belongs to"""
+    match = _MONTH_PATTERN.match(str(appointment_date or ''))
+    return match.group(1) if match else UNDATED_PARTITION
+
+
+# --- Appointment partitions ---
+class AppointmentPartition:
+    """One month of appointments with its own CSV file, journal, store and indexes"""
+
+    def __init__(self, month: str, file_path: str, journal: TableJournal, store: ColumnStore):
+        self.month = month
+        self.file_path = file_path
+        self.journal = journal
+        self.store = store
+        self.last_access = time.monotonic()
+        # Bumped by every write, so eviction can tell whether one landed while it saved the file
+        self.version = 0
+        self.rebuild_indexes()
+
+    def rebuild_indexes(self):
+        self.id_index: Dict[int, int] = {}
+        self.doctor_date_index: Dict[tuple, set] = defaultdict(set)
+        # Active bookings of each (doctor_id, date) as intervals; built on first use, dropped on writes
+        self.day_intervals: Dict[tuple, IntervalIndex] = {}
+        store = self.store
+        for position, (appointment_id, doctor_id, appointment_date) in enumerate(zip(
+                store.column('appointment_id'), store.column('doctor_id'), store.column('appointment_date'))):
+            self.index(position, appointment_id, doctor_id, appointment_date)
+
+    def index(self, position, appointment_id, doctor_id, appointment_date):
+        self.id_index.setdefault(_id_key(appointment_id), position)
+        self.doctor_date_index[(_id_key(doctor_id), str(appointment_date))].add(position)
+        self.day_intervals.pop((_id_key(doctor_id), str(appointment_date)), None)
+
+    def intervals_for(self, key: tuple) -> IntervalIndex:
+        """Interval index of the active bookings of one (doctor_id, date), keyed by appointment id"""
+        intervals = self.day_intervals.get(key)
+        if intervals is None:
+            store = self.store
+            positions = np.fromiter(self.doctor_date_index.get(key, ()), dtype=np.int64)
+            active = positions[store.isin('status', positions, ACTIVE_STATUSES)]
+            intervals = IntervalIndex.from_rows(zip(
+                store.take('start_time', active), store.take('end_time', active),
+                (_id_key(appointment_id) for appointment_id in store.take('appointment_id', active))))
+            self.day_intervals[key] = intervals
+        return intervals
+
+    def doctor_date_key(self, position) -> tuple:
+        return (_id_key(self.store.get(position, 'doctor_id')), str(self.store.get(position, 'appointment_date')))
+
+    def remove(self, appointment_id):
+        """Drop an appointment that moved to another month"""
+        position = self.id_index.get(_id_key(appointment_id))
+        if position is not None:
+            self.store.remove([position])
+            self.rebuild_indexes()
+
+
+class AppointmentDirectory:
+    """Where each appointment lives: its month partition, by appointment id and by patient.
+
+    Persisted like a table (CSV plus journal) and loaded whole at startup;
+    it is three small columns per appointment, so the partitions themselves
+    can stay lazy, a lookup of an unknown id loads nothing and a patient's
+    history loads only the months they have appointments in.
+    """
+
+    def __init__(self, store: ColumnStore):
+        self.store = store
+        self.rebuild_indexes()
+
+    def rebuild_indexes(self):
+        self.positions: Dict[int, int] = {}
+        self.patient_appointments: Dict[int, set] = defaultdict(set)
+        for position, (appointment_id, patient_id) in enumerate(zip(
+                self.store.column('appointment_id'), self.store.column('patient_id'))):
+            key = _id_key(appointment_id)
+            self.positions[key] = position
+            if _id_key(patient_id) is not None:
+                self.patient_appointments[_id_key(patient_id)].add(key)
+
+    def __contains__(self, appointment_id) -> bool:
+        return _id_key(appointment_id) in self.positions
+
+    def month_of(self, appointment_id) -> Optional[str]:
+        position = self.positions.get(_id_key(appointment_id))
+        return None if position is None else self.store.get(position, 'month')
+
+    def appointments_of(self, patient_id) -> Dict[str, List[int]]:
+        """A patient's appointment ids grouped by month"""
+        months = defaultdict(list)
+        for key in self.patient_appointments.get(_id_key(patient_id), ()):
+            months[self.store.get(self.positions[key], 'month')].append(key)
+        return months
+
+    def record(self, appointment_id, patient_id, month: str) -> Tuple[str, Dict]:
+        """Add an appointment, or move it to another month or patient; returns the journal op and record"""
+        key, patient_key = _id_key(appointment_id), _id_key(patient_id)
+        record = {'appointment_id': key, 'patient_id': patient_key, 'month': month}
+        position = self.positions.get(key)
+        if position is None:
+            self.positions[key] = position = self.store.append(record)
+            op = 'insert'
+        else:
+            previous = _id_key(self.store.get(position, 'patient_id'))
+            if previous is not None:
+                self.patient_appointments[previous].discard(key)
+            self.store.update(position, record)
+            op = 'update'
+        if patient_key is not None:
+            self.patient_appointments[patient_key].add(key)
+        return op, record
 
-# --- Data Structures ---
-@dataclass
-class Patient:
-    patient_id: Optional[int] = None
-    name: str = ""
-    phone: str = ""
-    age: Optional[int] = None
-    location: Optional[str] = None
-    first_visit: bool = True
-    preferred_language: str = 'en'
-
-@dataclass
-class Doctor:
-    doctor_id: Optional[int] = None
-    name: str = ""
-    qualification: str = ""
-    specializations: List[str] = None
-    working_start: str = "09:00"
-    working_end: str = "18:00"
-    working_days: List[str] = None
-    consultation_fee: int = 500
-    experience_years: int = 5
-
-@dataclass
-class Appointment:
-    appointment_id: Optional[int] = None
-    patient_id: int = 0
-    doctor_id: int = 0
-    patient_name: str = ""
-    doctor_name: str = ""
-    appointment_date: str = ""
-    start_time: str = ""
-    end_time: str = ""
-    status: str = 'scheduled'
-    patient: Optional[Patient] = None
-    doctor: Optional[Doctor] = None
 
 # --- CSVManager Class ---
 class CSVManager:
-    def __init__(self, data_folder='data'):
+    def __init__(self, data_folder='data', compact_interval: float = 60.0, durability: str = 'batched',
+                 flush_interval: float = 0.5, flush_threshold: int = 100, binary_snapshots: bool = True,
+                 phonetic_search: bool = True):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}, got {durability!r}")
         self.data_folder = data_folder
+        self.compact_interval = compact_interval
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.flush_threshold = max(int(flush_threshold), 1)
+        # Patient name search also matches names that sound alike (see PatientNameIndex)
+        self.phonetic_search = phonetic_search
+        if binary_snapshots and not FEATHER_AVAILABLE:
+            logger.warning("pyarrow not installed, binary table snapshots disabled; loading from CSV")
+        # Compaction also writes a Feather copy of each table, which startup prefers over the CSV
+        self.binary_snapshots = binary_snapshots and FEATHER_AVAILABLE
         os.makedirs(self.data_folder, exist_ok=True)
 
         # Define file paths
         self.doctors_file = os.path.join(self.data_folder, 'doctors.csv')
         self.patients_file = os.path.join(self.data_folder, 'patients.csv')
-        self.appointments_file = os.path.join(self.data_folder, 'appointments.csv')
+        self.appointments_folder = os.path.join(self.data_folder, 'appointments')
+        self.legacy_appointments_file = os.path.join(self.data_folder, 'appointments.csv')
+        os.makedirs(self.appointments_folder, exist_ok=True)
 
         self.lock = threading.Lock()
+        # One reader-writer lock per table: lookups share it, while a mutation and its
+        # journal append hold it exclusively, so concurrent writes are neither lost nor reordered
+        self.table_locks = {table: ReadWriteLock() for table in ('doctors', 'patients', 'appointments')}
+        # Makes booking check-and-insert atomic per (doctor_id, appointment_date)
+        self.slot_locks = StripedLock()
 
         # Define columns for each CSV
-        self.doctor_cols = ['doctor_id', 'name', 'qualification', 'specializations', 'working_start', 'working_end', 'working_days', 'is_active', 'consultation_fee', 'experience_years']
-        self.patient_cols = ['patient_id', 'name', 'phone', 'age', 'location', 'first_visit', 'preferred_language']
-        self.appointment_cols = ['appointment_id', 'patient_id', 'doctor_id', 'patient_name', 'doctor_name', 'appointment_date', 'start_time', 'end_time', 'status']
+        self.doctor_cols = DOCTOR_SCHEMA.columns
+        self.patient_cols = PATIENT_SCHEMA.columns
+        self.appointment_cols = APPOINTMENT_SCHEMA.columns
+
+        # Writes are appended to a per-table journal and folded into the CSV by compaction
+        self._dirty_rows: Dict[TableJournal, int] = defaultdict(int)
+        self.journals = {
+            'doctors': TableJournal(os.path.join(self.data_folder, 'doctors.journal')),
+            'patients': TableJournal(os.path.join(self.data_folder, 'patients.journal')),
+            # Flushed and compacted before the partitions, so a crash never leaves a row it cannot find
+            'appointment_directory': TableJournal(os.path.join(self.data_folder, 'appointment_directory.journal')),
+        }
+        self.appointment_directory_file = os.path.join(self.data_folder, 'appointment_directory.csv')
+
+        # Load each table into a columnar store and replay journaled writes on top
+        self.doctor_store = self._load_table(self.journals['doctors'], self.doctors_file, DOCTOR_SCHEMA, 'doctor_id')
+        self.patient_store = self._load_table(self.journals['patients'], self.patients_file, PATIENT_SCHEMA, 'patient_id')
 
-        # Load data into pandas DataFrames
-        self.doctors_df = self._load_csv(self.doctors_file, self.doctor_cols)
-        self.patients_df = self._load_csv(self.patients_file, self.patient_cols)
-        self.appointments_df = self._load_csv(self.appointments_file, self.appointment_cols)
+        # Appointments are split into monthly partitions under data/appointments/,
+        # loaded on first access and evicted once their month is in the past
+        self.partitions: Dict[str, AppointmentPartition] = {}
+        self._partition_load_lock = threading.Lock()
+        self._migrate_legacy_appointments()
+        self.appointment_directory = self._load_appointment_directory()
 
-    def _load_csv(self, file_path, columns):
+        # In-memory hash indexes: key -> row position in the store
+        self._rebuild_indexes()
+
+        # Per-table id sequences, initialized once from the loaded data
+        self.sequences = SequenceFile(os.path.join(self.data_folder, 'sequences.json'))
+        self.id_allocators = {
+            'doctors': self._make_allocator('doctors', self._doctor_index),
+            'patients': self._make_allocator('patients', self._patient_index),
+            'appointments': self._make_allocator('appointments', self._stored_appointment_ids()),
+        }
+
+        # Disk writes happen on a background thread, off the booking path
+        self._stop_event = threading.Event()
+        self._flush_event = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='csv-flusher', daemon=True)
+        self._flusher.start()
+
+    def _load_csv(self, file_path, schema: TableSchema):
         with self.lock:
             if os.path.exists(file_path):
                 logger.info(f"Loading data from {file_path}")
-                return pd.read_csv(file_path)
+                return read_table(file_path, schema, use_snapshot=self.binary_snapshots)
             else:
                 logger.info(f"Creating new data file: {file_path}")
-                return pd.DataFrame(columns=columns)
+                return pd.DataFrame(columns=schema.columns)
 
-    def _save_csv(self, df, file_path):
+    def _save_csv(self, df, file_path, schema: Optional[TableSchema] = None):
+        # Write to a temp file first so a crash never leaves a half-written table
+        tmp_path = f"{file_path}.tmp"
         with self.lock:
-            df.to_csv(file_path, index=False)
+            df.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, file_path)
+            if schema is not None and self.binary_snapshots:
+                try:
+                    write_snapshot(df, file_path, schema)
+                except Exception as e:
+                    # The CSV is already saved; startup simply falls back to it
+                    logger.warning(f"Could not write binary snapshot for {file_path}: {e}")
+
+    def _load_table(self, journal, file_path, schema, id_column) -> ColumnStore:
+        store = ColumnStore.from_frame(self._load_csv(file_path, schema), encodings=schema.encodings())
+        self._replay_journal(store, journal, id_column)
+        return store
+
+    def _replay_journal(self, store, journal, id_column):
+        """Apply journaled inserts and updates over a freshly loaded base file.
+
+        Replay is an upsert by id, so records that already reached the base
+        file before a crash are applied again harmlessly. 'delete' records
+        drop a row, e.g. an appointment rescheduled into another month.
+        """
+        positions = {}
+        for position, value in enumerate(store.column(id_column)):
+            key = _id_key(value)
+            if key is not None:
+                positions.setdefault(key, position)
+        deleted = set()
+        replayed = 0
+
+        for entry in journal.replay():
+            record = entry.get('data') or {}
+            key = _id_key(record.get(id_column))
+            if key is None:
+                continue
+            if entry.get('op') == 'delete':
+                if key in positions:
+                    deleted.add(positions.pop(key))
+            elif key in positions:
+                store.update(positions[key], record)
+            elif entry.get('op') == 'insert':
+                positions[key] = store.append(record)
+            replayed += 1
+
+        if deleted:
+            store.remove(deleted)
+        if replayed:
+            logger.info(f"Replayed {replayed} journal records from {journal.file_path}")
+
+    # DataFrame views for vectorized queries; materialized lazily by the stores
+    @property
+    def doctors_df(self) -> pd.DataFrame:
+        return self.doctor_store.frame()
+
+    @property
+    def patients_df(self) -> pd.DataFrame:
+        return self.patient_store.frame()
+
+    @property
+    def appointments_df(self) -> pd.DataFrame:
+        """Full appointment history; loads every partition, so prefer the indexed queries"""
+        frames = [self._get_partition(month).store.frame() for month in self._stored_months()]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=self.appointment_cols)
+        return pd.concat(frames, ignore_index=True)
+
+    def _journal_write(self, journal, op, record):
+        """Record a mutation according to the durability mode; caller holds the table's write lock"""
+        self._dirty_rows[journal] += 1
+        if self.durability == 'interval':
+            if self._dirty_rows[journal] >= self.flush_threshold:
+                self._flush_event.set()
+            return
+        journal.append(op, record, sync=self.durability == 'sync')
+        if journal.unflushed >= self.flush_threshold:
+            self._flush_event.set()
+
+    def _partition_write(self, partition: AppointmentPartition, op, record):
+        """Record a mutation of one month's appointments; caller holds the appointments write lock"""
+        partition.version += 1
+        self._journal_write(partition.journal, op, record)
+
+    # --- Indexes ---
+    def _rebuild_indexes(self):
+        """Build the lookup dicts from the loaded DataFrames"""
+        self._doctor_index: Dict[int, int] = {}
+        self._patient_index: Dict[int, int] = {}
+        self._phone_index: Dict[str, int] = {}
+        # Doctor ids by specialization, replacing a substring scan of every row per lookup
+        self._specialization_index = SpecializationIndex()
+        # Patient positions by fuzzy name, replacing a substring scan of every name per search
+        self._name_index = PatientNameIndex(phonetic=self.phonetic_search)
+
+        doctors = self.doctor_store
+        for position, (doctor_id, specializations) in enumerate(zip(
+                doctors.column('doctor_id'), doctors.column('specializations'))):
+            self._doctor_index.setdefault(_id_key(doctor_id), position)
+            self._specialization_index.add(_id_key(doctor_id), specializations)
+        patients = self.patient_store
+        for position, (patient_id, phone, name) in enumerate(zip(
+                patients.column('patient_id'), patients.column('phone'), patients.column('name'))):
+            self._index_patient(position, patient_id, phone)
+            self._name_index.add(position, name)
+
+    def _index_patient(self, position, patient_id, phone):
+        self._patient_index.setdefault(_id_key(patient_id), position)
+        phone = _phone_key(phone)
+        if phone:
+            self._phone_index.setdefault(phone, position)
+
+    # --- Appointment partitions ---
+    def _stored_months(self) -> List[str]:
+        """Months with a partition file or journal on disk, or loaded in memory"""
+        months = {month for month, _ in self._loaded_partitions()}
+        for name in os.listdir(self.appointments_folder):
+            month, _, suffix = name.partition('.')
+            if suffix in ('csv', 'journal', 'journal.compacting'):
+                months.add(month)
+        return sorted(months)
 
-    def _get_next_id(self, df, id_column):
-        if df.empty or id_column not in df.columns or df[id_column].isnull().all():
-            return 1
-        return int(df[id_column].max()) + 1
+    def _get_partition(self, month: str, create: bool = True) -> Optional[AppointmentPartition]:
+        """Return a month's partition, loading it on first access"""
+        partition = self.partitions.get(month)
+        if partition is None:
+            with self._partition_load_lock:
+                partition = self.partitions.get(month)
+                if partition is None:
+                    file_path = os.path.join(self.appointments_folder, f"{month}.csv")
+                    journal = TableJournal(os.path.join(self.appointments_folder, f"{month}.journal"))
+                    on_disk = any(os.path.exists(path) for path in (file_path, journal.file_path, journal.rotated_path))
+                    if not on_disk and not create:
+                        return None
+                    store = self._load_table(journal, file_path, APPOINTMENT_SCHEMA, 'appointment_id')
+                    partition = AppointmentPartition(month, file_path, journal, store)
+                    self.partitions[month] = partition
+        partition.last_access = time.monotonic()
+        return partition
+
+    def _loaded_partitions(self) -> List[tuple]:
+        """(month, partition) of the loaded partitions, copied under the load lock since readers load more"""
+        with self._partition_load_lock:
+            return sorted(self.partitions.items())
+
+    def _locate_appointment(self, appointment_id) -> tuple:
+        """Find (partition, position) for an id in the one partition the directory names"""
+        key = _id_key(appointment_id)
+        month = self.appointment_directory.month_of(key)
+        partition = self._get_partition(month, create=False) if month is not None else None
+        position = partition.id_index.get(key) if partition else None
+        if position is None:
+            return None, None
+        return partition, position
+
+    def _load_appointment_directory(self) -> AppointmentDirectory:
+        journal = self.journals['appointment_directory']
+        paths = (self.appointment_directory_file, journal.file_path, journal.rotated_path)
+        if any(os.path.exists(path) for path in paths):
+            store = self._load_table(journal, self.appointment_directory_file, APPOINTMENT_DIRECTORY_SCHEMA,
+                                     'appointment_id')
+            return AppointmentDirectory(store)
+
+        # Partitions written before the directory existed: read each once and save what they hold
+        store = ColumnStore.from_frame(pd.DataFrame(columns=APPOINTMENT_DIRECTORY_SCHEMA.columns),
+                                       encodings=APPOINTMENT_DIRECTORY_SCHEMA.encodings())
+        directory = AppointmentDirectory(store)
+        months = self._stored_months()
+        for month in months:
+            partition_store = self._get_partition(month).store
+            for appointment_id, patient_id in zip(partition_store.column('appointment_id'),
+                                                  partition_store.column('patient_id')):
+                directory.record(appointment_id, patient_id, month)
+        if months:
+            self._compact_table(self.table_locks['appointments'], store, journal,
+                                self.appointment_directory_file, APPOINTMENT_DIRECTORY_SCHEMA, force=True)
+            self.evict_partitions()
+            logger.info(f"Indexed {len(directory.positions)} appointments in {self.appointment_directory_file}")
+        return directory
+
+    def _record_appointment(self, appointment_id, patient_id, month: str):
+        """Point the directory at an appointment's partition; caller holds the appointments write lock"""
+        op, record = self.appointment_directory.record(appointment_id, patient_id, month)
+        self._journal_write(self.journals['appointment_directory'], op, record)
+
+    def _stored_appointment_ids(self) -> Iterable[int]:
+        """Existing appointment ids, only needed when no persisted sequence exists yet"""
+        if self.sequences.get('appointments'):
+            return []
+        return list(self.appointment_directory.positions)
+
+    def _migrate_legacy_appointments(self):
+        """Split a pre-partitioning appointments.csv (and its journal) into monthly partitions"""
+        legacy_journal = TableJournal(os.path.join(self.data_folder, 'appointments.journal'))
+        legacy_paths = (self.legacy_appointments_file, legacy_journal.file_path, legacy_journal.rotated_path)
+        if not any(os.path.exists(path) for path in legacy_paths):
+            return
+
+        legacy = self._load_table(legacy_journal, self.legacy_appointments_file, APPOINTMENT_SCHEMA, 'appointment_id').frame()
+        for month, rows in legacy.groupby(legacy['appointment_date'].map(partition_month)):
+            partition = self._get_partition(month)
+            for record in rows.to_dict('records'):
+                position = partition.id_index.get(_id_key(record['appointment_id']))
+                if position is None:
+                    position = partition.store.append(record)
+                    partition.index(position, record['appointment_id'], record['doctor_id'], record['appointment_date'])
+                else:
+                    partition.store.update(position, record)
+            partition.day_intervals.clear()
+            self._compact_table(self.table_locks['appointments'], partition.store, partition.journal,
+                                partition.file_path, APPOINTMENT_SCHEMA, force=True)
+
+        # Partitions are written first, so a crash here just repeats the (idempotent) migration
+        legacy_journal.close()
+        for path in legacy_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        logger.info(f"Migrated {len(legacy)} appointments into monthly partitions under {self.appointments_folder}")
+
+    def evict_partitions(self, before_month: Optional[str] = None, idle_seconds: float = 0.0) -> List[str]:
+        """Write out and unload partitions for months before before_month (default: the current month)"""
+        cutoff = before_month or datetime.now().strftime('%Y-%m')
+        now = time.monotonic()
+        evicted = []
+        lock = self.table_locks['appointments']
+        for month, partition in self._loaded_partitions():
+            if month >= cutoff or now - partition.last_access < idle_seconds:
+                continue
+            # Save outside the write lock; a write from here on changes the version and keeps the partition
+            version = partition.version
+            self._compact_table(lock, partition.store, partition.journal, partition.file_path, APPOINTMENT_SCHEMA)
+            with lock.write_lock():
+                with self._partition_load_lock:
+                    if partition.version != version or self.partitions.get(month) is not partition:
+                        continue
+                    del self.partitions[month]
+                partition.journal.close()
+                self._dirty_rows.pop(partition.journal, None)
+            evicted.append(month)
+        if evicted:
+            logger.debug(f"Evicted appointment partitions: {', '.join(evicted)}")
+        return evicted
+
+    # --- Compaction ---
+    def _needs_compaction(self, journal) -> bool:
+        return bool(self._dirty_rows.get(journal) or journal.pending or os.path.exists(journal.rotated_path))
+
+    def _compact_table(self, lock, store, journal, file_path, schema, force=False):
+        if not (force or self._needs_compaction(journal)):
+            return
+        # A read lock excludes writers, so no record lands between snapshot and rotation
+        with lock.read_lock():
+            snapshot = store.frame()
+            journal.rotate()
+            self._dirty_rows.pop(journal, None)
+        self._save_csv(snapshot, file_path, schema)
+        journal.discard_rotated()
+        logger.debug(f"Compacted {journal.file_path} into {file_path}")
+
+    def compact(self):
+        """Fold journaled writes into the base CSV files"""
+        self._compact_table(self.table_locks['doctors'], self.doctor_store, self.journals['doctors'],
+                            self.doctors_file, DOCTOR_SCHEMA)
+        self._compact_table(self.table_locks['patients'], self.patient_store, self.journals['patients'],
+                            self.patients_file, PATIENT_SCHEMA)
+        self._compact_table(self.table_locks['appointments'], self.appointment_directory.store,
+                            self.journals['appointment_directory'], self.appointment_directory_file,
+                            APPOINTMENT_DIRECTORY_SCHEMA)
+        for _, partition in self._loaded_partitions():
+            self._compact_table(self.table_locks['appointments'], partition.store, partition.journal,
+                                partition.file_path, APPOINTMENT_SCHEMA)
+
+    def _all_journals(self) -> List[TableJournal]:
+        return list(self.journals.values()) + [partition.journal for _, partition in self._loaded_partitions()]
+
+    def flush(self):
+        """Make every write so far durable without waiting for the flusher"""
+        if self.durability == 'interval':
+            self.compact()
+        else:
+            for journal in self._all_journals():
+                journal.flush()
+
+    def _flush_loop(self):
+        """Flush on a timer or when a write crosses flush_threshold, compacting every compact_interval"""
+        last_compaction = time.monotonic()
+        while not self._stop_event.is_set():
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            if self._stop_event.is_set():
+                break
+            try:
+                self.flush()
+                if time.monotonic() - last_compaction >= self.compact_interval:
+                    self.compact()
+                    self.evict_partitions(idle_seconds=self.compact_interval)
+                    last_compaction = time.monotonic()
+            except Exception as e:
+                logger.error(f"CSV flush failed: {e}")
+
+    def close(self):
+        """Stop the background flusher and fold any outstanding writes into the CSV files"""
+        self._stop_event.set()
+        self._flush_event.set()
+        self._flusher.join(timeout=5)
+        self.compact()
+        for journal in self._all_journals():
+            journal.close()
+
+    # --- Id allocation ---
+    def _make_allocator(self, table, ids: Iterable[int]) -> SequenceAllocator:
+        max_id = max((key for key in ids if key is not None), default=0)
+        return SequenceAllocator(table, max_id, sequence_file=self.sequences)
+
+    def _get_next_id(self, table, exists: Callable[[int], bool], requested_id=None) -> int:
+        """Use a caller-reserved id (bulk import) or allocate the next one"""
+        if requested_id is None:
+            return self.id_allocators[table].next_id()
+        requested_id = int(requested_id)
+        if exists(requested_id):
+            raise ValueError(f"{table} id {requested_id} already exists")
+        return requested_id
+
+    def reserve_ids(self, table: str, count: int) -> range:
+        """Reserve a block of ids for a bulk import; pass them back in the create_* payloads"""
+        return self.id_allocators[table].reserve(count)
 
     def _row_to_doctor(self, row) -> Doctor:
-        return Doctor(
-            doctor_id=row.get('doctor_id'),
-            name=row.get('name'),
-            qualification=row.get('qualification'),
-            specializations=row.get('specializations', '').split(',') if row.get('specializations') else [],
-            working_start=row.get('working_start'),
-            working_end=row.get('working_end'),
-            working_days=row.get('working_days', '').split(',') if row.get('working_days') else [],
-            consultation_fee=row.get('consultation_fee'),
-            experience_years=row.get('experience_years')
-        )
+        return make_doctor(*(row.get(field) for field in DOCTOR_FIELDS))
 
     def _row_to_patient(self, row) -> Patient:
-        return Patient(
-            patient_id=row.get('patient_id'),
-            name=row.get('name'),
-            phone=row.get('phone'),
-            age=row.get('age'),
-            location=row.get('location'),
-            first_visit=row.get('first_visit'),
-            preferred_language=row.get('preferred_language')
-        )
+        return make_patient(*(row.get(field) for field in PATIENT_FIELDS))
 
     def _row_to_appointment(self, row) -> Appointment:
-        return Appointment(
-            appointment_id=row.get('appointment_id'),
-            patient_id=row.get('patient_id'),
-            doctor_id=row.get('doctor_id'),
-            patient_name=row.get('patient_name'),
-            doctor_name=row.get('doctor_name'),
-            appointment_date=row.get('appointment_date'),
-            start_time=row.get('start_time'),
-            end_time=row.get('end_time'),
-            status=row.get('status')
-        )
+        return make_appointment(*(row.get(field) for field in APPOINTMENT_FIELDS))
+
+    @staticmethod
+    def _materialize(columns, fields, factory, lazy=False):
+        """Build results column-wise; lazy=True returns a ResultView that creates objects on access"""
+        view = ResultView(fields, columns, factory)
+        return view if lazy else view.to_list()
 
     # --- Doctor Methods ---
     def create_doctor(self, doctor_data: Dict) -> Optional[Doctor]:
         name = doctor_data.get('name')
-        if not self.doctors_df[self.doctors_df['name'] == name].empty:
-            logger.warning(f"Doctor '{name}' already exists. Skipping.")
-            return None
-
-        doctor_id = self._get_next_id(self.doctors_df, 'doctor_id')
-        new_record = {
-            'doctor_id': doctor_id, 'name': name,
-            'qualification': doctor_data.get('qualification', ''),
-            'specializations': doctor_data.get('specializations', ''),
-            'working_start': '09:00', 'working_end': '18:00',
-            'working_days': 'Mon,Tue,Wed,Thu,Fri,Sat',
-            'is_active': True, 'consultation_fee': 500, 'experience_years': 5
-        }
-        self.doctors_df = pd.concat([self.doctors_df, pd.DataFrame([new_record])], ignore_index=True)
-        self._save_csv(self.doctors_df, self.doctors_file)
+        with self.table_locks['doctors'].write_lock():
+            if not self.doctors_df[self.doctors_df['name'] == name].empty:
+                logger.warning(f"Doctor '{name}' already exists. Skipping.")
+                return None
+
+            doctor_id = self._get_next_id('doctors', self._doctor_index.__contains__, doctor_data.get('doctor_id'))
+            new_record = {
+                'doctor_id': doctor_id, 'name': name,
+                'qualification': doctor_data.get('qualification', ''),
+                'specializations': doctor_data.get('specializations', ''),
+                'working_start': '09:00', 'working_end': '18:00',
+                'working_days': 'Mon,Tue,Wed,Thu,Fri,Sat',
+                'is_active': True, 'consultation_fee': 500, 'experience_years': 5
+            }
+            self._doctor_index[doctor_id] = self.doctor_store.append(new_record)
+            self._specialization_index.add(doctor_id, new_record['specializations'])
+            self._journal_write(self.journals['doctors'], 'insert', new_record)
         logger.info(f"Successfully seeded doctor to CSV: {name} (ID: {doctor_id})")
         return self._row_to_doctor(new_record)
 
-    def get_doctors_by_specialization(self, specialization: str) -> List[Doctor]:
-        df = self.doctors_df[self.doctors_df['specializations'].str.contains(specialization, case=False, na=False)]
-        return [self._row_to_doctor(row) for _, row in df.iterrows()]
+    def get_doctors_by_specialization(self, specialization: str, lazy: bool = False) -> List[Doctor]:
+        """Doctors with the specialization, or with one containing each word of it (see SpecializationIndex)"""
+        with self.table_locks['doctors'].read_lock():
+            positions = np.array(sorted(self._doctor_index[doctor_id]
+                                        for doctor_id in self._specialization_index.doctor_ids(specialization)
+                                        if doctor_id in self._doctor_index), dtype=np.int64)
+            columns = [self.doctor_store.take(field, positions) for field in DOCTOR_FIELDS]
+        return self._materialize(columns, DOCTOR_FIELDS, make_doctor, lazy)
         
     def get_doctor_by_id(self, doctor_id: int) -> Optional[Doctor]:
-        doctor_series = self.doctors_df[self.doctors_df['doctor_id'] == doctor_id]
-        if not doctor_series.empty:
-            return self._row_to_doctor(doctor_series.iloc[0])
-        return None
+        with self.table_locks['doctors'].read_lock():
+            position = self._doctor_index.get(_id_key(doctor_id))
+            if position is None:
+                return None
+            row = self.doctor_store.row(position)
+        return self._row_to_doctor(row)
 
     def get_all_specializations(self) -> List[str]:
-        all_specs = set()
-        for spec_list in self.doctors_df['specializations'].dropna():
-            for spec in spec_list.split(','):
-                all_specs.add(spec.strip())
-        return sorted(list(all_specs))
+        with self.table_locks['doctors'].read_lock():
+            return self._specialization_index.names()
 
     # --- Patient Methods ---
-    def search_patients(self, query: str) -> List[Patient]:
-        query_lower = query.lower()
-        # Search by name or phone number
-        mask = self.patients_df['name'].str.lower().str.contains(query_lower, na=False) | \
-               self.patients_df['phone'].astype(str).str.contains(query, na=False)
-        df = self.patients_df[mask]
-        return [self._row_to_patient(row) for _, row in df.iterrows()]
+    def search_patients(self, query: str, lazy: bool = False,
+                        limit: int = PATIENT_SEARCH_LIMIT) -> List[Patient]:
+        """Up to `limit` patients: by phone for a number, else by name, closest first (see PatientNameIndex)"""
+        query = str(query or '').strip()
+        with self.table_locks['patients'].read_lock():
+            if query and not any(char.isalpha() for char in query):
+                positions = self._phone_positions(query, limit)
+            else:
+                positions = np.array([position for position, _ in self._name_index.search(query, limit)],
+                                     dtype=np.int64)
+            columns = [self.patient_store.take(field, positions) for field in PATIENT_FIELDS]
+        return self._materialize(columns, PATIENT_FIELDS, make_patient, lazy)
+
+    def _phone_positions(self, query: str, limit: int) -> np.ndarray:
+        """The patient with this phone number, else those whose number contains it; caller holds the read lock"""
+        position = self._phone_index.get(_phone_key(query))
+        if position is not None:
+            return np.array([position], dtype=np.int64)
+        # A partial number has no index to use
+        phones = pd.Series(self.patient_store.column('phone')).map(_phone_key)
+        return np.flatnonzero(phones.str.contains(query, regex=False, na=False).to_numpy())[:limit]
 
     def find_patient_by_phone(self, phone: str) -> Optional[Patient]:
-        patient_series = self.patients_df[self.patients_df['phone'] == phone]
-        if not patient_series.empty:
-            return self._row_to_patient(patient_series.iloc[0])
-        return None
+        with self.table_locks['patients'].read_lock():
+            position = self._phone_index.get(_phone_key(phone))
+            if position is None:
+                return None
+            row = self.patient_store.row(position)
+        return self._row_to_patient(row)
     
     def get_patient_by_id(self, patient_id: int) -> Optional[Patient]:
-        patient_series = self.patients_df[self.patients_df['patient_id'] == patient_id]
-        if not patient_series.empty:
-            return self._row_to_patient(patient_series.iloc[0])
-        return None
+        with self.table_locks['patients'].read_lock():
+            position = self._patient_index.get(_id_key(patient_id))
+            if position is None:
+                return None
+            row = self.patient_store.row(position)
+        return self._row_to_patient(row)
 
     def create_patient(self, patient_data: Dict) -> Patient:
-        patient_id = self._get_next_id(self.patients_df, 'patient_id')
-        new_record = {
-            'patient_id': patient_id, 'name': patient_data.get('name'),
-            'phone': patient_data.get('phone'), 'age': patient_data.get('age'),
-            'location': patient_data.get('location'), 'first_visit': True,
-            'preferred_language': patient_data.get('preferred_language', 'en')
-        }
-        self.patients_df = pd.concat([self.patients_df, pd.DataFrame([new_record])], ignore_index=True)
-        self._save_csv(self.patients_df, self.patients_file)
+        with self.table_locks['patients'].write_lock():
+            patient_id = self._get_next_id('patients', self._patient_index.__contains__, patient_data.get('patient_id'))
+            new_record = {
+                'patient_id': patient_id, 'name': patient_data.get('name'),
+                'phone': patient_data.get('phone'), 'age': patient_data.get('age'),
+                'location': patient_data.get('location'), 'first_visit': True,
+                'preferred_language': patient_data.get('preferred_language', 'en')
+            }
+            position = self.patient_store.append(new_record)
+            self._index_patient(position, patient_id, new_record['phone'])
+            self._name_index.add(position, new_record['name'])
+            self._journal_write(self.journals['patients'], 'insert', new_record)
         return self._row_to_patient(new_record)
 
     def update_patient(self, patient_id: int, update_data: Dict) -> bool:
-        idx = self.patients_df.index[self.patients_df['patient_id'] == patient_id].tolist()
-        if not idx:
-            return False
-        for key, value in update_data.items():
-            self.patients_df.loc[idx[0], key] = value
-        self._save_csv(self.patients_df, self.patients_file)
+        with self.table_locks['patients'].write_lock():
+            position = self._patient_index.get(_id_key(patient_id))
+            if position is None:
+                return False
+            old_phone = _phone_key(self.patient_store.get(position, 'phone'))
+            self.patient_store.update(position, update_data)
+            if 'phone' in update_data and self._phone_index.get(old_phone) == position:
+                del self._phone_index[old_phone]
+                self._index_patient(position, patient_id, update_data['phone'])
+            if 'name' in update_data:
+                self._name_index.add(position, update_data['name'])
+            self._journal_write(self.journals['patients'], 'update', {'patient_id': patient_id, **update_data})
         return True
 
     # --- Appointment Methods ---
+    def _has_slot_conflict(self, doctor_id, appointment_date, start_time, end_time=None, exclude_id=None) -> bool:
+        """Check for an active booking overlapping [start_time, end_time); caller holds the slot lock"""
+        with self.table_locks['appointments'].read_lock():
+            partition = self._get_partition(partition_month(appointment_date), create=False)
+            key = (_id_key(doctor_id), str(appointment_date))
+            positions = partition.doctor_date_index.get(key) if partition else None
+            if not positions or not start_time:
+                return False
+            try:
+                start, end = appointment_span(start_time, end_time)
+            except ValueError:
+                # Not an HH:MM time, so only a booking with the same start can clash
+                store = partition.store
+                positions = np.fromiter(positions, dtype=np.int64)
+                clashes = positions[store.isin('start_time', positions, [start_time])
+                                    & store.isin('status', positions, ACTIVE_STATUSES)]
+                return any(_id_key(store.get(position, 'appointment_id')) != exclude_id for position in clashes)
+            return partition.intervals_for(key).overlaps(start, end, exclude=exclude_id)
+
     def create_appointment(self, appointment_data: Dict) -> Appointment:
-        appointment_id = self._get_next_id(self.appointments_df, 'appointment_id')
-        
+        """Insert an appointment; the slot check and insert are atomic per doctor and date"""
         patient = self.get_patient_by_id(appointment_data['patient_id'])
         doctor = self.get_doctor_by_id(appointment_data['doctor_id'])
 
-        new_record = {
-            'appointment_id': appointment_id,
-            'patient_id': appointment_data.get('patient_id'),
-            'doctor_id': appointment_data.get('doctor_id'),
-            'patient_name': patient.name if patient else 'N/A',
-            'doctor_name': doctor.name if doctor else 'N/A',
-            'appointment_date': appointment_data.get('appointment_date'),
-            'start_time': appointment_data.get('start_time'),
-            'end_time': appointment_data.get('end_time'),
-            'status': 'scheduled'
-        }
-        self.appointments_df = pd.concat([self.appointments_df, pd.DataFrame([new_record])], ignore_index=True)
-        self._save_csv(self.appointments_df, self.appointments_file)
+        doctor_id = appointment_data.get('doctor_id')
+        appointment_date = appointment_data.get('appointment_date')
+        start_time = appointment_data.get('start_time')
+
+        with self.slot_locks.lock_for((_id_key(doctor_id), str(appointment_date))):
+            if self._has_slot_conflict(doctor_id, appointment_date, start_time, appointment_data.get('end_time')):
+                raise SlotUnavailableError(f"The slot {start_time} on {appointment_date} is already booked")
+
+            with self.table_locks['appointments'].write_lock():
+                appointment_id = self._get_next_id(
+                    'appointments', lambda key: self._locate_appointment(key)[0] is not None,
+                    appointment_data.get('appointment_id'))
+                new_record = {
+                    'appointment_id': appointment_id,
+                    'patient_id': appointment_data.get('patient_id'),
+                    'doctor_id': doctor_id,
+                    'patient_name': patient.name if patient else 'N/A',
+                    'doctor_name': doctor.name if doctor else 'N/A',
+                    'appointment_date': appointment_date,
+                    'start_time': start_time,
+                    'end_time': appointment_data.get('end_time'),
+                    'status': 'scheduled'
+                }
+                partition = self._get_partition(partition_month(appointment_date))
+                self._record_appointment(appointment_id, new_record['patient_id'], partition.month)
+                position = partition.store.append(new_record)
+                partition.index(position, appointment_id, doctor_id, appointment_date)
+                self._partition_write(partition, 'insert', new_record)
         return self._row_to_appointment(new_record)
 
-    def get_appointments_by_doctor_date(self, doctor_id: int, appointment_date: str) -> List[Appointment]:
-        mask = (self.appointments_df['doctor_id'] == doctor_id) & \
-               (self.appointments_df['appointment_date'] == appointment_date) & \
-               (self.appointments_df['status'].isin(['scheduled', 'confirmed']))
-        df = self.appointments_df[mask]
-        return [self._row_to_appointment(row) for _, row in df.iterrows()]
+    def get_appointments_by_doctor_date(self, doctor_id: int, appointment_date: str,
+                                        lazy: bool = False) -> List[Appointment]:
+        with self.table_locks['appointments'].read_lock():
+            partition = self._get_partition(partition_month(appointment_date), create=False)
+            positions = partition.doctor_date_index.get((_id_key(doctor_id), str(appointment_date))) if partition else None
+            if not positions:
+                return self._materialize([[] for _ in APPOINTMENT_FIELDS], APPOINTMENT_FIELDS, make_appointment, lazy)
+            store = partition.store
+            positions = np.sort(np.fromiter(positions, dtype=np.int64))
+            active = positions[store.isin('status', positions, ACTIVE_STATUSES)]
+            columns = [store.take(field, active) for field in APPOINTMENT_FIELDS]
+        return self._materialize(columns, APPOINTMENT_FIELDS, make_appointment, lazy)
+
+    def get_booked_slots_bulk(self, doctor_ids: Iterable[int],
+                              appointment_dates: Iterable[str]) -> Dict[DoctorDay, List[Appointment]]:
+        """Active appointments of each (doctor_id, date) in doctor_ids x appointment_dates.
+
+        Positions of the whole grid are gathered from each month's doctor/date
+        index, then read with one status check and one take per column.
+        """
+        doctor_ids = [key for key in dict.fromkeys(_id_key(doctor_id) for doctor_id in doctor_ids) if key is not None]
+        dates = sorted({str(appointment_date) for appointment_date in appointment_dates})
+        months = defaultdict(list)
+        for appointment_date in dates:
+            months[partition_month(appointment_date)].append(appointment_date)
+
+        appointments = []
+        with self.table_locks['appointments'].read_lock():
+            for month, month_dates in months.items():
+                partition = self._get_partition(month, create=False)
+                if partition is None:
+                    continue
+                index = partition.doctor_date_index
+                found = [position for doctor_id in doctor_ids for appointment_date in month_dates
+                         for position in index.get((doctor_id, appointment_date), ())]
+                if not found:
+                    continue
+                store = partition.store
+                positions = np.sort(np.fromiter(found, dtype=np.int64, count=len(found)))
+                active = positions[store.isin('status', positions, ACTIVE_STATUSES)]
+                columns = [store.take(field, active) for field in APPOINTMENT_FIELDS]
+                appointments.extend(self._materialize(columns, APPOINTMENT_FIELDS, make_appointment))
+        return group_by_doctor_date(appointments, doctor_ids, dates)
+
+    def get_appointments_by_patient(self, patient_id: int) -> List[Appointment]:
+        """A patient's booked (not cancelled) appointments, oldest first; reads only the months they are in"""
+        appointments = []
+        with self.table_locks['appointments'].read_lock():
+            for month, keys in sorted(self.appointment_directory.appointments_of(patient_id).items()):
+                partition = self._get_partition(month, create=False)
+                if partition is None:
+                    continue
+                store = partition.store
+                positions = np.array(sorted(position for position in map(partition.id_index.get, keys)
+                                            if position is not None), dtype=np.int64)
+                if not len(positions):
+                    continue
+                booked = positions[store.isin('status', positions, BOOKED_STATUSES)]
+                columns = [store.take(field, booked) for field in APPOINTMENT_FIELDS]
+                appointments.extend(self._materialize(columns, APPOINTMENT_FIELDS, make_appointment))
+        return sorted(appointments, key=lambda a: (str(a.appointment_date), str(a.start_time), _id_key(a.appointment_id) or 0))
 
     def get_appointment_by_id(self, appointment_id: int) -> Optional[Appointment]:
-        appointment_series = self.appointments_df[self.appointments_df['appointment_id'] == appointment_id]
-        if not appointment_series.empty:
-            return self._row_to_appointment(appointment_series.iloc[0])
-        return None
+        with self.table_locks['appointments'].read_lock():
+            partition, position = self._locate_appointment(appointment_id)
+            if partition is None:
+                return None
+            row = partition.store.row(position)
+        return self._row_to_appointment(row)
 
     def update_appointment(self, appointment_id: int, update_data: Dict) -> bool:
-        idx = self.appointments_df.index[self.appointments_df['appointment_id'] == appointment_id].tolist()
-        if not idx:
+        """Update an appointment; moving it onto a booked slot raises SlotUnavailableError"""
+        current = self.get_appointment_by_id(appointment_id)
+        if current is None:
             return False
-        for key, value in update_data.items():
-            self.appointments_df.loc[idx[0], key] = value
-        self._save_csv(self.appointments_df, self.appointments_file)
+
+        target = {**asdict(current), **update_data}
+        slot_key = (_id_key(target['doctor_id']), str(target['appointment_date']))
+        moves_into_slot = target['status'] in ACTIVE_STATUSES and any(
+            key in update_data for key in ('doctor_id', 'appointment_date', 'start_time', 'end_time', 'status'))
+
+        with self.slot_locks.lock_for(slot_key):
+            if moves_into_slot and self._has_slot_conflict(
+                    target['doctor_id'], target['appointment_date'], target['start_time'], target['end_time'],
+                    exclude_id=_id_key(appointment_id)):
+                raise SlotUnavailableError(
+                    f"The slot {target['start_time']} on {target['appointment_date']} is already booked")
+
+            with self.table_locks['appointments'].write_lock():
+                partition, position = self._locate_appointment(appointment_id)
+                if partition is None:
+                    return False
+                new_month = partition_month(update_data.get('appointment_date', partition.month))
+                if 'appointment_date' in update_data and new_month != partition.month:
+                    # Rescheduled into another month: insert there before deleting here, so a
+                    # crash in between can leave a duplicate but never lose the booking
+                    record = {**partition.store.row(position), **update_data}
+                    destination = self._get_partition(new_month)
+                    self._record_appointment(appointment_id, record['patient_id'], new_month)
+                    new_position = destination.store.append(record)
+                    destination.index(new_position, appointment_id, record['doctor_id'], record['appointment_date'])
+                    self._partition_write(destination, 'insert', record)
+                    partition.remove(appointment_id)
+                    self._partition_write(partition, 'delete', {'appointment_id': appointment_id})
+                    return True
+
+                if 'patient_id' in update_data:
+                    self._record_appointment(appointment_id, update_data['patient_id'], partition.month)
+                old_key = partition.doctor_date_key(position)
+                partition.store.update(position, update_data)
+                new_key = partition.doctor_date_key(position)
+                if new_key != old_key:
+                    partition.doctor_date_index[old_key].discard(position)
+                    partition.doctor_date_index[new_key].add(position)
+                partition.day_intervals.pop(old_key, None)
+                partition.day_intervals.pop(new_key, None)
+                self._partition_write(partition, 'update', {'appointment_id': appointment_id, **update_data})
         return True
 
-csv_manager = CSVManager()
\ No newline at end of file
+    # --- Analytics ---
+    def get_booking_analytics(self, days: int = 30) -> Dict:
+        """Booking counts over the last `days` days, reading only the partitions for those months"""
+        end_date = datetime.now().date()
+        start, end = (end_date - timedelta(days=days)).isoformat(), end_date.isoformat()
+        with self.table_locks['doctors'].read_lock():
+            specializations = {
+                _id_key(doctor_id): [spec.strip() for spec in specs.split(',') if spec.strip()]
+                for doctor_id, specs in zip(self.doctor_store.column('doctor_id'), self.doctor_store.column('specializations'))
+                if isinstance(specs, str)
+            }
+
+        booked, cancelled = 0, 0
+        by_specialization, by_doctor, by_day = Counter(), Counter(), Counter()
+        fields = ('appointment_date', 'status', 'doctor_id', 'doctor_name')
+        with self.table_locks['appointments'].read_lock():
+            for month in self._stored_months():
+                if not start[:7] <= month <= end[:7]:
+                    continue
+                store = self._get_partition(month).store
+                positions = np.arange(len(store))
+                for appointment_date, status, doctor_id, doctor_name in zip(*(store.take(f, positions) for f in fields)):
+                    if not appointment_date or not start <= appointment_date <= end:
+                        continue
+                    if status == 'cancelled':
+                        cancelled += 1
+                    elif status in BOOKED_STATUSES:
+                        booked += 1
+                        by_day[appointment_date] += 1
+                        if doctor_name:
+                            by_doctor[doctor_name] += 1
+                        for spec in specializations.get(_id_key(doctor_id), ()):
+                            by_specialization[spec] += 1
+        return booking_analytics(days, booked, cancelled, by_specialization, by_doctor, by_day)
+
+
+def _manager_from_settings() -> CSVManager:
+    try:
+        from config import settings
+    except Exception as e:
+        logger.warning(f"Settings unavailable, using default CSV persistence options: {e}")
+        return CSVManager()
+    return CSVManager(
+        compact_interval=settings.CSV_COMPACT_INTERVAL,
+        durability=settings.CSV_DURABILITY_MODE,
+        flush_interval=settings.CSV_FLUSH_INTERVAL,
+        flush_threshold=settings.CSV_FLUSH_THRESHOLD,
+        binary_snapshots=settings.CSV_BINARY_SNAPSHOTS,
+        phonetic_search=settings.CSV_PHONETIC_SEARCH,
+    )
+
+
+csv_manager = _manager_from_settings()
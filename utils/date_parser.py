@@ -89,6 +89,9 @@ import calendar
 from utils.logger import logger
 from utils.exceptions import InvalidDateError
 
+# How far ahead appointments may be booked
+MAX_ADVANCE_DAYS = 90
+
 class EnhancedDateParser:
     def __init__(self):
         self.today = datetime.date.today()
@@ -360,9 +363,9 @@ class EnhancedDateParser:
                 raise InvalidDateError(f"Cannot book appointments for past dates. {date_obj.strftime('%B %d, %Y')} has already passed.")
             
             # Cannot book too far in advance (e.g., more than 90 days)
-            max_advance = self.today + datetime.timedelta(days=90)
+            max_advance = self.today + datetime.timedelta(days=MAX_ADVANCE_DAYS)
             if date_obj > max_advance:
-                raise InvalidDateError(f"Cannot book appointments more than 90 days in advance. Please choose a date before {max_advance.strftime('%B %d, %Y')}.")
+                raise InvalidDateError(f"Cannot book appointments more than {MAX_ADVANCE_DAYS} days in advance. Please choose a date before {max_advance.strftime('%B %d, %Y')}.")
         
         elif context == "rescheduling":
             # Similar rules as booking
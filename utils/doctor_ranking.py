@@ -0,0 +1,73 @@
+#utils/doctor_ranking.py
+
+from dataclasses import dataclass
+from typing import List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from utils.storage_models import Doctor
+
+# Score terms of a recommendation: fewer bookings, more experience and a known location rank higher
+BASE_SCORE = 100
+BOOKING_PENALTY = 10
+EXPERIENCE_POINTS = 2
+MAX_EXPERIENCE_BONUS = 20
+LOCATION_BONUS = 5
+
+
+@dataclass(slots=True)
+class DoctorRanking:
+    doctor: Doctor
+    score: int
+    working: bool
+    booked_count: int
+    free_count: int
+
+
+def _years(value) -> float:
+    try:
+        years = float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if np.isnan(years) else years
+
+
+def score_doctors(doctors: Sequence[Doctor], booked_counts: np.ndarray,
+                  patient_location: Optional[str] = None) -> np.ndarray:
+    """Recommendation score of each doctor from its booking count; higher is better"""
+    experience = np.fromiter((_years(doctor.experience_years) for doctor in doctors), dtype=float, count=len(doctors))
+    scores = BASE_SCORE - booked_counts * BOOKING_PENALTY \
+        + np.minimum(experience * EXPERIENCE_POINTS, MAX_EXPERIENCE_BONUS)
+    if patient_location:
+        # Simplified location matching - real doctor locations would replace this
+        named = np.fromiter((bool(doctor.name) for doctor in doctors), dtype=bool, count=len(doctors))
+        scores = scores + named * LOCATION_BONUS
+    return scores.astype(int)
+
+
+def rank_doctors(doctors: Sequence[Doctor], working: np.ndarray, booked_counts: np.ndarray,
+                 free_counts: np.ndarray, patient_location: Optional[str] = None) -> List[DoctorRanking]:
+    """Every doctor, best first: working doctors by score, then those off that day.
+
+    Ties keep the order doctors were given in, as the first-best loop this
+    replaced did.
+    """
+    if not doctors:
+        return []
+    scores = score_doctors(doctors, booked_counts, patient_location)
+    # lexsort orders by its last key first
+    order = np.lexsort((np.arange(len(doctors)), -scores, ~working))
+    return [DoctorRanking(doctors[i], int(scores[i]), bool(working[i]), int(booked_counts[i]), int(free_counts[i]))
+            for i in order]
+
+
+def rank_from_days(doctors: Sequence[Doctor], working: Sequence[bool], days: Mapping,
+                   patient_location: Optional[str] = None) -> List[DoctorRanking]:
+    """rank_doctors() with counts from days, a doctor_id -> DayAvailability map of the working doctors"""
+    working = np.fromiter(working, dtype=bool, count=len(doctors))
+    booked = np.zeros(len(doctors), dtype=np.int64)
+    free = np.zeros(len(doctors), dtype=np.int64)
+    for i in np.flatnonzero(working):
+        day = days[doctors[i].doctor_id]
+        booked[i], free[i] = day.booked_count, day.free_count
+    return rank_doctors(doctors, working, booked, free, patient_location)
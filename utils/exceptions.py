@@ -26,4 +26,12 @@ class RateLimitExceededError(ApolloAssistError):
 
 class BookingConflictError(ApolloAssistError):
     """Appointment booking conflict detected"""
-    pass
\ No newline at end of file
+    pass
+
+class ServiceBusyError(ApolloAssistError):
+    """Too many requests in flight; the caller should hold and retry"""
+    pass
+
+class OperationTimeoutError(ApolloAssistError):
+    """A backend operation did not finish in time"""
+    pass
@@ -3,11 +3,16 @@
 import json
 import os
 import datetime
-from typing import List, Dict, Optional, Any
+import threading
+from typing import List, Dict, Optional, Any, Iterable
 from dataclasses import dataclass, asdict
 import gspread
 from google.oauth2.service_account import Credentials
 from utils.logger import logger
+from utils.id_allocator import SequenceAllocator, SheetSequences
+from utils.exceptions import SlotUnavailableError
+from utils.interval_index import IntervalIndex, appointment_span
+from utils.storage_models import DoctorDay, group_by_doctor_date, PATIENT_SEARCH_LIMIT
 from config import settings
 
 @dataclass
@@ -66,6 +71,11 @@ class GoogleSheetsManager:
         self.doctors_sheet = None
         self.appointments_sheet = None
         self.specializations_sheet = None
+        self.sequences_sheet = None
+
+        # Id sequences, created per sheet on first insert; leases are kept in the sequences sheet
+        self.id_allocators: Dict[str, SequenceAllocator] = {}
+        self._allocator_lock = threading.Lock()
         
         # Sheet configurations
         self.sheets_config = {
@@ -84,6 +94,9 @@ class GoogleSheetsManager:
             },
             'specializations': {
                 'headers': ['specialization_id', 'name', 'description', 'is_active']
+            },
+            'sequences': {
+                'headers': ['name', 'value']
             }
         }
         
@@ -284,25 +297,58 @@ class GoogleSheetsManager:
         except Exception as e:
             logger.error(f"Failed to seed initial data: {e}")
     
+    @staticmethod
+    def _sheet_ids(sheet) -> List[int]:
+        # The id is the first column of every sheet; skip the header row
+        return [int(value) for value in sheet.col_values(1)[1:] if str(value).isdigit()]
+
+    def _get_id_allocator(self, sheet, id_column: str) -> SequenceAllocator:
+        """Get the id sequence for a sheet.
+
+        Ids are leased in blocks whose end is saved in the sequences sheet,
+        which every worker on the spreadsheet shares. Before each new lease
+        the allocator re-reads that mark and the sheet's own id column, so it
+        skips ids other workers have leased or written since.
+        """
+        with self._allocator_lock:
+            allocator = self.id_allocators.get(id_column)
+            if allocator is None:
+                sequences = SheetSequences(self.sequences_sheet) if self.sequences_sheet else None
+
+                def refresh() -> int:
+                    leased = sequences.get(id_column) if sequences else 0
+                    return max(max(self._sheet_ids(sheet), default=0) + 1, leased)
+
+                # refresh() reads the sheet before the first lease
+                allocator = SequenceAllocator(id_column, sequence_file=sequences, refresh=refresh)
+                self.id_allocators[id_column] = allocator
+            return allocator
+
     def _get_next_id(self, sheet, id_column: str) -> int:
         """Get the next available ID for a sheet"""
-        try:
-            records = sheet.get_all_records()
-            if not records:
-                return 1
-            
-            existing_ids = [record.get(id_column, 0) for record in records if record.get(id_column)]
-            return max(existing_ids) + 1 if existing_ids else 1
-            
-        except Exception as e:
-            logger.error(f"Failed to get next ID: {e}")
-            return 1
+        return self._get_id_allocator(sheet, id_column).next_id()
+
+    def _unused_id(self, sheet, id_column: str, requested_id) -> Optional[int]:
+        """A caller-reserved id (bulk import), or None to allocate one; raises ValueError if the sheet has it"""
+        if not requested_id:
+            return None
+        requested_id = int(requested_id)
+        if requested_id in self._sheet_ids(sheet):
+            raise ValueError(f"{id_column} {requested_id} already exists")
+        return requested_id
+
+    def reserve_ids(self, table: str, count: int) -> range:
+        """Reserve a block of ids for a bulk import"""
+        sheet = getattr(self, f"{table}_sheet")
+        id_column = self.sheets_config[table]['headers'][0]
+        return self._get_id_allocator(sheet, id_column).reserve(count)
     
     # Patient operations
     def create_patient(self, patient_data: Dict) -> Optional[Patient]:
-        """Create a new patient record"""
+        """Create a new patient record; raises ValueError if a given patient_id is taken"""
+        requested_id = self._unused_id(self.patients_sheet, 'patient_id', patient_data.get('patient_id'))
         try:
-            patient_id = self._get_next_id(self.patients_sheet, 'patient_id')
+            patient_id = requested_id or self._get_next_id(self.patients_sheet, 'patient_id')
             timestamp = datetime.datetime.now().isoformat()
             
             row_data = [
@@ -362,8 +408,8 @@ class GoogleSheetsManager:
             logger.error(f"Failed to find patient by phone: {e}")
             return None
     
-    def search_patients(self, query: str) -> List[Patient]:
-        """Search patients by name or phone"""
+    def search_patients(self, query: str, limit: int = PATIENT_SEARCH_LIMIT) -> List[Patient]:
+        """Search patients by name or phone, at most `limit` of them"""
         try:
             records = self.patients_sheet.get_all_records()
             results = []
@@ -377,6 +423,8 @@ class GoogleSheetsManager:
                 name = str(record.get('name', '')).lower()
                 phone = str(record.get('phone', ''))
                 
+                if len(results) >= limit:
+                    break
                 if query_lower in name or query in phone:
                     results.append(Patient(
                         patient_id=record.get('patient_id'),
@@ -499,10 +547,22 @@ class GoogleSheetsManager:
             return []
     
     # Appointment operations
+    def _slot_taken(self, doctor_id, appointment_date, start_time, end_time=None, exclude_id=None) -> bool:
+        """Sheets has no unique constraint, so the overlap check stays a read before the write"""
+        if not start_time:
+            return False
+        booked = IntervalIndex.from_appointments(self.get_appointments_by_doctor_date(doctor_id, appointment_date))
+        return booked.overlaps(*appointment_span(start_time, end_time), exclude=exclude_id)
+
     def create_appointment(self, appointment_data: Dict) -> Optional[Appointment]:
-        """Create a new appointment"""
+        """Create a new appointment; raises SlotUnavailableError if the slot is already booked"""
+        if self._slot_taken(appointment_data.get('doctor_id'), appointment_data.get('appointment_date'),
+                            appointment_data.get('start_time'), appointment_data.get('end_time')):
+            raise SlotUnavailableError(f"The slot {appointment_data.get('start_time')} on "
+                                       f"{appointment_data.get('appointment_date')} is already booked")
+        requested_id = self._unused_id(self.appointments_sheet, 'appointment_id', appointment_data.get('appointment_id'))
         try:
-            appointment_id = self._get_next_id(self.appointments_sheet, 'appointment_id')
+            appointment_id = requested_id or self._get_next_id(self.appointments_sheet, 'appointment_id')
             timestamp = datetime.datetime.now().isoformat()
             
             # Get patient and doctor names
@@ -598,6 +658,59 @@ class GoogleSheetsManager:
             logger.error(f"Failed to get appointments: {e}")
             return []
     
+    def get_appointments_by_patient(self, patient_id: int) -> List[Appointment]:
+        """A patient's booked (not cancelled) appointments, oldest first"""
+        try:
+            records = self.appointments_sheet.get_all_records()
+        except Exception as e:
+            logger.error(f"Failed to get appointments: {e}")
+            return []
+        
+        results = [
+            Appointment(
+                appointment_id=record.get('appointment_id'),
+                patient_id=record.get('patient_id'),
+                doctor_id=record.get('doctor_id'),
+                patient_name=record.get('patient_name', ''),
+                doctor_name=record.get('doctor_name', ''),
+                appointment_date=record.get('appointment_date', ''),
+                start_time=record.get('start_time', ''),
+                end_time=record.get('end_time', ''),
+                status=record.get('status', ''),
+                notes=record.get('notes', '')
+            )
+            for record in records
+            if record.get('patient_id') == patient_id and record.get('status') in ['scheduled', 'confirmed', 'completed']
+        ]
+        return sorted(results, key=lambda a: (str(a.appointment_date), str(a.start_time)))
+    
+    def get_booked_slots_bulk(self, doctor_ids: Iterable[int],
+                              appointment_dates: Iterable[str]) -> Dict[DoctorDay, List[Appointment]]:
+        """Active appointments of each (doctor_id, date) in doctor_ids x appointment_dates, from one sheet read"""
+        doctor_ids, appointment_dates = list(doctor_ids), list(appointment_dates)
+        try:
+            records = self.appointments_sheet.get_all_records()
+        except Exception as e:
+            logger.error(f"Failed to get appointments: {e}")
+            records = []
+        
+        appointments = [
+            Appointment(
+                appointment_id=record.get('appointment_id'),
+                patient_id=record.get('patient_id'),
+                doctor_id=record.get('doctor_id'),
+                patient_name=record.get('patient_name', ''),
+                doctor_name=record.get('doctor_name', ''),
+                appointment_date=record.get('appointment_date', ''),
+                start_time=record.get('start_time', ''),
+                end_time=record.get('end_time', ''),
+                status=record.get('status', ''),
+                notes=record.get('notes', '')
+            )
+            for record in records
+        ]
+        return group_by_doctor_date(appointments, doctor_ids, appointment_dates)
+    
     def update_appointment(self, appointment_id: int, update_data: Dict) -> bool:
         """Update appointment record"""
         try:
@@ -605,6 +718,13 @@ class GoogleSheetsManager:
             
             for i, record in enumerate(records, start=2):  # Start from row 2 (after headers)
                 if record.get('appointment_id') == appointment_id:
+                    new_date = update_data.get('appointment_date', record.get('appointment_date'))
+                    new_time = update_data.get('start_time', record.get('start_time'))
+                    new_end = update_data.get('end_time', record.get('end_time'))
+                    moving = any(key in update_data for key in ('appointment_date', 'start_time', 'end_time'))
+                    if moving and self._slot_taken(record.get('doctor_id'), new_date, new_time, new_end,
+                                                   appointment_id):
+                        raise SlotUnavailableError(f"The slot {new_time} on {new_date} is already booked")
                     # Update the specific cells based on column positions
                     if 'appointment_date' in update_data:
                         self.appointments_sheet.update_cell(i, 6, update_data['appointment_date'])
@@ -625,6 +745,8 @@ class GoogleSheetsManager:
             
             return False
             
+        except SlotUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Failed to update appointment: {e}")
             return False
@@ -715,8 +837,12 @@ class GoogleSheetsManager:
                 "total_cancelled": 0,
                 "period_days": days
             }
+    def close(self):
+        """Nothing to release; every call goes straight to the Sheets API"""
+
     def create_doctor(self, doctor_data: Dict) -> Optional[Doctor]:
-        """Create a new doctor record in the Google Sheet."""
+        """Create a new doctor record in the Google Sheet; raises ValueError if a given doctor_id is taken."""
+        requested_id = self._unused_id(self.doctors_sheet, 'doctor_id', doctor_data.get('doctor_id'))
         try:
             # Check if doctor already exists to avoid duplicates
             existing_doctors = self.doctors_sheet.findall(doctor_data.get('name', ''))
@@ -724,7 +850,7 @@ class GoogleSheetsManager:
                 logger.warning(f"Doctor '{doctor_data.get('name')}' already exists. Skipping.")
                 return None
 
-            doctor_id = self._get_next_id(self.doctors_sheet, 'doctor_id')
+            doctor_id = requested_id or self._get_next_id(self.doctors_sheet, 'doctor_id')
             
             # Default values similar to your sample data
             row_data = [
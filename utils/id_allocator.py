@@ -0,0 +1,122 @@
+# utils/id_allocator.py
+
+import json
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from utils.logger import logger
+
+
+class SequenceFile:
+    """Persists the high-water mark of every table's id sequence in one small JSON file"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.values: Dict[str, int] = {}
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, encoding='utf-8') as f:
+                    self.values = {name: int(value) for name, value in json.load(f).items()}
+            except (ValueError, OSError) as e:
+                logger.warning(f"Ignoring unreadable sequence file {file_path}: {e}")
+
+    def get(self, name: str) -> int:
+        return self.values.get(name, 0)
+
+    def set(self, name: str, value: int):
+        with self.lock:
+            self.values[name] = value
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.values, f)
+            os.replace(tmp_path, self.file_path)
+
+
+class SheetSequences:
+    """SequenceFile's get()/set() over a worksheet of (name, value) rows.
+
+    Every process writing to the spreadsheet shares it, so a lease taken by
+    one worker is seen by the others the next time their own lease runs
+    out. set() never lowers a stored value. The sheet is re-read on every
+    call; calls only happen once per lease.
+    """
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.lock = threading.Lock()
+
+    def _rows(self) -> Dict[str, Tuple[int, int]]:
+        """name -> (1-based row number, value), skipping the header row"""
+        rows = {}
+        for number, row in enumerate(self.worksheet.get_all_values()[1:], start=2):
+            if len(row) >= 2 and str(row[1]).strip().isdigit():
+                rows[row[0]] = (number, int(row[1]))
+        return rows
+
+    def get(self, name: str) -> int:
+        return self._rows().get(name, (0, 0))[1]
+
+    def set(self, name: str, value: int):
+        with self.lock:
+            row = self._rows().get(name)
+            if row is None:
+                self.worksheet.append_row([name, value])
+            elif value > row[1]:
+                self.worksheet.update_cell(row[0], 2, value)
+
+
+class SequenceAllocator:
+    """Monotonic, thread-safe id sequence for one table.
+
+    Initialized once from the highest id already stored, then hands out ids
+    in O(1) without looking at the data again. When a SequenceFile is given,
+    ids are leased in blocks (hi/lo): the end of the current block is
+    persisted before any id in it is handed out, so an id that was already
+    confirmed to a caller is never reused after a restart, even if the
+    record itself had not reached disk. A restart may skip the unused
+    remainder of a block.
+
+    When other processes allocate from the same table, `refresh` returns the
+    lowest id they have not used or leased; it is called before each new
+    lease so the sequence skips past their ids.
+    """
+
+    def __init__(self, name: str, max_existing_id: int = 0,
+                 sequence_file: Optional[SequenceFile] = None, block_size: int = 100,
+                 refresh: Optional[Callable[[], int]] = None):
+        self.name = name
+        self.sequence_file = sequence_file
+        self.block_size = max(int(block_size), 1)
+        self.refresh = refresh
+        self.lock = threading.Lock()
+
+        persisted = sequence_file.get(name) if sequence_file else 0
+        self._next = max(int(max_existing_id) + 1, persisted, 1)
+        self._ceiling = self._next  # ids below this are covered by a persisted lease
+
+    def _lease(self, needed_up_to: int):
+        self._ceiling = needed_up_to + self.block_size
+        if self.sequence_file:
+            self.sequence_file.set(self.name, self._ceiling)
+
+    def next_id(self) -> int:
+        return self.reserve(1).start
+
+    def reserve(self, count: int) -> range:
+        """Atomically reserve a contiguous block of ids, e.g. for a bulk import"""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        with self.lock:
+            if self.refresh and self._next + count > self._ceiling:
+                self._next = max(self._next, int(self.refresh()))
+            first = self._next
+            self._next += count
+            if self._next > self._ceiling:
+                self._lease(self._next)
+            return range(first, first + count)
+
+    def peek(self) -> int:
+        """The id the next call to next_id() will return"""
+        return self._next
@@ -0,0 +1,118 @@
+#utils/interval_index.py
+
+from bisect import bisect_left, bisect_right
+from datetime import time as time_class
+from typing import Hashable, Iterable, List, Optional, Tuple
+
+# Length given to a booking stored without a usable end time (AppointmentScheduler's default slot)
+DEFAULT_APPOINTMENT_MINUTES = 30
+
+
+def to_minutes(text: str) -> int:
+    """Minutes since midnight for an H:M string; raises ValueError like datetime.replace() would"""
+    hour, minute = map(int, text.split(':'))
+    time_class(hour, minute)
+    return hour * 60 + minute
+
+
+def appointment_span(start_time: str, end_time: Optional[str],
+                     default_minutes: int = DEFAULT_APPOINTMENT_MINUTES) -> Tuple[int, int]:
+    """[start, end) of an appointment in minutes; a missing or non-positive end gets the default length"""
+    start = to_minutes(start_time)
+    try:
+        end = to_minutes(str(end_time)[:5])
+    except (TypeError, ValueError):
+        end = None
+    if end is None or end <= start:
+        end = start + default_minutes
+    return start, end
+
+
+class IntervalIndex:
+    """Half-open [start, end) minute intervals of one doctor's day, with O(log n) overlap queries.
+
+    Intervals are kept sorted by start next to a running maximum of their
+    ends, so only intervals before bisect_left(starts, end) can overlap
+    [start, end), and the running maximum at that point tells in one lookup
+    whether any of them reaches past start.
+    """
+
+    __slots__ = ('_starts', '_ends', '_keys', '_reach')
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, Hashable]] = ()):
+        ordered = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self._starts: List[int] = [start for start, _, _ in ordered]
+        self._ends: List[int] = [end for _, end, _ in ordered]
+        self._keys: List[Hashable] = [key for _, _, key in ordered]
+        self._reach: List[int] = []
+        self._extend_reach(0)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, Optional[str], Hashable]]) -> 'IntervalIndex':
+        """Index of (start_time, end_time, key) rows; rows whose start is not an HH:MM time are skipped"""
+        intervals = []
+        for start_time, end_time, key in rows:
+            try:
+                intervals.append((*appointment_span(start_time, end_time), key))
+            except (TypeError, ValueError, AttributeError):
+                continue
+        return cls(intervals)
+
+    @classmethod
+    def from_appointments(cls, appointments: Iterable) -> 'IntervalIndex':
+        """Index of Appointment-like objects, keyed by appointment_id"""
+        return cls.from_rows((appointment.start_time, appointment.end_time, appointment.appointment_id)
+                             for appointment in appointments)
+
+    def _extend_reach(self, index: int):
+        """Recompute the running maximum of ends from position index onwards"""
+        del self._reach[index:]
+        running = self._reach[-1] if self._reach else None
+        for end in self._ends[index:]:
+            running = end if running is None else max(running, end)
+            self._reach.append(running)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def add(self, start: int, end: int, key: Hashable = None):
+        if end <= start:
+            raise ValueError(f"Empty interval [{start}, {end})")
+        index = bisect_right(self._starts, start)
+        self._starts.insert(index, start)
+        self._ends.insert(index, end)
+        self._keys.insert(index, key)
+        self._extend_reach(index)
+
+    def discard(self, key: Hashable) -> bool:
+        """Remove the interval stored under key; False if there is none"""
+        try:
+            index = self._keys.index(key)
+        except ValueError:
+            return False
+        del self._starts[index], self._ends[index], self._keys[index]
+        self._extend_reach(index)
+        return True
+
+    def overlaps(self, start: int, end: int, exclude: Hashable = None) -> bool:
+        """True if any stored interval other than `exclude` overlaps [start, end)"""
+        candidates = bisect_left(self._starts, end)
+        if not candidates or self._reach[candidates - 1] <= start:
+            return False
+        if exclude is None:
+            return True
+        return any(key != exclude for key in self.overlapping(start, end))
+
+    def overlapping(self, start: int, end: int) -> List[Hashable]:
+        """Keys of the intervals overlapping [start, end), latest start first"""
+        hits = []
+        index = bisect_left(self._starts, end) - 1
+        # Walk back only while some earlier interval still reaches past start
+        while index >= 0 and self._reach[index] > start:
+            if self._ends[index] > start:
+                hits.append(self._keys[index])
+            index -= 1
+        return hits
+
+    def spans(self) -> List[Tuple[int, int]]:
+        return list(zip(self._starts, self._ends))
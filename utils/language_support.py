@@ -22,6 +22,7 @@ class LanguageManager:
                 'invalid_date': 'Please provide a valid date in DD-MM-YYYY format.',
                 'alternative_slots': 'Here are some alternative time slots: {}',
                 'alternative_doctors': 'Alternatively, Dr. {} is available at your preferred time.',
+                'please_hold': 'Please hold for a moment while I check that for you.',
             },
             'hi': {
                 'greeting': 'नमस्ते! आप अपोलो असिस्ट से बात कर रहे हैं। मैं आपकी कैसे सहायता कर सकता हूं?',
@@ -33,6 +34,7 @@ class LanguageManager:
                 'no_doctor': 'खुशी है, {} के लिए {} को कोई डॉक्टर उपलब्ध नहीं है।',
                 'emergency': 'चिकित्सा आपातकाल के लिए, कृपया फोन काटें और तुरंत 1066 डायल करें।',
                 'appointment_confirmed': 'पुष्टि के लिए, मैं {} के लिए डॉ. {} के साथ {} को {} बजे नियुक्ति बुक कर रहा हूं। क्या यह सही है?',
+                'please_hold': 'कृपया एक क्षण रुकें, मैं आपके लिए यह जांच रहा हूं।',
             },
             'ta': {
                 'greeting': 'வணக்கம்! நீங்கள் அப்போலோ அசிஸ்ட்டுடன் பேசுகிறீர்கள். நான் உங்களுக்கு எப்படி உதவ முடியும்?',
@@ -41,6 +43,7 @@ class LanguageManager:
                 'patient_found': 'நன்றி, எங்கள் சிஸ்டத்தில் உங்கள் விவரங்களை கண்டுபிடித்தேன்.',
                 'booking_success': 'உங்கள் சந்திப்பு வெற்றிகரமாக பதிவு செய்யப்பட்டுள்ளது டாக்டர் {} உடன் {} அன்று {} மணிக்கு.',
                 'emergency': 'மருத்துவ அவசரநிலைக்கு, தயவுசெய்து உடனே 1066 ஐ டயல் செய்யவும்.',
+                'please_hold': 'தயவுசெய்து சிறிது நேரம் காத்திருங்கள், நான் இதை சரிபார்க்கிறேன்.',
             }
         }
     
@@ -0,0 +1,164 @@
+#utils/patient_name_index.py
+
+import math
+import re
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+import numpy as np
+
+# A name word must be at least this similar to a query word to match it
+MIN_WORD_SIMILARITY = 0.5
+# Similarity given to words that differ in spelling but share a phonetic key
+PHONETIC_SIMILARITY = 0.8
+
+_WORD = re.compile(r'[^\W_]+')
+
+# Spelling variants of Indian names an ASR transcript or a caller produces:
+# Laxmi/Lakshmi, Karthick/Karthik, Mohammed/Muhammad, Ezhil/Ezil, Vasanth/Wasant, Zaheer/Jaheer
+_PHONETIC_RULES = [(re.compile(pattern), replacement) for pattern, replacement in (
+    ('x', 'ks'), ('q', 'k'), ('ck', 'k'), ('c(?!h)', 'k'), ('ch', 'c'), ('ph', 'f'),
+    ('([bdgjkpstz])h', r'\1'), ('w', 'v'), ('z', 'j'), ('(?<=.)[hy]', ''), ('[aeiou]+', 'a'),
+)]
+_REPEATS = re.compile(r'(.)\1+')
+
+
+def name_words(name) -> Tuple[str, ...]:
+    """Casefolded words of a name"""
+    if not isinstance(name, str):
+        return ()
+    return tuple(_WORD.findall(name.casefold()))
+
+
+def phonetic_key(word: str) -> str:
+    """A word with spellings that sound alike folded together.
+
+    Transliterated Indian names disagree mostly on vowels, aspiration and
+    doubled letters, so every run of vowels becomes 'a', an 'h' or 'y' after
+    the first letter is dropped and repeats collapse: Aishwarya and Ishwarya
+    are both 'asvara'. Consonants are kept, so Priya and Puri stay apart.
+    """
+    for pattern, replacement in _PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    return _REPEATS.sub(r'\1', word)
+
+
+def trigrams(word: str) -> FrozenSet[str]:
+    """Trigrams of a word padded so its start and end count too"""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class PatientNameIndex:
+    """Patients by the words of their names, with fuzzy lookup of each word.
+
+    Matching runs over the vocabulary of distinct name words, not over
+    patients: a query word finds the words sharing trigrams with it, or a
+    phonetic key, through two inverted indexes, and only the patients under
+    the words that match are scored. The vocabulary grows far more slowly
+    than the patient list, so a search costs the same at a million patients
+    as at a thousand, apart from how many patients share the matched names.
+
+    A patient scores the mean, over the query words, of its best word
+    similarity: 1 for the same word, PHONETIC_SIMILARITY for one that sounds
+    the same, else the trigram similarity. add() and remove() keep the index
+    current as patients are inserted and renamed.
+    """
+
+    def __init__(self, phonetic: bool = True):
+        self.phonetic = phonetic
+        self._names: Dict[int, Tuple[str, ...]] = {}
+        self._patients: Dict[str, Set[int]] = defaultdict(set)
+        self._grams: Dict[str, FrozenSet[str]] = {}
+        self._by_gram: Dict[str, Set[str]] = defaultdict(set)
+        self._by_sound: Dict[str, Set[str]] = defaultdict(set)
+        # Each word's patients as an array for search(), dropped when they change
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _add_word(self, word: str):
+        if word in self._grams:
+            return
+        grams = self._grams[word] = trigrams(word)
+        for gram in grams:
+            self._by_gram[gram].add(word)
+        if self.phonetic:
+            self._by_sound[phonetic_key(word)].add(word)
+
+    def add(self, key: int, name):
+        """Index a patient's name, replacing the one indexed before"""
+        self.remove(key)
+        words = name_words(name)
+        self._names[key] = words
+        for word in words:
+            self._add_word(word)
+            self._patients[word].add(key)
+            self._arrays.pop(word, None)
+
+    def remove(self, key: int):
+        # Words stay in the vocabulary; one with no patients left just matches nobody
+        for word in self._names.pop(key, ()):
+            self._patients[word].discard(key)
+            self._arrays.pop(word, None)
+
+    def _similar_words(self, word: str, min_similarity: float) -> Dict[str, float]:
+        grams = trigrams(word)
+        # A vocabulary word at least min_similarity alike shares at least this many trigrams
+        needed = max(1, math.ceil(min_similarity * len(grams) / (2 - min_similarity) - 1e-9))
+        shared = Counter(chain.from_iterable(self._by_gram.get(gram, ()) for gram in grams))
+        found = {}
+        for other, count in shared.items():
+            if count >= needed:
+                score = 2 * count / (len(grams) + len(self._grams[other]))
+                if score >= min_similarity:
+                    found[other] = score
+        if self.phonetic:
+            for other in self._by_sound.get(phonetic_key(word), ()):
+                found[other] = max(found.get(other, 0.0), PHONETIC_SIMILARITY)
+        if word in self._grams:
+            found[word] = 1.0
+        return found
+
+    def _keys_of(self, word: str) -> np.ndarray:
+        keys = self._arrays.get(word)
+        if keys is None:
+            patients = self._patients.get(word, ())
+            keys = self._arrays[word] = np.fromiter(patients, dtype=np.int64, count=len(patients))
+        return keys
+
+    def _best_by_patient(self, similar: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Patients under any of the similar words, each with its best word's similarity"""
+        ordered = sorted(similar.items(), key=lambda item: -item[1])
+        arrays = [self._keys_of(word) for word, _ in ordered]
+        keys = np.concatenate(arrays)
+        scores = np.repeat([score for _, score in ordered], [len(array) for array in arrays])
+        # Best words come first, and unique() keeps the first occurrence of each key
+        keys, first = np.unique(keys, return_index=True)
+        return keys, scores[first]
+
+    def search(self, query, limit: int = 20,
+               min_similarity: float = MIN_WORD_SIMILARITY) -> List[Tuple[int, float]]:
+        """Up to `limit` (key, score) pairs, best first; equal scores keep the lower key first"""
+        words = name_words(query)
+        if not words or limit <= 0:
+            return []
+        keys, scores = [], []
+        for word in words:
+            similar = self._similar_words(word, min_similarity)
+            if similar:
+                word_keys, word_scores = self._best_by_patient(similar)
+                keys.append(word_keys)
+                scores.append(word_scores)
+        if not keys:
+            return []
+        keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        if len(keys) > limit:
+            # Everything scoring at least the limit-th best, ties included, then ordered exactly
+            kept = totals >= -np.partition(-totals, limit - 1)[limit - 1]
+            keys, totals = keys[kept], totals[kept]
+        order = np.lexsort((keys, -totals))[:limit]
+        return [(int(keys[i]), float(totals[i]) / len(words)) for i in order]
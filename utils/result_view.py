@@ -0,0 +1,50 @@
+# utils/result_view.py
+
+from typing import Any, Callable, Dict, Generic, Iterator, List, Sequence, TypeVar, Union
+
+T = TypeVar('T')
+
+
+class ResultView(Sequence, Generic[T]):
+    """Lazy, read-only sequence over a query result held as columns.
+
+    Objects are only built for the rows actually accessed, so a caller that
+    just needs len() or one column (e.g. counting statuses) never pays for
+    creating a dataclass per row. to_list() materializes everything in one
+    column-wise pass.
+    """
+
+    def __init__(self, fields: Sequence[str], columns: Sequence[List[Any]], factory: Callable[..., T]):
+        self.fields = list(fields)
+        self._columns = list(columns)
+        self._factory = factory
+        self._length = len(self._columns[0]) if self._columns else 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, List[T]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        return self._factory(*(column[index] for column in self._columns))
+
+    def __iter__(self) -> Iterator[T]:
+        return map(self._factory, *self._columns) if self._columns else iter(())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, ResultView)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ResultView({self._length} rows)"
+
+    def column(self, field: str) -> List[Any]:
+        """Raw values of one field, without building any objects"""
+        return self._columns[self.fields.index(field)]
+
+    def columns(self) -> Dict[str, List[Any]]:
+        return dict(zip(self.fields, self._columns))
+
+    def to_list(self) -> List[T]:
+        return list(map(self._factory, *self._columns)) if self._columns else []
@@ -0,0 +1,58 @@
+# utils/rwlock.py
+
+import threading
+from contextlib import contextmanager
+from typing import Hashable, List
+
+
+class ReadWriteLock:
+    """Many concurrent readers or one writer.
+
+    Writers are preferred: once a writer is waiting, new readers queue behind
+    it, so a steady stream of slot lookups cannot starve a booking.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_lock(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_lock(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class StripedLock:
+    """Fixed pool of mutexes selected by key hash, e.g. one per (doctor_id, date)"""
+
+    def __init__(self, stripes: int = 64):
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, key: Hashable) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
@@ -0,0 +1,152 @@
+#utils/slot_bitmap.py
+
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from utils.interval_index import appointment_span, to_minutes as _minutes
+
+# A booked slot label ("10:30") or an appointment's (start_time, end_time)
+Booking = Union[str, Tuple[str, Optional[str]]]
+
+
+class SlotGrid:
+    """The slot start times of one working day, bit i standing for the i-th slot.
+
+    Grids depend only on (working_start, working_end, slot_minutes), so they
+    are shared through slot_grid(); the per-day state is a plain int mask.
+    """
+
+    __slots__ = ('slot_minutes', 'end', 'labels', 'starts', 'bits', 'full_mask')
+
+    def __init__(self, working_start: str, working_end: str, slot_minutes: int):
+        if slot_minutes < 1:
+            raise ValueError("slot_minutes must be at least 1")
+        start, end = _minutes(working_start), _minutes(working_end)
+        self.slot_minutes = slot_minutes
+        self.end = end
+        self.starts: Tuple[int, ...] = tuple(range(start, end - slot_minutes + 1, slot_minutes))
+        self.labels: Tuple[str, ...] = tuple(f"{t // 60:02d}:{t % 60:02d}" for t in self.starts)
+        self.bits: Dict[str, int] = {label: i for i, label in enumerate(self.labels)}
+        self.full_mask = (1 << len(self.labels)) - 1
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def mask_of(self, slots: Iterable[str]) -> int:
+        """Mask with the bits of the given slot labels set; labels off the grid are ignored"""
+        mask = 0
+        for label in slots:
+            bit = self.bits.get(label)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def mask_of_spans(self, spans: Iterable[Tuple[int, int]], duration: Optional[int] = None) -> int:
+        """Mask of the slots where a booking of `duration` minutes would overlap one of the
+        [start, end) minute spans or run past the end of the day (duration defaults to slot_minutes)"""
+        duration = duration or self.slot_minutes
+        mask = 0
+        for start, end in spans:
+            # Slot t is blocked when t < end and t + duration > start
+            low, high = bisect_right(self.starts, start - duration), bisect_left(self.starts, end)
+            if low < high:
+                mask |= (1 << high) - (1 << low)
+        if duration > self.slot_minutes:
+            last = bisect_right(self.starts, self.end - duration)
+            mask |= self.full_mask >> last << last
+        return mask
+
+    def mask_of_bookings(self, booked: Iterable[Booking], duration: Optional[int] = None) -> int:
+        """mask_of_spans() for a mix of booked slot labels and (start_time, end_time) pairs.
+
+        A label stands for one slot_minutes slot and, as in mask_of(), is
+        ignored when it is off the grid; a pair covers its real length, and
+        is ignored when its start is not an HH:MM time.
+        """
+        spans = []
+        for booking in booked:
+            if isinstance(booking, str):
+                bit = self.bits.get(booking)
+                if bit is not None:
+                    spans.append((self.starts[bit], self.starts[bit] + self.slot_minutes))
+            elif booking and booking[0]:
+                try:
+                    spans.append(appointment_span(*booking))
+                except ValueError:
+                    continue
+        return self.mask_of_spans(spans, duration)
+
+    def labels_of(self, mask: int) -> List[str]:
+        """Labels of the set bits of mask, in time order"""
+        labels = []
+        while mask:
+            low = mask & -mask
+            labels.append(self.labels[low.bit_length() - 1])
+            mask ^= low
+        return labels
+
+    def free_slots(self, booked_mask: int) -> List[str]:
+        return self.labels_of(self.full_mask & ~booked_mask)
+
+    def first_free(self, booked_mask: int, at_or_after: Optional[str] = None) -> Optional[str]:
+        """Earliest free slot starting at or after the given H:M time (the whole day if None)"""
+        free = self.full_mask & ~booked_mask
+        if at_or_after is not None:
+            # Clear the bits of slots that start earlier
+            skip = bisect_left(self.starts, _minutes(at_or_after))
+            free = free >> skip << skip
+        if not free:
+            return None
+        return self.labels[(free & -free).bit_length() - 1]
+
+
+@lru_cache(maxsize=256)
+def slot_grid(working_start: str, working_end: str, slot_minutes: int) -> SlotGrid:
+    return SlotGrid(working_start, working_end, slot_minutes)
+
+
+class SlotBitmap:
+    """Booked/free state of one (doctor, date): an int mask over a shared SlotGrid"""
+
+    __slots__ = ('grid', 'mask')
+
+    def __init__(self, grid: SlotGrid, booked_slots: Iterable[Booking] = ()):
+        self.grid = grid
+        self.mask = grid.mask_of_bookings(booked_slots)
+
+    def is_free(self, label: str) -> bool:
+        bit = self.grid.bits.get(label)
+        return bit is not None and not self.mask >> bit & 1
+
+    def book(self, label: str) -> bool:
+        """Mark a slot booked; False if it is off the grid or already booked"""
+        if not self.is_free(label):
+            return False
+        self.mask |= 1 << self.grid.bits[label]
+        return True
+
+    def release(self, label: str) -> bool:
+        """Mark a slot free again; False if it was not booked"""
+        bit = self.grid.bits.get(label)
+        if bit is None or not self.mask >> bit & 1:
+            return False
+        self.mask &= ~(1 << bit)
+        return True
+
+    @property
+    def free_count(self) -> int:
+        return len(self.grid) - self.mask.bit_count()
+
+    def free_slots(self) -> List[str]:
+        return self.grid.free_slots(self.mask)
+
+    def first_free(self, at_or_after: Optional[str] = None) -> Optional[str]:
+        return self.grid.first_free(self.mask, at_or_after)
+
+
+def available_slots(working_start: str, working_end: str, booked_slots: Iterable[Booking],
+                    slot_minutes: int, duration_minutes: Optional[int] = None) -> List[str]:
+    """Start times of a working day where a `duration_minutes` booking fits, in time order"""
+    grid = slot_grid(working_start, working_end, slot_minutes)
+    return grid.free_slots(grid.mask_of_bookings(booked_slots, duration_minutes))
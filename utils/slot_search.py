@@ -0,0 +1,177 @@
+#utils/slot_search.py
+
+import heapq
+import re
+from dataclasses import dataclass
+from datetime import date as date_class, datetime, timedelta
+from typing import Awaitable, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from utils.availability_calendar import DayAvailability
+from utils.date_parser import MAX_ADVANCE_DAYS
+from utils.exceptions import InvalidDateError
+from utils.interval_index import to_minutes
+from utils.storage_models import Doctor
+
+DAY_MINUTES = 24 * 60
+# Same periods get_available_slots_enhanced groups slots into
+TIME_OF_DAY = {
+    'morning': (0, 12 * 60),
+    'afternoon': (12 * 60, 17 * 60),
+    'evening': (17 * 60, DAY_MINUTES),
+}
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+WEEKDAY_GROUPS = {'weekday': WEEKDAYS[:5], 'weekdays': WEEKDAYS[:5], 'weekend': WEEKDAYS[5:]}
+
+
+@dataclass(slots=True)
+class SlotMatch:
+    doctor: Doctor
+    on_date: date_class
+    start_time: str
+
+
+def _label(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def parse_time_window(text: Optional[str]) -> Tuple[int, int]:
+    """[start, end) minutes for 'morning'/'afternoon'/'evening' or an 'HH:MM-HH:MM' range"""
+    if not text or not text.strip():
+        return 0, DAY_MINUTES
+    text = text.strip().lower()
+    if text in TIME_OF_DAY:
+        return TIME_OF_DAY[text]
+    match = re.fullmatch(r'(\d{1,2}:\d{2})\s*(?:-|to)\s*(\d{1,2}:\d{2})', text)
+    try:
+        start, end = to_minutes(match.group(1)), to_minutes(match.group(2))
+    except (AttributeError, ValueError):
+        raise InvalidDateError(f"Unknown time of day: {text}. Use morning, afternoon, evening or HH:MM-HH:MM.")
+    if end <= start:
+        raise InvalidDateError(f"The time range {text} ends before it starts.")
+    return start, end
+
+
+def parse_weekdays(text: Optional[str]) -> Optional[frozenset]:
+    """Three-letter weekday names from e.g. 'Mon, Wednesday' or 'weekend'; None means any day"""
+    if not text or not text.strip():
+        return None
+    days = set()
+    for part in re.split(r'[,\s/]+', text.strip().lower()):
+        if not part or part == 'and':
+            continue
+        if part in WEEKDAY_GROUPS:
+            days.update(WEEKDAY_GROUPS[part])
+            continue
+        day = next((name for name in WEEKDAYS if part.startswith(name.lower())), None)
+        if day is None:
+            raise InvalidDateError(f"Unknown weekday: {part}.")
+        days.add(day)
+    return frozenset(days)
+
+
+class SlotSearch:
+    """Date range, time-of-day window and weekdays an earliest-slot search may return"""
+
+    def __init__(self, first_date: Optional[date_class] = None, days_ahead: int = MAX_ADVANCE_DAYS,
+                 time_window: Tuple[int, int] = (0, DAY_MINUTES), weekdays: Optional[Iterable[str]] = None,
+                 now: Optional[datetime] = None):
+        self.now = now or datetime.now()
+        today = self.now.date()
+        self.first_date = max(first_date or today, today)
+        self.last_date = today + timedelta(days=days_ahead)
+        self.window = time_window
+        self.weekdays = frozenset(weekdays) if weekdays else None
+
+    def dates(self, start: date_class) -> Iterator[date_class]:
+        on_date = max(start, self.first_date)
+        while on_date <= self.last_date:
+            if self.weekdays is None or on_date.strftime('%a') in self.weekdays:
+                yield on_date
+            on_date += timedelta(days=1)
+
+    def first_in(self, day: DayAvailability, on_date: date_class, after: int = -1) -> Optional[int]:
+        """Minute of the day's first free slot inside the window that starts after `after`"""
+        low, high = self.window
+        bound = max(low, after + 1)
+        if on_date == self.now.date():
+            # Slots already under way today are not offered
+            bound = max(bound, self.now.hour * 60 + self.now.minute + 1)
+        if bound >= min(high, DAY_MINUTES):
+            return None
+        label = day.first_free(_label(bound))
+        if label is None:
+            return None
+        minute = to_minutes(label)
+        return minute if minute < high else None
+
+
+def _next_slot(doctor: Doctor, search: SlotSearch, start: date_class, after: int,
+               works_on: Callable[[Doctor, date_class], bool],
+               day_of: Callable[[Doctor, date_class], DayAvailability]) -> Optional[Tuple[date_class, int]]:
+    """The doctor's first matching free slot after minute `after` of date `start`, or None"""
+    for on_date in search.dates(start):
+        if works_on(doctor, on_date):
+            minute = search.first_in(day_of(doctor, on_date), on_date, after if on_date == start else -1)
+            if minute is not None:
+                return on_date, minute
+    return None
+
+
+async def _next_slot_async(doctor: Doctor, search: SlotSearch, start: date_class, after: int,
+                           works_on: Callable[[Doctor, date_class], bool],
+                           day_of: Callable[[Doctor, date_class], Awaitable[DayAvailability]]
+                           ) -> Optional[Tuple[date_class, int]]:
+    for on_date in search.dates(start):
+        if works_on(doctor, on_date):
+            minute = search.first_in(await day_of(doctor, on_date), on_date, after if on_date == start else -1)
+            if minute is not None:
+                return on_date, minute
+    return None
+
+
+def earliest_slots(doctors: Sequence[Doctor], search: SlotSearch, count: int,
+                   works_on: Callable[[Doctor, date_class], bool],
+                   day_of: Callable[[Doctor, date_class], DayAvailability]) -> List[SlotMatch]:
+    """The `count` earliest matching free slots across doctors, in (date, time) order.
+
+    A min-heap holds each doctor's next free slot; popping the earliest one
+    advances only that doctor's pointer, so days are read just as far as the
+    answer needs rather than for every doctor across the whole horizon.
+    """
+    heap = []
+    for index, doctor in enumerate(doctors):
+        found = _next_slot(doctor, search, search.first_date, -1, works_on, day_of)
+        if found:
+            heap.append((*found, index))
+    heapq.heapify(heap)
+
+    matches = []
+    while heap and len(matches) < count:
+        on_date, minute, index = heapq.heappop(heap)
+        matches.append(SlotMatch(doctors[index], on_date, _label(minute)))
+        found = _next_slot(doctors[index], search, on_date, minute, works_on, day_of)
+        if found:
+            heapq.heappush(heap, (*found, index))
+    return matches
+
+
+async def earliest_slots_async(doctors: Sequence[Doctor], search: SlotSearch, count: int,
+                               works_on: Callable[[Doctor, date_class], bool],
+                               day_of: Callable[[Doctor, date_class], Awaitable[DayAvailability]]
+                               ) -> List[SlotMatch]:
+    # Pointers advance one at a time: the day reads share the caller's storage session
+    heap = []
+    for index, doctor in enumerate(doctors):
+        found = await _next_slot_async(doctor, search, search.first_date, -1, works_on, day_of)
+        if found:
+            heap.append((*found, index))
+    heapq.heapify(heap)
+
+    matches = []
+    while heap and len(matches) < count:
+        on_date, minute, index = heapq.heappop(heap)
+        matches.append(SlotMatch(doctors[index], on_date, _label(minute)))
+        found = await _next_slot_async(doctors[index], search, on_date, minute, works_on, day_of)
+        if found:
+            heapq.heappush(heap, (*found, index))
+    return matches
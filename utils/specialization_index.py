@@ -0,0 +1,86 @@
+#utils/specialization_index.py
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize_specialization(text) -> str:
+    """Case- and whitespace-insensitive form of a specialization name"""
+    return ' '.join(str(text).casefold().split())
+
+
+def split_specializations(value) -> List[str]:
+    """Names in a comma-joined specializations cell; anything but a string has none"""
+    if not isinstance(value, str):
+        return []
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SpecializationIndex:
+    """Doctor ids by normalized specialization name, with a word index for partial names.
+
+    A query that is a known specialization is one dict lookup. Any other
+    query matches the specializations that contain each of its words as a
+    whole word, so 'general' or 'dentist' find 'General Dentist' while
+    'Cosmetic dentistry', 'Endodontist' and 'Pedodontist' stay out, as the
+    substring match this replaced let them in.
+    """
+
+    def __init__(self):
+        self._doctors: Dict[str, Set[int]] = defaultdict(set)
+        self._display: Dict[str, str] = {}
+        self._words: Dict[str, Set[str]] = defaultdict(set)
+
+    def add(self, doctor_id: int, specializations):
+        """Index a doctor under each name of a comma-joined specializations value"""
+        for name in split_specializations(specializations):
+            self._doctors[self.add_name(name)].add(doctor_id)
+
+    def add_name(self, name: str) -> str:
+        """Make a specialization known, without doctors; returns its normalized form"""
+        key = normalize_specialization(name)
+        if key not in self._display:
+            self._display[key] = name
+            self._doctors.setdefault(key, set())
+            for word in _WORD.findall(key):
+                self._words[word].add(key)
+        return key
+
+    def matching(self, query) -> List[str]:
+        """Normalized specializations a query selects: itself if known, else those containing all its words"""
+        key = normalize_specialization(query)
+        if key in self._doctors:
+            return [key]
+        words = _WORD.findall(key)
+        if not words:
+            return []
+        names = set.intersection(*(self._words.get(word, set()) for word in words))
+        return sorted(names)
+
+    def doctor_ids(self, query) -> Set[int]:
+        ids = set()
+        for key in self.matching(query):
+            ids |= self._doctors[key]
+        return ids
+
+    def names(self) -> List[str]:
+        """Every specialization, as first written, sorted"""
+        return sorted(self._display.values())
+
+
+def matching_specializations(query, names: Iterable[str]) -> List[str]:
+    """The names a query selects by SpecializationIndex's rules, as written in `names`.
+
+    For backends that store specializations in a table: the distinct names
+    are few, so matching them here and filtering doctors by the exact names
+    returned gives the same doctors as the CSV backend's index.
+    """
+    names = list(names)
+    index = SpecializationIndex()
+    for name in names:
+        index.add_name(name)
+    selected = set(index.matching(query))
+    return [name for name in names if normalize_specialization(name) in selected]
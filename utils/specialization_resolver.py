@@ -0,0 +1,296 @@
+#utils/specialization_resolver.py
+
+import unicodedata
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# What the agent knows about each specialization. Callers name what is wrong in
+# their own words, so besides common_conditions every entry lists aliases:
+# other names for the specialty and everyday terms, in English, Tamil and Hindi
+# (script and romanized), that the resolver maps to it.
+SPECIALIZATIONS: Dict[str, Dict] = {
+    "General Dentist": {
+        "description": "Routine dental care: check-ups, cleaning, fillings and tooth pain",
+        "common_conditions": ["tooth ache", "toothache", "tooth pain", "cavity", "cavities", "tooth decay",
+                              "sensitive teeth", "dental checkup", "teeth cleaning", "filling", "bad breath"],
+        "aliases": ["dentist", "dental", "teeth", "tooth",
+                    "பல் வலி", "பல் மருத்துவர்", "பல் சொத்தை", "pal vali", "pal doctor",
+                    "दांत दर्द", "दांत", "दांतों का डॉक्टर", "daant dard", "dant dard", "daant"],
+    },
+    "Endodontist": {
+        "description": "Root canal treatment and infections inside the tooth",
+        "common_conditions": ["root canal", "severe tooth pain", "tooth infection", "tooth abscess",
+                              "swelling near tooth", "pain while chewing"],
+        "aliases": ["endodontics", "rct", "வேர் சிகிச்சை", "रूट कैनाल"],
+    },
+    "Root canals": {
+        "description": "Root canal treatment",
+        "common_conditions": ["root canal", "tooth infection", "tooth abscess"],
+        "aliases": ["rct", "வேர் சிகிச்சை", "रूट कैनाल"],
+    },
+    "Orthodontics": {
+        "description": "Braces, aligners and straightening teeth",
+        "common_conditions": ["braces", "crooked teeth", "teeth alignment", "gap in teeth", "aligners",
+                              "overbite", "underbite", "protruding teeth"],
+        "aliases": ["orthodontist", "ortho", "பல் கம்பி", "பல் சீரமைப்பு", "ब्रेसेस", "टेढ़े दांत"],
+    },
+    "Dentofacial Orthopedics": {
+        "description": "Jaw growth and alignment",
+        "common_conditions": ["jaw alignment", "jaw growth", "overbite", "underbite"],
+        "aliases": [],
+    },
+    "Pedodontist": {
+        "description": "Dental care for children",
+        "common_conditions": ["child tooth pain", "kids teeth", "baby teeth", "milk teeth", "child dentist"],
+        "aliases": ["pedodontics", "pediatric dentist", "paediatric dentist", "children's dentist",
+                    "குழந்தை பல்", "பால் பல்", "बच्चों के दांत", "दूध के दांत"],
+    },
+    "Periodontist": {
+        "description": "Gum disease and the tissue around the teeth",
+        "common_conditions": ["bleeding gums", "gum bleeding", "swollen gums", "gum swelling", "gum pain",
+                              "loose teeth", "receding gums", "pyorrhea"],
+        "aliases": ["periodontics", "gums", "gum", "ஈறு", "ஈறு வீக்கம்", "ஈறு ரத்தம்", "eeru",
+                    "मसूड़े", "मसूड़ों से खून", "masoode", "masude"],
+    },
+    "Periodontal Surgeries": {
+        "description": "Gum surgery",
+        "common_conditions": ["gum surgery", "flap surgery", "gum grafting"],
+        "aliases": [],
+    },
+    "Cosmetic dentistry": {
+        "description": "Whitening, veneers and smile makeovers",
+        "common_conditions": ["teeth whitening", "whitening", "yellow teeth", "stained teeth", "smile makeover",
+                              "veneers"],
+        "aliases": ["பல் வெண்மை", "மஞ்சள் பல்", "दांत सफेद", "पीले दांत"],
+    },
+    "Dental implants": {
+        "description": "Replacing missing teeth with implants",
+        "common_conditions": ["missing tooth", "missing teeth", "tooth replacement", "implant", "implants"],
+        "aliases": ["implantologist", "பல் பொருத்துதல்", "नकली दांत", "इम्प्लांट"],
+    },
+    "Implant dentistry": {
+        "description": "Replacing missing teeth with implants",
+        "common_conditions": ["missing tooth", "missing teeth", "implant", "implants"],
+        "aliases": [],
+    },
+    "Full mouth rehabilitation": {
+        "description": "Restoring many damaged or missing teeth together",
+        "common_conditions": ["dentures", "full mouth", "many missing teeth", "worn teeth"],
+        "aliases": ["பல் செட்", "बत्तीसी"],
+    },
+    "Laser dentistry": {
+        "description": "Laser treatment of teeth and gums",
+        "common_conditions": ["laser treatment", "laser gum treatment"],
+        "aliases": ["laser"],
+    },
+    "Oral Medicine": {
+        "description": "Mouth ulcers, patches and other conditions of the mouth lining",
+        "common_conditions": ["mouth ulcer", "mouth ulcers", "white patches", "burning mouth", "dry mouth"],
+        "aliases": ["வாய்ப்புண்", "வாய் புண்", "मुंह के छाले", "munh ke chhale"],
+    },
+    "Maxillofacial Surgeon": {
+        "description": "Extractions, wisdom teeth and jaw surgery",
+        "common_conditions": ["wisdom tooth", "wisdom teeth", "tooth extraction", "tooth removal", "jaw pain",
+                              "jaw fracture", "facial injury", "impacted tooth"],
+        "aliases": ["oral surgeon", "oral and maxillofacial surgeon", "ஞானப் பல்", "பல் பிடுங்க", "அக்கல் பல்",
+                    "अक्ल दाढ़", "दांत निकालना", "akal daad"],
+    },
+    "Radiology": {
+        "description": "Dental X-rays and scans",
+        "common_conditions": ["x-ray", "xray", "opg", "dental scan"],
+        "aliases": ["எக்ஸ்ரே", "एक्स-रे"],
+    },
+    "Cardiology": {
+        "description": "Heart and cardiovascular system specialists",
+        "common_conditions": ["chest pain", "heart problems", "blood pressure", "palpitations"],
+        "aliases": ["cardiologist", "heart", "இதயம்", "நெஞ்சு வலி", "दिल", "सीने में दर्द"],
+    },
+    "Orthopedics": {
+        "description": "Bone, joint, and muscle specialists",
+        "common_conditions": ["back pain", "joint pain", "fractures", "arthritis", "sports injuries"],
+        "aliases": ["orthopedic", "முதுகு வலி", "மூட்டு வலி", "कमर दर्द", "जोड़ों का दर्द"],
+    },
+    "General Medicine": {
+        "description": "General health and medical care",
+        "common_conditions": ["fever", "general checkup", "diabetes", "hypertension"],
+        "aliases": ["physician", "காய்ச்சல்", "kaichal", "बुखार", "bukhar"],
+    },
+    "Pediatrics": {
+        "description": "Children's health specialists",
+        "common_conditions": ["child health", "vaccination", "growth problems", "pediatric care"],
+        "aliases": ["pediatrician", "paediatrician"],
+    },
+    "Gynecology": {
+        "description": "Women's health and reproductive system",
+        "common_conditions": ["women's health", "pregnancy", "menstrual problems", "reproductive health"],
+        "aliases": ["gynecologist", "gynaecologist"],
+    },
+    "Dermatology": {
+        "description": "Skin, hair, and nail specialists",
+        "common_conditions": ["skin problems", "acne", "hair loss", "rashes"],
+        "aliases": ["dermatologist", "skin"],
+    },
+    "Neurology": {
+        "description": "Nervous system and brain specialists",
+        "common_conditions": ["headache", "stroke", "epilepsy", "neurological problems"],
+        "aliases": ["neurologist", "தலைவலி", "thalai vali", "सिरदर्द", "सिर दर्द", "sir dard"],
+    },
+    "ENT": {
+        "description": "Ear, nose, and throat specialists",
+        "common_conditions": ["throat pain", "ear problems", "hearing loss", "sinus issues"],
+        "aliases": ["ear nose throat", "தொண்டை வலி", "गले में दर्द"],
+    },
+    "Ophthalmology": {
+        "description": "Eye and vision care specialists",
+        "common_conditions": ["eye problems", "vision issues", "cataracts", "eye pain"],
+        "aliases": ["ophthalmologist", "eye doctor", "கண் வலி", "आंख"],
+    },
+    "Psychiatry": {
+        "description": "Mental health and behavioral specialists",
+        "common_conditions": ["depression", "anxiety", "mental health", "stress"],
+        "aliases": ["psychiatrist"],
+    },
+}
+
+
+def normalize_text(text) -> str:
+    """Casefolded text with anything but letters, marks and digits turned into single spaces.
+
+    Marks are kept because Tamil and Devanagari vowel signs are marks, not
+    letters; splitting on them, as \\w does, would break every word apart.
+    """
+    chars = [char if unicodedata.category(char)[0] in 'LMN' else ' ' for char in str(text or '').casefold()]
+    return ' '.join(''.join(chars).split())
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over a fixed set of phrases.
+
+    Built once; find() reports every phrase occurring in a text in a single
+    pass over its characters, however many phrases there are, instead of a
+    substring test per phrase.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for phrase in phrases:
+            self._add(phrase)
+        self._link()
+
+    def _add(self, phrase: str):
+        state = 0
+        for char in phrase:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = following
+        self._out[state].append(len(self.phrases))
+        self.phrases.append(phrase)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[following] = self._goto[fail].get(char, 0)
+                self._out[following] = self._out[following] + self._out[self._fail[following]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """(start, end, phrase index) of every occurrence, ordered by end"""
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                yield end - len(self.phrases[index]), end, index
+
+
+@dataclass(slots=True)
+class SpecializationMatch:
+    specialization: str
+    score: int
+    matched_terms: List[str] = field(default_factory=list)
+
+
+class SpecializationResolver:
+    """Maps symptoms, conditions and aliases in free text to specializations.
+
+    Every name, condition and alias of the table is compiled into one
+    PhraseMatcher, so resolving a caller's sentence is a single scan. Only
+    whole words count, and where matched terms overlap the longest wins:
+    'severe tooth pain' is the Endodontist's term, not the 'tooth pain' of a
+    General Dentist inside it. Specializations rank by the total length of
+    their matched terms, the more specific ones first.
+    """
+
+    def __init__(self, table: Dict[str, Dict]):
+        self.table = table
+        targets: Dict[str, List[str]] = {}
+        for name, info in table.items():
+            for term in [name, *info.get("common_conditions", ()), *info.get("aliases", ())]:
+                key = normalize_text(term)
+                if key and name not in targets.setdefault(key, []):
+                    targets[key].append(name)
+        self._targets = list(targets.values())
+        self._matcher = PhraseMatcher(targets)
+        self._order = {name: i for i, name in enumerate(table)}
+        self._names = {normalize_text(name): name for name in table}
+
+    def _terms(self, text: str) -> List[Tuple[int, int, int]]:
+        """Whole-word matches, leftmost-longest and not overlapping"""
+        found = [(start, end, index) for start, end, index in self._matcher.find(text)
+                 if (start == 0 or text[start - 1] == ' ') and (end == len(text) or text[end] == ' ')]
+        found.sort(key=lambda match: (match[0], match[0] - match[1]))
+        kept, covered = [], 0
+        for start, end, index in found:
+            if start >= covered:
+                kept.append((start, end, index))
+                covered = end
+        return kept
+
+    def resolve(self, text, available: Optional[Iterable[str]] = None) -> List[SpecializationMatch]:
+        """Specializations the text points to, best first.
+
+        With `available`, only those among it (compared case-insensitively)
+        are returned, named as `available` writes them.
+        """
+        text = normalize_text(text)
+        names = None
+        if available is not None:
+            names = {normalize_text(name): name for name in available}
+        matches: Dict[str, SpecializationMatch] = {}
+        for start, end, index in self._terms(text):
+            for name in self._targets[index]:
+                if names is not None:
+                    name = names.get(normalize_text(name))
+                    if name is None:
+                        continue
+                match = matches.setdefault(name, SpecializationMatch(name, 0))
+                match.score += end - start
+                match.matched_terms.append(text[start:end])
+        return sorted(matches.values(),
+                      key=lambda match: (-match.score, self._order.get(match.specialization, len(self._order))))
+
+    def describe(self, specialization: str) -> Dict:
+        """Name, description and common conditions, as get_available_specializations lists them"""
+        info = self.table.get(self._names.get(normalize_text(specialization)))
+        if info is None:
+            return {"name": specialization, "description": f"{specialization} specialist", "common_conditions": []}
+        return {"name": specialization, "description": info["description"],
+                "common_conditions": list(info["common_conditions"])}
+
+
+specialization_resolver = SpecializationResolver(SPECIALIZATIONS)
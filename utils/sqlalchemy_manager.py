@@ -0,0 +1,769 @@
+# utils/sqlalchemy_manager.py
+
+import asyncio
+import threading
+import zlib
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, time, timedelta
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+
+from sqlalchemy import create_engine, event, select, func, or_
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, async_scoped_session
+from sqlalchemy.orm import sessionmaker, scoped_session, aliased, selectinload
+
+import ORM
+from ORM import Base
+from utils.logger import logger
+from utils.exceptions import SlotUnavailableError
+from utils.interval_index import DEFAULT_APPOINTMENT_MINUTES, IntervalIndex, appointment_span
+from utils.result_view import ResultView
+from utils.specialization_index import matching_specializations
+from utils.storage_models import (
+    ACTIVE_STATUSES, BOOKED_STATUSES, Patient, Doctor, Appointment, booking_analytics,
+    DOCTOR_FIELDS, PATIENT_FIELDS, APPOINTMENT_FIELDS, make_doctor, make_patient, make_appointment,
+    DoctorDay, group_by_doctor_date, PATIENT_SEARCH_LIMIT,
+)
+
+MODELS = {'doctors': ORM.Doctor, 'patients': ORM.Patient, 'appointments': ORM.Appointment}
+
+# Key of the session scope the current tool call runs in; see session_scope()
+_current_scope: ContextVar[Optional[object]] = ContextVar('storage_session_scope', default=None)
+
+
+def _to_date(value) -> Optional[date]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _to_time(value) -> Optional[time]:
+    if value is None or value == '':
+        return None
+    return value if isinstance(value, time) else datetime.strptime(str(value), "%H:%M").time()
+
+
+def _date_text(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def _time_text(value) -> Optional[str]:
+    return value.strftime("%H:%M") if isinstance(value, time) else value
+
+
+def _sqlite_connect(dbapi_connection, _record):
+    # The SQLite stand-in gets the same WAL settings as utils/sqlite_manager.py. pysqlite's own
+    # transaction handling is switched off so SAVEPOINTs nest inside the BEGIN emitted below,
+    # which is IMMEDIATE because SQLite ignores the FOR UPDATE the overlap check relies on.
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def _sqlite_begin(connection):
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def async_database_url(database_url: str) -> str:
+    """The asyncio form of a database URL: asyncpg for Postgres, aiosqlite for SQLite"""
+    url = make_url(database_url)
+    if url.get_backend_name() == 'postgresql':
+        url = url.set(drivername='postgresql+asyncpg')
+    elif url.get_backend_name() == 'sqlite':
+        url = url.set(drivername='sqlite+aiosqlite')
+    return url.render_as_string(hide_password=False)
+
+
+def _materialize(rows, fields, factory, lazy=False):
+    """Build results column-wise; lazy=True returns a ResultView that creates objects on access"""
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in fields]
+    view = ResultView(fields, columns, factory)
+    return view if lazy else view.to_list()
+
+
+# --- Statements and row conversion, shared by the sync and async managers ---
+_PATIENT_COLUMNS = [getattr(ORM.Patient, field) for field in PATIENT_FIELDS]
+
+
+def _doctor_values(row: ORM.Doctor) -> tuple:
+    """DOCTOR_FIELDS values in the comma-joined form make_doctor() takes"""
+    return (row.doctor_id, row.name, row.qualification or '', ','.join(spec.name for spec in row.specializations),
+            _time_text(row.working_start), _time_text(row.working_end), ','.join(row.working_days or []),
+            row.consultation_fee, row.experience_years)
+
+
+def _doctor_query():
+    # Specializations are loaded up front; the async session cannot lazy-load them
+    return select(ORM.Doctor).options(selectinload(ORM.Doctor.specializations)).order_by(ORM.Doctor.doctor_id)
+
+
+def _specialization_names(doctor_data: Dict) -> List[str]:
+    names = []
+    for spec in (doctor_data.get('specializations') or '').split(','):
+        if spec.strip() and spec.strip() not in names:
+            names.append(spec.strip())
+    return names
+
+
+def _new_doctor(doctor_id: Optional[int], doctor_data: Dict) -> ORM.Doctor:
+    return ORM.Doctor(doctor_id=doctor_id, name=doctor_data.get('name'),
+                      qualification=doctor_data.get('qualification', ''), is_active=True)
+
+
+def _doctors_by_specialization_query(names: List[str]):
+    """Doctors with any of the names matching_specializations() picked from _specializations_query()"""
+    return _doctor_query().where(ORM.Doctor.specializations.any(ORM.Specialization.name.in_(names)))
+
+
+def _specializations_query():
+    return select(ORM.Specialization.name).join(ORM.Specialization.doctors).distinct() \
+        .order_by(ORM.Specialization.name)
+
+
+def _patient_search_query(query: str, limit: int):
+    # Search by name or phone number
+    return select(*_PATIENT_COLUMNS) \
+        .where(or_(ORM.Patient.name.ilike(f"%{query}%"), ORM.Patient.phone.like(f"%{query}%"))) \
+        .order_by(ORM.Patient.patient_id).limit(limit)
+
+
+def _new_patient(patient_id: Optional[int], patient_data: Dict) -> ORM.Patient:
+    return ORM.Patient(
+        patient_id=patient_id, name=patient_data.get('name'),
+        phone=str(patient_data.get('phone')).strip() if patient_data.get('phone') is not None else None,
+        age=patient_data.get('age'), location=patient_data.get('location'), first_visit=True,
+        preferred_language=patient_data.get('preferred_language', 'en'))
+
+
+def _apply_patient_update(patient: ORM.Patient, update_data: Dict):
+    for column, value in update_data.items():
+        if column in PATIENT_FIELDS and column != 'patient_id':
+            setattr(patient, column, value)
+
+
+def _appointment_query():
+    patient, doctor = aliased(ORM.Patient), aliased(ORM.Doctor)
+    a = ORM.Appointment
+    return select(a.appointment_id, a.patient_id, a.doctor_id,
+                  func.coalesce(patient.name, 'N/A'), func.coalesce(doctor.name, 'N/A'),
+                  a.appointment_date, a.start_time, a.end_time, a.status) \
+        .outerjoin(patient, patient.patient_id == a.patient_id) \
+        .outerjoin(doctor, doctor.doctor_id == a.doctor_id)
+
+
+def _doctor_date_query(doctor_id: int, appointment_date):
+    return _appointment_query() \
+        .where(ORM.Appointment.doctor_id == doctor_id,
+               ORM.Appointment.appointment_date == _to_date(appointment_date),
+               ORM.Appointment.status.in_(ACTIVE_STATUSES)) \
+        .order_by(ORM.Appointment.appointment_id)
+
+
+def _patient_query(patient_id: int):
+    return _appointment_query() \
+        .where(ORM.Appointment.patient_id == patient_id,
+               ORM.Appointment.status.in_(BOOKED_STATUSES)) \
+        .order_by(ORM.Appointment.appointment_date, ORM.Appointment.start_time, ORM.Appointment.appointment_id)
+
+
+def _bulk_query(doctor_ids: Iterable[int], appointment_dates: Iterable[str]) -> Tuple[List[int], List[str], Any]:
+    """Deduplicated doctor ids, sorted dates and the one query covering them; the query is None for an empty grid"""
+    doctor_ids = list(dict.fromkeys(int(doctor_id) for doctor_id in doctor_ids))
+    dates = sorted({str(appointment_date) for appointment_date in appointment_dates})
+    if not doctor_ids or not dates:
+        return doctor_ids, dates, None
+    return doctor_ids, dates, _appointment_query() \
+        .where(ORM.Appointment.doctor_id.in_(doctor_ids),
+               ORM.Appointment.appointment_date.between(_to_date(dates[0]), _to_date(dates[-1])),
+               ORM.Appointment.status.in_(ACTIVE_STATUSES)) \
+        .order_by(ORM.Appointment.appointment_id)
+
+
+def _make_appointment(appointment_id, patient_id, doctor_id, patient_name, doctor_name,
+                      appointment_date, start_time, end_time, status) -> Appointment:
+    return make_appointment(appointment_id, patient_id, doctor_id, patient_name, doctor_name,
+                            _date_text(appointment_date), _time_text(start_time), _time_text(end_time), status)
+
+
+def _appointment_values(data: Dict) -> Dict[str, Any]:
+    """ORM column values from a CSVManager-style payload (ISO dates, HH:MM times)"""
+    values = {}
+    for column, value in data.items():
+        if column == 'appointment_date':
+            value = _to_date(value)
+        elif column in ('start_time', 'end_time'):
+            value = _to_time(value)
+        elif column not in ('patient_id', 'doctor_id', 'status', 'booking_source', 'notes'):
+            continue
+        values[column] = value
+    return values
+
+
+def _new_appointment_values(appointment_data: Dict) -> Dict[str, Any]:
+    values = _appointment_values(appointment_data)
+    values['status'] = 'scheduled'
+    if values.get('end_time') is None and values.get('start_time') is not None:
+        start = datetime.combine(date.min, values['start_time'])
+        values['end_time'] = (start + timedelta(minutes=DEFAULT_APPOINTMENT_MINUTES)).time()
+    return values
+
+
+def _slot_target(appointment: Optional[ORM.Appointment], values: Dict) -> Optional[Dict[str, Any]]:
+    """Doctor, date and times an insert (appointment=None) or update would occupy; None if it holds no slot"""
+    if appointment is not None:
+        if not values.keys() & {'doctor_id', 'appointment_date', 'start_time', 'end_time', 'status'}:
+            return None
+        values = {**{column: getattr(appointment, column) for column in
+                     ('doctor_id', 'appointment_date', 'start_time', 'end_time', 'status')}, **values}
+    if values.get('status') not in ACTIVE_STATUSES or values.get('start_time') is None:
+        return None
+    return values
+
+
+def _doctor_lock_query(doctor_id: int):
+    """Locks the doctor's row until commit, so overlap checks for one doctor run one at a time"""
+    return select(ORM.Doctor.doctor_id).where(ORM.Doctor.doctor_id == doctor_id).with_for_update()
+
+
+def _overlap_query(target: Dict[str, Any]):
+    """Active bookings of the target's doctor and day that start before the target ends"""
+    a = ORM.Appointment
+    _, end = appointment_span(_time_text(target['start_time']), _time_text(target['end_time']))
+    query = select(a.appointment_id, a.start_time, a.end_time) \
+        .where(a.doctor_id == target['doctor_id'],
+               a.appointment_date == _to_date(target['appointment_date']),
+               a.status.in_(ACTIVE_STATUSES))
+    if end < 24 * 60:
+        query = query.where(a.start_time < time(end // 60, end % 60))
+    return query
+
+
+def _overlaps(rows, target: Dict[str, Any], exclude_id: Optional[int] = None) -> bool:
+    booked = IntervalIndex.from_rows((_time_text(start_time), _time_text(end_time), appointment_id)
+                                     for appointment_id, start_time, end_time in rows)
+    return booked.overlaps(*appointment_span(_time_text(target['start_time']), _time_text(target['end_time'])),
+                           exclude=exclude_id)
+
+
+def _slot_unavailable(data: Dict) -> SlotUnavailableError:
+    return SlotUnavailableError(
+        f"The slot {data.get('start_time')} on {data.get('appointment_date')} is already booked")
+
+
+def _analytics_queries(days: int) -> Dict[str, Any]:
+    """Aggregates behind get_booking_analytics(), served by idx_appointment_date_status"""
+    a = ORM.Appointment
+    links = ORM.doctor_specializations_table
+    end_date = datetime.now().date()
+    in_window = a.appointment_date.between(end_date - timedelta(days=days), end_date)
+    booked = a.status.in_(BOOKED_STATUSES)
+    return {
+        'daily': select(a.appointment_date, func.count()).where(in_window, booked).group_by(a.appointment_date),
+        'doctors': select(ORM.Doctor.name, func.count()).join(a, a.doctor_id == ORM.Doctor.doctor_id)
+        .where(in_window, booked).group_by(ORM.Doctor.name),
+        'specializations': select(ORM.Specialization.name, func.count())
+        .join(links, links.c.specialization_id == ORM.Specialization.specialization_id)
+        .join(a, a.doctor_id == links.c.doctor_id)
+        .where(in_window, booked).group_by(ORM.Specialization.name),
+        'cancelled': select(func.count()).where(in_window, a.status == 'cancelled'),
+    }
+
+
+def _analytics_from_rows(days: int, rows: Dict[str, list]) -> Dict:
+    daily = {_date_text(day): count for day, count in rows['daily']}
+    return booking_analytics(days, sum(daily.values()), rows['cancelled'][0][0],
+                             dict(rows['specializations']), dict(rows['doctors']), daily)
+
+
+def _engine_options(database_url: str, engine_options: Dict) -> Dict:
+    if database_url.startswith('sqlite'):
+        return engine_options
+    # Same pool settings as main.py
+    return {'pool_size': 10, 'max_overflow': 20, 'pool_pre_ping': True, 'pool_recycle': 3600, **engine_options}
+
+
+class SQLAlchemyManager:
+    """Storage backend on the ORM.py models, for Postgres (SQLite works as a stand-in).
+
+    Sessions come from a scoped_session keyed by the current session_scope(),
+    so every storage call made while handling one tool call shares a session
+    and a transaction. Bookings may not overlap: a write that takes a slot
+    first locks the doctor's row (FOR UPDATE; SQLite serializes writers with
+    BEGIN IMMEDIATE instead), then checks the day's active bookings, and an
+    overlap raises SlotUnavailableError. The unique_slot index still backs up
+    the equal-start case.
+    """
+
+    def __init__(self, database_url: str, create_tables: bool = True, **engine_options):
+        self.engine = create_engine(database_url, **_engine_options(database_url, engine_options))
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _sqlite_connect)
+            event.listen(self.engine, 'begin', _sqlite_begin)
+        self.Session = scoped_session(sessionmaker(bind=self.engine, expire_on_commit=False),
+                                      scopefunc=_current_scope.get)
+        self._reserved: Dict[str, int] = {}
+        self._reserve_lock = threading.Lock()
+        if create_tables:
+            Base.metadata.create_all(self.engine)
+        logger.info(f"SQLAlchemy storage ready on {self.engine.url.render_as_string(hide_password=True)}")
+
+    # --- Sessions ---
+    @contextmanager
+    def session_scope(self):
+        """Session for one unit of work, e.g. a tool call.
+
+        Nested scopes reuse the outer session; the outermost scope commits
+        (or rolls back on error) and releases it.
+        """
+        if _current_scope.get() is not None:
+            yield self.Session()
+            return
+        token = _current_scope.set(object())
+        try:
+            session = self.Session()
+            try:
+                yield session
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+        finally:
+            self.Session.remove()
+            _current_scope.reset(token)
+
+    def close(self):
+        self.engine.dispose()
+
+    # --- Id allocation ---
+    def reserve_ids(self, table: str, count: int) -> range:
+        """Reserve a block of ids for a bulk import; pass them back in the create_* payloads"""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        model = MODELS[table]
+        id_column = model.__mapper__.primary_key[0]
+        with self.session_scope() as session:
+            if self.engine.dialect.name == 'postgresql':
+                # Advance the serial sequence past the block, serialized against other reservations
+                session.execute(select(func.pg_advisory_xact_lock(zlib.crc32(table.encode()))))
+                sequence = func.pg_get_serial_sequence(model.__tablename__, id_column.name)
+                first = session.execute(select(func.nextval(sequence))).scalar()
+                session.execute(select(func.setval(sequence, first + count - 1)))
+                return range(first, first + count)
+            # Other dialects take max(id) + 1, so the block is held in this process only
+            with self._reserve_lock:
+                current = session.execute(select(func.coalesce(func.max(id_column), 0))).scalar()
+                first = max(current, self._reserved.get(table, 0)) + 1
+                self._reserved[table] = first + count - 1
+                return range(first, first + count)
+
+    def _assign_id(self, session, table: str, requested_id) -> Optional[int]:
+        """Explicit id for a new row: the requested one, or one past any reserved block"""
+        if requested_id is not None:
+            return int(requested_id)
+        if table not in self._reserved:
+            return None
+        with self._reserve_lock:
+            id_column = MODELS[table].__mapper__.primary_key[0]
+            current = session.execute(select(func.coalesce(func.max(id_column), 0))).scalar()
+            self._reserved[table] = max(current, self._reserved[table]) + 1
+            return self._reserved[table]
+
+    # --- Doctor Methods ---
+    def create_doctor(self, doctor_data: Dict) -> Optional[Doctor]:
+        name = doctor_data.get('name')
+        with self.session_scope() as session:
+            if session.execute(select(ORM.Doctor.doctor_id).where(ORM.Doctor.name == name)).first():
+                logger.warning(f"Doctor '{name}' already exists. Skipping.")
+                return None
+            doctor = _new_doctor(self._assign_id(session, 'doctors', doctor_data.get('doctor_id')), doctor_data)
+            names = _specialization_names(doctor_data)
+            existing = {spec.name: spec for spec in session.scalars(
+                select(ORM.Specialization).where(ORM.Specialization.name.in_(names)))}
+            doctor.specializations = [existing.get(spec) or ORM.Specialization(name=spec) for spec in names]
+            session.add(doctor)
+            session.flush()
+            logger.info(f"Successfully seeded doctor to the database: {name} (ID: {doctor.doctor_id})")
+            return make_doctor(*_doctor_values(doctor))
+
+    def get_doctors_by_specialization(self, specialization: str, lazy: bool = False) -> List[Doctor]:
+        with self.session_scope() as session:
+            names = matching_specializations(specialization, session.scalars(_specializations_query()))
+            rows = [_doctor_values(doctor)
+                    for doctor in session.scalars(_doctors_by_specialization_query(names))] if names else []
+        return _materialize(rows, DOCTOR_FIELDS, make_doctor, lazy)
+
+    def get_doctor_by_id(self, doctor_id: int) -> Optional[Doctor]:
+        with self.session_scope() as session:
+            doctor = session.scalars(_doctor_query().where(ORM.Doctor.doctor_id == doctor_id)).first()
+            return make_doctor(*_doctor_values(doctor)) if doctor else None
+
+    def get_all_specializations(self) -> List[str]:
+        with self.session_scope() as session:
+            return list(session.scalars(_specializations_query()))
+
+    # --- Patient Methods ---
+    def search_patients(self, query: str, lazy: bool = False,
+                        limit: int = PATIENT_SEARCH_LIMIT) -> List[Patient]:
+        with self.session_scope() as session:
+            rows = session.execute(_patient_search_query(query, limit)).all()
+        return _materialize(rows, PATIENT_FIELDS, make_patient, lazy)
+
+    def find_patient_by_phone(self, phone: str) -> Optional[Patient]:
+        with self.session_scope() as session:
+            row = session.execute(select(*_PATIENT_COLUMNS)
+                                  .where(ORM.Patient.phone == str(phone).strip())).first()
+        return make_patient(*row) if row else None
+
+    def get_patient_by_id(self, patient_id: int) -> Optional[Patient]:
+        with self.session_scope() as session:
+            row = session.execute(select(*_PATIENT_COLUMNS)
+                                  .where(ORM.Patient.patient_id == patient_id)).first()
+        return make_patient(*row) if row else None
+
+    def create_patient(self, patient_data: Dict) -> Patient:
+        with self.session_scope() as session:
+            patient = _new_patient(self._assign_id(session, 'patients', patient_data.get('patient_id')),
+                                   patient_data)
+            session.add(patient)
+            session.flush()
+            return make_patient(*(getattr(patient, field) for field in PATIENT_FIELDS))
+
+    def update_patient(self, patient_id: int, update_data: Dict) -> bool:
+        with self.session_scope() as session:
+            patient = session.get(ORM.Patient, patient_id)
+            if patient is None:
+                return False
+            _apply_patient_update(patient, update_data)
+            return True
+
+    # --- Appointment Methods ---
+    def create_appointment(self, appointment_data: Dict) -> Appointment:
+        """Insert an appointment; raises SlotUnavailableError if it overlaps an active booking"""
+        values = _new_appointment_values(appointment_data)
+        target = _slot_target(None, values)
+        with self.session_scope() as session:
+            if target is not None:
+                session.execute(_doctor_lock_query(target['doctor_id']))
+                if _overlaps(session.execute(_overlap_query(target)).all(), target):
+                    raise _slot_unavailable(appointment_data)
+            appointment = ORM.Appointment(
+                appointment_id=self._assign_id(session, 'appointments', appointment_data.get('appointment_id')),
+                **values)
+            try:
+                # Savepoint, so a lost race leaves the rest of the tool call's transaction usable
+                with session.begin_nested():
+                    session.add(appointment)
+            except IntegrityError as e:
+                raise _slot_unavailable(appointment_data) from e
+            row = session.execute(_appointment_query()
+                                  .where(ORM.Appointment.appointment_id == appointment.appointment_id)).one()
+        return _make_appointment(*row)
+
+    def get_appointments_by_doctor_date(self, doctor_id: int, appointment_date: str,
+                                        lazy: bool = False) -> List[Appointment]:
+        with self.session_scope() as session:
+            rows = session.execute(_doctor_date_query(doctor_id, appointment_date)).all()
+        return _materialize(rows, APPOINTMENT_FIELDS, _make_appointment, lazy)
+
+    def get_booked_slots_bulk(self, doctor_ids: Iterable[int],
+                              appointment_dates: Iterable[str]) -> Dict[DoctorDay, List[Appointment]]:
+        """Active appointments of each (doctor_id, date) in doctor_ids x appointment_dates, in one query"""
+        doctor_ids, dates, query = _bulk_query(doctor_ids, appointment_dates)
+        if query is None:
+            return {}
+        with self.session_scope() as session:
+            rows = session.execute(query).all()
+        return group_by_doctor_date(_materialize(rows, APPOINTMENT_FIELDS, _make_appointment), doctor_ids, dates)
+
+    def get_appointments_by_patient(self, patient_id: int) -> List[Appointment]:
+        """A patient's booked (not cancelled) appointments, oldest first"""
+        with self.session_scope() as session:
+            rows = session.execute(_patient_query(patient_id)).all()
+        return _materialize(rows, APPOINTMENT_FIELDS, _make_appointment)
+
+    def get_appointment_by_id(self, appointment_id: int) -> Optional[Appointment]:
+        with self.session_scope() as session:
+            row = session.execute(_appointment_query()
+                                  .where(ORM.Appointment.appointment_id == appointment_id)).first()
+        return _make_appointment(*row) if row else None
+
+    def update_appointment(self, appointment_id: int, update_data: Dict) -> bool:
+        """Update an appointment; moving it onto a booked slot raises SlotUnavailableError"""
+        values = _appointment_values(update_data)
+        with self.session_scope() as session:
+            appointment = session.get(ORM.Appointment, appointment_id)
+            if appointment is None:
+                return False
+            target = _slot_target(appointment, values)
+            if target is not None:
+                session.execute(_doctor_lock_query(target['doctor_id']))
+                if _overlaps(session.execute(_overlap_query(target)).all(), target, exclude_id=appointment_id):
+                    raise _slot_unavailable(update_data)
+            try:
+                with session.begin_nested():
+                    for column, value in values.items():
+                        setattr(appointment, column, value)
+            except IntegrityError as e:
+                session.refresh(appointment)
+                raise _slot_unavailable(update_data) from e
+            return True
+
+    # --- Analytics ---
+    def get_booking_analytics(self, days: int = 30) -> Dict:
+        """Booking counts over the last `days` days, aggregated in SQL on idx_appointment_date_status"""
+        with self.session_scope() as session:
+            rows = {name: session.execute(query).all() for name, query in _analytics_queries(days).items()}
+        return _analytics_from_rows(days, rows)
+
+
+class AsyncSQLAlchemyManager:
+    """SQLAlchemyManager on an AsyncEngine, for the voice-agent tools.
+
+    Same tables, statements and slot rules, but every method is a coroutine
+    running on asyncpg (or aiosqlite for the SQLite stand-in), so a tool call
+    awaits the database instead of blocking the LiveKit event loop. Sessions
+    are keyed by the same context variable, which asyncio copies per task, so
+    concurrent calls never share one. Tables are created on first use.
+    """
+
+    def __init__(self, database_url: str, create_tables: bool = True, **engine_options):
+        database_url = async_database_url(database_url)
+        self.engine = create_async_engine(database_url, **_engine_options(database_url, engine_options))
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine.sync_engine, 'connect', _sqlite_connect)
+            event.listen(self.engine.sync_engine, 'begin', _sqlite_begin)
+        self.Session = async_scoped_session(async_sessionmaker(bind=self.engine, expire_on_commit=False),
+                                            scopefunc=_current_scope.get)
+        self._create_tables = create_tables
+        self._tables_ready = not create_tables
+        self._tables_lock = asyncio.Lock()
+        self._reserved: Dict[str, int] = {}
+        self._reserve_lock = asyncio.Lock()
+        logger.info(f"Async SQLAlchemy storage ready on {self.engine.url.render_as_string(hide_password=True)}")
+
+    async def _ensure_tables(self):
+        if self._tables_ready:
+            return
+        async with self._tables_lock:
+            if not self._tables_ready:
+                async with self.engine.begin() as connection:
+                    await connection.run_sync(Base.metadata.create_all)
+                self._tables_ready = True
+
+    # --- Sessions ---
+    @asynccontextmanager
+    async def session_scope(self):
+        """Session for one unit of work, e.g. a tool call; nested scopes reuse the outer session"""
+        if _current_scope.get() is not None:
+            yield self.Session()
+            return
+        await self._ensure_tables()
+        token = _current_scope.set(object())
+        try:
+            session = self.Session()
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+        finally:
+            await self.Session.remove()
+            _current_scope.reset(token)
+
+    async def close(self):
+        await self.engine.dispose()
+
+    # --- Id allocation ---
+    async def reserve_ids(self, table: str, count: int) -> range:
+        """Reserve a block of ids for a bulk import; pass them back in the create_* payloads"""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        model = MODELS[table]
+        id_column = model.__mapper__.primary_key[0]
+        async with self.session_scope() as session:
+            if self.engine.dialect.name == 'postgresql':
+                await session.execute(select(func.pg_advisory_xact_lock(zlib.crc32(table.encode()))))
+                sequence = func.pg_get_serial_sequence(model.__tablename__, id_column.name)
+                first = await session.scalar(select(func.nextval(sequence)))
+                await session.execute(select(func.setval(sequence, first + count - 1)))
+                return range(first, first + count)
+            async with self._reserve_lock:
+                current = await session.scalar(select(func.coalesce(func.max(id_column), 0)))
+                first = max(current, self._reserved.get(table, 0)) + 1
+                self._reserved[table] = first + count - 1
+                return range(first, first + count)
+
+    async def _assign_id(self, session, table: str, requested_id) -> Optional[int]:
+        if requested_id is not None:
+            return int(requested_id)
+        if table not in self._reserved:
+            return None
+        async with self._reserve_lock:
+            id_column = MODELS[table].__mapper__.primary_key[0]
+            current = await session.scalar(select(func.coalesce(func.max(id_column), 0)))
+            self._reserved[table] = max(current, self._reserved[table]) + 1
+            return self._reserved[table]
+
+    # --- Doctor Methods ---
+    async def create_doctor(self, doctor_data: Dict) -> Optional[Doctor]:
+        name = doctor_data.get('name')
+        async with self.session_scope() as session:
+            if (await session.execute(select(ORM.Doctor.doctor_id).where(ORM.Doctor.name == name))).first():
+                logger.warning(f"Doctor '{name}' already exists. Skipping.")
+                return None
+            doctor = _new_doctor(await self._assign_id(session, 'doctors', doctor_data.get('doctor_id')),
+                                 doctor_data)
+            names = _specialization_names(doctor_data)
+            existing = {spec.name: spec for spec in await session.scalars(
+                select(ORM.Specialization).where(ORM.Specialization.name.in_(names)))}
+            doctor.specializations = [existing.get(spec) or ORM.Specialization(name=spec) for spec in names]
+            session.add(doctor)
+            await session.flush()
+            logger.info(f"Successfully seeded doctor to the database: {name} (ID: {doctor.doctor_id})")
+            return make_doctor(*_doctor_values(doctor))
+
+    async def get_doctors_by_specialization(self, specialization: str, lazy: bool = False) -> List[Doctor]:
+        async with self.session_scope() as session:
+            names = matching_specializations(specialization, await session.scalars(_specializations_query()))
+            rows = [_doctor_values(doctor)
+                    for doctor in await session.scalars(_doctors_by_specialization_query(names))] if names else []
+        return _materialize(rows, DOCTOR_FIELDS, make_doctor, lazy)
+
+    async def get_doctor_by_id(self, doctor_id: int) -> Optional[Doctor]:
+        async with self.session_scope() as session:
+            doctor = (await session.scalars(_doctor_query().where(ORM.Doctor.doctor_id == doctor_id))).first()
+            return make_doctor(*_doctor_values(doctor)) if doctor else None
+
+    async def get_all_specializations(self) -> List[str]:
+        async with self.session_scope() as session:
+            return list(await session.scalars(_specializations_query()))
+
+    # --- Patient Methods ---
+    async def search_patients(self, query: str, lazy: bool = False,
+                              limit: int = PATIENT_SEARCH_LIMIT) -> List[Patient]:
+        async with self.session_scope() as session:
+            rows = (await session.execute(_patient_search_query(query, limit))).all()
+        return _materialize(rows, PATIENT_FIELDS, make_patient, lazy)
+
+    async def find_patient_by_phone(self, phone: str) -> Optional[Patient]:
+        async with self.session_scope() as session:
+            row = (await session.execute(select(*_PATIENT_COLUMNS)
+                                         .where(ORM.Patient.phone == str(phone).strip()))).first()
+        return make_patient(*row) if row else None
+
+    async def get_patient_by_id(self, patient_id: int) -> Optional[Patient]:
+        async with self.session_scope() as session:
+            row = (await session.execute(select(*_PATIENT_COLUMNS)
+                                         .where(ORM.Patient.patient_id == patient_id))).first()
+        return make_patient(*row) if row else None
+
+    async def create_patient(self, patient_data: Dict) -> Patient:
+        async with self.session_scope() as session:
+            patient = _new_patient(await self._assign_id(session, 'patients', patient_data.get('patient_id')),
+                                   patient_data)
+            session.add(patient)
+            await session.flush()
+            return make_patient(*(getattr(patient, field) for field in PATIENT_FIELDS))
+
+    async def update_patient(self, patient_id: int, update_data: Dict) -> bool:
+        async with self.session_scope() as session:
+            patient = await session.get(ORM.Patient, patient_id)
+            if patient is None:
+                return False
+            _apply_patient_update(patient, update_data)
+            return True
+
+    # --- Appointment Methods ---
+    async def create_appointment(self, appointment_data: Dict) -> Appointment:
+        """Insert an appointment; raises SlotUnavailableError if it overlaps an active booking"""
+        values = _new_appointment_values(appointment_data)
+        target = _slot_target(None, values)
+        async with self.session_scope() as session:
+            if target is not None:
+                await session.execute(_doctor_lock_query(target['doctor_id']))
+                if _overlaps((await session.execute(_overlap_query(target))).all(), target):
+                    raise _slot_unavailable(appointment_data)
+            appointment = ORM.Appointment(
+                appointment_id=await self._assign_id(session, 'appointments', appointment_data.get('appointment_id')),
+                **values)
+            try:
+                async with session.begin_nested():
+                    session.add(appointment)
+            except IntegrityError as e:
+                raise _slot_unavailable(appointment_data) from e
+            row = (await session.execute(_appointment_query()
+                                         .where(ORM.Appointment.appointment_id == appointment.appointment_id))).one()
+        return _make_appointment(*row)
+
+    async def get_appointments_by_doctor_date(self, doctor_id: int, appointment_date: str,
+                                              lazy: bool = False) -> List[Appointment]:
+        async with self.session_scope() as session:
+            rows = (await session.execute(_doctor_date_query(doctor_id, appointment_date))).all()
+        return _materialize(rows, APPOINTMENT_FIELDS, _make_appointment, lazy)
+
+    async def get_booked_slots_bulk(self, doctor_ids: Iterable[int],
+                                    appointment_dates: Iterable[str]) -> Dict[DoctorDay, List[Appointment]]:
+        doctor_ids, dates, query = _bulk_query(doctor_ids, appointment_dates)
+        if query is None:
+            return {}
+        async with self.session_scope() as session:
+            rows = (await session.execute(query)).all()
+        return group_by_doctor_date(_materialize(rows, APPOINTMENT_FIELDS, _make_appointment), doctor_ids, dates)
+
+    async def get_appointments_by_patient(self, patient_id: int) -> List[Appointment]:
+        async with self.session_scope() as session:
+            rows = (await session.execute(_patient_query(patient_id))).all()
+        return _materialize(rows, APPOINTMENT_FIELDS, _make_appointment)
+
+    async def get_appointment_by_id(self, appointment_id: int) -> Optional[Appointment]:
+        async with self.session_scope() as session:
+            row = (await session.execute(_appointment_query()
+                                         .where(ORM.Appointment.appointment_id == appointment_id))).first()
+        return _make_appointment(*row) if row else None
+
+    async def update_appointment(self, appointment_id: int, update_data: Dict) -> bool:
+        """Update an appointment; moving it onto a booked slot raises SlotUnavailableError"""
+        values = _appointment_values(update_data)
+        async with self.session_scope() as session:
+            appointment = await session.get(ORM.Appointment, appointment_id)
+            if appointment is None:
+                return False
+            target = _slot_target(appointment, values)
+            if target is not None:
+                await session.execute(_doctor_lock_query(target['doctor_id']))
+                if _overlaps((await session.execute(_overlap_query(target))).all(), target,
+                             exclude_id=appointment_id):
+                    raise _slot_unavailable(update_data)
+            try:
+                async with session.begin_nested():
+                    for column, value in values.items():
+                        setattr(appointment, column, value)
+            except IntegrityError as e:
+                await session.refresh(appointment)
+                raise _slot_unavailable(update_data) from e
+            return True
+
+    # --- Analytics ---
+    async def get_booking_analytics(self, days: int = 30) -> Dict:
+        async with self.session_scope() as session:
+            rows = {name: (await session.execute(query)).all() for name, query in _analytics_queries(days).items()}
+        return _analytics_from_rows(days, rows)
+
+
+def manager_from_settings() -> SQLAlchemyManager:
+    """SQLAlchemyManager on settings.DATABASE_URL (not created at import, unlike csv_manager)"""
+    from config import settings
+    return SQLAlchemyManager(settings.DATABASE_URL)
+
+
+def async_manager_from_settings() -> AsyncSQLAlchemyManager:
+    """AsyncSQLAlchemyManager on settings.ASYNC_DATABASE_URL, or the asyncio form of DATABASE_URL"""
+    from config import settings
+    return AsyncSQLAlchemyManager(settings.ASYNC_DATABASE_URL or settings.DATABASE_URL)
@@ -0,0 +1,447 @@
+# utils/sqlite_manager.py
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Iterable, Any
+
+from utils.logger import logger
+from utils.exceptions import SlotUnavailableError
+from utils.interval_index import IntervalIndex, appointment_span
+from utils.result_view import ResultView
+from utils.specialization_index import matching_specializations
+from utils.storage_models import (
+    ACTIVE_STATUSES, BOOKED_STATUSES, Patient, Doctor, Appointment, booking_analytics,
+    DOCTOR_FIELDS, PATIENT_FIELDS, APPOINTMENT_FIELDS, make_doctor, make_patient, make_appointment,
+    DoctorDay, group_by_doctor_date, PATIENT_SEARCH_LIMIT,
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS doctors (
+    doctor_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    qualification TEXT,
+    specializations TEXT,
+    working_start TEXT DEFAULT '09:00',
+    working_end TEXT DEFAULT '18:00',
+    working_days TEXT DEFAULT 'Mon,Tue,Wed,Thu,Fri,Sat',
+    is_active INTEGER DEFAULT 1,
+    consultation_fee INTEGER DEFAULT 500,
+    experience_years INTEGER DEFAULT 5
+);
+CREATE TABLE IF NOT EXISTS doctor_specializations (
+    doctor_id INTEGER NOT NULL REFERENCES doctors(doctor_id) ON DELETE CASCADE,
+    specialization TEXT NOT NULL,
+    PRIMARY KEY (doctor_id, specialization)
+);
+CREATE INDEX IF NOT EXISTS idx_specialization_name ON doctor_specializations(specialization);
+
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    phone TEXT,
+    age INTEGER,
+    location TEXT,
+    first_visit INTEGER DEFAULT 1,
+    preferred_language TEXT DEFAULT 'en'
+);
+CREATE INDEX IF NOT EXISTS idx_patient_phone ON patients(phone);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    appointment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id INTEGER,
+    doctor_id INTEGER,
+    patient_name TEXT,
+    doctor_name TEXT,
+    appointment_date TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    status TEXT DEFAULT 'scheduled'
+);
+CREATE INDEX IF NOT EXISTS idx_appointment_doctor_date ON appointments(doctor_id, appointment_date);
+CREATE INDEX IF NOT EXISTS idx_appointment_date_status ON appointments(appointment_date, status);
+CREATE INDEX IF NOT EXISTS idx_appointment_patient_date ON appointments(patient_id, appointment_date);
+-- Same slot rule as ORM.Appointment.unique_slot, limited to active bookings so a
+-- cancelled slot can be booked again
+CREATE UNIQUE INDEX IF NOT EXISTS unique_slot ON appointments(doctor_id, appointment_date, start_time)
+    WHERE status IN {ACTIVE_STATUSES!r};
+"""
+
+# Columns callers may write through create_*/update_*
+WRITABLE_COLUMNS = {
+    'doctors': set(DOCTOR_FIELDS) | {'is_active'},
+    'patients': set(PATIENT_FIELDS),
+    'appointments': set(APPOINTMENT_FIELDS),
+}
+ID_COLUMNS = {'doctors': 'doctor_id', 'patients': 'patient_id', 'appointments': 'appointment_id'}
+
+
+class SQLiteManager:
+    """Storage backend on an embedded SQLite database in WAL mode.
+
+    Exposes the same methods as CSVManager, so the scheduler can use it via
+    `self.sheets = sqlite_manager`. Each thread gets its own connection; WAL
+    lets readers proceed while a write transaction is open, and the partial
+    unique index on (doctor_id, appointment_date, start_time) makes a double
+    booking fail inside the database rather than in application code.
+    """
+
+    def __init__(self, db_path: str = 'data/apollo.db', synchronous: str = 'NORMAL', busy_timeout: float = 5.0):
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self.busy_timeout = busy_timeout
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+        logger.info(f"SQLite storage ready at {db_path}")
+
+    # --- Connections ---
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        return self._connection().execute(sql, tuple(params)).fetchall()
+
+    @staticmethod
+    def _materialize(rows, fields, factory, lazy=False):
+        """Build results column-wise; lazy=True returns a ResultView that creates objects on access"""
+        columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in fields]
+        view = ResultView(fields, columns, factory)
+        return view if lazy else view.to_list()
+
+    @staticmethod
+    def _writable(table: str, data: Dict) -> Dict:
+        ignored = set(data) - WRITABLE_COLUMNS[table]
+        if ignored:
+            logger.debug(f"Ignoring unknown {table} columns: {sorted(ignored)}")
+        return {column: value for column, value in data.items() if column in WRITABLE_COLUMNS[table]}
+
+    @staticmethod
+    def _has_overlap(conn: sqlite3.Connection, doctor_id, appointment_date, start_time, end_time,
+                     exclude_id=None) -> bool:
+        """Check for an active booking overlapping [start_time, end_time); run it inside BEGIN IMMEDIATE
+        so no other writer can book the doctor between the check and the write"""
+        if not start_time:
+            return False
+        statuses = ', '.join('?' * len(ACTIVE_STATUSES))
+        try:
+            start, end = appointment_span(start_time, end_time)
+        except ValueError:
+            # Not an HH:MM time, so only a booking with the same start can clash (as in CSVManager)
+            return conn.execute(
+                f"SELECT 1 FROM appointments WHERE doctor_id = ? AND appointment_date = ? AND start_time = ? "
+                f"AND status IN ({statuses}) AND appointment_id IS NOT ?",
+                (doctor_id, str(appointment_date), start_time, *ACTIVE_STATUSES, exclude_id)).fetchone() is not None
+        rows = conn.execute(
+            f"SELECT appointment_id, start_time, end_time FROM appointments "
+            f"WHERE doctor_id = ? AND appointment_date = ? AND status IN ({statuses}) "
+            f"AND start_time < ?",
+            (doctor_id, str(appointment_date), *ACTIVE_STATUSES, f"{end // 60:02d}:{end % 60:02d}")).fetchall()
+        booked = IntervalIndex.from_rows((row['start_time'], row['end_time'], row['appointment_id']) for row in rows)
+        return booked.overlaps(start, end, exclude=exclude_id)
+
+    # --- Id allocation ---
+    def reserve_ids(self, table: str, count: int) -> range:
+        """Reserve a block of ids for a bulk import; pass them back in the create_* payloads"""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        id_column = ID_COLUMNS[table]
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+            current = max(row['seq'] if row else 0,
+                          conn.execute(f"SELECT COALESCE(MAX({id_column}), 0) FROM {table}").fetchone()[0])
+            if row:
+                conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (current + count, table))
+            else:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, current + count))
+        return range(current + 1, current + count + 1)
+
+    def advance_sequence(self, table: str, last_id: int):
+        """Make sure new rows get ids above last_id (keeps ids the CSV store handed out unused)"""
+        conn = self._connection()
+        with conn:
+            updated = conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                                   (last_id, table)).rowcount
+            if not updated:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, last_id))
+
+    # --- Doctor Methods ---
+    def create_doctor(self, doctor_data: Dict) -> Optional[Doctor]:
+        name = doctor_data.get('name')
+        record = {
+            'doctor_id': doctor_data.get('doctor_id'), 'name': name,
+            'qualification': doctor_data.get('qualification', ''),
+            'specializations': doctor_data.get('specializations', ''),
+            'working_start': '09:00', 'working_end': '18:00',
+            'working_days': 'Mon,Tue,Wed,Thu,Fri,Sat',
+            'is_active': True, 'consultation_fee': 500, 'experience_years': 5
+        }
+        conn = self._connection()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    f"INSERT INTO doctors ({', '.join(record)}) VALUES ({', '.join('?' * len(record))})",
+                    tuple(record.values()))
+                record['doctor_id'] = cursor.lastrowid
+                self._index_specializations(conn, record['doctor_id'], record['specializations'])
+        except sqlite3.IntegrityError:
+            logger.warning(f"Doctor '{name}' already exists. Skipping.")
+            return None
+        logger.info(f"Successfully seeded doctor to SQLite: {name} (ID: {record['doctor_id']})")
+        return make_doctor(*(record[field] for field in DOCTOR_FIELDS))
+
+    @staticmethod
+    def _index_specializations(conn, doctor_id, specializations):
+        conn.execute("DELETE FROM doctor_specializations WHERE doctor_id = ?", (doctor_id,))
+        names = {spec.strip() for spec in (specializations or '').split(',') if spec.strip()}
+        conn.executemany("INSERT INTO doctor_specializations (doctor_id, specialization) VALUES (?, ?)",
+                         [(doctor_id, name) for name in names])
+
+    def get_doctors_by_specialization(self, specialization: str, lazy: bool = False) -> List[Doctor]:
+        """Doctors with the specialization, or with one containing each word of it (see SpecializationIndex)"""
+        names = matching_specializations(specialization, self.get_all_specializations())
+        rows = self._query(
+            f"SELECT {', '.join(DOCTOR_FIELDS)} FROM doctors WHERE doctor_id IN "
+            f"(SELECT doctor_id FROM doctor_specializations WHERE specialization IN ({', '.join('?' * len(names))})) "
+            f"ORDER BY doctor_id", tuple(names)) if names else []
+        return self._materialize(rows, DOCTOR_FIELDS, make_doctor, lazy)
+
+    def get_doctor_by_id(self, doctor_id: int) -> Optional[Doctor]:
+        rows = self._query(f"SELECT {', '.join(DOCTOR_FIELDS)} FROM doctors WHERE doctor_id = ?", (doctor_id,))
+        return make_doctor(*rows[0]) if rows else None
+
+    def get_all_specializations(self) -> List[str]:
+        return [row[0] for row in self._query(
+            "SELECT DISTINCT specialization FROM doctor_specializations ORDER BY specialization")]
+
+    # --- Patient Methods ---
+    def search_patients(self, query: str, lazy: bool = False,
+                        limit: int = PATIENT_SEARCH_LIMIT) -> List[Patient]:
+        # Search by name or phone number
+        rows = self._query(
+            f"SELECT {', '.join(PATIENT_FIELDS)} FROM patients "
+            f"WHERE name LIKE ? OR phone LIKE ? ORDER BY patient_id LIMIT ?",
+            (f"%{query}%", f"%{query}%", limit))
+        return self._materialize(rows, PATIENT_FIELDS, make_patient, lazy)
+
+    def find_patient_by_phone(self, phone: str) -> Optional[Patient]:
+        rows = self._query(
+            f"SELECT {', '.join(PATIENT_FIELDS)} FROM patients WHERE phone = ? ORDER BY patient_id LIMIT 1",
+            (str(phone).strip(),))
+        return make_patient(*rows[0]) if rows else None
+
+    def get_patient_by_id(self, patient_id: int) -> Optional[Patient]:
+        rows = self._query(f"SELECT {', '.join(PATIENT_FIELDS)} FROM patients WHERE patient_id = ?", (patient_id,))
+        return make_patient(*rows[0]) if rows else None
+
+    def create_patient(self, patient_data: Dict) -> Patient:
+        record = {
+            'patient_id': patient_data.get('patient_id'), 'name': patient_data.get('name'),
+            'phone': patient_data.get('phone'), 'age': patient_data.get('age'),
+            'location': patient_data.get('location'), 'first_visit': True,
+            'preferred_language': patient_data.get('preferred_language', 'en')
+        }
+        if record['phone'] is not None:
+            record['phone'] = str(record['phone']).strip()
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                f"INSERT INTO patients ({', '.join(record)}) VALUES ({', '.join('?' * len(record))})",
+                tuple(record.values()))
+        record['patient_id'] = cursor.lastrowid
+        return make_patient(*(record[field] for field in PATIENT_FIELDS))
+
+    def update_patient(self, patient_id: int, update_data: Dict) -> bool:
+        values = self._writable('patients', update_data)
+        values.pop('patient_id', None)
+        if not values:
+            return self.get_patient_by_id(patient_id) is not None
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE patients SET {', '.join(f'{column} = ?' for column in values)} WHERE patient_id = ?",
+                (*values.values(), patient_id))
+        return cursor.rowcount > 0
+
+    # --- Appointment Methods ---
+    def create_appointment(self, appointment_data: Dict) -> Appointment:
+        """Insert an appointment; raises SlotUnavailableError if it overlaps an active booking"""
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                if self._has_overlap(conn, appointment_data.get('doctor_id'), appointment_data.get('appointment_date'),
+                                     appointment_data.get('start_time'), appointment_data.get('end_time')):
+                    raise SlotUnavailableError(f"The slot {appointment_data.get('start_time')} on "
+                                               f"{appointment_data.get('appointment_date')} is already booked")
+                names = conn.execute(
+                    "SELECT (SELECT name FROM patients WHERE patient_id = ?), "
+                    "(SELECT name FROM doctors WHERE doctor_id = ?)",
+                    (appointment_data.get('patient_id'), appointment_data.get('doctor_id'))).fetchone()
+                record = {
+                    'appointment_id': appointment_data.get('appointment_id'),
+                    'patient_id': appointment_data.get('patient_id'),
+                    'doctor_id': appointment_data.get('doctor_id'),
+                    'patient_name': names[0] or 'N/A',
+                    'doctor_name': names[1] or 'N/A',
+                    'appointment_date': appointment_data.get('appointment_date'),
+                    'start_time': appointment_data.get('start_time'),
+                    'end_time': appointment_data.get('end_time'),
+                    'status': 'scheduled'
+                }
+                cursor = conn.execute(
+                    f"INSERT INTO appointments ({', '.join(record)}) VALUES ({', '.join('?' * len(record))})",
+                    tuple(record.values()))
+        except sqlite3.IntegrityError as e:
+            if record.get('appointment_id') is not None and 'appointment_id' in str(e):
+                raise ValueError(f"appointments id {record['appointment_id']} already exists") from e
+            raise SlotUnavailableError(
+                f"The slot {record['start_time']} on {record['appointment_date']} is already booked") from e
+        record['appointment_id'] = cursor.lastrowid
+        return make_appointment(*(record[field] for field in APPOINTMENT_FIELDS))
+
+    def get_appointments_by_doctor_date(self, doctor_id: int, appointment_date: str,
+                                        lazy: bool = False) -> List[Appointment]:
+        rows = self._query(
+            f"SELECT {', '.join(APPOINTMENT_FIELDS)} FROM appointments "
+            f"WHERE doctor_id = ? AND appointment_date = ? AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))}) "
+            f"ORDER BY appointment_id",
+            (doctor_id, str(appointment_date), *ACTIVE_STATUSES))
+        return self._materialize(rows, APPOINTMENT_FIELDS, make_appointment, lazy)
+
+    def get_booked_slots_bulk(self, doctor_ids: Iterable[int],
+                              appointment_dates: Iterable[str]) -> Dict[DoctorDay, List[Appointment]]:
+        """Active appointments of each (doctor_id, date) in doctor_ids x appointment_dates, in one query"""
+        doctor_ids = list(dict.fromkeys(int(doctor_id) for doctor_id in doctor_ids))
+        dates = sorted({str(appointment_date) for appointment_date in appointment_dates})
+        if not doctor_ids or not dates:
+            return {}
+        # Rows of days between the requested ones are dropped by the grouping
+        rows = self._query(
+            f"SELECT {', '.join(APPOINTMENT_FIELDS)} FROM appointments "
+            f"WHERE doctor_id IN ({', '.join('?' * len(doctor_ids))}) AND appointment_date BETWEEN ? AND ? "
+            f"AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))}) ORDER BY appointment_id",
+            (*doctor_ids, dates[0], dates[-1], *ACTIVE_STATUSES))
+        return group_by_doctor_date(self._materialize(rows, APPOINTMENT_FIELDS, make_appointment),
+                                    doctor_ids, dates)
+
+    def get_appointments_by_patient(self, patient_id: int) -> List[Appointment]:
+        """A patient's booked (not cancelled) appointments, oldest first"""
+        rows = self._query(
+            f"SELECT {', '.join(APPOINTMENT_FIELDS)} FROM appointments "
+            f"WHERE patient_id = ? AND status IN ({', '.join('?' * len(BOOKED_STATUSES))}) "
+            f"ORDER BY appointment_date, start_time, appointment_id",
+            (patient_id, *BOOKED_STATUSES))
+        return self._materialize(rows, APPOINTMENT_FIELDS, make_appointment)
+
+    def get_appointment_by_id(self, appointment_id: int) -> Optional[Appointment]:
+        rows = self._query(
+            f"SELECT {', '.join(APPOINTMENT_FIELDS)} FROM appointments WHERE appointment_id = ?", (appointment_id,))
+        return make_appointment(*rows[0]) if rows else None
+
+    def update_appointment(self, appointment_id: int, update_data: Dict) -> bool:
+        """Update an appointment; moving it onto a booked slot raises SlotUnavailableError"""
+        values = self._writable('appointments', update_data)
+        values.pop('appointment_id', None)
+        if not values:
+            return self.get_appointment_by_id(appointment_id) is not None
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                if values.keys() & {'doctor_id', 'appointment_date', 'start_time', 'end_time', 'status'}:
+                    current = conn.execute(
+                        "SELECT doctor_id, appointment_date, start_time, end_time, status FROM appointments "
+                        "WHERE appointment_id = ?", (appointment_id,)).fetchone()
+                    target = {**dict(current), **values} if current else None
+                    if target and target['status'] in ACTIVE_STATUSES and self._has_overlap(
+                            conn, target['doctor_id'], target['appointment_date'], target['start_time'],
+                            target['end_time'], exclude_id=appointment_id):
+                        raise SlotUnavailableError(f"The slot {target['start_time']} on "
+                                                   f"{target['appointment_date']} is already booked")
+                cursor = conn.execute(
+                    f"UPDATE appointments SET {', '.join(f'{column} = ?' for column in values)} "
+                    f"WHERE appointment_id = ?",
+                    (*values.values(), appointment_id))
+        except sqlite3.IntegrityError as e:
+            raise SlotUnavailableError(
+                f"The slot {values.get('start_time')} on {values.get('appointment_date')} is already booked") from e
+        return cursor.rowcount > 0
+
+    # --- Analytics ---
+    def get_booking_analytics(self, days: int = 30) -> Dict:
+        """Booking counts over the last `days` days, aggregated in SQL on idx_appointment_date_status"""
+        end_date = datetime.now().date()
+        window = ((end_date - timedelta(days=days)).isoformat(), end_date.isoformat())
+        booked = f"a.status IN ({', '.join('?' * len(BOOKED_STATUSES))})"
+        in_window = "a.appointment_date BETWEEN ? AND ?"
+        params = (*window, *BOOKED_STATUSES)
+
+        def counts(sql, query_params=params):
+            return {key: count for key, count in self._query(sql, query_params) if key is not None}
+
+        daily = counts(f"SELECT a.appointment_date, COUNT(*) FROM appointments a "
+                       f"WHERE {in_window} AND {booked} GROUP BY a.appointment_date")
+        doctors = counts(f"SELECT a.doctor_name, COUNT(*) FROM appointments a "
+                         f"WHERE {in_window} AND {booked} GROUP BY a.doctor_name")
+        specializations = counts(f"SELECT s.specialization, COUNT(*) FROM appointments a "
+                                 f"JOIN doctor_specializations s ON s.doctor_id = a.doctor_id "
+                                 f"WHERE {in_window} AND {booked} GROUP BY s.specialization")
+        cancelled = self._query(f"SELECT COUNT(*) FROM appointments a WHERE {in_window} AND a.status = 'cancelled'",
+                                window)[0][0]
+        return booking_analytics(days, sum(daily.values()), cancelled, specializations, doctors, daily)
+
+    # --- Bulk import ---
+    def import_rows(self, table: str, records: List[Dict]) -> int:
+        """Insert rows with their existing ids (migration); rows that clash are skipped. Returns rows inserted."""
+        columns = [column for column in WRITABLE_COLUMNS[table] if any(column in record for record in records)]
+        if not records or not columns:
+            return 0
+        conn = self._connection()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [tuple(record.get(column) for column in columns) for record in records])
+            inserted = conn.total_changes - before
+            if table == 'doctors':
+                for record in records:
+                    self._index_specializations(conn, record['doctor_id'], record.get('specializations'))
+        return inserted
+
+
+def manager_from_settings() -> SQLiteManager:
+    """SQLiteManager at the configured SQLITE_DB_PATH (not created at import, unlike csv_manager)"""
+    try:
+        from config import settings
+        db_path = settings.SQLITE_DB_PATH
+    except Exception as e:
+        logger.warning(f"Settings unavailable, using the default SQLite database path: {e}")
+        db_path = 'data/apollo.db'
+    return SQLiteManager(db_path)
@@ -0,0 +1,223 @@
+# utils/storage_backend.py
+
+import functools
+import threading
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, runtime_checkable
+
+from utils.blocking_executor import BlockingExecutor, blocking_executor
+from utils.logger import logger
+from utils.storage_models import Patient, Doctor, Appointment, DoctorDay, PATIENT_SEARCH_LIMIT
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    """What AppointmentScheduler needs from a storage backend.
+
+    Implemented by CSVManager, SQLiteManager, SQLAlchemyManager and
+    GoogleSheetsManager. Write
+    methods raise SlotUnavailableError when an appointment would take a slot
+    that already has an active booking.
+    get_booked_slots_bulk() answers a doctors x dates grid of active
+    appointments with one read, for callers that would otherwise call
+    get_appointments_by_doctor_date() once per doctor and day.
+    """
+
+    # Doctors
+    def create_doctor(self, doctor_data: Dict) -> Optional[Doctor]: ...
+    def get_doctors_by_specialization(self, specialization: str) -> List[Doctor]: ...
+    def get_doctor_by_id(self, doctor_id: int) -> Optional[Doctor]: ...
+    def get_all_specializations(self) -> List[str]: ...
+
+    # Patients
+    def search_patients(self, query: str, limit: int = PATIENT_SEARCH_LIMIT) -> List[Patient]: ...
+    def find_patient_by_phone(self, phone: str) -> Optional[Patient]: ...
+    def get_patient_by_id(self, patient_id: int) -> Optional[Patient]: ...
+    def create_patient(self, patient_data: Dict) -> Optional[Patient]: ...
+    def update_patient(self, patient_id: int, update_data: Dict) -> bool: ...
+
+    # Appointments
+    def create_appointment(self, appointment_data: Dict) -> Optional[Appointment]: ...
+    def get_appointments_by_doctor_date(self, doctor_id: int, appointment_date: str) -> List[Appointment]: ...
+    def get_booked_slots_bulk(self, doctor_ids: Iterable[int],
+                              appointment_dates: Iterable[str]) -> Dict[DoctorDay, List[Appointment]]: ...
+    def get_appointments_by_patient(self, patient_id: int) -> List[Appointment]: ...
+    def get_appointment_by_id(self, appointment_id: int) -> Optional[Appointment]: ...
+    def update_appointment(self, appointment_id: int, update_data: Dict) -> bool: ...
+
+    # Bulk import and reporting
+    def reserve_ids(self, table: str, count: int) -> range: ...
+    def get_booking_analytics(self, days: int = 30) -> Dict: ...
+    def close(self) -> None: ...
+
+
+@runtime_checkable
+class AsyncStorageBackend(Protocol):
+    """StorageBackend with coroutine methods, for callers on the event loop.
+
+    Implemented natively by AsyncSQLAlchemyManager; any StorageBackend can be
+    wrapped in AsyncBackendAdapter.
+    """
+
+    # Doctors
+    async def create_doctor(self, doctor_data: Dict) -> Optional[Doctor]: ...
+    async def get_doctors_by_specialization(self, specialization: str) -> List[Doctor]: ...
+    async def get_doctor_by_id(self, doctor_id: int) -> Optional[Doctor]: ...
+    async def get_all_specializations(self) -> List[str]: ...
+
+    # Patients
+    async def search_patients(self, query: str, limit: int = PATIENT_SEARCH_LIMIT) -> List[Patient]: ...
+    async def find_patient_by_phone(self, phone: str) -> Optional[Patient]: ...
+    async def get_patient_by_id(self, patient_id: int) -> Optional[Patient]: ...
+    async def create_patient(self, patient_data: Dict) -> Optional[Patient]: ...
+    async def update_patient(self, patient_id: int, update_data: Dict) -> bool: ...
+
+    # Appointments
+    async def create_appointment(self, appointment_data: Dict) -> Optional[Appointment]: ...
+    async def get_appointments_by_doctor_date(self, doctor_id: int, appointment_date: str) -> List[Appointment]: ...
+    async def get_booked_slots_bulk(self, doctor_ids: Iterable[int],
+                                    appointment_dates: Iterable[str]) -> Dict[DoctorDay, List[Appointment]]: ...
+    async def get_appointments_by_patient(self, patient_id: int) -> List[Appointment]: ...
+    async def get_appointment_by_id(self, appointment_id: int) -> Optional[Appointment]: ...
+    async def update_appointment(self, appointment_id: int, update_data: Dict) -> bool: ...
+
+    # Bulk import and reporting
+    async def reserve_ids(self, table: str, count: int) -> range: ...
+    async def get_booking_analytics(self, days: int = 30) -> Dict: ...
+    async def close(self) -> None: ...
+
+
+ASYNC_METHODS = frozenset(name for name in vars(AsyncStorageBackend)
+                          if not name.startswith('_') and callable(getattr(AsyncStorageBackend, name)))
+
+# Methods that change stored data; AsyncBackendAdapter never abandons one that has started
+MUTATING_METHODS = frozenset({'create_doctor', 'create_patient', 'update_patient', 'create_appointment',
+                              'update_appointment', 'reserve_ids'})
+
+
+class AsyncBackendAdapter:
+    """AsyncStorageBackend over a blocking StorageBackend.
+
+    Each protocol method runs the wrapped call on a BlockingExecutor (the
+    shared bounded pool by default), so backends without an asyncio driver
+    (CSV, SQLite, Sheets) keep the event loop free too. When the pool is full
+    or a call overruns its timeout, the awaiting caller gets ServiceBusyError
+    or OperationTimeoutError. Writes (MUTATING_METHODS) only time out while
+    they wait for a worker: one that has started is awaited to the end, so a
+    caller is never told to retry a booking that then commits anyway.
+    """
+
+    def __init__(self, backend: StorageBackend, executor: Optional[BlockingExecutor] = None):
+        self.backend = backend
+        self.executor = executor or blocking_executor
+
+    @asynccontextmanager
+    async def session_scope(self):
+        # Each call runs on its own worker thread, so there is no session to share across calls
+        yield None
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+        if name not in ASYNC_METHODS:
+            return method
+
+        run = self.executor.run_to_completion if name in MUTATING_METHODS else self.executor.run
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await run(method, *args, **kwargs)
+        return call
+
+
+# --- Registry ---
+# A factory called without options returns the backend configured from settings;
+# options (e.g. data_folder, db_path) build a separate instance, as tests and benchmarks do.
+def _csv_backend(**options) -> StorageBackend:
+    from utils import csv_manager
+    return csv_manager.CSVManager(**options) if options else csv_manager.csv_manager
+
+
+def _sqlite_backend(**options) -> StorageBackend:
+    from utils.sqlite_manager import SQLiteManager, manager_from_settings
+    return SQLiteManager(**options) if options else manager_from_settings()
+
+
+def _postgres_backend(**options) -> StorageBackend:
+    from utils.sqlalchemy_manager import SQLAlchemyManager, manager_from_settings
+    return SQLAlchemyManager(**options) if options else manager_from_settings()
+
+
+def _sheets_backend(**options) -> StorageBackend:
+    from utils.google_sheets_manager import sheets_manager
+    return sheets_manager
+
+
+def _async_postgres_backend(**options) -> AsyncStorageBackend:
+    from utils.sqlalchemy_manager import AsyncSQLAlchemyManager, async_manager_from_settings
+    return AsyncSQLAlchemyManager(**options) if options else async_manager_from_settings()
+
+
+BACKENDS: Dict[str, Callable[..., StorageBackend]] = {
+    'csv': _csv_backend,
+    'sqlite': _sqlite_backend,
+    'postgres': _postgres_backend,
+    'sheets': _sheets_backend,
+}
+
+# Backends with a native asyncio driver; the rest are served through AsyncBackendAdapter
+ASYNC_BACKENDS: Dict[str, Callable[..., AsyncStorageBackend]] = {
+    'postgres': _async_postgres_backend,
+}
+
+_default_backend: Optional[StorageBackend] = None
+_default_async_backend: Optional[AsyncStorageBackend] = None
+_default_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[..., StorageBackend]):
+    BACKENDS[name] = factory
+
+
+def create_backend(name: str, **options) -> StorageBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {name!r}; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+
+def create_async_backend(name: str, **options) -> AsyncStorageBackend:
+    if name in ASYNC_BACKENDS:
+        return ASYNC_BACKENDS[name](**options)
+    return AsyncBackendAdapter(create_backend(name, **options))
+
+
+def configured_backend_name() -> str:
+    try:
+        from config import settings
+        return settings.STORAGE_BACKEND
+    except Exception as e:
+        logger.warning(f"Settings unavailable, using the CSV storage backend: {e}")
+        return 'csv'
+
+
+def get_backend() -> StorageBackend:
+    """The shared backend selected by settings.STORAGE_BACKEND, created on first use"""
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            name = configured_backend_name()
+            _default_backend = create_backend(name)
+            logger.info(f"Using the '{name}' storage backend")
+        return _default_backend
+
+
+def get_async_backend() -> AsyncStorageBackend:
+    """Async counterpart of get_backend(): a native asyncio backend if one is registered, else the shared one adapted"""
+    global _default_async_backend
+    name = configured_backend_name()
+    # get_backend() takes _default_lock itself, so resolve it first
+    shared = None if name in ASYNC_BACKENDS else get_backend()
+    with _default_lock:
+        if _default_async_backend is None:
+            _default_async_backend = create_async_backend(name) if shared is None else AsyncBackendAdapter(shared)
+            logger.info(f"Using the '{name}' storage backend for async callers")
+        return _default_async_backend
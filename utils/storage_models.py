@@ -0,0 +1,119 @@
+# utils/storage_models.py
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+
+# Appointment statuses that occupy a slot
+ACTIVE_STATUSES = ('scheduled', 'confirmed')
+# Statuses counted as bookings in analytics
+BOOKED_STATUSES = ('scheduled', 'confirmed', 'completed')
+# Most patients a search returns, on every backend
+PATIENT_SEARCH_LIMIT = 20
+
+
+# --- Data Structures ---
+@dataclass(slots=True)
+class Patient:
+    patient_id: Optional[int] = None
+    name: str = ""
+    phone: str = ""
+    age: Optional[int] = None
+    location: Optional[str] = None
+    first_visit: bool = True
+    preferred_language: str = 'en'
+
+@dataclass(slots=True)
+class Doctor:
+    doctor_id: Optional[int] = None
+    name: str = ""
+    qualification: str = ""
+    specializations: List[str] = None
+    working_start: str = "09:00"
+    working_end: str = "18:00"
+    working_days: List[str] = None
+    consultation_fee: int = 500
+    experience_years: int = 5
+
+@dataclass(slots=True)
+class Appointment:
+    appointment_id: Optional[int] = None
+    patient_id: int = 0
+    doctor_id: int = 0
+    patient_name: str = ""
+    doctor_name: str = ""
+    appointment_date: str = ""
+    start_time: str = ""
+    end_time: str = ""
+    status: str = 'scheduled'
+    patient: Optional[Patient] = None
+    doctor: Optional[Doctor] = None
+
+# --- Row materializers ---
+# Positional factories shared by single-row lookups and column-wise bulk results
+DOCTOR_FIELDS = ('doctor_id', 'name', 'qualification', 'specializations', 'working_start', 'working_end',
+                 'working_days', 'consultation_fee', 'experience_years')
+PATIENT_FIELDS = ('patient_id', 'name', 'phone', 'age', 'location', 'first_visit', 'preferred_language')
+APPOINTMENT_FIELDS = ('appointment_id', 'patient_id', 'doctor_id', 'patient_name', 'doctor_name',
+                      'appointment_date', 'start_time', 'end_time', 'status')
+
+
+def make_doctor(doctor_id, name, qualification, specializations, working_start, working_end,
+                working_days, consultation_fee, experience_years) -> Doctor:
+    return Doctor(doctor_id, name, qualification,
+                  specializations.split(',') if specializations else [],
+                  working_start, working_end,
+                  working_days.split(',') if working_days else [],
+                  consultation_fee, experience_years)
+
+
+def make_patient(*values) -> Patient:
+    return Patient(*values)
+
+
+def make_appointment(*values) -> Appointment:
+    return Appointment(*values)
+
+
+
+# --- Bulk availability ---
+# (doctor_id, 'YYYY-MM-DD') key of get_booked_slots_bulk() results
+DoctorDay = Tuple[int, str]
+
+
+def doctor_day(doctor_id, appointment_date) -> Optional[DoctorDay]:
+    try:
+        return int(doctor_id), str(appointment_date)
+    except (TypeError, ValueError):
+        return None
+
+
+def group_by_doctor_date(appointments: Iterable[Appointment], doctor_ids: Iterable[int],
+                         appointment_dates: Iterable[str]) -> Dict[DoctorDay, List[Appointment]]:
+    """The get_booked_slots_bulk() result every storage backend returns.
+
+    Every requested (doctor_id, date) is a key, mapped to its active
+    appointments ([] when it has none); other appointments are dropped.
+    """
+    dates = [str(appointment_date) for appointment_date in appointment_dates]
+    grouped = {(int(doctor_id), appointment_date): [] for doctor_id in doctor_ids for appointment_date in dates}
+    for appointment in appointments:
+        day = grouped.get(doctor_day(appointment.doctor_id, appointment.appointment_date))
+        if day is not None and appointment.status in ACTIVE_STATUSES:
+            day.append(appointment)
+    return grouped
+
+
+# --- Analytics ---
+def booking_analytics(days: int, total_bookings: int, total_cancelled: int, specialization_counts: Dict[str, int],
+                      doctor_counts: Dict[str, int], daily_counts: Dict[str, int]) -> Dict:
+    """The get_booking_analytics() result every storage backend returns"""
+    considered = total_bookings + total_cancelled
+    return {
+        "total_bookings": total_bookings,
+        "specialization_stats": dict(sorted(specialization_counts.items(), key=lambda x: x[1], reverse=True)[:10]),
+        "top_doctors": dict(sorted(doctor_counts.items(), key=lambda x: x[1], reverse=True)[:10]),
+        "daily_trends": dict(sorted(daily_counts.items())),
+        "cancellation_rate": round(total_cancelled / considered * 100, 2) if considered else 0,
+        "total_cancelled": total_cancelled,
+        "period_days": days
+    }
@@ -0,0 +1,111 @@
+# utils/table_journal.py
+
+import json
+import os
+import threading
+from typing import Dict, Iterator, Any
+
+from utils.logger import logger
+
+
+def _json_default(value):
+    """Convert numpy/pandas scalars to plain Python values for JSON"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class TableJournal:
+    """Append-only log of inserts and updates for one CSV table.
+
+    Each mutation is written as a single JSON line, so a booking costs one
+    small append instead of a full rewrite of the table. The base CSV is
+    brought up to date by compaction: the live journal is rotated aside,
+    the table is written out and the rotated journal is discarded.
+
+    Appends go to a buffered handle. With sync=True a record is flushed and
+    fsynced before append returns; otherwise records accumulate until
+    flush() is called, which lets a background thread group many writes
+    into one fsync.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.rotated_path = f"{file_path}.compacting"
+        self.lock = threading.Lock()
+        self.pending = 0  # records not yet folded into the base file
+        self.unflushed = 0  # records appended but not yet fsynced
+        self._handle = None
+
+    def append(self, op: str, record: Dict[str, Any], sync: bool = False):
+        """Append a single 'insert' or 'update' record"""
+        line = json.dumps({'op': op, 'data': record}, default=_json_default)
+        with self.lock:
+            if self._handle is None:
+                self._handle = open(self.file_path, 'a', encoding='utf-8')
+            self._handle.write(line + '\n')
+            self.pending += 1
+            self.unflushed += 1
+            if sync:
+                self._sync()
+
+    def flush(self):
+        """Write out and fsync any buffered records"""
+        with self.lock:
+            if self._handle is not None and self.unflushed:
+                self._sync()
+
+    def _sync(self):
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self.unflushed = 0
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """Yield records in write order, including a journal left behind by an interrupted compaction"""
+        for path in (self.rotated_path, self.file_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line_no, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write
+                        logger.warning(f"Skipping unreadable journal record {path}:{line_no}")
+                        continue
+                    self.pending += 1
+                    yield entry
+
+    def rotate(self):
+        """Move the live journal aside so it can be folded while new writes continue"""
+        with self.lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+            self.unflushed = 0
+            if not os.path.exists(self.file_path):
+                return
+            if os.path.exists(self.rotated_path):
+                # A previous compaction did not finish; keep its records in order
+                with open(self.rotated_path, 'a', encoding='utf-8') as dst, \
+                        open(self.file_path, encoding='utf-8') as src:
+                    dst.write(src.read())
+                os.remove(self.file_path)
+            else:
+                os.replace(self.file_path, self.rotated_path)
+            self.pending = 0
+
+    def discard_rotated(self):
+        """Drop the rotated journal once its records are in the base file"""
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    def close(self):
+        with self.lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+            self.unflushed = 0
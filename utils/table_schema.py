@@ -0,0 +1,248 @@
+# utils/table_schema.py
+
+import re
+from functools import lru_cache
+from datetime import date, datetime
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+import pandas as pd
+
+_BOOL_VALUES = {'true': True, 'false': False, '1': True, '0': False}
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_TIME_PATTERN = re.compile(r'^(\d{1,2}):(\d{2})$')
+_EPOCH = date(1970, 1, 1)
+
+# Column kinds read from CSV as strings
+TEXT_KINDS = ('text', 'category', 'date', 'time', 'phone')
+
+
+def is_missing(value) -> bool:
+    return value is None or (not isinstance(value, str) and pd.isna(value))
+
+
+def _to_text(value):
+    if is_missing(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _to_bool(value):
+    if is_missing(value):
+        return None
+    return _BOOL_VALUES.get(str(value).strip().lower())
+
+
+# Booking traffic repeats the same few hundred dates and times, so parsing is memoized
+@lru_cache(maxsize=4096)
+def _day_number(text: str) -> int:
+    if not _DATE_PATTERN.match(text):
+        raise ValueError(f"not an ISO date: {text!r}")
+    return (date.fromisoformat(text) - _EPOCH).days
+
+
+@lru_cache(maxsize=4096)
+def _day_text(day: int) -> str:
+    return date.fromordinal(_EPOCH.toordinal() + day).isoformat()
+
+
+@lru_cache(maxsize=2048)
+def _minute_of_day(text: str) -> int:
+    match = _TIME_PATTERN.match(text)
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        raise ValueError(f"not an HH:MM time: {text!r}")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+# --- Compact in-memory encodings ---
+class Encoding:
+    """Maps a column's values to a compact numpy dtype and back.
+
+    encode() raises ValueError for a value it cannot represent exactly; the
+    ColumnStore then falls back to plain object storage for that column.
+    """
+    dtype: Any = object
+    missing: Any = None
+
+    def empty(self, capacity: int) -> np.ndarray:
+        return np.full(capacity, self.missing, dtype=self.dtype)
+
+    def encode(self, value):
+        raise NotImplementedError
+
+    def decode(self, raw):
+        raise NotImplementedError
+
+    def lookup(self, value) -> Optional[Any]:
+        """Encoded form of a query value, or None when no stored value can equal it"""
+        try:
+            return self.encode(value)
+        except ValueError:
+            return None
+
+    def decode_many(self, raw: np.ndarray) -> List[Any]:
+        return [self.decode(value) for value in raw]
+
+    def to_series(self, raw: np.ndarray) -> pd.Series:
+        return pd.Series(self.decode_many(raw), dtype=object)
+
+
+class CategoryEncoding(Encoding):
+    """Small-vocabulary strings (statuses, languages, doctor names) stored as int32 codes"""
+    dtype = np.int32
+    missing = -1
+
+    def __init__(self):
+        self.categories: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def encode(self, value):
+        if is_missing(value):
+            return self.missing
+        value = str(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.categories)
+            self.categories.append(value)
+        return code
+
+    def lookup(self, value):
+        return None if is_missing(value) else self._codes.get(str(value))
+
+    def decode(self, raw):
+        return None if raw < 0 else self.categories[raw]
+
+    def decode_many(self, raw):
+        # Code -1 (missing) indexes the trailing None
+        return np.array(self.categories + [None], dtype=object)[raw].tolist()
+
+    def to_series(self, raw):
+        return pd.Series(pd.Categorical.from_codes(raw.copy(), categories=list(self.categories)))
+
+
+class DateEncoding(Encoding):
+    """ISO dates stored as int32 day numbers since 1970-01-01"""
+    dtype = np.int32
+    missing = np.iinfo(np.int32).min
+
+    def encode(self, value):
+        if is_missing(value):
+            return self.missing
+        if isinstance(value, datetime):
+            if value.time() != datetime.min.time():
+                raise ValueError(f"not a plain date: {value!r}")
+            value = value.date()
+        if isinstance(value, date):
+            return (value - _EPOCH).days
+        if isinstance(value, str):
+            return _day_number(value)
+        raise ValueError(f"not an ISO date: {value!r}")
+
+    def decode(self, raw):
+        return None if raw == self.missing else _day_text(int(raw))
+
+    def to_series(self, raw):
+        days = pd.Series(raw.astype(np.int64))
+        return pd.to_datetime(days.where(raw != self.missing), unit='D')
+
+
+class TimeEncoding(Encoding):
+    """HH:MM times stored as int16 minutes after midnight"""
+    dtype = np.int16
+    missing = -1
+
+    def encode(self, value):
+        if is_missing(value):
+            return self.missing
+        return _minute_of_day(str(value))
+
+    def decode(self, raw):
+        return None if raw < 0 else f"{raw // 60:02d}:{raw % 60:02d}"
+
+
+class FixedStringEncoding(Encoding):
+    """Short strings such as phone numbers in a fixed-width numpy unicode array"""
+    missing = ''
+
+    def __init__(self, width: int = 16):
+        self.width = width
+        self.dtype = f'<U{width}'
+
+    def encode(self, value):
+        text = _to_text(value)
+        if text is None:
+            return self.missing
+        if not text or len(text) > self.width:
+            raise ValueError(f"does not fit {self.dtype}: {value!r}")
+        return text
+
+    def decode(self, raw):
+        return str(raw) or None
+
+    def decode_many(self, raw):
+        return [value or None for value in raw.tolist()]
+
+
+ENCODINGS = {'category': CategoryEncoding, 'date': DateEncoding, 'time': TimeEncoding, 'phone': FixedStringEncoding}
+
+
+class TableSchema:
+    """Column kinds for one table.
+
+    Kinds are 'int', 'float', 'bool' and 'text', plus the compact kinds
+    'category', 'date', 'time' and 'phone' that the ColumnStore keeps
+    encoded in memory. The schema gives explicit dtypes when reading CSVs
+    and typed Arrow columns for the binary snapshot. A column whose values
+    do not convert cleanly is written as text rather than losing data.
+    """
+
+    def __init__(self, kinds: Dict[str, str]):
+        self.kinds = kinds
+
+    @property
+    def columns(self):
+        return list(self.kinds)
+
+    def encodings(self) -> Dict[str, Encoding]:
+        """Fresh encoders for a new store (category vocabularies are per store)"""
+        return {column: ENCODINGS[kind]() for column, kind in self.kinds.items() if kind in ENCODINGS}
+
+    def csv_dtypes(self) -> Dict[str, type]:
+        # Numeric columns are left to inference so one malformed value cannot fail startup
+        return {column: str for column, kind in self.kinds.items() if kind in TEXT_KINDS}
+
+    def coerce(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Typed copy of a frame, suitable for Arrow"""
+        typed = {}
+        for column in df.columns:
+            values = df[column]
+            kind = self.kinds.get(column, 'text')
+            present = values.notna()
+            if kind == 'bool':
+                converted = values.map(_to_bool)
+                if not (converted.isna() & present).any():
+                    typed[column] = converted.astype('boolean')
+                    continue
+            elif kind in ('int', 'float'):
+                converted = pd.to_numeric(values, errors='coerce')
+                if not (converted.isna() & present).any():
+                    whole = (converted.dropna() % 1 == 0).all()
+                    typed[column] = converted.astype('Int64' if kind == 'int' and whole else 'float64')
+                    continue
+            elif kind == 'date' and pd.api.types.is_datetime64_any_dtype(values):
+                typed[column] = values
+                continue
+            text = values.map(_to_text).astype(object)
+            typed[column] = text.astype('category') if kind == 'category' else text
+        return pd.DataFrame(typed, columns=df.columns)
+
+    @staticmethod
+    def restore(df: pd.DataFrame) -> pd.DataFrame:
+        """Plain Python values with None for missing, whichever format the frame came from"""
+        df = df.copy()
+        for column in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column]):
+                df[column] = df[column].dt.strftime('%Y-%m-%d')
+        return df.astype(object).where(df.notna(), None)
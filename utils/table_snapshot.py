@@ -0,0 +1,39 @@
+# utils/table_snapshot.py
+
+import os
+
+import pandas as pd
+
+from utils.logger import logger
+from utils.table_schema import TableSchema
+
+try:
+    import pyarrow  # noqa: F401  (pandas uses it for Feather)
+    FEATHER_AVAILABLE = True
+except ImportError:
+    FEATHER_AVAILABLE = False
+
+
+def snapshot_path(csv_path: str) -> str:
+    return f"{csv_path[:-4] if csv_path.endswith('.csv') else csv_path}.feather"
+
+
+def read_table(csv_path: str, schema: TableSchema, use_snapshot: bool = True) -> pd.DataFrame:
+    """Load a table from its binary snapshot when that is current, else from the CSV"""
+    feather_path = snapshot_path(csv_path)
+    if use_snapshot and FEATHER_AVAILABLE and os.path.exists(feather_path):
+        # The snapshot is written after the CSV, so an older one means the CSV was edited by hand
+        if not os.path.exists(csv_path) or os.path.getmtime(feather_path) >= os.path.getmtime(csv_path):
+            try:
+                return TableSchema.restore(pd.read_feather(feather_path))
+            except Exception as e:
+                logger.warning(f"Unreadable snapshot {feather_path}, falling back to CSV: {e}")
+    return TableSchema.restore(pd.read_csv(csv_path, dtype=schema.csv_dtypes()))
+
+
+def write_snapshot(df: pd.DataFrame, csv_path: str, schema: TableSchema):
+    """Write the Feather snapshot next to a CSV that has just been saved"""
+    feather_path = snapshot_path(csv_path)
+    tmp_path = f"{feather_path}.tmp"
+    schema.coerce(df).reset_index(drop=True).to_feather(tmp_path)
+    os.replace(tmp_path, feather_path)
@@ -0,0 +1,172 @@
+#utils/visit_history.py
+
+import threading
+import time
+from bisect import bisect_left, insort
+from dataclasses import replace
+from datetime import date as date_class
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import logger
+from utils.storage_models import ACTIVE_STATUSES, BOOKED_STATUSES, Appointment
+
+
+def _visit_key(appointment: Appointment) -> Tuple[str, str, int]:
+    try:
+        appointment_id = int(appointment.appointment_id)
+    except (TypeError, ValueError):
+        appointment_id = 0
+    return str(appointment.appointment_date or ''), str(appointment.start_time or ''), appointment_id
+
+
+class PatientVisits:
+    """One patient's booked (not cancelled) appointments in (date, start time) order.
+
+    The split between past visits and upcoming appointments is one bisect on
+    today's date, so "last visit" and "next appointments" do not scan the
+    history.
+    """
+
+    __slots__ = ('_keys', '_appointments', 'loaded_at')
+
+    def __init__(self, appointments: Iterable[Appointment] = (), loaded_at: float = 0.0):
+        ordered = sorted((appointment for appointment in appointments if appointment.status in BOOKED_STATUSES),
+                         key=_visit_key)
+        self._keys = [_visit_key(appointment) for appointment in ordered]
+        self._appointments = ordered
+        self.loaded_at = loaded_at
+
+    def __len__(self) -> int:
+        return len(self._appointments)
+
+    def _index_of(self, appointment_id) -> Optional[int]:
+        return next((i for i, appointment in enumerate(self._appointments)
+                     if str(appointment.appointment_id) == str(appointment_id)), None)
+
+    def add(self, appointment: Appointment):
+        """Insert or move an appointment; a copy is kept, so later edits to the object do not reorder it"""
+        self.remove(appointment.appointment_id)
+        if appointment.status not in BOOKED_STATUSES:
+            return
+        key = _visit_key(appointment)
+        index = bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._appointments.insert(index, replace(appointment))
+
+    def remove(self, appointment_id) -> bool:
+        index = self._index_of(appointment_id)
+        if index is None:
+            return False
+        del self._keys[index], self._appointments[index]
+        return True
+
+    def _first_from(self, on_date: date_class) -> int:
+        return bisect_left(self._keys, (on_date.isoformat(),))
+
+    def last_visit(self, today: Optional[date_class] = None) -> Optional[Appointment]:
+        """The latest appointment before today"""
+        index = self._first_from(today or date_class.today())
+        return self._appointments[index - 1] if index else None
+
+    def upcoming(self, today: Optional[date_class] = None) -> List[Appointment]:
+        """Scheduled or confirmed appointments from today on, soonest first"""
+        return [appointment for appointment in self._appointments[self._first_from(today or date_class.today()):]
+                if appointment.status in ACTIVE_STATUSES]
+
+
+class VisitHistory:
+    """Per-patient visit histories, read from storage once and kept current by the scheduler.
+
+    Works like AvailabilityCalendar: record() and forget() follow each stored
+    booking, reschedule and cancellation, a history is re-read once it is
+    older than `ttl` seconds (other worker processes book too), and a load
+    that overlapped a change to its patient is not cached.
+    """
+
+    def __init__(self, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._patients: Dict[int, PatientVisits] = {}
+        self._versions: Dict[int, int] = {}
+        self._counts = {'hits': 0, 'misses': 0, 'updates': 0}
+
+    @staticmethod
+    def _key(patient_id) -> Optional[int]:
+        try:
+            return int(patient_id)
+        except (TypeError, ValueError):
+            return None
+
+    def _cached(self, key: int) -> Tuple[Optional[PatientVisits], int]:
+        with self._lock:
+            visits = self._patients.get(key)
+            if visits is not None and self._clock() - visits.loaded_at > self.ttl:
+                visits = None
+            self._counts['hits' if visits is not None else 'misses'] += 1
+            return visits, self._versions.get(key, 0)
+
+    def _store(self, key: int, appointments: Iterable[Appointment], version: int) -> PatientVisits:
+        visits = PatientVisits(appointments, self._clock())
+        with self._lock:
+            if self._versions.get(key, 0) == version:
+                self._patients[key] = visits
+        return visits
+
+    def get(self, patient_id, load: Callable[[], Iterable[Appointment]]) -> PatientVisits:
+        """The patient's visits, calling load() for their appointments when not cached"""
+        key = self._key(patient_id)
+        if key is None:
+            return PatientVisits()
+        visits, version = self._cached(key)
+        if visits is None:
+            visits = self._store(key, load(), version)
+        return visits
+
+    async def get_async(self, patient_id, load: Callable[[], Awaitable[Iterable[Appointment]]]) -> PatientVisits:
+        key = self._key(patient_id)
+        if key is None:
+            return PatientVisits()
+        visits, version = self._cached(key)
+        if visits is None:
+            visits = self._store(key, await load(), version)
+        return visits
+
+    def _change(self, patient_id, apply: Callable[[PatientVisits], None]):
+        key = self._key(patient_id)
+        if key is None:
+            return
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            visits = self._patients.get(key)
+            if visits is not None:
+                apply(visits)
+                self._counts['updates'] += 1
+
+    def record(self, appointment: Appointment):
+        """Record a stored booking, or an appointment's new date and time after a reschedule"""
+        self._change(appointment.patient_id, lambda visits: visits.add(appointment))
+
+    def forget(self, appointment: Appointment):
+        """Record a cancellation"""
+        self._change(appointment.patient_id, lambda visits: visits.remove(appointment.appointment_id))
+
+    def invalidate(self, patient_id=None):
+        with self._lock:
+            keys = list(self._patients) if patient_id is None else [self._key(patient_id)]
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._patients.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'patients': len(self._patients), **self._counts}
+
+
+def visit_history_from_settings() -> VisitHistory:
+    try:
+        from config import settings
+    except Exception as e:
+        logger.warning(f"Settings unavailable, using the default visit history TTL: {e}")
+        return VisitHistory()
+    return VisitHistory(ttl=settings.VISIT_HISTORY_TTL)